@@ -5,7 +5,8 @@ from .models import (
     BudgetDocument, ProposalDocument, ProjectDocument, ExpenseDocument, ExtensionRequest,
     PersonalTask, Message, GroupChat, GroupChatMember, GroupChatMessage, Announcement,
     SystemHealth, BackupStatus, MaintenanceSchedule,
-    EquipmentItem, EquipmentCategory, BudgetAllocation, ProjectEquipment, TrancheRelease
+    EquipmentItem, EquipmentCategory, BudgetAllocation, ProjectEquipment, TrancheRelease,
+    ReportJob
 )
 
 # ------------------------
@@ -578,3 +579,10 @@ class MaintenanceScheduleAdmin(admin.ModelAdmin):
             'fields': ('created_at', 'updated_at')
         }),
     )
+
+@admin.register(ReportJob)
+class ReportJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'report_type', 'status', 'requested_by', 'date_created', 'finished_at')
+    list_filter = ('report_type', 'status', 'date_created')
+    search_fields = ('requested_by__username', 'filename', 'error')
+    readonly_fields = ('params_hash', 'date_created', 'started_at', 'finished_at')
@@ -1,23 +1,21 @@
-from .models import Notification
+from django.utils.functional import SimpleLazyObject
+
+from .notification_cache import summary
+
 
 def notifications_context(request):
-    if request.user.is_authenticated:
-        # Get all notifications for the user (for the global notification bell)
-        # Show recent notifications in the dropdown, but count all unread
-        unread_count = Notification.objects.filter(
-            receiver=request.user,
-            status='unread'
-        ).count()
+    """Unread count and latest notifications for the bell
 
-        # Show recent 10 notifications in the dropdown regardless of category
-        notifications = Notification.objects.filter(
-            receiver=request.user
-        ).order_by('-timestamp')[:10]
-    else:
-        unread_count = 0
-        notifications = []
+    Lazy: nothing is loaded until a template reads one of the variables, and
+    then both come from one cached summary.
+    """
+    def load():
+        if request.user.is_authenticated:
+            return summary(request.user.pk)
+        return {'unread_count': 0, 'notifications': []}
 
+    feed = SimpleLazyObject(load)
     return {
-        'unread_notifications_count': unread_count,
-        'notifications_list': notifications
+        'unread_notifications_count': SimpleLazyObject(lambda: feed['unread_count']),
+        'notifications_list': SimpleLazyObject(lambda: feed['notifications']),
     }
@@ -0,0 +1,206 @@
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Prefetch, Sum, prefetch_related_objects
+
+from .models import BudgetAllocation, Project, Proposal
+
+
+# Seconds a budget's allocation ledger stays cached; 0 disables the cache
+LEDGER_CACHE_TIMEOUT = getattr(settings, 'BUDGET_LEDGER_CACHE_TIMEOUT', 300)
+
+BUDGET_STATUSES = (
+    'pending_procurement', 'available', 'partially_allocated', 'fully_allocated', 'completed', 'archived',
+    # Legacy status mappings for existing data
+    'active', 'exhausted',
+)
+
+
+LEDGER_ATTRS = ('ledger_allocations', 'ledger_projects', 'ledger_proposals')
+
+
+def _ledger_key(budget_id):
+    return f'budget_ledger:{budget_id}'
+
+
+# -----------------------------
+# Allocation ledger
+# -----------------------------
+def _ledger_prefetches():
+    """Equipment allocations, projects and unconverted approved proposals, one query each"""
+    return (
+        Prefetch(
+            'allocations',
+            queryset=BudgetAllocation.objects.select_related('equipment_item', 'allocated_by'),
+            to_attr='ledger_allocations',
+        ),
+        Prefetch(
+            'projects',
+            queryset=Project.objects.only(
+                'id', 'budget_id', 'project_title', 'funds', 'mun', 'province',
+                'beneficiary_address', 'status', 'beneficiary',
+            ),
+            to_attr='ledger_projects',
+        ),
+        Prefetch(
+            'proposals',
+            # Only proposals that haven't been converted to projects yet
+            queryset=Proposal.objects.filter(status='approved', project__isnull=True).select_related('beneficiary'),
+            to_attr='ledger_proposals',
+        ),
+    )
+
+
+def _allocation_entries(budget):
+    """Ledger rows for a budget loaded with _ledger_prefetches()"""
+    entries = []
+    for eq_alloc in budget.ledger_allocations:
+        entries.append({
+            'type': 'equipment',
+            'id': eq_alloc.id,
+            'title': f"{eq_alloc.equipment_item.name} ({eq_alloc.allocated_quantity} {eq_alloc.equipment_item.unit})",
+            'amount': float(eq_alloc.allocated_value),
+            'location': 'Equipment Allocation',
+            'status': eq_alloc.status,
+            'beneficiary': eq_alloc.allocated_by.full_name() if eq_alloc.allocated_by else 'System'
+        })
+
+    for project in budget.ledger_projects:
+        entries.append({
+            'type': 'project',
+            'id': project.id,
+            'title': project.project_title,
+            'amount': float(project.funds or 0),
+            'location': f"{project.mun or ''} {project.province or ''}".strip() or project.beneficiary_address or 'N/A',
+            'status': project.status,
+            'beneficiary': project.beneficiary or 'N/A'
+        })
+
+    for proposal in budget.ledger_proposals:
+        entries.append({
+            'type': 'proposal',
+            'id': proposal.id,
+            'title': proposal.title,
+            'amount': float(proposal.approved_amount or 0),
+            'location': f"{proposal.municipality or ''} {proposal.province or ''}".strip() or proposal.location or 'N/A',
+            'status': 'approved',
+            'beneficiary': proposal.beneficiary.full_name() if proposal.beneficiary else 'N/A'
+        })
+    return entries
+
+
+def allocation_ledgers(budgets):
+    """{budget id: ledger rows} for `budgets`, served from the cache where possible
+
+    Budgets missing from the cache are loaded together with three prefetch
+    queries, however many budgets there are.
+    """
+    budgets = list(budgets)
+    ledgers = {}
+    if LEDGER_CACHE_TIMEOUT:
+        cached = cache.get_many([_ledger_key(budget.id) for budget in budgets])
+        ledgers = {budget.id: cached[_ledger_key(budget.id)] for budget in budgets if _ledger_key(budget.id) in cached}
+
+    missing = [budget for budget in budgets if budget.id not in ledgers]
+    if missing:
+        for budget in missing:
+            # Drop rows prefetched by an earlier call so stale ledgers aren't rebuilt from them
+            for attr in LEDGER_ATTRS:
+                budget.__dict__.pop(attr, None)
+        prefetch_related_objects(missing, *_ledger_prefetches())
+        fresh = {budget.id: _allocation_entries(budget) for budget in missing}
+        if LEDGER_CACHE_TIMEOUT:
+            cache.set_many({_ledger_key(pk): rows for pk, rows in fresh.items()}, LEDGER_CACHE_TIMEOUT)
+        ledgers.update(fresh)
+    return ledgers
+
+
+def invalidate_ledger(*budget_ids):
+    """Drop the cached ledgers of the given budgets (None ids are ignored)"""
+    keys = [_ledger_key(pk) for pk in set(budget_ids) if pk is not None]
+    if keys:
+        cache.delete_many(keys)
+
+
+# -----------------------------
+# Grouped breakdowns
+# -----------------------------
+def _breakdown(budgets, field):
+    """{value: {'total', 'remaining', 'spent'}} per `field`, as floats for the charts"""
+    data = {}
+    rows = budgets.order_by(field).values(field).annotate(
+        total=Sum('total_equipment_value'), spent=Sum('delivered_equipment_value'),
+    )
+    for row in rows:
+        total = row['total'] or Decimal('0.00')
+        spent = row['spent'] or Decimal('0.00')
+        data[str(row[field])] = {'total': float(total), 'remaining': float(total - spent), 'spent': float(spent)}
+    return data
+
+
+def budget_breakdown(budgets):
+    """Summary totals, fund source / fiscal year / status breakdowns and per-budget ledgers
+
+    `budgets` is the (optionally fund-filtered) Budget queryset shown on the page.
+    """
+    budget_rows = list(budgets)
+    totals = budgets.aggregate(
+        total=Sum('total_equipment_value'), delivered=Sum('delivered_equipment_value'), count=Count('id'),
+    )
+    total_budget = totals['total'] or Decimal('0.00')
+    total_spent = totals['delivered'] or Decimal('0.00')
+
+    status_counts = dict.fromkeys(BUDGET_STATUSES, 0)
+    for row in budgets.order_by().values('status').annotate(total=Count('id')):
+        if row['status'] in status_counts:
+            status_counts[row['status']] = row['total']
+
+    ledgers = allocation_ledgers(budget_rows)
+    budget_allocations = []
+    for budget in budget_rows:
+        entries = ledgers[budget.id]
+        budget_allocations.append({
+            'budget_id': budget.id,
+            'fund_source': budget.fund_source,
+            'fiscal_year': budget.fiscal_year,
+            'total_amount': float(budget.total_amount),
+            'remaining_amount': float(budget.remaining_amount),
+            'allocated_amount': float(budget.total_amount - budget.remaining_amount),
+            'allocations': entries,
+            'allocation_count': len(entries)
+        })
+
+    return {
+        'budgets': budget_rows,
+        'budget_count': totals['count'],
+        'total_budget': total_budget,
+        'total_spent': total_spent,
+        'total_remaining': total_budget - total_spent,
+        'utilization_rate': round((float(total_spent) / float(total_budget) * 100), 2) if total_budget > 0 else 0,
+        'fund_source_data': _breakdown(budgets, 'fund_source'),
+        'fiscal_year_data': _breakdown(budgets, 'fiscal_year'),
+        'status_counts': status_counts,
+        'budget_allocations': budget_allocations,
+    }
+
+
+# -----------------------------
+# Signal receivers
+# -----------------------------
+def remember_budget(sender, instance, raw=False, **kwargs):
+    """pre_save: keep the stored budget so a move between budgets invalidates both ledgers"""
+    instance._ledger_previous_budget_id = None
+    if instance.pk and not instance._state.adding:
+        instance._ledger_previous_budget_id = sender.objects.filter(pk=instance.pk).values_list('budget_id', flat=True).first()
+
+
+def budget_changed(sender, instance, **kwargs):
+    """post_save/post_delete on BudgetAllocation, Project or Proposal"""
+    invalidate_ledger(instance.budget_id, getattr(instance, '_ledger_previous_budget_id', None))
+
+
+def equipment_item_changed(sender, instance, raw=False, **kwargs):
+    """post_save on EquipmentItem: its name, unit and unit cost appear in the ledgers of every budget allocating it"""
+    if not raw:
+        invalidate_ledger(*BudgetAllocation.objects.filter(equipment_item_id=instance.pk).values_list('budget_id', flat=True))
@@ -0,0 +1,140 @@
+import json
+
+from django.db.models import Q, Sum
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from . import conversations, notification_cache
+from .models import ConversationSummary, DeletedMessage, Message, Notification
+
+
+class SelectionError(ValueError):
+    """Raised for a bulk request without a valid selection"""
+
+
+# Most ids one request may name
+MAX_BULK_IDS = 1000
+
+
+# -----------------------------
+# Selections
+# -----------------------------
+def parse_selection(request):
+    """{'ids', 'before', 'partner_id'} from a JSON or form POST body
+
+    `ids` lists the rows to act on; `before` (ISO 8601) selects every row up to
+    and including that time, e.g. the newest one the page has shown. At least
+    one is required; with both, rows must match both.
+    """
+    if request.content_type == 'application/json':
+        try:
+            data = json.loads(request.body or b'{}')
+        except ValueError:
+            raise SelectionError('Invalid JSON body')
+        if not isinstance(data, dict):
+            raise SelectionError('Expected a JSON object')
+        ids, before, partner_id = data.get('ids'), data.get('before'), data.get('partner_id')
+    else:
+        ids, before, partner_id = request.POST.getlist('ids') or None, request.POST.get('before'), request.POST.get('partner_id')
+
+    if ids is None and not before:
+        raise SelectionError('Pass ids or before')
+    if ids is not None and (not isinstance(ids, list) or len(ids) > MAX_BULK_IDS):
+        raise SelectionError(f'ids must be a list of at most {MAX_BULK_IDS} ids')
+    selection = {'ids': None, 'before': None, 'partner_id': None}
+    try:
+        if ids is not None:
+            selection['ids'] = [int(pk) for pk in ids]
+        if partner_id not in (None, ''):
+            selection['partner_id'] = int(partner_id)
+    except (TypeError, ValueError):
+        raise SelectionError('ids and partner_id must be integers')
+    if before:
+        moment = parse_datetime(str(before))
+        if moment is None:
+            raise SelectionError(f'Invalid before: {before}')
+        selection['before'] = timezone.make_aware(moment) if timezone.is_naive(moment) else moment
+    return selection
+
+
+def _select(queryset, selection, time_field):
+    if selection['ids'] is not None:
+        queryset = queryset.filter(pk__in=selection['ids'])
+    if selection['before'] is not None:
+        queryset = queryset.filter(**{f'{time_field}__lte': selection['before']})
+    return queryset
+
+
+def unread_counts(user):
+    """Unread notifications and direct messages after a bulk action"""
+    messages = ConversationSummary.objects.filter(user=user).aggregate(total=Sum('unread_count'))['total']
+    return {
+        'unread_count': notification_cache.summary(user.pk)['unread_count'],
+        'unread_messages': messages or 0,
+    }
+
+
+# -----------------------------
+# Notifications
+# -----------------------------
+def mark_notifications_read(user, selection):
+    """Mark the selected notifications read with one update(); returns how many changed"""
+    notifications = _select(Notification.objects.filter(receiver=user, status='unread'), selection, 'timestamp')
+    updated = notifications.update(status='read')
+    if updated:
+        # update() sends no post_save
+        notification_cache.invalidate(user.pk)
+    return updated
+
+
+def delete_notifications(user, selection):
+    """Delete the selected notifications with one DELETE; returns how many"""
+    notifications = _select(Notification.objects.filter(receiver=user), selection, 'timestamp')
+    # Nothing references a notification, so skip delete()'s row fetch and per-row post_delete
+    deleted = notifications._raw_delete(notifications.db)
+    if deleted:
+        notification_cache.invalidate(user.pk)
+    return deleted
+
+
+# -----------------------------
+# Direct messages
+# -----------------------------
+def _messages(user, selection, received_only):
+    if received_only:
+        messages = Message.objects.filter(recipient=user)
+        if selection['partner_id'] is not None:
+            messages = messages.filter(sender_id=selection['partner_id'])
+    else:
+        # Messages the user already hid, one by one or with the conversation, are skipped
+        messages = Message.objects.visible_to(user)
+        if selection['partner_id'] is not None:
+            partner_id = selection['partner_id']
+            messages = messages.filter(Q(sender_id=partner_id) | Q(recipient_id=partner_id))
+    return _select(messages, selection, 'created_at')
+
+
+def _refresh_summaries(user, partner_ids):
+    for partner_id in partner_ids:
+        if partner_id != user.pk:
+            conversations.refresh(user.pk, partner_id, create=False)
+
+
+def mark_messages_read(user, selection):
+    """Mark the selected received messages read with one update(); returns how many changed"""
+    messages = _messages(user, selection, received_only=True).filter(is_read=False)
+    partner_ids = set(messages.values_list('sender_id', flat=True).distinct())
+    updated = messages.update(is_read=True, read_at=timezone.now())
+    # update() skips Message.mark_as_read's summary bookkeeping: recount the touched conversations
+    _refresh_summaries(user, partner_ids)
+    return updated
+
+
+def hide_messages(user, selection):
+    """One-sided delete of the selected messages with one bulk insert; returns how many"""
+    rows = list(_messages(user, selection, received_only=False).values_list('id', 'sender_id', 'recipient_id'))
+    DeletedMessage.objects.bulk_create(
+        [DeletedMessage(user=user, message_id=pk) for pk, _, _ in rows], batch_size=500, ignore_conflicts=True,
+    )
+    _refresh_summaries(user, {recipient_id if sender_id == user.pk else sender_id for _, sender_id, recipient_id in rows})
+    return len(rows)
@@ -0,0 +1,159 @@
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from .data_exports import DATASETS
+from .models import AuditLog, Budget, ExtensionRequest, Project, Proposal, TrancheRelease
+
+
+class FeedQueryError(ValueError):
+    """Raised for an unknown feed, a malformed cursor or page size"""
+
+
+# Changes per page, and the most a client may ask for
+CHANGE_FEED_PAGE_SIZE = getattr(settings, 'CHANGE_FEED_PAGE_SIZE', 500)
+MAX_FEED_PAGE_SIZE = 5000
+
+# Seconds a change must age before it is served; longer than any write transaction
+CHANGE_FEED_SAFETY_LAG = getattr(settings, 'CHANGE_FEED_SAFETY_LAG', 10)
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+# -----------------------------
+# Feeds
+# -----------------------------
+@dataclass(frozen=True)
+class Feed:
+    model: type
+    # values() fields of a changed row; id and date_updated carry the watermark
+    fields: tuple
+
+    @property
+    def model_name(self):
+        """AuditLog.model_name of the model's delete entries"""
+        return self.model.__name__
+
+
+FEEDS = {
+    'projects': Feed(Project, DATASETS['projects'].fields),
+    'proposals': Feed(Proposal, DATASETS['proposals'].fields),
+    'budgets': Feed(Budget, DATASETS['budgets'].fields),
+    'extension_requests': Feed(ExtensionRequest, (
+        'id', 'proposal_id', 'proponent_id', 'reason', 'requested_extension_days', 'status', 'remarks',
+        'approved_days', 'approved_by_id', 'date_submitted', 'date_approved', 'date_updated',
+    )),
+    'tranche_releases': Feed(TrancheRelease, (
+        'id', 'project_id', 'tranche_number', 'amount', 'release_date', 'check_number', 'bank_account',
+        'liquidation_status', 'liquidation_amount', 'liquidation_date', 'is_released', 'eligible_for_next_tranche',
+        'required_liquidation_percentage', 'remarks', 'created_by_id', 'date_created', 'date_updated',
+    )),
+}
+
+
+def get_feed(name):
+    if name not in FEEDS:
+        raise FeedQueryError(f'Unknown feed: {name}')
+    return FEEDS[name]
+
+
+# -----------------------------
+# Cursors
+# -----------------------------
+def _encode(moment, pk):
+    return f'{(moment - _EPOCH) // timedelta(microseconds=1)}-{pk}'
+
+
+def _decode(value):
+    micros, pk = value.split('-')
+    return _EPOCH + timedelta(microseconds=int(micros)), int(pk)
+
+
+def encode_cursor(changes, deletions):
+    """'<changes>.<deletions>', each '<microseconds since epoch>-<id>' or empty before the first row"""
+    return '.'.join(_encode(*position) if position else '' for position in (changes, deletions))
+
+
+def decode_cursor(value):
+    """((date_updated, id) or None, (AuditLog timestamp, id) or None) from encode_cursor()"""
+    try:
+        changes, deletions = value.split('.')
+        return tuple(_decode(part) if part else None for part in (changes, deletions))
+    except (AttributeError, ValueError, OverflowError):
+        raise FeedQueryError(f'Invalid cursor: {value}')
+
+
+def _after(queryset, field, position):
+    """Rows strictly after `position` in (field, id) order
+
+    Written as a range on the leading column rather than `field > t OR
+    (field = t AND id > pk)`, so the database seeks to the watermark in the
+    (field, id) index instead of scanning it from the start.
+    """
+    if position is None:
+        return queryset
+    moment, pk = position
+    return queryset.filter(**{f'{field}__gte': moment}).filter(Q(**{f'{field}__gt': moment}) | Q(id__gt=pk))
+
+
+# -----------------------------
+# Pages
+# -----------------------------
+def page(feed, cursor=None, limit=None):
+    """Rows created or modified, and ids deleted, since `cursor`
+
+    Returns a dict with the changed rows and deleted ids in watermark order,
+    whether either side has more, and the cursor to continue from: a sync
+    calls again with it until has_more is false and keeps it for next time.
+    Without a cursor the feed starts from the first row, i.e. a full load.
+
+    Changes are read in (date_updated, id) order and deletions from the
+    AuditLog delete entries in (timestamp, id) order, each from its own
+    index; with nothing new, a sync costs one index probe for each.
+
+    Timestamps are stamped in Python before the write commits, so a row from
+    a slower transaction can become visible with a timestamp older than one
+    already served. Only rows older than CHANGE_FEED_SAFETY_LAG seconds are
+    returned, which keeps the cursor behind any write still in flight; newer
+    rows come with a later sync.
+    """
+    try:
+        limit = min(max(int(limit or CHANGE_FEED_PAGE_SIZE), 1), MAX_FEED_PAGE_SIZE)
+    except ValueError:
+        raise FeedQueryError('Invalid limit')
+    changes_at, deletions_at = decode_cursor(cursor) if cursor else (None, None)
+    settled = timezone.now() - timedelta(seconds=CHANGE_FEED_SAFETY_LAG)
+
+    rows = list(_after(feed.model.objects.filter(date_updated__lte=settled), 'date_updated', changes_at).order_by(
+        'date_updated', 'id',
+    ).values(*feed.fields)[:limit + 1])
+    deletions = list(_after(
+        AuditLog.objects.filter(model_name=feed.model_name, action='delete', timestamp__lte=settled), 'timestamp', deletions_at,
+    ).order_by('timestamp', 'id').values_list('timestamp', 'id', 'object_id')[:limit + 1])
+
+    has_more = len(rows) > limit or len(deletions) > limit
+    rows, deletions = rows[:limit], deletions[:limit]
+    if rows:
+        changes_at = rows[-1]['date_updated'], rows[-1]['id']
+    if deletions:
+        deletions_at = deletions[-1][:2]
+    return {
+        'changes': rows,
+        'deleted': [
+            {'id': int(object_id) if object_id.isdigit() else object_id, 'deleted_at': timestamp}
+            for timestamp, _, object_id in deletions
+        ],
+        'has_more': has_more,
+        'cursor': encode_cursor(changes_at, deletions_at),
+    }
+
+
+# -----------------------------
+# Signal receivers
+# -----------------------------
+def record_delete(sender, instance, **kwargs):
+    """Log a delete entry for models whose deletions no view audits, e.g. cascades from their parent"""
+    AuditLog.objects.create(action='delete', model_name=sender.__name__, object_id=str(instance.pk))
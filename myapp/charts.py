@@ -0,0 +1,284 @@
+import hashlib
+import io
+import json
+import logging
+import os
+import tempfile
+import threading
+from dataclasses import asdict, dataclass
+from itertools import cycle, islice
+
+from django.conf import settings
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from matplotlib.ticker import FuncFormatter, MaxNLocator
+
+logger = logging.getLogger(__name__)
+
+
+# Where rendered PNGs are kept; shared by every process on the host
+CHART_CACHE_DIR = getattr(settings, 'CHART_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'taskpro_charts'))
+
+# Total size of the cache directory; the least recently used charts are evicted past it
+CHART_CACHE_MAX_BYTES = getattr(settings, 'CHART_CACHE_MAX_BYTES', 64 * 1024 * 1024)
+
+# Bump when drawing changes so cached PNGs of the old look are not reused
+RENDERER_VERSION = 1
+
+KINDS = ('bar', 'grouped_bar', 'stacked_bar', 'pie')
+
+
+@dataclass(frozen=True)
+class Series:
+    name: str
+    values: tuple
+    # One colour for the series, or one per label
+    color: object = None
+
+
+def series(name, values, color=None):
+    """A Series with float values, so Decimal/int inputs hash the same"""
+    if color is not None and not isinstance(color, str):
+        color = tuple(color)
+    return Series(name, tuple(float(value or 0) for value in values), color)
+
+
+@dataclass(frozen=True)
+class ChartSpec:
+    """Everything that determines a chart's pixels; equal specs render equal PNGs"""
+    kind: str
+    labels: tuple
+    series: tuple
+    title: str = ''
+    xlabel: str = ''
+    ylabel: str = ''
+    size: tuple = (6, 4)
+    dpi: int = 100
+    title_size: object = None
+    title_weight: str = 'normal'
+    axis_label_size: object = None
+    tick_size: object = None
+    label_size: object = None
+    label_rotation: int = 0
+    bar_width: float = 0.8
+    alpha: float = 1.0
+    # Format for the number printed above each bar, e.g. '{:,}'; blank for none
+    value_labels: str = ''
+    value_label_size: int = 9
+    # Format for y-axis ticks, applied to int(tick), e.g. 'PHP {:,}'
+    y_format: str = ''
+    integer_y: bool = False
+    legend: bool = False
+    legend_size: object = None
+    # Series drawn as a line over the bars
+    line: object = None
+    tight_bbox: bool = False
+
+    def __post_init__(self):
+        if self.kind not in KINDS:
+            raise ValueError(f'Unknown chart kind: {self.kind}')
+        object.__setattr__(self, 'labels', tuple(str(label) for label in self.labels))
+        object.__setattr__(self, 'series', tuple(self.series))
+        object.__setattr__(self, 'size', tuple(self.size))
+
+    def key(self):
+        raw = json.dumps([RENDERER_VERSION, asdict(self)], sort_keys=True, separators=(',', ':'), default=str)
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+
+# -----------------------------
+# Drawing
+# -----------------------------
+def _colors(color, count):
+    if color is None or isinstance(color, str):
+        return color
+    return list(islice(cycle(color), count))
+
+
+def _value_labels(ax, spec, bars):
+    for bar in bars:
+        height = bar.get_height()
+        ax.text(bar.get_x() + bar.get_width() / 2., height, spec.value_labels.format(int(height)),
+                ha='center', va='bottom', fontsize=spec.value_label_size)
+
+
+def draw(spec):
+    """PNG bytes for a spec, drawn on its own Figure so concurrent renders share no state"""
+    fig = Figure(figsize=spec.size)
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+    count = len(spec.labels)
+    x = list(range(count))
+
+    if spec.kind == 'pie':
+        values = spec.series[0].values
+        wedges, _, _ = ax.pie(values, colors=_colors(spec.series[0].color, count), autopct='%1.1f%%', startangle=90,
+                              textprops={'fontsize': spec.tick_size or 10}, pctdistance=0.75)
+        if spec.legend:
+            ax.legend(wedges, spec.labels, loc='center left', bbox_to_anchor=(1, 0.5), fontsize=spec.legend_size)
+    else:
+        ticks = x
+        if spec.kind == 'grouped_bar':
+            for offset, item in enumerate(spec.series):
+                ax.bar([i + spec.bar_width * offset for i in x], item.values, spec.bar_width,
+                       label=item.name, color=_colors(item.color, count), alpha=spec.alpha)
+            ticks = [i + spec.bar_width * (len(spec.series) - 1) / 2 for i in x]
+        else:
+            bottom = None
+            for item in spec.series:
+                bars = ax.bar(x, item.values, width=spec.bar_width, bottom=bottom, label=item.name,
+                              color=_colors(item.color, count), alpha=spec.alpha)
+                if spec.kind == 'bar' and spec.value_labels:
+                    _value_labels(ax, spec, bars)
+                if spec.kind == 'stacked_bar':
+                    bottom = item.values if bottom is None else [a + b for a, b in zip(bottom, item.values)]
+        if spec.line is not None:
+            ax.plot(x, spec.line.values, 'o-', color=spec.line.color, linewidth=2, markersize=6, label=spec.line.name)
+
+        ax.set_xticks(ticks)
+        ax.set_xticklabels(spec.labels, rotation=spec.label_rotation, ha='right' if spec.label_rotation else 'center',
+                           fontsize=spec.label_size)
+        if spec.xlabel:
+            ax.set_xlabel(spec.xlabel, fontsize=spec.axis_label_size)
+        if spec.ylabel:
+            ax.set_ylabel(spec.ylabel, fontsize=spec.axis_label_size)
+        if spec.y_format:
+            ax.yaxis.set_major_formatter(FuncFormatter(lambda value, _: spec.y_format.format(int(value))))
+        if spec.integer_y:
+            ax.yaxis.set_major_locator(MaxNLocator(integer=True))
+        if spec.legend:
+            ax.legend(fontsize=spec.legend_size)
+
+    if spec.title:
+        ax.set_title(spec.title, fontsize=spec.title_size, fontweight=spec.title_weight)
+    if spec.tick_size:
+        ax.tick_params(axis='both', labelsize=spec.tick_size)
+
+    fig.tight_layout()
+    buf = io.BytesIO()
+    fig.savefig(buf, format='png', dpi=spec.dpi, bbox_inches='tight' if spec.tight_bbox else None)
+    return buf.getvalue()
+
+
+# -----------------------------
+# On-disk LRU cache
+# -----------------------------
+_stats_lock = threading.Lock()
+_stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+
+
+def _count(name, amount=1):
+    with _stats_lock:
+        _stats[name] += amount
+
+
+def stats():
+    """Hit/miss/eviction counters of this process, plus the cache's current size on disk"""
+    with _stats_lock:
+        counters = dict(_stats)
+    entries = _entries()
+    counters['entries'] = len(entries)
+    counters['bytes'] = sum(size for _, size, _ in entries)
+    lookups = counters['hits'] + counters['misses']
+    counters['hit_rate'] = counters['hits'] / lookups if lookups else 0.0
+    return counters
+
+
+def reset_stats():
+    with _stats_lock:
+        for name in _stats:
+            _stats[name] = 0
+
+
+def _path(key):
+    return os.path.join(CHART_CACHE_DIR, f'{key}.png')
+
+
+def _entries():
+    """[(path, size, last used)] of cached charts"""
+    try:
+        scan = list(os.scandir(CHART_CACHE_DIR))
+    except FileNotFoundError:
+        return []
+    entries = []
+    for entry in scan:
+        if not entry.name.endswith('.png'):
+            continue
+        try:
+            info = entry.stat()
+        except FileNotFoundError:
+            continue  # evicted by another process meanwhile
+        entries.append((entry.path, info.st_size, info.st_mtime))
+    return entries
+
+
+def _evict():
+    entries = _entries()
+    total = sum(size for _, size, _ in entries)
+    if total <= CHART_CACHE_MAX_BYTES:
+        return
+    for path, size, _ in sorted(entries, key=lambda entry: entry[2]):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            continue
+        _count('evictions')
+        total -= size
+        if total <= CHART_CACHE_MAX_BYTES:
+            break
+
+
+def _read(path):
+    try:
+        with open(path, 'rb') as f:
+            data = f.read()
+        os.utime(path)  # mark as recently used
+        return data
+    except FileNotFoundError:
+        return None
+
+
+def _write(path, data):
+    os.makedirs(CHART_CACHE_DIR, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=CHART_CACHE_DIR, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        # Readers see either no file or the complete PNG
+        os.replace(tmp, path)
+    except OSError:
+        logger.warning('Could not cache chart %s', path, exc_info=True)
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def render_png(spec):
+    """PNG bytes for a spec, from the cache when an identical chart was rendered before"""
+    path = _path(spec.key())
+    data = _read(path)
+    if data is not None:
+        _count('hits')
+        return data
+    _count('misses')
+    data = draw(spec)
+    if CHART_CACHE_MAX_BYTES:
+        _write(path, data)
+        _evict()
+    return data
+
+
+def png_buffer(spec):
+    """render_png() as a file-like object, e.g. for reportlab's Image"""
+    return io.BytesIO(render_png(spec))
+
+
+def clear():
+    """Remove every cached chart; returns how many were removed"""
+    removed = 0
+    for path, _, _ in _entries():
+        try:
+            os.remove(path)
+            removed += 1
+        except FileNotFoundError:
+            pass
+    return removed
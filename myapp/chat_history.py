@@ -0,0 +1,105 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db.models import Q
+
+from .conversations import visible_messages
+from .models import GroupChatMessage
+
+
+class HistoryQueryError(ValueError):
+    """Raised for a malformed cursor or page size"""
+
+
+# Messages per history page, and the most a client may ask for
+MESSAGE_HISTORY_PAGE_SIZE = getattr(settings, 'MESSAGE_HISTORY_PAGE_SIZE', 50)
+MAX_HISTORY_PAGE_SIZE = 200
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+# -----------------------------
+# Cursors
+# -----------------------------
+def encode_cursor(created_at, pk):
+    """'<microseconds since epoch>-<id>' for a message position"""
+    return f'{(created_at - _EPOCH) // timedelta(microseconds=1)}-{pk}'
+
+
+def decode_cursor(value):
+    """(created_at, id) from encode_cursor()"""
+    try:
+        micros, pk = value.split('-')
+        return _EPOCH + timedelta(microseconds=int(micros)), int(pk)
+    except (AttributeError, ValueError, OverflowError):
+        raise HistoryQueryError(f'Invalid cursor: {value}')
+
+
+# -----------------------------
+# Visible messages
+# -----------------------------
+def direct_messages(user, partner):
+    """Messages between two users minus the user's one-sided deletes"""
+    return visible_messages(user.pk, partner.pk).select_related('sender')
+
+
+def group_messages(user, chat):
+    """Messages of a group chat minus the user's one-sided deletes"""
+    return GroupChatMessage.objects.visible_to(user).filter(group_chat=chat).select_related('sender')
+
+
+# -----------------------------
+# Pages
+# -----------------------------
+def page(messages, before=None, after=None, limit=None):
+    """One page of `messages` in chronological order
+
+    With no cursor the newest `limit` messages; `before` pages back from a
+    cursor and `after` returns what arrived since one. Returns a dict with the
+    messages, whether more exist in the direction paged, and the cursors of the
+    first and last message to continue from.
+    """
+    if before and after:
+        raise HistoryQueryError('Pass either before or after, not both')
+    try:
+        limit = min(max(int(limit or MESSAGE_HISTORY_PAGE_SIZE), 1), MAX_HISTORY_PAGE_SIZE)
+    except ValueError:
+        raise HistoryQueryError('Invalid limit')
+
+    if after:
+        created_at, pk = decode_cursor(after)
+        rows = list(messages.filter(
+            Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=pk)
+        ).order_by('created_at', 'id')[:limit + 1])
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+    else:
+        if before:
+            created_at, pk = decode_cursor(before)
+            messages = messages.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk))
+        rows = list(messages.order_by('-created_at', '-id')[:limit + 1])
+        has_more = len(rows) > limit
+        rows = rows[:limit][::-1]
+
+    return {
+        'messages': rows,
+        'has_more': has_more,
+        'before': encode_cursor(rows[0].created_at, rows[0].pk) if rows else before,
+        'after': encode_cursor(rows[-1].created_at, rows[-1].pk) if rows else after,
+    }
+
+
+def message_payload(message, user):
+    payload = {
+        'id': message.pk,
+        'sender_id': message.sender_id,
+        'sender_name': message.sender.get_full_name(),
+        'is_mine': message.sender_id == user.pk,
+        'content': message.content,
+        'created_at': message.created_at.isoformat(),
+    }
+    if hasattr(message, 'subject'):
+        payload['subject'] = message.subject or ''
+        payload['attachment_url'] = message.attachment.url if message.attachment else ''
+        payload['attachment_name'] = message.attachment.name if message.attachment else ''
+    return payload
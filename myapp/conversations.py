@@ -0,0 +1,134 @@
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db.models import Exists, F, OuterRef, Q
+from django.utils import timezone
+
+from .models import ConversationSummary, DeletedConversation, DeletedMessage, Message
+
+# Conversations per inbox page
+INBOX_PAGE_SIZE = getattr(settings, 'INBOX_PAGE_SIZE', 25)
+
+
+# -----------------------------
+# Queries
+# -----------------------------
+def visible_messages(user_id, partner_id):
+    """Messages between two users that `user_id` has not deleted on their side"""
+    return Message.objects.visible_to(user_id).filter(
+        Q(sender_id=user_id, recipient_id=partner_id) | Q(sender_id=partner_id, recipient_id=user_id)
+    )
+
+
+def inbox_page(user, page_number=None):
+    """A Paginator page of the user's conversations, most recent first"""
+    summaries = ConversationSummary.objects.filter(user=user, last_message__isnull=False).select_related(
+        'partner', 'last_message', 'last_message__sender',
+    ).order_by('-last_activity', '-id')
+    return Paginator(summaries, INBOX_PAGE_SIZE).get_page(page_number)
+
+
+# -----------------------------
+# Maintenance
+# -----------------------------
+def refresh(user_id, partner_id, create=True):
+    """Recompute one summary row from the messages; `create=False` only updates an existing row"""
+    delete_before = DeletedConversation.objects.filter(user_id=user_id, partner_id=partner_id).values_list(
+        'delete_before', flat=True,
+    ).first()
+    visible = visible_messages(user_id, partner_id)
+    last = visible.order_by('-created_at', '-id').values_list('id', 'created_at').first()
+    values = {
+        'last_message_id': last[0] if last else None,
+        'last_activity': last[1] if last else None,
+        'unread_count': visible.filter(sender_id=partner_id, is_read=False).count(),
+        'delete_before': delete_before,
+    }
+    if create:
+        ConversationSummary.objects.update_or_create(user_id=user_id, partner_id=partner_id, defaults=values)
+    else:
+        ConversationSummary.objects.filter(user_id=user_id, partner_id=partner_id).update(**values)
+
+
+def message_created(message):
+    """Move both sides of the conversation to the new message"""
+    if message.sender_id == message.recipient_id:
+        return
+    for user_id, partner_id in ((message.sender_id, message.recipient_id), (message.recipient_id, message.sender_id)):
+        values = {'last_message': message, 'last_activity': message.created_at}
+        if user_id == message.recipient_id and not message.is_read:
+            values['unread_count'] = F('unread_count') + 1
+        if not ConversationSummary.objects.filter(user_id=user_id, partner_id=partner_id).update(**values):
+            # First message between the two (or a row never built): compute it in full
+            refresh(user_id, partner_id)
+
+
+def message_read(message):
+    """Message.mark_as_read(): one fewer unread message, unless the recipient had deleted it"""
+    ConversationSummary.objects.filter(
+        user_id=message.recipient_id, partner_id=message.sender_id, unread_count__gt=0,
+    ).exclude(
+        delete_before__gte=message.created_at,
+    ).exclude(
+        Exists(DeletedMessage.objects.filter(user_id=message.recipient_id, message_id=message.pk)),
+    ).update(unread_count=F('unread_count') - 1)
+
+
+def mark_read(user, partner):
+    """Mark everything the partner sent the user as read, as opening the conversation does"""
+    Message.objects.filter(sender=partner, recipient=user, is_read=False).update(is_read=True, read_at=timezone.now())
+    ConversationSummary.objects.filter(user=user, partner=partner).update(unread_count=0)
+
+
+def rebuild():
+    """Recompute every summary from the messages; returns the number of rows"""
+    delete_before = {(user_id, partner_id): before for user_id, partner_id, before in
+                     DeletedConversation.objects.values_list('user_id', 'partner_id', 'delete_before')}
+    deleted = set(DeletedMessage.objects.values_list('user_id', 'message_id'))
+
+    summaries = {}
+    rows = Message.objects.order_by('created_at', 'id').values_list('id', 'sender_id', 'recipient_id', 'created_at', 'is_read')
+    for pk, sender_id, recipient_id, created_at, is_read in rows.iterator(chunk_size=5000):
+        if sender_id == recipient_id:
+            continue
+        for user_id, partner_id in ((sender_id, recipient_id), (recipient_id, sender_id)):
+            summary = summaries.setdefault((user_id, partner_id), ConversationSummary(
+                user_id=user_id, partner_id=partner_id, delete_before=delete_before.get((user_id, partner_id)),
+            ))
+            if (user_id, pk) in deleted or (summary.delete_before and created_at <= summary.delete_before):
+                continue
+            summary.last_message_id, summary.last_activity = pk, created_at
+            if user_id == recipient_id and not is_read:
+                summary.unread_count += 1
+
+    ConversationSummary.objects.all().delete()
+    ConversationSummary.objects.bulk_create(summaries.values(), batch_size=1000)
+    return len(summaries)
+
+
+# -----------------------------
+# Signal receivers
+# -----------------------------
+def message_saved(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        message_created(instance)
+
+
+def message_deleted(sender, instance, **kwargs):
+    if instance.sender_id != instance.recipient_id:
+        refresh(instance.sender_id, instance.recipient_id, create=False)
+        refresh(instance.recipient_id, instance.sender_id, create=False)
+
+
+def conversation_deleted(sender, instance, raw=False, **kwargs):
+    """DeletedConversation saved by a one-sided delete: hide the older messages"""
+    if not raw:
+        refresh(instance.user_id, instance.partner_id)
+
+
+def message_hidden(sender, instance, created, raw=False, **kwargs):
+    """DeletedMessage created by a one-sided delete"""
+    if not created or raw:
+        return
+    message = Message.objects.only('sender_id', 'recipient_id').get(pk=instance.message_id)
+    partner_id = message.recipient_id if message.sender_id == instance.user_id else message.sender_id
+    refresh(instance.user_id, partner_id, create=False)
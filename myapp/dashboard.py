@@ -0,0 +1,178 @@
+from dataclasses import dataclass, field, asdict
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+from . import rollups
+from .models import User, Proposal, Project, ExtensionRequest, ProjectStatusRollup, ProposalStatusRollup
+
+
+def _label(value):
+    """Format 'dost_staff' -> 'Dost Staff'"""
+    return value.replace('_', ' ').title()
+
+
+def _month_starts(now, months=12):
+    """Return the first instant of each of the last `months` local months, oldest first"""
+    current = timezone.localtime(now).replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    starts = [current]
+    for _ in range(months - 1):
+        current = (current - timedelta(days=1)).replace(day=1)
+        starts.append(current)
+    return list(reversed(starts))
+
+
+def _monthly_counts(field_name, month_starts, now):
+    """Conditional Count() per month over `field_name`, keyed m0..m11"""
+    bounds = month_starts[1:] + [now]
+    return {
+        f'm{i}': Count('id', filter=Q(**{f'{field_name}__gte': start, f'{field_name}__lt': end}))
+        for i, (start, end) in enumerate(zip(month_starts, bounds))
+    }
+
+
+def _choice_counts(choices, field_name='status'):
+    """Conditional Count() per choice value, keyed by the choice value"""
+    return {
+        f'c_{value}': Count('id', filter=Q(**{field_name: value}))
+        for value, _ in choices
+    }
+
+
+def _present(choices, row):
+    """Labels/values for choices that have at least one row (mirrors values().annotate())"""
+    labels, values = [], []
+    for value, _ in choices:
+        total = row[f'c_{value}']
+        if total:
+            labels.append(_label(value))
+            values.append(total)
+    return labels, values
+
+
+# -----------------------------
+# Snapshot
+# -----------------------------
+@dataclass(frozen=True)
+class DashboardSnapshot:
+    """Every counter, status bucket and trend shown on the administrator dashboard"""
+    # Budget
+    total_budget: Decimal = Decimal('0.00')
+    total_spent: Decimal = Decimal('0.00')
+    total_remaining: Decimal = Decimal('0.00')
+    utilization_rate: float = 0
+
+    # Summary stats
+    total_users: int = 0
+    total_proposals: int = 0
+    total_projects: int = 0
+    completed_projects: int = 0
+    pending_extensions: int = 0
+
+    # Task completion stats
+    task_pending: int = 0
+    task_in_progress: int = 0
+    task_completed: int = 0
+    task_overdue: int = 0
+
+    # Charts
+    project_status_labels: list = field(default_factory=list)
+    project_status_values: list = field(default_factory=list)
+    user_role_labels: list = field(default_factory=list)
+    user_role_values: list = field(default_factory=list)
+    proposal_status_labels: list = field(default_factory=list)
+    proposal_status_values: list = field(default_factory=list)
+    extension_status_labels: list = field(default_factory=list)
+    extension_status_values: list = field(default_factory=list)
+
+    # Trends (last 12 months)
+    month_labels: list = field(default_factory=list)
+    proposals_month_values: list = field(default_factory=list)
+    extensions_month_values: list = field(default_factory=list)
+
+    def as_dict(self):
+        """JSON-serializable representation used by the stats API"""
+        data = asdict(self)
+        for key in ('total_budget', 'total_spent', 'total_remaining'):
+            data[key] = float(data[key])
+        return data
+
+
+def build_dashboard_snapshot(now=None):
+    """Compute the administrator dashboard aggregates in a fixed number of grouped queries
+
+    Project, proposal, task and budget figures come from the rollup tables
+    (see rollups.py); users and extension requests are aggregated directly.
+    """
+    now = now or timezone.now()
+    month_starts = _month_starts(now)
+
+    # 1. Budget totals (rollup)
+    budget_totals = rollups.budget_totals()
+    total_budget = budget_totals['total_equipment_value']
+    total_spent = budget_totals['delivered_equipment_value'].quantize(Decimal('0.01'))
+    total_remaining = (total_budget - total_spent).quantize(Decimal('0.01'))
+
+    # 2. Project status (rollup, grouped by the stored status bucket)
+    status_data = dict.fromkeys((bucket for bucket, _ in Project.STATUS_BUCKET_CHOICES), 0)
+    for entry in ProjectStatusRollup.objects.filter(count__gt=0).values('status_bucket').annotate(total=Sum('count')):
+        status_data[entry['status_bucket']] += entry['total']
+    total_projects = sum(status_data.values())
+    completed_projects = status_data['completed']
+
+    utilization_rate = round(completed_projects / total_projects * 100, 2) if total_projects else 0
+
+    # 3. User roles
+    users = User.objects.aggregate(total=Count('id'), **_choice_counts(User.ROLE_CHOICES, 'role'))
+    user_role_labels, user_role_values = _present(User.ROLE_CHOICES, users)
+
+    # 4. Proposals: status + monthly trend (rollup)
+    month_index = {start.date(): i for i, start in enumerate(month_starts)}
+    proposals = dict.fromkeys((f'c_{value}' for value, _ in Proposal.STATUS_CHOICES), 0)
+    proposals_month_values = [0] * len(month_starts)
+    for entry in ProposalStatusRollup.objects.filter(count__gt=0).values('status', 'month').annotate(total=Sum('count')):
+        key = f"c_{entry['status']}"
+        proposals[key] = proposals.get(key, 0) + entry['total']
+        if entry['month'] in month_index:
+            proposals_month_values[month_index[entry['month']]] += entry['total']
+    proposal_status_labels, proposal_status_values = _present(Proposal.STATUS_CHOICES, proposals)
+
+    # 5. Extension requests: status + monthly trend
+    extensions = ExtensionRequest.objects.aggregate(
+        **_choice_counts(ExtensionRequest.STATUS_CHOICES),
+        **_monthly_counts('date_submitted', month_starts, now),
+    )
+    extension_status_labels, extension_status_values = _present(ExtensionRequest.STATUS_CHOICES, extensions)
+
+    # 6. Tasks (rollup)
+    tasks = rollups.task_status_counts()
+
+    months = range(len(month_starts))
+    return DashboardSnapshot(
+        total_budget=total_budget,
+        total_spent=total_spent,
+        total_remaining=total_remaining,
+        utilization_rate=utilization_rate,
+        total_users=users['total'],
+        total_proposals=sum(proposals.values()),
+        total_projects=total_projects,
+        completed_projects=completed_projects,
+        pending_extensions=extensions['c_pending'],
+        task_pending=tasks.get('pending', 0),
+        task_in_progress=tasks.get('in_progress', 0),
+        task_completed=tasks.get('completed', 0),
+        task_overdue=tasks.get('overdue', 0),
+        project_status_labels=[label for _, label in Project.STATUS_BUCKET_CHOICES],
+        project_status_values=list(status_data.values()),
+        user_role_labels=user_role_labels,
+        user_role_values=user_role_values,
+        proposal_status_labels=proposal_status_labels,
+        proposal_status_values=proposal_status_values,
+        extension_status_labels=extension_status_labels,
+        extension_status_values=extension_status_values,
+        month_labels=[start.strftime('%b %Y') for start in month_starts],
+        proposals_month_values=proposals_month_values,
+        extensions_month_values=[extensions[f'm{i}'] for i in months],
+    )
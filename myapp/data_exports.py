@@ -0,0 +1,269 @@
+import csv
+import hashlib
+import json
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Count, Max
+from django.utils import timezone
+
+from .models import AuditLog, Budget, Project, ProjectEquipment, Proposal, Task
+from .report_data import ReportFilters
+
+
+class ExportQueryError(ValueError):
+    """Raised for an unknown dataset or format, or a malformed filter"""
+
+
+# Rows fetched from the database, and written to the response, per chunk
+EXPORT_CHUNK_SIZE = 2000
+
+# Bump when the columns change so clients drop old validators
+FORMAT_VERSION = 1
+
+CONTENT_TYPES = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson',
+}
+
+
+# -----------------------------
+# Filters
+# -----------------------------
+def parse_filters(params):
+    """The administrator_reports_view filters: year, municipality, status, start_date and end_date
+
+    Unlike the reports page, a malformed year or date is an error rather than
+    silently ignored, so a scheduled pull never gets a wider export than it asked for.
+    """
+    filters = {
+        'year': None,
+        'municipality': (params.get('municipality') or '').strip() or None,
+        'status': (params.get('status') or '').strip() or None,
+        'start': None,
+        'end': None,
+    }
+    year = (params.get('year') or '').strip()
+    if year:
+        if not year.isdigit():
+            raise ExportQueryError(f'Invalid year: {year}')
+        filters['year'] = int(year)
+    for name, key in (('start_date', 'start'), ('end_date', 'end')):
+        value = (params.get(name) or '').strip()
+        if value:
+            try:
+                filters[key] = datetime.strptime(value, '%Y-%m-%d').date()
+            except ValueError:
+                raise ExportQueryError(f'Invalid {name}: {value} (expected YYYY-MM-DD)')
+    return filters
+
+
+def _filter_projects(queryset, f):
+    # Same lookups as the reports pages
+    return ReportFilters(**f).projects(queryset)
+
+
+def _filter_proposals(queryset, f):
+    return ReportFilters(**f).proposals(queryset)
+
+
+def _filter_budgets(queryset, f):
+    # Budgets have no municipality; their statuses are not the report's project/proposal ones
+    if f['year'] is not None:
+        queryset = queryset.filter(fiscal_year=f['year'])
+    if f['start']:
+        queryset = queryset.filter(date_allocated__gte=f['start'])
+    if f['end']:
+        queryset = queryset.filter(date_allocated__lte=f['end'])
+    return queryset
+
+
+def _filter_tasks(queryset, f):
+    if f['year'] is not None:
+        queryset = queryset.filter(due_date__year=f['year'])
+    if f['municipality']:
+        queryset = queryset.filter(project__mun__iexact=f['municipality'])
+    if f['start']:
+        queryset = queryset.filter(due_date__gte=f['start'])
+    if f['end']:
+        queryset = queryset.filter(due_date__lte=f['end'])
+    if f['status']:
+        queryset = queryset.filter(status__iexact=f['status'])
+    return queryset
+
+
+def _filter_audit_logs(queryset, f):
+    # `status` matches the action (create, update, approval...)
+    if f['year'] is not None:
+        queryset = queryset.filter(timestamp__year=f['year'])
+    if f['start']:
+        queryset = queryset.filter(timestamp__date__gte=f['start'])
+    if f['end']:
+        queryset = queryset.filter(timestamp__date__lte=f['end'])
+    if f['status']:
+        queryset = queryset.filter(action__iexact=f['status'])
+    return queryset
+
+
+def _filter_deliveries(queryset, f):
+    if f['year'] is not None:
+        queryset = queryset.filter(delivery_date__year=f['year'])
+    if f['municipality']:
+        queryset = queryset.filter(project__mun__iexact=f['municipality'])
+    if f['start']:
+        queryset = queryset.filter(delivery_date__gte=f['start'])
+    if f['end']:
+        queryset = queryset.filter(delivery_date__lte=f['end'])
+    if f['status']:
+        queryset = queryset.filter(status__iexact=f['status'])
+    return queryset
+
+
+# -----------------------------
+# Datasets
+# -----------------------------
+@dataclass(frozen=True)
+class Dataset:
+    model: type
+    # values_list() paths, also the CSV header and NDJSON keys
+    fields: tuple
+    filter: Callable
+    # Field whose latest value is the dataset's Last-Modified
+    updated_field: str = 'date_updated'
+    admin_only: bool = False
+
+    def queryset(self, filters):
+        return self.filter(self.model.objects.all(), filters).order_by('pk')
+
+
+DATASETS = {
+    'projects': Dataset(Project, (
+        'id', 'no', 'project_code', 'year', 'project_title', 'agency_grantee', 'program', 'type_of_project',
+        'status', 'status_bucket', 'remarks', 'mun', 'province', 'district', 'latitude', 'longitude',
+        'beneficiary', 'beneficiary_address', 'contact_details', 'proponent_details', 'no_of_beneficiaries',
+        'male', 'female', 'total_beneficiaries', 'senior_citizen', 'pwd', 'fund_source', 'funds',
+        'total_project_cost', 'counterpart_funds', 'internally_managed_fund', 'total_funds_released',
+        'first_tranche', 'second_tranche', 'third_tranche', 'project_start', 'project_end', 'date_of_release',
+        'date_of_completion', 'original_project_duration', 'extension_date', 'check_ada_no',
+        'status_of_liquidation', 'date_of_liquidation', 'amount_liquidated', 'availed_technologies',
+        'interventions', 'tafr', 'par', 'terminal_report', 'invoice_receipt', 'list_of_eqpt', 'donated',
+        'date_of_donation', 'donation_status', 'pme_visit', 'womens_group', 'date_of_inspection_tagging',
+        'acknowledgment_receipt_by_grantee', 'approval_date', 'date_created', 'date_updated',
+    ), _filter_projects),
+    'proposals': Dataset(Proposal, (
+        'id', 'title', 'status', 'proposed_amount', 'approved_amount', 'submitted_by_id', 'submission_date',
+        'processed_by_id', 'beneficiary_id', 'location', 'municipality', 'province', 'date_updated',
+    ), _filter_proposals),
+    'budgets': Dataset(Budget, (
+        'id', 'fiscal_year', 'fund_source', 'lib_category', 'total_allocated_items', 'total_delivered_items',
+        'total_equipment_value', 'delivered_equipment_value', 'counterpart_value', 'status', 'date_allocated',
+        'created_by_id', 'date_created', 'date_updated',
+    ), _filter_budgets),
+    'tasks': Dataset(Task, (
+        'id', 'project_id', 'title', 'assigned_to_id', 'start_date', 'due_date', 'completion_date', 'status',
+        'priority', 'category', 'progress_percentage', 'estimated_hours', 'actual_hours', 'location_name',
+        'latitude', 'longitude', 'date_updated',
+    ), _filter_tasks),
+    'audit_logs': Dataset(AuditLog, (
+        'id', 'timestamp', 'user_id', 'action', 'model_name', 'object_id', 'details', 'reason', 'ip_address',
+        'old_data', 'new_data',
+    ), _filter_audit_logs, updated_field='timestamp', admin_only=True),
+    'equipment_deliveries': Dataset(ProjectEquipment, (
+        'id', 'project_id', 'budget_allocation_id', 'budget_allocation__equipment_item__name', 'delivered_quantity',
+        'delivery_date', 'status', 'serial_numbers', 'property_tag_number', 'ownership_status', 'lease_start_date',
+        'ownership_transfer_date', 'received_by', 'delivered_by_id', 'date_created', 'date_updated',
+    ), _filter_deliveries),
+}
+
+
+def get_dataset(name, fmt):
+    if name not in DATASETS:
+        raise ExportQueryError(f'Unknown dataset: {name}')
+    if fmt not in CONTENT_TYPES:
+        raise ExportQueryError(f'Unknown format: {fmt}')
+    return DATASETS[name]
+
+
+# -----------------------------
+# Validators
+# -----------------------------
+def validators(name, fmt, filters):
+    """(weak ETag, Last-Modified datetime or None) of an export, from one aggregate query
+
+    Last-Modified has one-second resolution and cannot see deletions, so the
+    ETag also covers the exact latest change and the row count; clients that
+    send If-None-Match see every change.
+    """
+    dataset = DATASETS[name]
+    state = dataset.queryset(filters).order_by().aggregate(count=Count('pk'), updated=Max(dataset.updated_field))
+    updated = state['updated']
+    raw = json.dumps([FORMAT_VERSION, name, fmt, filters, state['count'], updated], cls=DjangoJSONEncoder, sort_keys=True)
+    return f'W/"{hashlib.sha1(raw.encode()).hexdigest()}"', updated
+
+
+def filename(name, fmt):
+    return f'{name}_{timezone.now().strftime("%Y%m%d")}.{fmt}'
+
+
+# -----------------------------
+# Rows
+# -----------------------------
+class _Lines:
+    """A file-like object collecting csv.writer output"""
+
+    def __init__(self):
+        self.parts = []
+
+    def write(self, value):
+        self.parts.append(value)
+
+    def pop(self):
+        text, self.parts = ''.join(self.parts), []
+        return text
+
+
+def _csv_value(value):
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, cls=DjangoJSONEncoder, separators=(',', ':'))
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def _chunks(queryset, fields, chunk_size):
+    rows = queryset.values_list(*fields).iterator(chunk_size=chunk_size)
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def csv_lines(queryset, fields, chunk_size=EXPORT_CHUNK_SIZE):
+    """The header, then one str per `chunk_size` rows"""
+    lines = _Lines()
+    writer = csv.writer(lines)
+    writer.writerow(fields)
+    yield lines.pop()
+    for chunk in _chunks(queryset, fields, chunk_size):
+        writer.writerows([_csv_value(value) for value in row] for row in chunk)
+        yield lines.pop()
+
+
+def ndjson_lines(queryset, fields, chunk_size=EXPORT_CHUNK_SIZE):
+    """One JSON object per row, `chunk_size` rows per str"""
+    encoder = DjangoJSONEncoder(separators=(',', ':'))
+    for chunk in _chunks(queryset, fields, chunk_size):
+        yield ''.join(encoder.encode(dict(zip(fields, row))) + '\n' for row in chunk)
+
+
+def lines(fmt, queryset, fields, chunk_size=EXPORT_CHUNK_SIZE):
+    """The encoded body of an export, chunk by chunk"""
+    produce = csv_lines if fmt == 'csv' else ndjson_lines
+    for text in produce(queryset, fields, chunk_size):
+        yield text.encode('utf-8')
@@ -0,0 +1,277 @@
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+
+# SQLite file every worker process appends events to and reads them back from,
+# so a push published in one worker reaches streams held open by the others
+EVENT_BUS_PATH = getattr(settings, 'EVENT_BUS_PATH', os.path.join(tempfile.gettempdir(), 'taskpro_events.sqlite3'))
+
+# Seconds between reads of the shared log while streams are open; publishes in
+# the same process are picked up immediately
+EVENT_BUS_POLL_INTERVAL = getattr(settings, 'EVENT_BUS_POLL_INTERVAL', 1.0)
+
+# Seconds events are kept for clients reconnecting with Last-Event-ID
+EVENT_BUS_RETENTION = getattr(settings, 'EVENT_BUS_RETENTION', 600)
+
+# Seconds between SSE comments that keep proxies from closing an idle stream
+SSE_KEEPALIVE = getattr(settings, 'SSE_KEEPALIVE', 20)
+
+# Seconds a stream is held before the server ends it and the browser reconnects;
+# bounds the life of streams whose client went away unnoticed
+SSE_MAX_AGE = getattr(settings, 'SSE_MAX_AGE', 300)
+
+# Milliseconds the browser waits before reconnecting
+SSE_RETRY_MS = 5000
+
+
+def user_channel(user_id):
+    return f'user:{user_id}'
+
+
+def group_channel(chat_id):
+    return f'group:{chat_id}'
+
+
+# -----------------------------
+# Shared log (SQLite file)
+# -----------------------------
+class EventLog:
+    """Append-only event table in a standalone SQLite file, one connection per thread"""
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        self._pruned_at = 0.0
+
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            # Readers never block the writer
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS events ('
+                'id INTEGER PRIMARY KEY AUTOINCREMENT, channel TEXT NOT NULL, event TEXT NOT NULL, '
+                'data TEXT NOT NULL, created REAL NOT NULL)'
+            )
+            self._local.connection = connection
+        return connection
+
+    def append(self, channel, event, data):
+        """Store one event; returns its id"""
+        connection = self._connection()
+        now = time.time()
+        cursor = connection.execute(
+            'INSERT INTO events (channel, event, data, created) VALUES (?, ?, ?, ?)',
+            (channel, event, json.dumps(data, separators=(',', ':')), now),
+        )
+        self._prune(connection, now)
+        return cursor.lastrowid
+
+    def append_many(self, rows):
+        """Store [(channel, event, data)] in one transaction"""
+        connection = self._connection()
+        now = time.time()
+        with connection:
+            connection.execute('BEGIN')
+            connection.executemany(
+                'INSERT INTO events (channel, event, data, created) VALUES (?, ?, ?, ?)',
+                [(channel, event, json.dumps(data, separators=(',', ':')), now) for channel, event, data in rows],
+            )
+        self._prune(connection, now)
+
+    def _prune(self, connection, now):
+        if now - self._pruned_at > 60:
+            self._pruned_at = now
+            connection.execute('DELETE FROM events WHERE created < ?', (now - EVENT_BUS_RETENTION,))
+
+    def since(self, last_id, limit=1000):
+        """[(id, channel, event, data)] stored after `last_id`, oldest first"""
+        return self._connection().execute(
+            'SELECT id, channel, event, data FROM events WHERE id > ? ORDER BY id LIMIT ?', (last_id, limit),
+        ).fetchall()
+
+    def last_id(self):
+        return self._connection().execute('SELECT COALESCE(MAX(id), 0) FROM events').fetchone()[0]
+
+
+# -----------------------------
+# In-process pub/sub
+# -----------------------------
+class Subscription:
+    """One open stream: its channels, a queue of pending events and the last id delivered"""
+
+    def __init__(self, channels, last_id):
+        self.channels = frozenset(channels)
+        self.last_id = last_id
+        self.queue = asyncio.Queue()
+
+    def offer(self, rows):
+        for row in rows:
+            if row[0] > self.last_id and row[1] in self.channels:
+                self.queue.put_nowait(row)
+                self.last_id = row[0]
+
+
+class EventHub:
+    """Fans events out of the shared log to the streams open in this process
+
+    A single task per process reads the log on an interval (or at once when this
+    process publishes) and hands each row to the subscriptions listening on its
+    channel, so database load does not grow with the number of open streams.
+    """
+
+    def __init__(self, log):
+        self.log = log
+        self._subscriptions = set()
+        self._loop = None
+        self._wake = None
+        self._task = None
+        self._cursor = 0
+
+    async def subscribe(self, channels, last_event_id=None):
+        await self._ensure_running()
+        if not self._subscriptions:
+            # The reader skips the log while nobody listens, so its cursor may be far behind
+            self._cursor = max(self._cursor, await asyncio.to_thread(self.log.last_id))
+        subscription = Subscription(channels, self._cursor)
+        if last_event_id is not None and last_event_id < self._cursor:
+            # Replay what the client missed while reconnecting
+            subscription.last_id = last_event_id
+            subscription.offer(await asyncio.to_thread(self.log.since, last_event_id))
+            subscription.last_id = max(subscription.last_id, self._cursor)
+        self._subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        self._subscriptions.discard(subscription)
+
+    async def _ensure_running(self):
+        loop = asyncio.get_running_loop()
+        if self._task is not None and not self._task.done() and self._loop is loop:
+            return
+        self._loop = loop
+        self._wake = asyncio.Event()
+        self._cursor = await asyncio.to_thread(self.log.last_id)
+        self._task = loop.create_task(self._run())
+
+    def wake(self):
+        """Called from any thread after a publish in this process"""
+        loop, wake = self._loop, self._wake
+        if loop is not None and wake is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(wake.set)
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), EVENT_BUS_POLL_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            if not self._subscriptions:
+                continue
+            try:
+                rows = await asyncio.to_thread(self.log.since, self._cursor)
+            except sqlite3.Error:
+                logger.exception('Reading the event log failed')
+                continue
+            if not rows:
+                continue
+            self._cursor = rows[-1][0]
+            for subscription in list(self._subscriptions):
+                subscription.offer(rows)
+
+
+log = EventLog(EVENT_BUS_PATH)
+hub = EventHub(log)
+
+
+def publish(channel, event, data):
+    """Append an event to the shared log and wake this process's streams"""
+    try:
+        log.append(channel, event, data)
+    except sqlite3.Error:
+        # Pushes are best effort; pages still poll as a fallback
+        logger.exception('Publishing %s to %s failed', event, channel)
+        return
+    hub.wake()
+
+
+def publish_many(rows):
+    """publish() for [(channel, event, data)], written in one transaction"""
+    if not rows:
+        return
+    try:
+        log.append_many(rows)
+    except sqlite3.Error:
+        logger.exception('Publishing %d events failed', len(rows))
+        return
+    hub.wake()
+
+
+def publish_on_commit(channel, event, data):
+    transaction.on_commit(lambda: publish(channel, event, data))
+
+
+# -----------------------------
+# Streaming
+# -----------------------------
+def format_event(row):
+    pk, _, event, data = row
+    return f'id: {pk}\nevent: {event}\ndata: {data}\n\n'
+
+
+async def stream(subscription):
+    """SSE body for a subscription; ends after SSE_MAX_AGE so the browser reconnects"""
+    deadline = time.monotonic() + SSE_MAX_AGE
+    try:
+        yield f'retry: {SSE_RETRY_MS}\n\n'
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            try:
+                row = await asyncio.wait_for(subscription.queue.get(), min(SSE_KEEPALIVE, remaining))
+            except asyncio.TimeoutError:
+                yield ': keepalive\n\n'
+                continue
+            yield format_event(row)
+            while not subscription.queue.empty():
+                yield format_event(subscription.queue.get_nowait())
+    finally:
+        hub.unsubscribe(subscription)
+
+
+# -----------------------------
+# Signal receivers
+# -----------------------------
+def notification_created(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        publish_on_commit(user_channel(instance.receiver_id), 'notification', {'id': instance.pk})
+
+
+def message_created(sender, instance, created, raw=False, **kwargs):
+    if not created or raw:
+        return
+    data = {'id': instance.pk, 'sender_id': instance.sender_id, 'recipient_id': instance.recipient_id}
+    for user_id in {instance.sender_id, instance.recipient_id}:
+        publish_on_commit(user_channel(user_id), 'message', data)
+
+
+def group_message_created(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        publish_on_commit(group_channel(instance.group_chat_id), 'group_message', {
+            'id': instance.pk, 'chat_id': instance.group_chat_id, 'sender_id': instance.sender_id,
+        })
@@ -0,0 +1,259 @@
+import tempfile
+from dataclasses import dataclass
+from typing import Callable
+
+from django.conf import settings
+from django.db.models import F
+from django.http import FileResponse
+from django.utils import timezone
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Alignment, Border, Font, NamedStyle, PatternFill, Side
+from openpyxl.utils import get_column_letter
+
+from .models import Budget, Project, Proposal, Task, User
+
+XLSX_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+# Bytes of a finished workbook held in memory before it spills to a temporary file
+EXCEL_SPOOL_MAX_SIZE = getattr(settings, 'EXCEL_SPOOL_MAX_SIZE', 8 * 1024 * 1024)
+
+# Rows fetched from the database per round trip
+EXPORT_CHUNK_SIZE = 2000
+
+CURRENCY_FORMAT = '₱#,##0.00'
+
+
+# -----------------------------
+# Styles
+# -----------------------------
+def _named_styles():
+    thin = Side(style='thin')
+    border = Border(left=thin, right=thin, top=thin, bottom=thin)
+    return [
+        NamedStyle(
+            name='export_header', font=Font(bold=True, color='FFFFFF'), border=border,
+            fill=PatternFill(start_color='0072CE', end_color='0072CE', fill_type='solid'),
+            alignment=Alignment(horizontal='center', vertical='center', wrap_text=True),
+        ),
+        NamedStyle(name='export_cell', border=border, alignment=Alignment(wrap_text=True)),
+        NamedStyle(name='export_currency', border=border, number_format=CURRENCY_FORMAT),
+        NamedStyle(name='export_title', font=Font(bold=True, size=14, color='0072CE')),
+        NamedStyle(name='export_subtitle', font=Font(bold=True, size=11)),
+        NamedStyle(name='export_note', font=Font(italic=True, color='666666')),
+        NamedStyle(name='export_amount', number_format=CURRENCY_FORMAT),
+    ]
+
+
+def workbook():
+    """A write-only Workbook with the export named styles registered
+
+    Rows are streamed to the worksheet's temporary file as they are appended,
+    and each cell refers to a shared named style rather than its own Font,
+    Border and Fill objects, so memory stays flat however many rows there are.
+    """
+    wb = Workbook(write_only=True)
+    for style in _named_styles():
+        wb.add_named_style(style)
+    return wb
+
+
+def styled_cell(ws, value, style=None):
+    cell = WriteOnlyCell(ws, value)
+    if style:
+        cell.style = style
+    return cell
+
+
+# -----------------------------
+# Columns and values
+# -----------------------------
+def text(value):
+    return value or '-'
+
+
+def money(value):
+    """Blank and zero amounts show as '-'"""
+    return float(value) if value else '-'
+
+
+def amount(value):
+    """Blank amounts count as zero"""
+    return float(value or 0)
+
+
+def day(value):
+    return value.strftime('%Y-%m-%d') if value else '-'
+
+
+def choice(model, field):
+    """get_FOO_display() for a values_list() column"""
+    labels = dict(model._meta.get_field(field).flatchoices)
+    return lambda value: labels.get(value, value) or '-'
+
+
+def user_names():
+    """user id -> full_name() formatter, loaded once per export"""
+    names = {
+        user.pk: user.full_name()
+        for user in User.objects.only('first_name', 'middle_name', 'last_name', 'suffix').iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    }
+    return lambda pk: names.get(pk, '-') if pk else '-'
+
+
+@dataclass(frozen=True)
+class Column:
+    header: str
+    # values_list() path, or an annotation on the queryset
+    field: str
+    width: int
+    format: Callable = text
+    style: str = 'export_cell'
+
+
+def money_column(header, field, width=15, format=money):
+    return Column(header, field, width, format, 'export_currency')
+
+
+def rows(queryset, columns, chunk_size=EXPORT_CHUNK_SIZE):
+    """Formatted rows of `queryset`, projected onto the columns' fields and read `chunk_size` at a time"""
+    formats = [column.format for column in columns]
+    for values in queryset.values_list(*[column.field for column in columns]).iterator(chunk_size=chunk_size):
+        yield [format(value) for format, value in zip(formats, values)]
+
+
+def write_sheet(wb, title, columns, data, freeze=True):
+    """Append a sheet of a header row plus `data` rows, styled per column"""
+    ws = wb.create_sheet(title)
+    for i, column in enumerate(columns, 1):
+        ws.column_dimensions[get_column_letter(i)].width = column.width
+    if freeze:
+        ws.freeze_panes = 'A2'
+    ws.append([styled_cell(ws, column.header, 'export_header') for column in columns])
+    # append() writes a row out before returning, so one styled cell per column serves every row
+    cells = [styled_cell(ws, None, column.style) for column in columns]
+    for row in data:
+        for cell, value in zip(cells, row):
+            cell.value = value
+        ws.append(cells)
+    return ws
+
+
+def response(wb, filename):
+    """Save `wb` to a spooled temporary file and stream it as an attachment"""
+    output = tempfile.SpooledTemporaryFile(max_size=EXCEL_SPOOL_MAX_SIZE)
+    wb.save(output)
+    output.seek(0)
+    # FileResponse closes the file once it has been sent
+    return FileResponse(output, as_attachment=True, filename=filename, content_type=XLSX_CONTENT_TYPE)
+
+
+def stamped(name):
+    return f'{name}_{timezone.now().strftime("%Y%m%d")}.xlsx'
+
+
+# -----------------------------
+# Sheets
+# -----------------------------
+def project_columns():
+    """The full Projects table, column for column"""
+    return [
+        # Identification
+        Column('No.', 'no', 6), Column('Code', 'project_code', 15), Column('Year', 'year', 6),
+        # Basic Info
+        Column('Project Title', 'project_title', 40), Column('Agency/Grantee', 'agency_grantee', 25),
+        Column('Program', 'program', 12), Column('Type', 'type_of_project', 15), Column('Status', 'status', 12),
+        Column('Remarks', 'remarks', 20),
+        # Location
+        Column('Municipality', 'mun', 12), Column('Province', 'province', 12), Column('District', 'district', 8),
+        # Beneficiaries
+        Column('Beneficiary', 'beneficiary', 25), Column('Beneficiary Address', 'beneficiary_address', 30),
+        Column('Contact', 'contact_details', 20), Column('Proponent', 'proponent_details', 25),
+        Column('No. Beneficiaries', 'no_of_beneficiaries', 8), Column('Male', 'male', 6), Column('Female', 'female', 6),
+        Column('Total', 'total_beneficiaries', 6), Column('Senior Citizen', 'senior_citizen', 6), Column('PWD', 'pwd', 6),
+        # Financials
+        Column('Fund Source', 'fund_source', 15), money_column('Approved Budget', 'funds'),
+        money_column('Total Project Cost', 'total_project_cost'), money_column('Counterpart Fund', 'counterpart_funds'),
+        money_column('Internal Managed Fund', 'internally_managed_fund'),
+        money_column('Total Released', 'total_funds_released'),
+        # Tranches
+        money_column('1st Tranche', 'first_tranche', 12), money_column('2nd Tranche', 'second_tranche', 12),
+        money_column('3rd Tranche', 'third_tranche', 12),
+        # Dates & Timeline
+        Column('Start Date', 'project_start', 12, day), Column('End Date', 'project_end', 12, day),
+        Column('Release Date', 'date_of_release', 12, day), Column('Completion Date', 'date_of_completion', 12, day),
+        Column('Duration', 'original_project_duration', 15), Column('Extension Date', 'extension_date', 15),
+        # Liquidation
+        Column('Check/ADA No.', 'check_ada_no', 15), Column('Liquidation Status', 'status_of_liquidation', 15),
+        Column('Liquidation Date', 'date_of_liquidation', 12, day), money_column('Amount Liquidated', 'amount_liquidated'),
+        # Tech & Interventions
+        Column('Technologies Availed', 'availed_technologies', 30), Column('Interventions', 'interventions', 30),
+        # Documents & Status
+        Column('TAFR', 'tafr', 10), Column('PAR', 'par', 10), Column('Terminal Report', 'terminal_report', 12),
+        Column('Invoice/Receipt', 'invoice_receipt', 12), Column('Equipment List', 'list_of_eqpt', 20),
+        # Donation
+        Column('Donated', 'donated', 10), Column('Donation Date', 'date_of_donation', 12, day),
+        Column('Donation Status', 'donation_status', 15),
+        # Other
+        Column('PME Visit', 'pme_visit', 10), Column("Women's Group", 'womens_group', 12),
+        Column('Inspection/Tagging Date', 'date_of_inspection_tagging', 12, day),
+        Column('Receipt by Grantee', 'acknowledgment_receipt_by_grantee', 15),
+    ]
+
+
+def projects():
+    return Project.objects.order_by('no', '-date_created')
+
+
+def budget_columns(names, master=False):
+    columns = [
+        Column('Fiscal Year', 'fiscal_year', 12), Column('Fund Source', 'fund_source', 30),
+        # total_amount / remaining_amount are model properties over the stored values
+        money_column('Total Amount', 'total_equipment_value', 18, amount),
+        money_column('Remaining Amount', 'remaining', 18, amount),
+    ]
+    if master:
+        columns.append(money_column('Spent', 'delivered_equipment_value', 18, amount))
+    columns += [Column('Status', 'status', 12), Column('Date Allocated', 'date_allocated', 15, day)]
+    if not master:
+        columns.append(Column('Created By', 'created_by', 25, names))
+    return columns
+
+
+def budgets():
+    return Budget.objects.annotate(
+        remaining=F('total_equipment_value') - F('delivered_equipment_value'),
+    ).order_by('-fiscal_year')
+
+
+def proposal_columns(names, master=False):
+    columns = [
+        Column('Title', 'title', 40), Column('Status', 'status', 15, choice(Proposal, 'status')),
+        money_column('Proposed Amount', 'proposed_amount', 18, amount), money_column('Approved Amount', 'approved_amount', 18),
+        Column('Submitted By', 'submitted_by', 25, names), Column('Submission Date', 'submission_date', 15, day),
+        Column('Processed By', 'processed_by', 25, names), Column('Beneficiary', 'beneficiary', 25, names),
+    ]
+    if not master:
+        columns.append(Column('Location', 'location', 25))
+    columns += [Column('Municipality', 'municipality', 15), Column('Province', 'province', 15)]
+    return columns
+
+
+def proposals():
+    return Proposal.objects.order_by('-submission_date')
+
+
+def task_columns(names, master=False):
+    columns = [Column('Task Title', 'title', 30), Column('Project', 'project__project_title', 40)]
+    if not master:
+        columns.append(Column('Description', 'description', 50))
+    columns += [
+        Column('Assigned To', 'assigned_to', 25, names), Column('Status', 'status', 15, choice(Task, 'status')),
+        Column('Due Date', 'due_date', 12, day), Column('Completion Date', 'completion_date', 15, day),
+        Column('Location', 'location_name', 30),
+    ]
+    return columns
+
+
+def tasks():
+    return Task.objects.order_by('-due_date')
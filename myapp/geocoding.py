@@ -0,0 +1,112 @@
+import math
+from decimal import Decimal
+
+from .models import GeocodeCache
+
+
+# Biliran municipalities with their town-centre coordinates and main barangays
+BILIRAN_MUNICIPALITIES = {
+    'Almeria': {'lat': 11.6167, 'lng': 124.4333, 'barangays': ['Poblacion', 'Caucab', 'Tabunan', 'Pili', 'Imelda']},
+    'Biliran': {'lat': 11.5833, 'lng': 124.4667, 'barangays': ['Poblacion', 'Busali', 'Hugpa', 'Caraycaray', 'Cabungaan']},
+    'Cabucgayan': {'lat': 11.4667, 'lng': 124.5500, 'barangays': ['Poblacion', 'Looc', 'Lanawan', 'Manlabang', 'Canila']},
+    'Caibiran': {'lat': 11.5500, 'lng': 124.5833, 'barangays': ['Poblacion', 'Victory', 'Palanay', 'Cabibihan', 'Maurang']},
+    'Culaba': {'lat': 11.6500, 'lng': 124.5500, 'barangays': ['Poblacion', 'Virginia', 'Acaban', 'Salvacion', 'Marvel']},
+    'Kawayan': {'lat': 11.6667, 'lng': 124.5000, 'barangays': ['Poblacion', 'Tucdao', 'Uson', 'Inasuyan', 'Balaquid']},
+    'Maripipi': {'lat': 11.7833, 'lng': 124.3333, 'barangays': ['Poblacion', 'Binalayan', 'Casibang', 'Ermita', 'Agutay']},
+    'Naval': {'lat': 11.5667, 'lng': 124.4000, 'barangays': ['Poblacion', 'Atipolo', 'Caray-Caray', 'Larrazabal', 'Sto. Niño']},
+}
+
+PROVINCE = 'Biliran'
+
+# Coordinates are cached at 3 decimals (~110 m)
+PRECISION = Decimal('0.001')
+
+# Points further than this from every gazetteer place are left unnamed
+MAX_DISTANCE_KM = 25.0
+
+EARTH_RADIUS_KM = 6371.0088
+
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    """Distance in km between two points in degrees; spatial.haversine_km is the batched form"""
+    lat1, lng1, lat2, lng2 = map(math.radians, (lat1, lng1, lat2, lng2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+    # Rounding can push `a` just past 1 for antipodal points
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(min(a, 1.0)))
+
+
+def cache_key(lat, lng):
+    """(lat, lng) rounded to the cache precision, as Decimals"""
+    return (
+        Decimal(str(lat)).quantize(PRECISION),
+        Decimal(str(lng)).quantize(PRECISION),
+    )
+
+
+def nearest_place(lat, lng):
+    """(place name, distance km) of the closest gazetteer municipality"""
+    name, distance = min(
+        ((mun, haversine_km(lat, lng, info['lat'], info['lng'])) for mun, info in BILIRAN_MUNICIPALITIES.items()),
+        key=lambda pair: pair[1],
+    )
+    return f'{name}, {PROVINCE}', distance
+
+
+# -----------------------------
+# Lookups
+# -----------------------------
+def reverse_many(points):
+    """{cache key: place name or None} for an iterable of (lat, lng) pairs
+
+    One query reads the cached keys; the rest are resolved from the gazetteer and
+    stored with a single bulk insert. No network access.
+    """
+    keys = {cache_key(lat, lng) for lat, lng in points if lat is not None and lng is not None}
+    if not keys:
+        return {}
+
+    found = {}
+    rows = GeocodeCache.objects.filter(
+        latitude__in={lat for lat, _ in keys}, longitude__in={lng for _, lng in keys},
+    ).values_list('latitude', 'longitude', 'place_name', 'distance_km')
+    for lat, lng, place_name, distance in rows:
+        if (lat, lng) in keys:
+            found[(lat, lng)] = (place_name, distance)
+
+    new_entries = []
+    for key in keys - set(found):
+        place_name, distance = nearest_place(float(key[0]), float(key[1]))
+        found[key] = (place_name, distance)
+        new_entries.append(GeocodeCache(latitude=key[0], longitude=key[1], place_name=place_name, distance_km=distance))
+    if new_entries:
+        GeocodeCache.objects.bulk_create(new_entries, ignore_conflicts=True)
+
+    return {
+        key: place_name if distance <= MAX_DISTANCE_KM else None
+        for key, (place_name, distance) in found.items()
+    }
+
+
+def reverse(lat, lng):
+    """Place name for one coordinate pair, or None when it is outside the gazetteer"""
+    if lat is None or lng is None:
+        return None
+    return reverse_many([(lat, lng)]).get(cache_key(lat, lng))
+
+
+def resolve_task_locations(tasks, save=False):
+    """Fill location_name on tasks that have coordinates but no name, in bulk
+
+    With save=True the names are written back with a single bulk_update.
+    """
+    pending = [task for task in tasks if not task.location_name and task.latitude is not None and task.longitude is not None]
+    names = reverse_many((task.latitude, task.longitude) for task in pending)
+    resolved = []
+    for task in pending:
+        name = names.get(cache_key(task.latitude, task.longitude))
+        if name:
+            task.location_name = name
+            resolved.append(task)
+    if save and resolved:
+        type(resolved[0]).objects.bulk_update(resolved, ['location_name'], batch_size=500)
+    return resolved
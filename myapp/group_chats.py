@@ -0,0 +1,70 @@
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import GroupChatMember, GroupChatMessage
+
+
+# -----------------------------
+# Queries
+# -----------------------------
+def memberships(user):
+    """The user's active memberships for the group chat lists, with their chat, project and member count
+
+    One query: the chat and project are joined and the member count is a
+    correlated subquery on the (group_chat, user) index. Counting through a
+    join instead grouped every member row of every chat.
+    """
+    active_members = GroupChatMember.objects.filter(
+        group_chat_id=OuterRef('group_chat_id'), is_active=True,
+    ).order_by().values('group_chat_id').annotate(total=Count('id')).values('total')
+    return GroupChatMember.objects.filter(user=user, is_active=True).select_related(
+        'group_chat', 'group_chat__project',
+    ).annotate(
+        member_count=Coalesce(Subquery(active_members, output_field=IntegerField()), 0),
+    ).order_by('-group_chat__updated_at')
+
+
+def total_unread(user):
+    return GroupChatMember.objects.filter(user=user, is_active=True).aggregate(
+        total=Sum('unread_count'),
+    )['total'] or 0
+
+
+# -----------------------------
+# Unread counters
+# -----------------------------
+def mark_seen(member):
+    """Opening a chat: stamp last_seen_at and clear the unread counter in one update"""
+    now = timezone.now()
+    GroupChatMember.objects.filter(pk=member.pk).update(last_seen_at=now, unread_count=0)
+    member.last_seen_at, member.unread_count = now, 0
+
+
+def message_created(message):
+    """Count a new message as unread for every other active member, in one update"""
+    GroupChatMember.objects.filter(group_chat_id=message.group_chat_id, is_active=True).exclude(
+        user_id=message.sender_id,
+    ).update(unread_count=F('unread_count') + 1)
+
+
+def rebuild_unread():
+    """Recount every counter from last_seen_at; returns the number of memberships"""
+    # Members who never opened the chat count from when they joined
+    unseen = GroupChatMessage.objects.filter(
+        group_chat_id=OuterRef('group_chat_id'),
+        created_at__gt=Coalesce(OuterRef('last_seen_at'), OuterRef('joined_at')),
+    ).exclude(
+        sender_id=OuterRef('user_id'),
+    ).order_by().values('group_chat_id').annotate(total=Count('id')).values('total')
+    return GroupChatMember.objects.update(
+        unread_count=Coalesce(Subquery(unseen, output_field=IntegerField()), 0),
+    )
+
+
+# -----------------------------
+# Signal receivers
+# -----------------------------
+def message_saved(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        message_created(instance)
@@ -0,0 +1,117 @@
+"""
+Management command to benchmark the streaming Excel export against a per-cell styled in-memory Workbook.
+Run with: python manage.py benchmark_excel_export [--rows 200000 --compare-rows 20000]
+"""
+import time
+from datetime import date
+from decimal import Decimal
+from io import BytesIO
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from openpyxl import Workbook
+from openpyxl.styles import Alignment, Border, Font, PatternFill, Side
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from myapp import excel_export
+from myapp.models import Project
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Peak memory and time of the projects Excel export, streaming vs in-memory (rolled back afterwards)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=200000, help='Projects to export with the streaming engine')
+        parser.add_argument('--compare-rows', type=int, default=20000,
+                            help='Projects to export with the in-memory Workbook afterwards; 0 skips it')
+        parser.add_argument('--chunk-size', type=int, default=excel_export.EXPORT_CHUNK_SIZE)
+
+    @staticmethod
+    def _peak_rss():
+        """Peak resident set size of this process so far, in MB"""
+        if resource is None:
+            return None
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # kilobytes on Linux, bytes on macOS
+        return peak / 2 ** 20 if peak > 2 ** 32 else peak / 2 ** 10
+
+    def _measured(self, label, rows, func):
+        start = time.perf_counter()
+        size = func()
+        elapsed = time.perf_counter() - start
+        peak = self._peak_rss()
+        self.stdout.write(
+            f'{label:<12} {rows:8d} rows {elapsed:8.2f} s {rows / elapsed:9.0f} rows/s '
+            f'{size / 2 ** 20:7.1f} MB file, peak RSS ' + (f'{peak:.0f} MB' if peak is not None else 'n/a')
+        )
+        return peak
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self._run(options)
+                raise Rollback
+        except Rollback:
+            pass
+
+    def _run(self, options):
+        rows, compare_rows = options['rows'], options['compare_rows']
+        # Inserted a batch at a time so building them does not set the peak
+        for start in range(0, max(rows, compare_rows), 2000):
+            Project.objects.bulk_create([
+                Project(
+                    no=i, project_code=f'BENCH-{i:06d}', year=2020 + i % 6, project_title=f'Benchmark project {i}',
+                    agency_grantee='Benchmark Cooperative', program='SETUP', type_of_project='Equipment',
+                    status='ongoing', mun='Naval', province='Biliran', beneficiary=f'Beneficiary {i}',
+                    male=i % 40, female=i % 35, funds=Decimal('1250000.00'), total_project_cost=Decimal('1500000.00'),
+                    first_tranche=Decimal('625000.00'), project_start=date(2024, 1, 1), project_end=date(2025, 6, 30),
+                )
+                for i in range(start, min(start + 2000, max(rows, compare_rows)))
+            ])
+        baseline = self._peak_rss()
+        if baseline is not None:
+            self.stdout.write(f'peak RSS before exporting {baseline:.0f} MB')
+
+        # Streaming first: the in-memory run can only raise the process peak afterwards
+        self._measured('streaming', rows, lambda: self._streaming(rows, options['chunk_size']))
+        if compare_rows:
+            self._measured('in-memory', compare_rows, lambda: self._in_memory(compare_rows))
+        self.stdout.write(self.style.SUCCESS('Done'))
+
+    def _streaming(self, rows, chunk_size):
+        columns = excel_export.project_columns()
+        wb = excel_export.workbook()
+        excel_export.write_sheet(
+            wb, 'Projects', columns, excel_export.rows(excel_export.projects()[:rows], columns, chunk_size),
+        )
+        response = excel_export.response(wb, 'benchmark.xlsx')
+        # Read the file rather than response.close(), which would close the connection mid-transaction
+        with response.file_to_stream as output:
+            return sum(len(chunk) for chunk in iter(lambda: output.read(response.block_size), b''))
+
+    def _in_memory(self, rows):
+        # The shape of the exports before excel_export: model instances and style objects on every cell
+        columns = excel_export.project_columns()
+        wb = Workbook()
+        ws = wb.active
+        thin = Side(style='thin')
+        for col, column in enumerate(columns, 1):
+            cell = ws.cell(row=1, column=col, value=column.header)
+            cell.font = Font(bold=True, color='FFFFFF')
+            cell.fill = PatternFill(start_color='0072CE', end_color='0072CE', fill_type='solid')
+        for row_num, project in enumerate(excel_export.projects()[:rows], 2):
+            for col, column in enumerate(columns, 1):
+                cell = ws.cell(row=row_num, column=col, value=column.format(getattr(project, column.field)))
+                cell.border = Border(left=thin, right=thin, top=thin, bottom=thin)
+                cell.alignment = Alignment(wrap_text=True)
+        output = BytesIO()
+        wb.save(output)
+        return output.tell()
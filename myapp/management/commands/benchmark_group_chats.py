@@ -0,0 +1,104 @@
+"""
+Management command to benchmark group chat unread counters against counting from last_seen_at.
+Run with: python manage.py benchmark_group_chats [--chats 100 --members 50]
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from myapp import group_chats
+from myapp.models import GroupChat, GroupChatMember, GroupChatMessage, User
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Time the group chat list with per-member counters vs per-chat unread counts (rolled back afterwards)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chats', type=int, default=100)
+        parser.add_argument('--members', type=int, default=50)
+        parser.add_argument('--messages', type=int, default=20, help='Messages per chat')
+
+    def _timed(self, label, func):
+        queries = []
+
+        def count(execute, sql, params, many, context):
+            queries.append(sql)
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(count):
+            start = time.perf_counter()
+            result = func()
+            elapsed = time.perf_counter() - start
+        self.stdout.write(f'{label:<40} {elapsed * 1000:10.2f} ms {len(queries):6d} queries')
+        return result, elapsed
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self._run(options)
+                raise Rollback
+        except Rollback:
+            pass
+
+    def _run(self, options):
+        chats, members, per_chat = options['chats'], options['members'], options['messages']
+        users = User.objects.bulk_create([
+            User(username=f'bench_chat_{i}', email=f'bench_chat_{i}@example.com', role='dost_staff')
+            for i in range(members)
+        ])
+        reader = users[0]
+        rooms = GroupChat.objects.bulk_create([GroupChat(name=f'Bench {i}', created_by=reader) for i in range(chats)])
+        seen = timezone.now()
+        GroupChatMember.objects.bulk_create([
+            GroupChatMember(group_chat=room, user=user, last_seen_at=seen) for room in rooms for user in users
+        ])
+        self.stdout.write(f'{chats} chats x {members} members, {per_chat} new messages per chat')
+
+        def post_messages():
+            for room in rooms:
+                for i in range(per_chat):
+                    GroupChatMessage.objects.create(group_chat=room, sender=users[1 + i % (members - 1)], content='x')
+
+        _, insert_time = self._timed('post messages (counter update each)', post_messages)
+        self.stdout.write(f'{"  per message":<40} {insert_time / (chats * per_chat) * 1000:10.3f} ms')
+
+        def counted_list():
+            rows = list(GroupChatMember.objects.filter(user=reader, is_active=True).select_related('group_chat'))
+            return {
+                row.group_chat_id: GroupChatMessage.objects.filter(
+                    group_chat_id=row.group_chat_id, created_at__gt=row.last_seen_at,
+                ).exclude(sender=reader).count()
+                for row in rows
+            }
+
+        def aggregated_list():
+            # The same list query, counting unread messages through a join instead of reading the counter
+            rows = group_chats.memberships(reader).annotate(
+                unread=Count('group_chat__messages', filter=Q(group_chat__messages__created_at__gt=seen)
+                             & ~Q(group_chat__messages__sender=reader)),
+            )
+            return {row.group_chat_id: row.unread for row in rows}
+
+        def counter_list():
+            return {row.group_chat_id: row.unread_count for row in group_chats.memberships(reader)}
+
+        counted, counted_time = self._timed('count per chat (N+1)', counted_list)
+        aggregated, aggregated_time = self._timed('aggregate over messages (one join)', aggregated_list)
+        counters, counter_time = self._timed('stored counters', counter_list)
+        if not counted == aggregated == counters:
+            self.stderr.write(self.style.ERROR('Unread counts differ between the methods'))
+            return
+
+        member = GroupChatMember.objects.get(group_chat=rooms[0], user=reader)
+        self._timed('open a chat (mark_seen)', lambda: group_chats.mark_seen(member))
+        self.stdout.write(self.style.SUCCESS(
+            f'chat list {counted_time / counter_time:.1f}x faster than counting per chat, '
+            f'{aggregated_time / counter_time:.1f}x faster than aggregating messages'
+        ))
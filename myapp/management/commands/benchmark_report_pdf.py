@@ -0,0 +1,128 @@
+"""
+Management command to benchmark the chunked full report PDF against one Paragraph-celled Table.
+Run with: python manage.py benchmark_report_pdf [--rows 10000 --compare-rows 10000]
+"""
+import time
+from datetime import date
+from decimal import Decimal
+from io import BytesIO
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import RequestFactory
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import landscape, letter
+from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+from reportlab.platypus import Paragraph, SimpleDocTemplate, Table, TableStyle
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from myapp import pdf_export, views
+from myapp.models import Project, User
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Peak memory and time of the full report PDF projects list, chunked vs one table (rolled back afterwards)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=10000, help='Projects in the report built by export_full_report_pdf')
+        parser.add_argument('--compare-rows', type=int, default=10000,
+                            help='Projects to lay out as one Paragraph-celled Table afterwards; 0 skips it')
+        parser.add_argument('--chunk-size', type=int, default=pdf_export.PDF_TABLE_CHUNK_ROWS)
+
+    @staticmethod
+    def _peak_rss():
+        """Peak resident set size of this process so far, in MB"""
+        if resource is None:
+            return None
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # kilobytes on Linux, bytes on macOS
+        return peak / 2 ** 20 if peak > 2 ** 32 else peak / 2 ** 10
+
+    def _measured(self, label, rows, func):
+        start = time.perf_counter()
+        size = func()
+        elapsed = time.perf_counter() - start
+        peak = self._peak_rss()
+        self.stdout.write(
+            f'{label:<12} {rows:8d} rows {elapsed:8.2f} s {rows / elapsed:9.0f} rows/s '
+            f'{size / 2 ** 20:7.1f} MB file, peak RSS ' + (f'{peak:.0f} MB' if peak is not None else 'n/a')
+        )
+        return peak
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self._run(options)
+                raise Rollback
+        except Rollback:
+            pass
+
+    def _run(self, options):
+        rows, compare_rows = options['rows'], options['compare_rows']
+        total = max(rows, compare_rows)
+        # Inserted a batch at a time so building them does not set the peak
+        for start in range(0, total, 2000):
+            Project.objects.bulk_create([
+                Project(
+                    # The report is filtered to 2025, i.e. the first `rows` projects
+                    no=i, project_code=f'BENCH-{i:06d}', year=2025 if i < rows else 2024, mun='Naval', status='ongoing', program='SETUP',
+                    # One title in four is too long for its column and wraps
+                    project_title=f'Benchmark project {i}' + (' for the upgrading of food processing equipment' if i % 4 == 0 else ''),
+                    agency_grantee='Benchmark Cooperative', funds=Decimal('1250000.00'),
+                    project_start=date(2025, 1, 1), project_end=date(2025, 12, 31),
+                )
+                for i in range(start, min(start + 2000, total))
+            ])
+        admin = User.objects.create_user('benchmark_pdf', 'password', email='benchmark_pdf@example.com', role='admin')
+        baseline = self._peak_rss()
+        if baseline is not None:
+            self.stdout.write(f'peak RSS before exporting {baseline:.0f} MB')
+
+        # Chunked first: the single-table run can only raise the process peak afterwards
+        self._measured('chunked', rows, lambda: self._chunked(admin, options['chunk_size']))
+        if compare_rows:
+            self._measured('one table', compare_rows, lambda: self._one_table(compare_rows))
+        self.stdout.write(self.style.SUCCESS('Done'))
+
+    def _chunked(self, admin, chunk_size):
+        request = RequestFactory().get('/', {
+            # The projects list alone, as in the single-table run
+            'year': '2025', 'include_summary': '0', 'include_equipment': '0', 'include_proposals': '0',
+            'include_charts': '0', 'include_signatory': '0',
+        })
+        request.user = admin
+        pdf_export.PDF_TABLE_CHUNK_ROWS = chunk_size
+        response = views.export_full_report_pdf(request)
+        # Read the file rather than response.close(), which would close the connection mid-transaction
+        with response.file_to_stream as output:
+            return sum(len(chunk) for chunk in iter(lambda: output.read(response.block_size), b''))
+
+    def _one_table(self, rows):
+        # The projects list before pdf_export: model instances, Paragraph cells and one Table
+        styles = getSampleStyleSheet()
+        cell_style = ParagraphStyle('CellStyle', parent=styles['Normal'], fontSize=8, leading=10)
+        data = [['#', 'Project Code', 'Project Title', 'Agency/Grantee', 'Municipality', 'Status', 'Program', 'Funds (PHP)', 'Start Date', 'End Date']]
+        for idx, proj in enumerate(Project.objects.order_by('no')[:rows], 1):
+            data.append([
+                str(idx), proj.project_code, Paragraph(proj.project_title[:50], cell_style),
+                Paragraph(proj.agency_grantee, cell_style), proj.mun, proj.status.title(), proj.program,
+                f'PHP {int(proj.funds):,}', proj.project_start.strftime('%m/%d/%Y'), proj.project_end.strftime('%m/%d/%Y'),
+            ])
+        table = Table(data, colWidths=[25, 60, 150, 100, 70, 60, 50, 80, 65, 65], repeatRows=1)
+        table.setStyle(TableStyle([
+            ('FONTSIZE', (0, 1), (-1, -1), 7),
+            ('GRID', (0, 0), (-1, -1), 0.5, colors.HexColor('#BFDBFE')),
+            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+            *[('BACKGROUND', (0, i), (-1, i), colors.HexColor('#DBEAFE')) for i in range(2, len(data), 2)],
+        ]))
+        output = BytesIO()
+        SimpleDocTemplate(output, pagesize=landscape(letter)).build([table])
+        return output.tell()
@@ -0,0 +1,68 @@
+"""
+Management command to benchmark the NumPy spatial index against the scalar views.haversine_distance.
+Run with: python manage.py benchmark_spatial [--points 100000]
+"""
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand
+
+from myapp import spatial, views
+
+
+class Command(BaseCommand):
+    help = 'Compare batched haversine, radius and k-nearest queries with a scalar Python loop'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--points', type=int, default=100000)
+        parser.add_argument('--radius-km', type=float, default=5.0)
+        parser.add_argument('--k', type=int, default=10)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def _timed(self, label, func):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        self.stdout.write(f'{label:<32} {elapsed * 1000:10.2f} ms')
+        return result, elapsed
+
+    def handle(self, *args, **options):
+        n, radius_km, k = options['points'], options['radius_km'], options['k']
+        rng = np.random.default_rng(options['seed'])
+        # Synthetic points spread over Biliran province
+        lats = rng.uniform(11.45, 11.80, n)
+        lngs = rng.uniform(124.30, 124.62, n)
+        lat, lng = 11.5667, 124.4000  # Naval
+
+        self.stdout.write(f'{n} points, radius {radius_km} km, k={k}')
+        index, _ = self._timed('build index', lambda: spatial.SpatialIndex.from_points(
+            ('task', i, a, b) for i, (a, b) in enumerate(zip(lats.tolist(), lngs.tolist()))
+        ))
+
+        def scalar_distances():
+            return [views.haversine_distance(lat, lng, a, b) for a, b in zip(lats.tolist(), lngs.tolist())]
+
+        # Each scalar query pays for its own distance loop, as it would per request
+        scalar, scalar_time = self._timed('scalar haversine (all points)', scalar_distances)
+        batched, batched_time = self._timed('batched haversine (all points)', lambda: spatial.haversine_km(lat, lng, lats, lngs))
+        max_error = float(np.max(np.abs(np.asarray(scalar) - batched)))
+
+        scalar_hits, scalar_radius_time = self._timed('scalar radius search', lambda: sorted(
+            i for i, d in enumerate(scalar_distances()) if d <= radius_km
+        ))
+        hits, radius_time = self._timed('indexed radius search', lambda: index.within(lat, lng, radius_km))
+
+        scalar_nearest, scalar_knn_time = self._timed('scalar k-nearest', lambda: [
+            i for i, _ in sorted(enumerate(scalar_distances()), key=lambda pair: pair[1])[:k]
+        ])
+        nearest, knn_time = self._timed('indexed k-nearest', lambda: index.nearest(lat, lng, k))
+
+        if sorted(row[1] for row in hits) != scalar_hits or [row[1] for row in nearest] != scalar_nearest:
+            self.stderr.write(self.style.ERROR('Indexed results differ from the scalar scan'))
+            return
+
+        self.stdout.write(f'max |scalar - batched| = {max_error:.2e} km')
+        self.stdout.write(self.style.SUCCESS(
+            f'haversine {scalar_time / batched_time:.1f}x, radius {scalar_radius_time / radius_time:.1f}x, '
+            f'k-nearest {scalar_knn_time / knn_time:.1f}x faster than the scalar loop'
+        ))
@@ -0,0 +1,25 @@
+"""
+Management command to inspect or empty the on-disk cache of rendered report charts.
+Run with: python manage.py chart_cache [--clear]
+"""
+from django.core.management.base import BaseCommand
+
+from myapp import charts
+
+
+class Command(BaseCommand):
+    help = 'Show the size of the chart PNG cache, or clear it'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clear', action='store_true', help='Delete every cached chart')
+
+    def handle(self, *args, **options):
+        if options['clear']:
+            removed = charts.clear()
+            self.stdout.write(self.style.SUCCESS(f'{removed} cached chart(s) removed from {charts.CHART_CACHE_DIR}'))
+            return
+        stats = charts.stats()
+        self.stdout.write(self.style.SUCCESS(
+            f"{stats['entries']} chart(s), {stats['bytes'] / 1024:.1f} KiB in {charts.CHART_CACHE_DIR} "
+            f"(limit {charts.CHART_CACHE_MAX_BYTES / 1024:.0f} KiB)"
+        ))
@@ -0,0 +1,34 @@
+"""
+Management command to fill in missing task location names from the offline Biliran gazetteer.
+Run with: python manage.py geocode_tasks
+"""
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from myapp import geocoding
+from myapp.models import Task
+
+
+class Command(BaseCommand):
+    help = 'Name task locations from their coordinates (no network access)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        tasks = Task.objects.filter(
+            Q(location_name__isnull=True) | Q(location_name=''),
+            latitude__isnull=False, longitude__isnull=False,
+        ).only('id', 'latitude', 'longitude', 'location_name').order_by('id')
+
+        resolved = 0
+        batch = []
+        for task in tasks.iterator(chunk_size=options['batch_size']):
+            batch.append(task)
+            if len(batch) >= options['batch_size']:
+                resolved += len(geocoding.resolve_task_locations(batch, save=True))
+                batch = []
+        if batch:
+            resolved += len(geocoding.resolve_task_locations(batch, save=True))
+
+        self.stdout.write(self.style.SUCCESS(f'{resolved} task location(s) named'))
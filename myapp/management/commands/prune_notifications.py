@@ -0,0 +1,26 @@
+"""
+Management command to archive old read notifications and cap how many each user keeps.
+Run with: python manage.py prune_notifications [--days 90] [--max-per-user 500]
+"""
+from django.core.management.base import BaseCommand
+
+from myapp import notification_retention
+
+
+class Command(BaseCommand):
+    help = 'Move old read notifications, and notifications past the per-user cap, to the gzipped archive'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=notification_retention.NOTIFICATION_RETENTION_DAYS,
+                            help='Archive read notifications older than this many days')
+        parser.add_argument('--max-per-user', type=int, default=notification_retention.NOTIFICATION_MAX_PER_USER,
+                            help='Notifications kept per user; 0 for no cap')
+        parser.add_argument('--batch-size', type=int, default=notification_retention.PRUNE_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        old = notification_retention.archive_read(options['days'], options['batch_size'])
+        capped = notification_retention.enforce_caps(options['max_per_user'], options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'{old} old read notification(s) and {capped} over the per-user cap archived '
+            f'to {notification_retention.NOTIFICATION_ARCHIVE_DIR}'
+        ))
@@ -0,0 +1,15 @@
+"""
+Management command to recompute the inbox conversation summaries from the messages.
+Run with: python manage.py rebuild_conversations
+"""
+from django.core.management.base import BaseCommand
+
+from myapp import conversations
+
+
+class Command(BaseCommand):
+    help = 'Rebuild ConversationSummary rows to repair drift'
+
+    def handle(self, *args, **options):
+        rows = conversations.rebuild()
+        self.stdout.write(self.style.SUCCESS(f'{rows} conversation summaries rebuilt'))
@@ -0,0 +1,23 @@
+"""
+Management command to recompute the dashboard rollup tables from the source rows.
+Run with: python manage.py rebuild_rollups
+"""
+from django.core.management.base import BaseCommand
+
+from myapp import rollups
+from myapp.models import Project
+
+
+class Command(BaseCommand):
+    help = 'Backfill project status buckets, then rebuild project, proposal, task and budget rollup tables to repair drift'
+
+    def handle(self, *args, **options):
+        self.stdout.write('Rebuilding dashboard rollups...\n')
+
+        # Buckets written by raw SQL or before the bulk paths kept them in step
+        self.stdout.write(f'Project status buckets fixed: {Project.objects.sync_status_buckets()}')
+
+        for name, buckets in rollups.rebuild().items():
+            self.stdout.write(f'{name}: {buckets} buckets')
+
+        self.stdout.write(self.style.SUCCESS('\nRollups rebuilt!'))
@@ -0,0 +1,88 @@
+"""
+Management command to render queued PDF/Excel report jobs in a pool of worker processes.
+Run with: python manage.py run_report_worker [--workers 4] [--once]
+"""
+import multiprocessing
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from myapp import report_jobs
+
+
+class Command(BaseCommand):
+    help = 'Process queued report jobs (ReportJob) with a process pool'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=min(4, os.cpu_count() or 1),
+                            help='Worker processes; 0 renders jobs in this process')
+        parser.add_argument('--once', action='store_true', help='Exit when the queue is empty')
+        parser.add_argument('--poll-interval', type=float, default=2.0)
+        parser.add_argument('--stale-after', type=int, default=1800,
+                            help='Seconds after which a running job is assumed lost and queued again')
+
+    def handle(self, *args, **options):
+        requeued = report_jobs.requeue_stale(options['stale_after'])
+        pruned = report_jobs.prune()
+        if requeued or pruned:
+            self.stdout.write(f'{requeued} stale job(s) requeued, {pruned} expired job(s) pruned')
+
+        try:
+            if options['workers'] <= 0:
+                processed = self._run_inline(options)
+            else:
+                processed = self._run_pool(options)
+        except KeyboardInterrupt:
+            self.stdout.write('Stopping report worker')
+            return
+        self.stdout.write(self.style.SUCCESS(f'{processed} report job(s) processed'))
+
+    def _report(self, job_id, status):
+        self.stdout.write(f'Report job #{job_id}: {status}')
+
+    def _run_inline(self, options):
+        processed = 0
+        while True:
+            # Rendering inline leaves no beat while a job runs; the pages export directly meanwhile
+            report_jobs.heartbeat()
+            claimed = report_jobs.claim(1)
+            if not claimed:
+                if options['once']:
+                    return processed
+                time.sleep(options['poll_interval'])
+                continue
+            self._report(claimed[0], report_jobs.run_job(claimed[0]))
+            processed += 1
+
+    def _run_pool(self, options):
+        workers = options['workers']
+        processed = 0
+        running = {}
+        # Spawned workers set Django up themselves and open their own database connections
+        connections.close_all()
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=django.setup) as pool:
+            while True:
+                report_jobs.heartbeat()
+                for job_id in report_jobs.claim(workers - len(running)):
+                    running[pool.submit(report_jobs.run_job_in_worker, job_id)] = job_id
+                if not running:
+                    if options['once']:
+                        return processed
+                    time.sleep(options['poll_interval'])
+                    continue
+
+                done, _ = wait(running, timeout=options['poll_interval'], return_when=FIRST_COMPLETED)
+                for future in done:
+                    job_id = running.pop(future)
+                    try:
+                        status = future.result()
+                    except Exception as e:
+                        report_jobs.mark_failed(job_id, e)
+                        status = 'failed'
+                    self._report(job_id, status)
+                    processed += 1
@@ -8,6 +8,7 @@ from decimal import Decimal
 from datetime import timedelta
 import random
 
+from myapp.geocoding import BILIRAN_MUNICIPALITIES
 from myapp.models import (
     User, Budget, Proposal, Project, Task, 
     BudgetTransaction, Notification, AuditLog, ApprovalLog, ProjectExpense
@@ -18,16 +19,7 @@ class Command(BaseCommand):
     help = 'Clear all data and seed fresh Biliran-focused sample data'
 
     # Biliran Municipalities with their coordinates
-    MUNICIPALITIES = {
-        'Almeria': {'lat': 11.6167, 'lng': 124.4333, 'barangays': ['Poblacion', 'Caucab', 'Tabunan', 'Pili', 'Imelda']},
-        'Biliran': {'lat': 11.5833, 'lng': 124.4667, 'barangays': ['Poblacion', 'Busali', 'Hugpa', 'Caraycaray', 'Cabungaan']},
-        'Cabucgayan': {'lat': 11.4667, 'lng': 124.5500, 'barangays': ['Poblacion', 'Looc', 'Lanawan', 'Manlabang', 'Canila']},
-        'Caibiran': {'lat': 11.5500, 'lng': 124.5833, 'barangays': ['Poblacion', 'Victory', 'Palanay', 'Cabibihan', 'Maurang']},
-        'Culaba': {'lat': 11.6500, 'lng': 124.5500, 'barangays': ['Poblacion', 'Virginia', 'Acaban', 'Salvacion', 'Marvel']},
-        'Kawayan': {'lat': 11.6667, 'lng': 124.5000, 'barangays': ['Poblacion', 'Tucdao', 'Uson', 'Inasuyan', 'Balaquid']},
-        'Maripipi': {'lat': 11.7833, 'lng': 124.3333, 'barangays': ['Poblacion', 'Binalayan', 'Casibang', 'Ermita', 'Agutay']},
-        'Naval': {'lat': 11.5667, 'lng': 124.4000, 'barangays': ['Poblacion', 'Atipolo', 'Caray-Caray', 'Larrazabal', 'Sto. Niño']},
-    }
+    MUNICIPALITIES = BILIRAN_MUNICIPALITIES
 
     # Project types/programs
     PROGRAMS = ['SETUP', 'GIA', 'CEST', 'STARBOOKS', 'TAPI']
@@ -0,0 +1,28 @@
+"""
+Management command to notify proponents of tasks that have become overdue.
+Run with: python manage.py sweep_overdue [--loop --interval 3600]
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from myapp import overdue
+
+
+class Command(BaseCommand):
+    help = 'Flag newly overdue tasks and notify their proponents (schedule daily, e.g. from cron)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help='Keep sweeping instead of exiting after one pass')
+        parser.add_argument('--interval', type=int, default=3600, help='Seconds between sweeps with --loop')
+
+    def handle(self, *args, **options):
+        try:
+            while True:
+                flagged = overdue.sweep()
+                self.stdout.write(self.style.SUCCESS(f'{flagged} overdue task(s) flagged'))
+                if not options['loop']:
+                    return
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            self.stdout.write('Stopping overdue sweeper')
@@ -7,6 +7,9 @@ logger = logging.getLogger(__name__)
 
 class NoCacheMiddleware(MiddlewareMixin):
     def process_response(self, request, response):
+        # Responses validated by ETag (e.g. the project map) set their own Cache-Control
+        if response.has_header('ETag'):
+            return response
         # Add no-cache headers to all responses
         response['Cache-Control'] = 'no-store, no-cache, must-revalidate, max-age=0'
         response['Pragma'] = 'no-cache'
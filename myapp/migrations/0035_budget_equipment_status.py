@@ -10,15 +10,18 @@ class Migration(migrations.Migration):
     ]
 
     operations = [
-        migrations.DeleteModel(
-            name='ReportingCache',
+        # The table was already dropped with raw SQL in 0022; only the state needs updating
+        migrations.SeparateDatabaseAndState(
+            state_operations=[migrations.DeleteModel(name='ReportingCache')],
+            database_operations=[migrations.RunSQL('DROP TABLE IF EXISTS myapp_reportingcache;', migrations.RunSQL.noop)],
         ),
         migrations.AlterField(
             model_name='budget',
             name='status',
             field=models.CharField(choices=[('pending_procurement', 'Pending Procurement'), ('available', 'Available for Allocation'), ('partially_allocated', 'Partially Allocated'), ('fully_allocated', 'Fully Allocated'), ('completed', 'Completed'), ('archived', 'Archived')], default='pending_procurement', max_length=25),
         ),
-        migrations.DeleteModel(
-            name='TaskTimeEntry',
+        migrations.SeparateDatabaseAndState(
+            state_operations=[migrations.DeleteModel(name='TaskTimeEntry')],
+            database_operations=[migrations.RunSQL('DROP TABLE IF EXISTS myapp_tasktimeentry;', migrations.RunSQL.noop)],
         ),
     ]
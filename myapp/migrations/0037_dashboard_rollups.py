@@ -0,0 +1,127 @@
+# Generated by Django 4.2.30 on 2026-10-18 06:41
+
+from decimal import Decimal
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncMonth
+
+
+def populate_rollups(apps, schema_editor):
+    """Seed the rollup tables from existing rows (same buckets as rollups.rebuild)"""
+    Project = apps.get_model('myapp', 'Project')
+    Proposal = apps.get_model('myapp', 'Proposal')
+    Task = apps.get_model('myapp', 'Task')
+    Budget = apps.get_model('myapp', 'Budget')
+    ProjectStatusRollup = apps.get_model('myapp', 'ProjectStatusRollup')
+    ProposalStatusRollup = apps.get_model('myapp', 'ProposalStatusRollup')
+    TaskStatusRollup = apps.get_model('myapp', 'TaskStatusRollup')
+    BudgetRollup = apps.get_model('myapp', 'BudgetRollup')
+
+    projects = {}
+    for row in Project.objects.order_by().values('status', 'mun', 'year').annotate(n=Count('id'), funds=Sum('funds')):
+        bucket = projects.setdefault((row['status'] or '', row['mun'] or '', row['year']), [0, Decimal('0.00')])
+        bucket[0] += row['n']
+        bucket[1] += row['funds'] or Decimal('0.00')
+    ProjectStatusRollup.objects.bulk_create([
+        ProjectStatusRollup(status=status, municipality=mun, year=year, count=n, total_funds=funds)
+        for (status, mun, year), (n, funds) in projects.items()
+    ])
+
+    proposals = {}
+    for row in Proposal.objects.order_by().values('status', 'municipality', month=TruncMonth('submission_date')).annotate(n=Count('id')):
+        key = (row['status'], row['municipality'] or '', row['month'].date().replace(day=1))
+        proposals[key] = proposals.get(key, 0) + row['n']
+    ProposalStatusRollup.objects.bulk_create([
+        ProposalStatusRollup(status=status, municipality=mun, month=month, count=n)
+        for (status, mun, month), n in proposals.items()
+    ])
+
+    TaskStatusRollup.objects.bulk_create([
+        TaskStatusRollup(status=row['status'], assignee_id=row['assigned_to_id'], count=row['n'])
+        for row in Task.objects.order_by().values('status', 'assigned_to_id').annotate(n=Count('id'))
+    ])
+
+    BudgetRollup.objects.bulk_create([
+        BudgetRollup(
+            fund_source=row['fund_source'], fiscal_year=row['fiscal_year'], count=row['n'],
+            total_equipment_value=row['total'] or Decimal('0.00'),
+            delivered_equipment_value=row['delivered'] or Decimal('0.00'),
+        )
+        for row in Budget.objects.order_by().values('fund_source', 'fiscal_year').annotate(
+            n=Count('id'), total=Sum('total_equipment_value'), delivered=Sum('delivered_equipment_value'),
+        )
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0036_add_one_sided_delete_models'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProposalStatusRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(max_length=20)),
+                ('municipality', models.CharField(blank=True, default='', max_length=100)),
+                ('month', models.DateField(help_text='First day of the submission month')),
+                ('count', models.IntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Proposal Status Rollup',
+                'verbose_name_plural': 'Proposal Status Rollups',
+                'unique_together': {('status', 'municipality', 'month')},
+            },
+        ),
+        migrations.CreateModel(
+            name='ProjectStatusRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(blank=True, default='', max_length=100)),
+                ('municipality', models.CharField(blank=True, default='', max_length=100)),
+                ('year', models.IntegerField(blank=True, null=True)),
+                ('count', models.IntegerField(default=0)),
+                ('total_funds', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=18)),
+            ],
+            options={
+                'verbose_name': 'Project Status Rollup',
+                'verbose_name_plural': 'Project Status Rollups',
+                'unique_together': {('status', 'municipality', 'year')},
+            },
+        ),
+        migrations.CreateModel(
+            name='BudgetRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fund_source', models.CharField(max_length=50)),
+                ('fiscal_year', models.PositiveIntegerField()),
+                ('count', models.IntegerField(default=0)),
+                ('total_equipment_value', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=18)),
+                ('delivered_equipment_value', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=18)),
+            ],
+            options={
+                'verbose_name': 'Budget Rollup',
+                'verbose_name_plural': 'Budget Rollups',
+                'unique_together': {('fund_source', 'fiscal_year')},
+            },
+        ),
+        migrations.CreateModel(
+            name='TaskStatusRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(max_length=20)),
+                ('count', models.IntegerField(default=0)),
+                ('assignee', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Task Status Rollup',
+                'verbose_name_plural': 'Task Status Rollups',
+                'unique_together': {('status', 'assignee')},
+            },
+        ),
+        migrations.RunPython(populate_rollups, migrations.RunPython.noop),
+    ]
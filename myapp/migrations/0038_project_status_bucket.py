@@ -0,0 +1,81 @@
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+STATUS_BUCKET_ALIASES = {
+    'proposal': ('proposal', 'proposed', 'new'),
+    'ongoing': ('ongoing', 'on-going', 'in_progress', 'in progress', 'inprogress'),
+    'completed': ('completed', 'complete'),
+    'terminated': ('terminated', 'cancelled', 'canceled'),
+}
+
+
+def bucket_for_status(raw_status):
+    s = str(raw_status or '').strip().lower()
+    for bucket, aliases in STATUS_BUCKET_ALIASES.items():
+        if s in aliases:
+            return bucket
+    return 'unknown'
+
+
+def backfill_status_bucket(apps, schema_editor):
+    """Fill Project.status_bucket and regroup the project rollups by bucket"""
+    Project = apps.get_model('myapp', 'Project')
+    ProjectStatusRollup = apps.get_model('myapp', 'ProjectStatusRollup')
+
+    raw_statuses = Project.objects.order_by().values_list('status', flat=True).distinct()
+    for raw_status in raw_statuses:
+        Project.objects.filter(status=raw_status).update(status_bucket=bucket_for_status(raw_status))
+
+    buckets = {}
+    for row in Project.objects.order_by().values('status_bucket', 'mun', 'year').annotate(n=Count('id'), funds=Sum('funds')):
+        bucket = buckets.setdefault((row['status_bucket'], row['mun'] or '', row['year']), [0, Decimal('0.00')])
+        bucket[0] += row['n']
+        bucket[1] += row['funds'] or Decimal('0.00')
+    ProjectStatusRollup.objects.all().delete()
+    ProjectStatusRollup.objects.bulk_create([
+        ProjectStatusRollup(status_bucket=status_bucket, municipality=mun, year=year, count=n, total_funds=funds)
+        for (status_bucket, mun, year), (n, funds) in buckets.items()
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0037_dashboard_rollups'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='project',
+            name='status_bucket',
+            field=models.CharField(choices=[('proposal', 'Proposal'), ('ongoing', 'Ongoing'), ('completed', 'Completed'), ('terminated', 'Terminated'), ('unknown', 'Unknown')], default='unknown', editable=False, max_length=20),
+        ),
+        migrations.AddIndex(
+            model_name='project',
+            index=models.Index(fields=['status_bucket', 'year', 'mun'], name='myapp_proje_status__05ff39_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='projectstatusrollup',
+            unique_together=set(),
+        ),
+        migrations.RemoveField(
+            model_name='projectstatusrollup',
+            name='status',
+        ),
+        migrations.AddField(
+            model_name='projectstatusrollup',
+            name='status_bucket',
+            field=models.CharField(choices=[('proposal', 'Proposal'), ('ongoing', 'Ongoing'), ('completed', 'Completed'), ('terminated', 'Terminated'), ('unknown', 'Unknown')], default='unknown', max_length=20),
+            preserve_default=False,
+        ),
+        # Every rollup row holds the placeholder bucket until the backfill
+        # regroups them, so the constraint can only go on afterwards.
+        migrations.RunPython(backfill_status_bucket, migrations.RunPython.noop),
+        migrations.AlterUniqueTogether(
+            name='projectstatusrollup',
+            unique_together={('status_bucket', 'municipality', 'year')},
+        ),
+    ]
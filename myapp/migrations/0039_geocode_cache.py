@@ -0,0 +1,29 @@
+# Generated by Django 4.2.30 on 2026-10-18 06:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0038_project_status_bucket'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GeocodeCache',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('latitude', models.DecimalField(decimal_places=3, max_digits=7)),
+                ('longitude', models.DecimalField(decimal_places=3, max_digits=7)),
+                ('place_name', models.CharField(max_length=255)),
+                ('distance_km', models.FloatField(help_text='Distance from the coordinates to the matched gazetteer place')),
+                ('date_created', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Geocode Cache Entry',
+                'verbose_name_plural': 'Geocode Cache',
+                'unique_together': {('latitude', 'longitude')},
+            },
+        ),
+    ]
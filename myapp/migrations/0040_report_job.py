@@ -0,0 +1,43 @@
+# Generated by Django 4.2.30 on 2026-10-18 07:02
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0039_geocode_cache'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReportJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('report_type', models.CharField(choices=[('financial_summary', 'Financial Summary (PDF)'), ('proposal_status', 'Proposal Status (PDF)'), ('approved_projects', 'Approved Projects (PDF)'), ('full_report', 'Full Report (PDF)'), ('master_excel', 'Master Report (Excel)')], max_length=30)),
+                ('params', models.JSONField(blank=True, default=dict)),
+                ('params_hash', models.CharField(help_text='SHA-256 of the report type, canonical parameters and, where the output depends on it, the user', max_length=64)),
+                ('status', models.CharField(choices=[('queued', 'Queued'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], default='queued', max_length=10)),
+                ('output', models.FileField(blank=True, null=True, upload_to='report_jobs/%Y/%m/')),
+                ('filename', models.CharField(blank=True, max_length=255)),
+                ('content_type', models.CharField(blank=True, max_length=100)),
+                ('error', models.TextField(blank=True)),
+                ('date_created', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('requested_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='report_jobs', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Report Job',
+                'verbose_name_plural': 'Report Jobs',
+                'ordering': ['-date_created'],
+                'indexes': [models.Index(fields=['params_hash', 'status', 'finished_at'], name='myapp_repor_params__9fb222_idx'), models.Index(fields=['status', 'date_created'], name='myapp_repor_status_a060b2_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='reportjob',
+            constraint=models.UniqueConstraint(condition=models.Q(('status__in', ['queued', 'running'])), fields=('params_hash',), name='unique_inflight_report_job'),
+        ),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 4.2.30 on 2026-10-18 07:12
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def populate_summaries(apps, schema_editor):
+    """Build the summaries from existing messages (same rules as conversations.rebuild)"""
+    Message = apps.get_model('myapp', 'Message')
+    DeletedMessage = apps.get_model('myapp', 'DeletedMessage')
+    DeletedConversation = apps.get_model('myapp', 'DeletedConversation')
+    ConversationSummary = apps.get_model('myapp', 'ConversationSummary')
+
+    delete_before = {(user_id, partner_id): before for user_id, partner_id, before in
+                     DeletedConversation.objects.values_list('user_id', 'partner_id', 'delete_before')}
+    deleted = set(DeletedMessage.objects.values_list('user_id', 'message_id'))
+
+    summaries = {}
+    rows = Message.objects.order_by('created_at', 'id').values_list('id', 'sender_id', 'recipient_id', 'created_at', 'is_read')
+    for pk, sender_id, recipient_id, created_at, is_read in rows.iterator(chunk_size=5000):
+        if sender_id == recipient_id:
+            continue
+        for user_id, partner_id in ((sender_id, recipient_id), (recipient_id, sender_id)):
+            summary = summaries.setdefault((user_id, partner_id), ConversationSummary(
+                user_id=user_id, partner_id=partner_id, delete_before=delete_before.get((user_id, partner_id)),
+            ))
+            if (user_id, pk) in deleted or (summary.delete_before and created_at <= summary.delete_before):
+                continue
+            summary.last_message_id, summary.last_activity = pk, created_at
+            if user_id == recipient_id and not is_read:
+                summary.unread_count += 1
+    ConversationSummary.objects.bulk_create(summaries.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0040_report_job'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ConversationSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_activity', models.DateTimeField(blank=True, null=True)),
+                ('unread_count', models.PositiveIntegerField(default=0)),
+                ('delete_before', models.DateTimeField(blank=True, null=True)),
+                ('last_message', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='myapp.message')),
+                ('partner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='conversation_summaries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Conversation Summary',
+                'verbose_name_plural': 'Conversation Summaries',
+                'indexes': [models.Index(fields=['user', '-last_activity'], name='myapp_conve_user_id_b9ad34_idx')],
+                'unique_together': {('user', 'partner')},
+            },
+        ),
+        migrations.RunPython(populate_summaries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 4.2.30 on 2026-10-18 07:26
+
+from django.db import migrations, models
+
+
+def key_short_project_notifications(apps, schema_editor):
+    """Give existing short-duration notices their key so saving the project doesn't send them again"""
+    Notification = apps.get_model('myapp', 'Notification')
+    Project = apps.get_model('myapp', 'Project')
+
+    keyed = set()
+    for pk, title in Project.objects.order_by('id').values_list('id', 'project_title'):
+        key = f'project_short:{pk}'
+        notices = Notification.objects.filter(dedupe_key__isnull=True, message__startswith=f"Project '{title}' ").filter(
+            models.Q(message__contains='has a short duration') | models.Q(message__contains='is short in duration'),
+        )
+        for notice_id, receiver_id in notices.order_by('id').values_list('id', 'receiver_id'):
+            if (receiver_id, key) not in keyed:
+                keyed.add((receiver_id, key))
+                Notification.objects.filter(pk=notice_id).update(dedupe_key=key)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0041_conversation_summary'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notification',
+            name='dedupe_key',
+            field=models.CharField(blank=True, max_length=100, null=True),
+        ),
+        migrations.RunPython(key_short_project_notifications, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='notification',
+            constraint=models.UniqueConstraint(fields=('receiver', 'dedupe_key'), name='unique_notification_dedupe_key'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-18 07:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0042_notification_dedupe_key'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['status', 'due_date', 'due_date_notified'], name='myapp_task_status_c9d444_idx'),
+        ),
+    ]
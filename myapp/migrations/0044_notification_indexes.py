@@ -0,0 +1,25 @@
+# Generated by Django 4.2.30 on 2026-10-18 07:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0043_task_overdue_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['receiver', 'status'], name='myapp_notif_receive_ca6ce3_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['receiver', '-timestamp'], name='myapp_notif_receive_7588f4_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['status', 'timestamp'], name='myapp_notif_status_7bc7d3_idx'),
+        ),
+    ]
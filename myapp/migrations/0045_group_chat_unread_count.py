@@ -0,0 +1,34 @@
+# Generated by Django 4.2.30 on 2026-10-18 07:33
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_unread(apps, schema_editor):
+    """Same count as group_chats.rebuild_unread()"""
+    GroupChatMember = apps.get_model('myapp', 'GroupChatMember')
+    GroupChatMessage = apps.get_model('myapp', 'GroupChatMessage')
+    unseen = GroupChatMessage.objects.filter(
+        group_chat_id=OuterRef('group_chat_id'),
+        created_at__gt=Coalesce(OuterRef('last_seen_at'), OuterRef('joined_at')),
+    ).exclude(
+        sender_id=OuterRef('user_id'),
+    ).order_by().values('group_chat_id').annotate(total=Count('id')).values('total')
+    GroupChatMember.objects.update(unread_count=Coalesce(Subquery(unseen, output_field=IntegerField()), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0044_notification_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='groupchatmember',
+            name='unread_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(count_unread, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 4.2.30 on 2026-10-18 08:10
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def stamp_deliveries(apps, schema_editor):
+    # Deliveries start out last changed when they were recorded; tasks keep the migration time
+    ProjectEquipment = apps.get_model('myapp', 'ProjectEquipment')
+    ProjectEquipment.objects.update(date_updated=F('date_created'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0045_group_chat_unread_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='projectequipment',
+            name='date_updated',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='date_updated',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.RunPython(stamp_deliveries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 4.2.30 on 2026-10-18 08:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0046_task_equipment_date_updated'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='auditlog',
+            index=models.Index(fields=['model_name', 'action', 'timestamp', 'id'], name='myapp_audit_model_n_ac2a78_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='budget',
+            index=models.Index(fields=['date_updated', 'id'], name='myapp_budge_date_up_ab46cf_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='extensionrequest',
+            index=models.Index(fields=['date_updated', 'id'], name='myapp_exten_date_up_1ceb3b_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='project',
+            index=models.Index(fields=['date_updated', 'id'], name='myapp_proje_date_up_2c4d4f_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='proposal',
+            index=models.Index(fields=['date_updated', 'id'], name='myapp_propo_date_up_79ce04_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='trancherelease',
+            index=models.Index(fields=['date_updated', 'id'], name='myapp_tranc_date_up_0dc6b8_idx'),
+        ),
+    ]
@@ -4,7 +4,9 @@ from django.conf import settings
 from django.utils import timezone
 from django.core.exceptions import ValidationError
 from django.db.models import Sum, F
-from django.dispatch import receiver
+from django.db.models.functions import Lower, Trim
+from django.db.models.lookups import In
+from django.dispatch import Signal, receiver
 from django.db.models.signals import post_save, post_delete, pre_save
 from decimal import Decimal
 
@@ -147,6 +149,12 @@ class Budget(models.Model):
     date_created = models.DateTimeField(auto_now_add=True)
     date_updated = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # change_feed reads in (date_updated, id) order
+            models.Index(fields=['date_updated', 'id']),
+        ]
+
     @property
     def total_amount(self):
         """Legacy compatibility property - returns total equipment value"""
@@ -196,12 +204,89 @@ class Proposal(models.Model):
     latitude = models.FloatField(blank=True, null=True)
     longitude = models.FloatField(blank=True, null=True)
 
+    class Meta:
+        indexes = [
+            # change_feed reads in (date_updated, id) order
+            models.Index(fields=['date_updated', 'id']),
+        ]
+
     def __str__(self): return self.title
 
 # -------------------------
 # Project (GIA/CEST Schema + Legacy Compatibility)
 # -------------------------
+# Sent after ProjectQuerySet bulk writes (bulk_create, bulk_update, update), which
+# skip post_save; receivers that only need to know that projects changed listen here
+projects_bulk_written = Signal()
+
+
+class ProjectQuerySet(models.QuerySet):
+    """Keeps status_bucket in step with status on the bulk paths that skip Project.save()"""
+
+    def _written(self, rows):
+        if rows:
+            projects_bulk_written.send(sender=self.model)
+        return rows
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        for obj in objs:
+            obj.status_bucket = self.model.bucket_for_status(obj.status)
+        return self._written(super().bulk_create(objs, *args, **kwargs))
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        if 'status' in fields:
+            objs = list(objs)
+            for obj in objs:
+                obj.status_bucket = self.model.bucket_for_status(obj.status)
+            fields = set(fields) | {'status_bucket'}
+        return self._written(super().bulk_update(objs, fields, *args, **kwargs))
+
+    def update(self, **kwargs):
+        if 'status' not in kwargs or 'status_bucket' in kwargs:
+            return self._written(super().update(**kwargs))
+        if not hasattr(kwargs['status'], 'resolve_expression'):
+            return self._written(super().update(status_bucket=self.model.bucket_for_status(kwargs['status']), **kwargs))
+        # An expression: bucket the rows by their new status once it is written
+        pks = list(self.values_list('pk', flat=True))
+        with transaction.atomic(using=self.db):
+            rows = super().update(**kwargs)
+            self.model.objects.filter(pk__in=pks).sync_status_buckets()
+        return self._written(rows)
+
+    def sync_status_buckets(self):
+        """Recompute status_bucket in the database, e.g. after raw SQL; returns the rows fixed"""
+        # Lookups need the output field before the expression is resolved
+        status = Trim(Lower('status'), output_field=models.CharField())
+        bucket = models.Case(
+            *[
+                models.When(In(status, list(aliases)), then=models.Value(name))
+                for name, aliases in self.model.STATUS_BUCKET_ALIASES.items()
+            ],
+            default=models.Value('unknown'),
+            output_field=models.CharField(),
+        )
+        return super().annotate(expected_bucket=bucket).exclude(
+            status_bucket=F('expected_bucket'),
+        ).update(status_bucket=bucket)
+
+
 class Project(models.Model):
+    # Canonical buckets for the free-text `status` column (see bucket_for_status)
+    STATUS_BUCKET_CHOICES = [
+        ('proposal', 'Proposal'),
+        ('ongoing', 'Ongoing'),
+        ('completed', 'Completed'),
+        ('terminated', 'Terminated'),
+        ('unknown', 'Unknown'),
+    ]
+    STATUS_BUCKET_ALIASES = {
+        'proposal': ('proposal', 'proposed', 'new'),
+        'ongoing': ('ongoing', 'on-going', 'in_progress', 'in progress', 'inprogress'),
+        'completed': ('completed', 'complete'),
+        'terminated': ('terminated', 'cancelled', 'canceled'),
+    }
+
     # --- Schema Fields (GIA/CEST) ---
     no = models.IntegerField(blank=True, null=True)
     project_code = models.CharField(max_length=50, blank=True, null=True)
@@ -222,6 +307,7 @@ class Project(models.Model):
     no_of_beneficiaries = models.IntegerField(blank=True, null=True)
     program = models.CharField(max_length=50, blank=True, null=True)
     status = models.CharField(max_length=100, blank=True, null=True)
+    status_bucket = models.CharField(max_length=20, choices=STATUS_BUCKET_CHOICES, default='unknown', editable=False)
     donation_status = models.CharField(max_length=255, blank=True, null=True)
     remarks = models.TextField(blank=True, null=True)
     year = models.IntegerField(blank=True, null=True)
@@ -310,6 +396,32 @@ class Project(models.Model):
     latitude = models.FloatField(blank=True, null=True)
     longitude = models.FloatField(blank=True, null=True)
 
+    objects = ProjectQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status_bucket', 'year', 'mun']),
+            # change_feed reads in (date_updated, id) order
+            models.Index(fields=['date_updated', 'id']),
+        ]
+
+    @classmethod
+    def bucket_for_status(cls, raw_status):
+        """Normalize a free-text status (or a bucket key) into a STATUS_BUCKET_CHOICES key"""
+        s = str(raw_status or '').strip().lower()
+        for bucket, aliases in cls.STATUS_BUCKET_ALIASES.items():
+            if s in aliases:
+                return bucket
+        return 'unknown'
+
+    def save(self, *args, **kwargs):
+        # Keep the indexed status bucket in sync with the free-text status
+        self.status_bucket = self.bucket_for_status(self.status)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'status' in update_fields:
+            kwargs['update_fields'] = set(update_fields) | {'status_bucket'}
+        super().save(*args, **kwargs)
+
     # ----------------------------------------------------
     # COMPATIBILITY LAYER (Properties & Setters)
     # This prevents 'AttributeError' in old views/signals
@@ -529,6 +641,10 @@ class TrancheRelease(models.Model):
     class Meta:
         ordering = ['project', 'tranche_number']
         unique_together = ['project', 'tranche_number']
+        indexes = [
+            # change_feed reads in (date_updated, id) order
+            models.Index(fields=['date_updated', 'id']),
+        ]
         verbose_name = 'Tranche Release'
         verbose_name_plural = 'Tranche Releases'
     
@@ -691,6 +807,13 @@ class Task(models.Model):
     estimated_hours = models.DecimalField(max_digits=8, decimal_places=2, blank=True, null=True, help_text="Estimated hours to complete")
     actual_hours = models.DecimalField(max_digits=8, decimal_places=2, blank=True, null=True, help_text="Actual hours worked")
     due_date_notified = models.BooleanField(default=False)
+    date_updated = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # Newly overdue tasks for the sweep_overdue command
+            models.Index(fields=['status', 'due_date', 'due_date_notified']),
+        ]
 
 # -------------------------
 # Audit Log
@@ -725,6 +848,10 @@ class AuditLog(models.Model):
     
     class Meta:
         ordering = ['-timestamp']
+        indexes = [
+            # change_feed reads delete entries per model in (timestamp, id) order
+            models.Index(fields=['model_name', 'action', 'timestamp', 'id']),
+        ]
         verbose_name = 'Audit Log'
         verbose_name_plural = 'Audit Logs'
     
@@ -752,6 +879,21 @@ class Notification(models.Model):
     link = models.URLField(max_length=500, blank=True, null=True)
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='unread')
     timestamp = models.DateTimeField(default=timezone.now)
+    # Identifies the event a system notification is about (e.g. 'project_short:12');
+    # a receiver gets at most one notification per key
+    dedupe_key = models.CharField(max_length=100, null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Unread count and the bell's latest notifications
+            models.Index(fields=['receiver', 'status']),
+            models.Index(fields=['receiver', '-timestamp']),
+            # Old read notifications for prune_notifications
+            models.Index(fields=['status', 'timestamp']),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['receiver', 'dedupe_key'], name='unique_notification_dedupe_key'),
+        ]
 
 # -------------------------
 # Form Template (Downloadable Forms)
@@ -823,6 +965,12 @@ class ExtensionRequest(models.Model):
     date_approved = models.DateTimeField(blank=True, null=True)
     date_updated = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # change_feed reads in (date_updated, id) order
+            models.Index(fields=['date_updated', 'id']),
+        ]
+
     def __str__(self):
         return f"Extension Request for {self.proposal.title} by {self.proponent.full_name()}"
 
@@ -985,6 +1133,46 @@ class PersonalTask(models.Model):
 # Communication Hub Models
 # -------------------------------
 
+class MessageQuerySet(models.QuerySet):
+    def visible_to(self, user):
+        """Messages the user sent or received, minus their one-sided deletes
+
+        The DeletedMessage rows and the DeletedConversation delete_before
+        watermarks are applied as NOT EXISTS subqueries on their (user, ...)
+        unique indexes, so the cost does not grow with how many the user has.
+        """
+        user_id = getattr(user, 'pk', user)
+        return self.filter(models.Q(sender_id=user_id) | models.Q(recipient_id=user_id)).exclude(
+            models.Exists(DeletedMessage.objects.filter(user_id=user_id, message_id=models.OuterRef('pk'))),
+        ).exclude(
+            models.Exists(DeletedConversation.objects.filter(
+                models.Q(partner_id=models.OuterRef('sender_id')) | models.Q(partner_id=models.OuterRef('recipient_id')),
+                user_id=user_id,
+                delete_before__gte=models.OuterRef('created_at'),
+            )),
+        )
+
+
+class GroupChatMessageQuerySet(models.QuerySet):
+    def visible_to(self, user):
+        """Group chat messages minus the user's one-sided deletes
+
+        Like MessageQuerySet.visible_to(): DeletedGroupChatMessage rows and
+        DeletedGroupChat delete_before watermarks become NOT EXISTS subqueries.
+        Membership is left to the caller.
+        """
+        user_id = getattr(user, 'pk', user)
+        return self.exclude(
+            models.Exists(DeletedGroupChatMessage.objects.filter(user_id=user_id, message_id=models.OuterRef('pk'))),
+        ).exclude(
+            models.Exists(DeletedGroupChat.objects.filter(
+                user_id=user_id,
+                group_chat_id=models.OuterRef('group_chat_id'),
+                delete_before__gte=models.OuterRef('created_at'),
+            )),
+        )
+
+
 class Message(models.Model):
     """Direct messaging between users"""
     MESSAGE_TYPES = [
@@ -1006,6 +1194,8 @@ class Message(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = MessageQuerySet.as_manager()
+
     class Meta:
         ordering = ['-created_at']
         indexes = [
@@ -1022,6 +1212,8 @@ class Message(models.Model):
             self.is_read = True
             self.read_at = timezone.now()
             self.save(update_fields=['is_read', 'read_at'])
+            from .conversations import message_read
+            message_read(self)
 
 class GroupChat(models.Model):
     """Group chat rooms for project teams"""
@@ -1056,6 +1248,8 @@ class GroupChatMember(models.Model):
     is_active = models.BooleanField(default=True)
     joined_at = models.DateTimeField(auto_now_add=True)
     last_seen_at = models.DateTimeField(null=True, blank=True)
+    # Messages from others since last_seen_at; kept by group_chats.message_created/mark_seen
+    unread_count = models.PositiveIntegerField(default=0)
 
     class Meta:
         unique_together = ['group_chat', 'user']
@@ -1073,6 +1267,8 @@ class GroupChatMessage(models.Model):
     edited_at = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    objects = GroupChatMessageQuerySet.as_manager()
+
     class Meta:
         ordering = ['created_at']
         indexes = [
@@ -1185,6 +1381,33 @@ class DeletedGroupChatMessage(models.Model):
         return f"Group message {self.message.id} deleted by {self.user.get_full_name()}"
 
 
+class ConversationSummary(models.Model):
+    """One row per (user, partner) direct-message conversation, as shown in the user's inbox
+
+    Kept up to date by myapp/conversations.py from Message saves, mark_as_read and
+    the one-sided delete records, so an inbox is a single indexed query.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='conversation_summaries')
+    partner = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    # Latest message the user can still see; null when every message is deleted for them
+    last_message = models.ForeignKey(Message, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    last_activity = models.DateTimeField(null=True, blank=True)
+    unread_count = models.PositiveIntegerField(default=0)
+    # Copied from DeletedConversation: older messages are hidden for the user
+    delete_before = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        unique_together = ['user', 'partner']
+        indexes = [
+            models.Index(fields=['user', '-last_activity']),
+        ]
+        verbose_name = 'Conversation Summary'
+        verbose_name_plural = 'Conversation Summaries'
+
+    def __str__(self):
+        return f"{self.user_id} <-> {self.partner_id}: {self.unread_count} unread"
+
+
 # -------------------------------
 # System Health Monitoring Models
 # -------------------------------
@@ -1442,6 +1665,7 @@ class ProjectEquipment(models.Model):
     condition_notes = models.TextField(blank=True, null=True)
     received_by = models.CharField(max_length=255, blank=True, null=True)
     date_created = models.DateTimeField(auto_now_add=True)
+    date_updated = models.DateTimeField(auto_now=True)
     
     # DOST Compliance Fields
     property_tag_number = models.CharField(
@@ -1822,3 +2046,153 @@ class UserPreference(models.Model):
     
     def __str__(self):
         return f"Preferences for {self.user.username}"
+
+
+# ===============================
+# DASHBOARD ROLLUP MODELS
+# ===============================
+# Counter tables maintained from post_save/post_delete (see myapp/rollups.py).
+# Run `python manage.py rebuild_rollups` to repair drift after bulk updates.
+class ProjectStatusRollup(models.Model):
+    """Project counts per status bucket x municipality x year"""
+    status_bucket = models.CharField(max_length=20, choices=Project.STATUS_BUCKET_CHOICES)
+    municipality = models.CharField(max_length=100, blank=True, default='')
+    year = models.IntegerField(blank=True, null=True)
+    count = models.IntegerField(default=0)
+    total_funds = models.DecimalField(max_digits=18, decimal_places=2, default=Decimal('0.00'))
+
+    class Meta:
+        unique_together = ['status_bucket', 'municipality', 'year']
+        verbose_name = 'Project Status Rollup'
+        verbose_name_plural = 'Project Status Rollups'
+
+    def __str__(self):
+        return f"{self.status_bucket} / {self.municipality or 'No municipality'} / {self.year}: {self.count}"
+
+
+class ProposalStatusRollup(models.Model):
+    """Proposal counts per status x municipality x submission month"""
+    status = models.CharField(max_length=20)
+    municipality = models.CharField(max_length=100, blank=True, default='')
+    month = models.DateField(help_text='First day of the submission month')
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ['status', 'municipality', 'month']
+        verbose_name = 'Proposal Status Rollup'
+        verbose_name_plural = 'Proposal Status Rollups'
+
+    def __str__(self):
+        return f"{self.status} / {self.municipality or 'No municipality'} / {self.month:%b %Y}: {self.count}"
+
+
+class TaskStatusRollup(models.Model):
+    """Task counts per status x assignee"""
+    status = models.CharField(max_length=20)
+    assignee = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, null=True, blank=True, related_name='+')
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ['status', 'assignee']
+        verbose_name = 'Task Status Rollup'
+        verbose_name_plural = 'Task Status Rollups'
+
+    def __str__(self):
+        return f"{self.status} / {self.assignee_id or 'Unassigned'}: {self.count}"
+
+
+class BudgetRollup(models.Model):
+    """Budget counts and equipment value sums per fund source x fiscal year"""
+    fund_source = models.CharField(max_length=50)
+    fiscal_year = models.PositiveIntegerField()
+    count = models.IntegerField(default=0)
+    total_equipment_value = models.DecimalField(max_digits=18, decimal_places=2, default=Decimal('0.00'))
+    delivered_equipment_value = models.DecimalField(max_digits=18, decimal_places=2, default=Decimal('0.00'))
+
+    class Meta:
+        unique_together = ['fund_source', 'fiscal_year']
+        verbose_name = 'Budget Rollup'
+        verbose_name_plural = 'Budget Rollups'
+
+    def __str__(self):
+        return f"{self.fund_source} ({self.fiscal_year}): {self.count}"
+
+
+
+# ===============================
+# GEOCODING
+# ===============================
+class GeocodeCache(models.Model):
+    """Reverse-geocoded place names keyed by coordinates rounded to 3 decimals (~100 m)
+
+    Filled by myapp/geocoding.py from the offline Biliran gazetteer.
+    """
+    latitude = models.DecimalField(max_digits=7, decimal_places=3)
+    longitude = models.DecimalField(max_digits=7, decimal_places=3)
+    place_name = models.CharField(max_length=255)
+    distance_km = models.FloatField(help_text='Distance from the coordinates to the matched gazetteer place')
+    date_created = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ['latitude', 'longitude']
+        verbose_name = 'Geocode Cache Entry'
+        verbose_name_plural = 'Geocode Cache'
+
+    def __str__(self):
+        return f"({self.latitude}, {self.longitude}) -> {self.place_name}"
+
+
+# ===============================
+# BACKGROUND REPORT JOBS
+# ===============================
+class ReportJob(models.Model):
+    """A PDF/Excel export rendered off-request by the run_report_worker command
+
+    Jobs with the same report type and parameters share one row while queued or
+    running, and a finished file is reused until it expires (see report_jobs.py).
+    """
+    REPORT_CHOICES = [
+        ('financial_summary', 'Financial Summary (PDF)'),
+        ('proposal_status', 'Proposal Status (PDF)'),
+        ('approved_projects', 'Approved Projects (PDF)'),
+        ('full_report', 'Full Report (PDF)'),
+        ('master_excel', 'Master Report (Excel)'),
+    ]
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+
+    report_type = models.CharField(max_length=30, choices=REPORT_CHOICES)
+    params = models.JSONField(default=dict, blank=True)
+    params_hash = models.CharField(max_length=64, help_text='SHA-256 of the report type, canonical parameters and, where the output depends on it, the user')
+    requested_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='report_jobs')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='queued')
+    output = models.FileField(upload_to='report_jobs/%Y/%m/', blank=True, null=True)
+    filename = models.CharField(max_length=255, blank=True)
+    content_type = models.CharField(max_length=100, blank=True)
+    error = models.TextField(blank=True)
+    date_created = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-date_created']
+        indexes = [
+            models.Index(fields=['params_hash', 'status', 'finished_at']),
+            models.Index(fields=['status', 'date_created']),
+        ]
+        constraints = [
+            # At most one in-flight job per parameter set
+            models.UniqueConstraint(
+                fields=['params_hash'], condition=models.Q(status__in=['queued', 'running']),
+                name='unique_inflight_report_job',
+            ),
+        ]
+        verbose_name = 'Report Job'
+        verbose_name_plural = 'Report Jobs'
+
+    def __str__(self):
+        return f"{self.get_report_type_display()} #{self.pk} ({self.status})"
@@ -0,0 +1,70 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Notification
+
+
+# Seconds a user's unread count and latest notifications stay cached; 0 disables the cache
+NOTIFICATION_CACHE_TIMEOUT = getattr(settings, 'NOTIFICATION_CACHE_TIMEOUT', 300)
+
+# Notifications shown in the bell dropdown
+RECENT_NOTIFICATIONS = 10
+
+FIELDS = ('id', 'message', 'category', 'status', 'timestamp', 'link')
+
+
+def _version_key(user_id):
+    return f'notifications:version:{user_id}'
+
+
+def _version(user_id):
+    """The user's current cache version, started from the clock so a lost counter never reuses old entries"""
+    key = _version_key(user_id)
+    cache.add(key, time.time_ns(), None)
+    return cache.get(key)
+
+
+def _feed_key(user_id, version):
+    return f'notifications:{user_id}:{version}'
+
+
+def _load(user_id):
+    notifications = Notification.objects.filter(receiver_id=user_id)
+    return {
+        'unread_count': notifications.filter(status='unread').count(),
+        # Plain dicts: templates read them like the model instances they replace
+        'notifications': list(notifications.order_by('-timestamp').values(*FIELDS)[:RECENT_NOTIFICATIONS]),
+    }
+
+
+def summary(user_id):
+    """{'unread_count', 'notifications'} for the bell, from the cache where possible"""
+    if not NOTIFICATION_CACHE_TIMEOUT:
+        return _load(user_id)
+    key = _feed_key(user_id, _version(user_id))
+    feed = cache.get(key)
+    if feed is None:
+        feed = _load(user_id)
+        cache.set(key, feed, NOTIFICATION_CACHE_TIMEOUT)
+    return feed
+
+
+def invalidate(*user_ids):
+    """Move the given users to a new version; their old entries expire unread"""
+    for user_id in set(user_ids):
+        try:
+            cache.incr(_version_key(user_id))
+        except ValueError:
+            # No version yet, so nothing cached to drop
+            pass
+
+
+# -----------------------------
+# Signal receivers
+# -----------------------------
+def notification_changed(sender, instance, raw=False, **kwargs):
+    """post_save/post_delete on Notification"""
+    if not raw:
+        invalidate(instance.receiver_id)
@@ -0,0 +1,59 @@
+from django.db import transaction
+
+from . import events, notification_cache
+from .models import Notification
+
+
+# Rows per INSERT when fanning a notification out
+FANOUT_BATCH_SIZE = 500
+
+
+def fan_out(receiver_ids, message, category='general', link=None, sender=None, dedupe_key=None):
+    """Create one notification per receiver with a single bulk insert per batch
+
+    With a `dedupe_key`, receivers who already hold a notification with that key
+    are skipped by the (receiver, dedupe_key) unique constraint. Returns the
+    receivers that were sent to.
+    """
+    receiver_ids = list(dict.fromkeys(receiver_ids))
+    if not receiver_ids:
+        return []
+    if dedupe_key is not None:
+        already = set(Notification.objects.filter(
+            receiver_id__in=receiver_ids, dedupe_key=dedupe_key,
+        ).values_list('receiver_id', flat=True))
+        receiver_ids = [pk for pk in receiver_ids if pk not in already]
+        if not receiver_ids:
+            return []
+
+    create_many([
+        Notification(sender=sender, receiver_id=pk, message=message, category=category, link=link, dedupe_key=dedupe_key)
+        for pk in receiver_ids
+    ])
+    return receiver_ids
+
+
+def create_many(notifications):
+    """bulk_create() unsaved notifications, skipping any whose (receiver, dedupe_key) already exists
+
+    bulk_create() sends no post_save, so the receivers' bell caches and event
+    streams are refreshed here, once the surrounding transaction commits.
+    """
+    if not notifications:
+        return
+    Notification.objects.bulk_create(notifications, batch_size=FANOUT_BATCH_SIZE, ignore_conflicts=True)
+    receiver_ids = list(dict.fromkeys(notification.receiver_id for notification in notifications))
+    transaction.on_commit(lambda: _receivers_notified(receiver_ids))
+
+
+def _receivers_notified(receiver_ids):
+    notification_cache.invalidate(*receiver_ids)
+    events.publish_many([(events.user_channel(pk), 'notification', {}) for pk in receiver_ids])
+
+
+def fan_out_on_commit(receiver_ids, message, **kwargs):
+    """fan_out() once the surrounding transaction commits, so a rollback notifies no one
+
+    `receiver_ids` may be a values_list() queryset; it is evaluated at commit time.
+    """
+    transaction.on_commit(lambda: fan_out(receiver_ids, message, **kwargs))
@@ -0,0 +1,108 @@
+import gzip
+import json
+import os
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from . import notification_cache
+from .models import Notification
+
+
+# Read notifications older than this many days are archived and removed
+NOTIFICATION_RETENTION_DAYS = getattr(settings, 'NOTIFICATION_RETENTION_DAYS', 90)
+
+# Most notifications kept per user; the oldest read ones past it are archived, unread
+# ones only when there are more unread than the cap. 0 disables the cap
+NOTIFICATION_MAX_PER_USER = getattr(settings, 'NOTIFICATION_MAX_PER_USER', 500)
+
+# Where archived notifications go, one gzipped JSON-lines file per month of timestamp
+NOTIFICATION_ARCHIVE_DIR = getattr(settings, 'NOTIFICATION_ARCHIVE_DIR',
+                                   os.path.join(settings.BASE_DIR, 'archive', 'notifications'))
+
+# Rows archived and deleted per transaction
+PRUNE_BATCH_SIZE = 1000
+
+ARCHIVE_FIELDS = ('id', 'sender_id', 'receiver_id', 'message', 'category', 'link', 'status', 'timestamp', 'dedupe_key')
+
+
+def archive_path(month):
+    """The archive file for notifications stamped in `month` ('YYYY-MM')"""
+    return os.path.join(NOTIFICATION_ARCHIVE_DIR, f'notifications-{month}.jsonl.gz')
+
+
+def _write_archive(rows):
+    by_month = defaultdict(list)
+    for row in rows:
+        by_month[timezone.localtime(row['timestamp']).strftime('%Y-%m')].append(row)
+    os.makedirs(NOTIFICATION_ARCHIVE_DIR, exist_ok=True)
+    for month, month_rows in by_month.items():
+        # Appending adds a gzip member; readers see one continuous stream of lines
+        with gzip.open(archive_path(month), 'at', encoding='utf-8') as f:
+            for row in month_rows:
+                f.write(json.dumps(row, cls=DjangoJSONEncoder, separators=(',', ':')) + '\n')
+
+
+def _archive_batch(queryset, batch_size):
+    """Archive and delete up to `batch_size` rows of `queryset`, oldest first; returns how many"""
+    with transaction.atomic():
+        rows = list(queryset.order_by('timestamp', 'id').values(*ARCHIVE_FIELDS)[:batch_size])
+        if not rows:
+            return 0
+        # Written before the delete commits: a failure leaves rows in both places, never in neither
+        _write_archive(rows)
+        # One DELETE without per-row post_delete; each receiver's bell is dropped once below
+        Notification.objects.filter(pk__in=[row['id'] for row in rows])._raw_delete(Notification.objects.db)
+    notification_cache.invalidate(*(row['receiver_id'] for row in rows))
+    return len(rows)
+
+
+def _archive_all(queryset, batch_size):
+    total = 0
+    while True:
+        archived = _archive_batch(queryset, batch_size)
+        total += archived
+        if archived < batch_size:
+            return total
+
+
+def archive_read(days=None, batch_size=PRUNE_BATCH_SIZE):
+    """Archive read notifications older than `days`; returns how many"""
+    cutoff = timezone.now() - timedelta(days=NOTIFICATION_RETENTION_DAYS if days is None else days)
+    return _archive_all(Notification.objects.filter(status='read', timestamp__lt=cutoff), batch_size)
+
+
+def enforce_caps(max_per_user=None, batch_size=PRUNE_BATCH_SIZE):
+    """Archive each user's oldest notifications past `max_per_user`; returns how many
+
+    Read notifications go first. Unread ones would silently vanish from the
+    bell, so they are only archived when a user has more unread than the cap.
+    """
+    cap = NOTIFICATION_MAX_PER_USER if max_per_user is None else max_per_user
+    if not cap:
+        return 0
+    over = list(Notification.objects.values('receiver_id').annotate(total=Count('id')).filter(total__gt=cap))
+    archived = 0
+    for row in over:
+        excess = row['total'] - cap
+        notifications = Notification.objects.filter(receiver_id=row['receiver_id'])
+        for queryset in (notifications.exclude(status='unread'), notifications.filter(status='unread')):
+            while excess > 0:
+                done = _archive_batch(queryset, min(excess, batch_size))
+                if not done:
+                    break
+                excess -= done
+                archived += done
+    return archived
+
+
+def read_archive(month):
+    """Iterate the archived notifications of `month` as dicts"""
+    with gzip.open(archive_path(month), 'rt', encoding='utf-8') as f:
+        for line in f:
+            yield json.loads(line)
@@ -0,0 +1,57 @@
+from django.db import transaction
+from django.urls import reverse
+from django.utils import timezone
+
+from . import notification_fanout
+from .models import Notification, Task
+
+# Statuses a task can still become overdue in
+OPEN_STATUSES = [value for value, _ in Task.STATUS_CHOICES if value != 'completed']
+
+
+def overdue_tasks(today=None):
+    """Open tasks due by `today` whose proponent hasn't been told yet
+
+    Served by the (status, due_date, due_date_notified) index.
+    """
+    return Task.objects.filter(
+        status__in=OPEN_STATUSES,
+        due_date__lte=today or timezone.localdate(),
+        due_date_notified=False,
+        project__proposal__processed_by__isnull=False,
+    )
+
+
+def sweep(today=None, task_ids=None):
+    """Notify the proponents of newly overdue tasks and flag the tasks; returns how many were flagged
+
+    One query finds the tasks, one update() flags them and the notifications
+    are bulk-inserted, so the cost does not grow with the number of tasks.
+    """
+    tasks = overdue_tasks(today)
+    if task_ids is not None:
+        tasks = tasks.filter(pk__in=task_ids)
+    rows = list(tasks.values_list('id', 'title', 'due_date', 'project__proposal__processed_by_id'))
+    if not rows:
+        return 0
+
+    link = reverse('proponent_task_list_url')
+    with transaction.atomic():
+        Task.objects.filter(pk__in=[row[0] for row in rows], due_date_notified=False).update(due_date_notified=True)
+        notification_fanout.create_many([
+            Notification(
+                sender=None,
+                receiver_id=proponent_id,
+                message=(
+                    f"Task '{title}' is overdue (was due {due_date}). "
+                    f"Please take necessary action, prepare an extension letter if needed, "
+                    f"and submit required reports."
+                ),
+                category='task',
+                link=link,
+                # A second sweeper running at the same time cannot notify twice
+                dedupe_key=f'task_overdue:{pk}',
+            )
+            for pk, title, due_date, proponent_id in rows
+        ])
+    return len(rows)
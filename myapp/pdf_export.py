@@ -0,0 +1,69 @@
+import tempfile
+
+from django.conf import settings
+from django.http import FileResponse
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from reportlab.platypus import Paragraph, Table, TableStyle
+
+PDF_CONTENT_TYPE = 'application/pdf'
+
+# Bytes of a finished PDF held in memory before it spills to a temporary file
+PDF_SPOOL_MAX_SIZE = getattr(settings, 'PDF_SPOOL_MAX_SIZE', 8 * 1024 * 1024)
+
+# Rows per Table flowable of a long list
+PDF_TABLE_CHUNK_ROWS = 100
+
+# Left plus right padding reportlab puts in a table cell
+CELL_PADDING = 12
+
+
+def fit(text, width, style, font='Helvetica', size=7):
+    """`text` as a plain string if it fits on one line of a `width` column, else a wrapping Paragraph
+
+    A plain string is drawn as-is; a Paragraph is parsed and laid out word by
+    word, which dominates the build time of long tables.
+    """
+    if stringWidth(text, font, size) <= width - CELL_PADDING:
+        return text
+    return Paragraph(text, style)
+
+
+def chunked_tables(header, rows, col_widths, commands, stripe=None, chunk_size=None):
+    """Table flowables of `chunk_size` rows each, every one starting with `header`
+
+    Splitting one Table across pages re-measures all of its remaining rows at
+    every page break; tables of a fixed size keep that work per page constant.
+    `commands` style every table; `stripe` colours every other row of the whole list.
+    """
+    chunk_size = chunk_size or PDF_TABLE_CHUNK_ROWS
+    chunk = []
+    offset = 0
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == chunk_size:
+            yield _table(header, chunk, offset, col_widths, commands, stripe)
+            offset += len(chunk)
+            chunk = []
+    if chunk:
+        yield _table(header, chunk, offset, col_widths, commands, stripe)
+
+
+def _table(header, chunk, offset, col_widths, commands, stripe):
+    table = Table([header] + chunk, colWidths=col_widths, repeatRows=1)
+    stripes = []
+    if stripe is not None:
+        # The list's odd rows, counted across chunks
+        stripes = [('BACKGROUND', (0, i), (-1, i), stripe) for i in range(1, len(chunk) + 1) if (offset + i) % 2 == 0]
+    table.setStyle(TableStyle(commands + stripes))
+    return table
+
+
+def spooled_file():
+    return tempfile.SpooledTemporaryFile(max_size=PDF_SPOOL_MAX_SIZE)
+
+
+def response(output, filename, as_attachment=False):
+    """Stream a finished PDF from `output`, opened inline like the other PDF exports"""
+    output.seek(0)
+    # FileResponse closes the file once it has been sent
+    return FileResponse(output, as_attachment=as_attachment, filename=filename, content_type=PDF_CONTENT_TYPE)
@@ -0,0 +1,259 @@
+import base64
+import json
+
+from django.db.models import F, Prefetch, Q
+
+from .models import Project, ProjectEquipment
+
+
+class GridQueryError(ValueError):
+    """Raised for an unknown field, sort key or a malformed cursor"""
+
+
+# -----------------------------
+# Field projection
+# -----------------------------
+def _text(name, default=''):
+    return (name,), lambda p: getattr(p, name) or default
+
+
+def _number(name):
+    return (name,), lambda p: getattr(p, name) or 0
+
+
+def _money(name):
+    return (name,), lambda p: float(getattr(p, name)) if getattr(p, name) else 0.0
+
+
+def _date(name):
+    return (name,), lambda p: getattr(p, name).isoformat() if getattr(p, name) else ''
+
+
+def _file_url(name):
+    return (name,), lambda p: getattr(p, name).url if getattr(p, name) else ''
+
+
+def _equipment_summary(project):
+    summary = []
+    for eq in project.equipment_deliveries.all():
+        item = eq.budget_allocation.equipment_item if eq.budget_allocation else None
+        summary.append({
+            'name': item.name if item else 'Unknown Equipment',
+            'quantity': eq.delivered_quantity,
+            'unit_cost': float(item.estimated_unit_cost or 0) if item else 0.0,
+            'property_tag': eq.property_tag_number or '',
+            'ownership_status': eq.ownership_status or 'dost_owned',
+            'ownership_status_display': eq.get_ownership_status_display(),
+            'delivery_date': eq.delivery_date.isoformat() if eq.delivery_date else '',
+        })
+    return summary
+
+
+# Output field -> (model fields to load, serializer)
+GRID_FIELDS = {
+    'id': (('id',), lambda p: p.id),
+    'no': (('no',), lambda p: p.no),
+    'project_code': _text('project_code'),
+    'year': (('year',), lambda p: p.year),
+    'project_title': _text('project_title'),
+    'agency_grantee': _text('agency_grantee'),
+    'program': _text('program'),
+    'type_of_project': _text('type_of_project'),
+    'status': _text('status'),
+    'status_bucket': _text('status_bucket'),
+    'remarks': _text('remarks'),
+    'mun': _text('mun'),
+    'province': _text('province', 'Biliran'),
+    'district': _text('district', 'Lone District'),
+    'beneficiary': _text('beneficiary'),
+    'beneficiary_address': _text('beneficiary_address'),
+    'contact_details': _text('contact_details'),
+    'proponent_details': _text('proponent_details'),
+    'no_of_beneficiaries': _number('no_of_beneficiaries'),
+    'male': _number('male'),
+    'female': _number('female'),
+    'total_beneficiaries': _number('total_beneficiaries'),
+    'senior_citizen': _number('senior_citizen'),
+    'pwd': _number('pwd'),
+    'fund_source': _text('fund_source'),
+    'funds': _money('funds'),
+    'total_project_cost': _money('total_project_cost'),
+    'counterpart_funds': _money('counterpart_funds'),
+    'internally_managed_fund': _money('internally_managed_fund'),
+    'total_funds_released': _money('total_funds_released'),
+    'first_tranche': _money('first_tranche'),
+    'second_tranche': _money('second_tranche'),
+    'third_tranche': _money('third_tranche'),
+    'dost_viii': _money('dost_viii'),
+    'project_start': _date('project_start'),
+    'project_end': _date('project_end'),
+    'date_of_release': _date('date_of_release'),
+    'date_of_completion': _date('date_of_completion'),
+    'date_of_donation': _date('date_of_donation'),
+    'date_of_inspection_tagging': _date('date_of_inspection_tagging'),
+    'date_of_liquidation': _date('date_of_liquidation'),
+    'check_ada_no': _text('check_ada_no'),
+    'status_of_liquidation': _text('status_of_liquidation'),
+    'amount_liquidated': _money('amount_liquidated'),
+    'original_project_duration': _text('original_project_duration'),
+    'extension_date': _text('extension_date'),
+    'availed_technologies': _text('availed_technologies'),
+    'interventions': _text('interventions'),
+    'donation_status': _text('donation_status'),
+    'tafr': _text('tafr'),
+    'par': _text('par'),
+    'list_of_eqpt': _text('list_of_eqpt'),
+    'terminal_report': _text('terminal_report'),
+    'invoice_receipt': _text('invoice_receipt'),
+    'donated': _text('donated'),
+    'acknowledgment_receipt_by_grantee': _text('acknowledgment_receipt_by_grantee'),
+    'pme_visit': _text('pme_visit'),
+    'womens_group': _text('womens_group'),
+    'product_photo_url': _file_url('product_photo'),
+    'supporting_documents_url': _file_url('supporting_documents'),
+    # DOST Equipment Tracking Summary (prefetched in one query per page)
+    'equipment_summary': ((), _equipment_summary),
+}
+
+# Columns that can be sorted on; every sort is tie-broken by id
+SORT_FIELDS = ('id', 'no', 'year', 'project_code', 'project_title', 'mun', 'program',
+               'fund_source', 'status_bucket', 'funds', 'total_funds_released',
+               'project_start', 'project_end', 'date_created', 'date_updated')
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 200
+
+
+def parse_fields(raw):
+    """?fields=a,b,c -> validated tuple of GRID_FIELDS keys ('id' is always included)"""
+    if not raw:
+        return tuple(GRID_FIELDS)
+    fields = ['id'] + [name.strip() for name in raw.split(',') if name.strip() and name.strip() != 'id']
+    unknown = [name for name in fields if name not in GRID_FIELDS]
+    if unknown:
+        raise GridQueryError(f"Unknown field(s): {', '.join(unknown)}")
+    return tuple(dict.fromkeys(fields))
+
+
+def serialize(project, fields):
+    return {name: GRID_FIELDS[name][1](project) for name in fields}
+
+
+# -----------------------------
+# Keyset cursors
+# -----------------------------
+def encode_cursor(value, pk):
+    """Opaque cursor for the row after (sort value, id)"""
+    if value is not None and not isinstance(value, (int, float, str)):
+        value = value.isoformat() if hasattr(value, 'isoformat') else str(value)
+    raw = json.dumps([value, pk], separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor, sort_field):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        value, pk = json.loads(raw)
+        value = Project._meta.get_field(sort_field).to_python(value)
+        return value, int(pk)
+    except Exception:
+        raise GridQueryError('Invalid cursor')
+
+
+def _after(sort_field, descending, value, pk):
+    """Rows strictly after (value, pk) in ORDER BY sort_field [DESC] NULLS LAST, id [DESC]"""
+    pk_after = Q(id__lt=pk) if descending else Q(id__gt=pk)
+    if value is None:
+        return Q(**{f'{sort_field}__isnull': True}) & pk_after
+    lookup = 'lt' if descending else 'gt'
+    return (
+        Q(**{f'{sort_field}__{lookup}': value})
+        | (Q(**{sort_field: value}) & pk_after)
+        | Q(**{f'{sort_field}__isnull': True})
+    )
+
+
+# -----------------------------
+# Query
+# -----------------------------
+def filter_projects(queryset, params):
+    """Apply the grid filters: q, status, mun, year, program, fund_source, ids"""
+    q = params.get('q', '').strip()
+    if q:
+        queryset = queryset.filter(
+            Q(project_title__icontains=q) | Q(project_code__icontains=q) |
+            Q(agency_grantee__icontains=q) | Q(beneficiary__icontains=q)
+        )
+    if params.get('status'):
+        queryset = queryset.filter(status_bucket=Project.bucket_for_status(params['status']))
+    if params.get('mun'):
+        queryset = queryset.filter(mun__iexact=params['mun'])
+    if params.get('program'):
+        queryset = queryset.filter(program__iexact=params['program'])
+    if params.get('fund_source'):
+        queryset = queryset.filter(fund_source__iexact=params['fund_source'])
+    if params.get('year'):
+        try:
+            queryset = queryset.filter(year=int(params['year']))
+        except ValueError:
+            raise GridQueryError('Invalid year')
+    if params.get('ids'):
+        try:
+            queryset = queryset.filter(id__in=[int(pk) for pk in params['ids'].split(',') if pk])
+        except ValueError:
+            raise GridQueryError('Invalid ids')
+    return queryset
+
+
+def project_page(params):
+    """One page of the project grid
+
+    Returns {'results', 'next_cursor'} plus 'total' on the first page. Sorting is
+    keyset-based on (sort field, id), so deep pages cost the same as the first one.
+    """
+    fields = parse_fields(params.get('fields'))
+
+    sort = params.get('sort') or '-id'
+    descending = sort.startswith('-')
+    sort_field = sort.lstrip('-')
+    if sort_field not in SORT_FIELDS:
+        raise GridQueryError(f'Cannot sort by {sort_field}')
+
+    try:
+        limit = min(max(int(params.get('limit') or DEFAULT_LIMIT), 1), MAX_LIMIT)
+    except ValueError:
+        raise GridQueryError('Invalid limit')
+
+    queryset = filter_projects(Project.objects.all(), params)
+    total = None if params.get('cursor') else queryset.count()
+
+    if params.get('cursor'):
+        value, pk = decode_cursor(params['cursor'], sort_field)
+        queryset = queryset.filter(_after(sort_field, descending, value, pk))
+
+    if descending:
+        queryset = queryset.order_by(F(sort_field).desc(nulls_last=True), '-id')
+    else:
+        queryset = queryset.order_by(F(sort_field).asc(nulls_last=True), 'id')
+
+    columns = {'id', sort_field}
+    for name in fields:
+        columns.update(GRID_FIELDS[name][0])
+    queryset = queryset.only(*columns)
+    if 'equipment_summary' in fields:
+        queryset = queryset.prefetch_related(Prefetch(
+            'equipment_deliveries',
+            queryset=ProjectEquipment.objects.select_related('budget_allocation__equipment_item'),
+        ))
+
+    rows = list(queryset[:limit + 1])
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    page = {
+        'results': [serialize(project, fields) for project in rows],
+        'next_cursor': encode_cursor(getattr(rows[-1], sort_field), rows[-1].id) if has_more else None,
+    }
+    if total is not None:
+        page['total'] = total
+    return page
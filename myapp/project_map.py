@@ -0,0 +1,246 @@
+import hashlib
+import json
+import time
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Max
+
+from .geocoding import BILIRAN_MUNICIPALITIES, PROVINCE
+from .models import Project
+
+
+class MapQueryError(ValueError):
+    """Raised for a malformed zoom, bbox or status filter"""
+
+
+# Map layers, in legend order; proposal and unknown buckets are shown as 'new'
+LAYERS = ('new', 'ongoing', 'completed', 'terminated')
+LAYER_FOR_BUCKET = {'proposal': 'new', 'unknown': 'new', 'ongoing': 'ongoing', 'completed': 'completed', 'terminated': 'terminated'}
+
+# Projects without coordinates sit within this many degrees of their municipality centre
+FALLBACK_JITTER_DEG = 0.01
+
+# Points closer than this many screen pixels at the requested zoom share a cluster
+CLUSTER_RADIUS_PX = 60
+TILE_SIZE_PX = 256
+# From this zoom on every project is returned as its own point
+MAX_CLUSTER_ZOOM = 16
+
+# Seconds a computed feature collection stays cached (keyed by its ETag)
+PROJECT_MAP_CACHE_TIMEOUT = getattr(settings, 'PROJECT_MAP_CACHE_TIMEOUT', 300)
+
+# Bump when the response format changes so clients drop old ETags
+FORMAT_VERSION = 1
+
+_VERSION_KEY = 'project_map:version'
+
+
+# -----------------------------
+# Positions
+# -----------------------------
+def fallback_offset(pk):
+    """Stable (dlat, dlng) for a project id, spread over +/- FALLBACK_JITTER_DEG"""
+    digest = hashlib.blake2b(str(pk).encode(), digest_size=8).digest()
+    a = int.from_bytes(digest[:4], 'big') / 0xFFFFFFFF
+    b = int.from_bytes(digest[4:], 'big') / 0xFFFFFFFF
+    return (a * 2 - 1) * FALLBACK_JITTER_DEG, (b * 2 - 1) * FALLBACK_JITTER_DEG
+
+
+def project_position(pk, latitude, longitude, municipality):
+    """Stored coordinates, else the municipality centre plus the project's fallback offset"""
+    if latitude is not None and longitude is not None:
+        return latitude, longitude
+    centre = BILIRAN_MUNICIPALITIES.get(municipality or '')
+    if not centre:
+        return None
+    dlat, dlng = fallback_offset(pk)
+    return centre['lat'] + dlat, centre['lng'] + dlng
+
+
+# -----------------------------
+# Request parameters
+# -----------------------------
+def parse_params(params):
+    """(zoom, bbox as (west, south, east, north) or None, layers)"""
+    try:
+        zoom = min(max(int(params.get('zoom') or 11), 0), 22)
+    except ValueError:
+        raise MapQueryError('Invalid zoom')
+
+    bbox = None
+    if params.get('bbox'):
+        try:
+            west, south, east, north = (float(value) for value in params['bbox'].split(','))
+        except ValueError:
+            raise MapQueryError('bbox must be west,south,east,north')
+        if south > north:
+            raise MapQueryError('bbox must be west,south,east,north')
+        bbox = (west, south, east, north)
+
+    layers = LAYERS
+    if params.get('status'):
+        layers = tuple(value.strip() for value in params['status'].split(',') if value.strip())
+        unknown = [value for value in layers if value not in LAYERS]
+        if unknown:
+            raise MapQueryError(f"Unknown status(es): {', '.join(unknown)}")
+    return zoom, bbox, layers
+
+
+def cell_size_deg(zoom):
+    """Clustering grid cell, in degrees of longitude, for a Web Mercator zoom level"""
+    return CLUSTER_RADIUS_PX * 360.0 / (TILE_SIZE_PX * 2 ** zoom)
+
+
+def _version():
+    """Write counter of the projects table, started from the clock so a lost counter never reuses old ETags"""
+    cache.add(_VERSION_KEY, time.time_ns(), None)
+    return cache.get(_VERSION_KEY)
+
+
+def map_etag(params):
+    """ETag for a map request: changes whenever a project is added, edited or deleted
+
+    The row count and latest date_updated miss a QuerySet.update() that leaves
+    date_updated alone, or a delete plus an insert; the write counter bumped
+    by projects_changed() catches those.
+    """
+    zoom, bbox, layers = parse_params(params)
+    state = Project.objects.aggregate(count=Count('id'), updated=Max('date_updated'))
+    updated = state['updated'].isoformat() if state['updated'] else ''
+    raw = f"{FORMAT_VERSION}|{_version()}|{state['count']}|{updated}|{zoom}|{bbox}|{','.join(layers)}"
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+
+# -----------------------------
+# Features
+# -----------------------------
+def _points(layers):
+    """ids, lats, lngs and layer codes of every placeable project in `layers`"""
+    buckets = [bucket for bucket, layer in LAYER_FOR_BUCKET.items() if layer in layers]
+    rows = Project.objects.filter(status_bucket__in=buckets).values_list('id', 'latitude', 'longitude', 'mun', 'status_bucket')
+    ids, lats, lngs, codes = [], [], [], []
+    for pk, lat, lng, mun, bucket in rows.iterator(chunk_size=5000):
+        position = project_position(pk, lat, lng, mun)
+        if position is None:
+            continue
+        ids.append(pk)
+        lats.append(position[0])
+        lngs.append(position[1])
+        codes.append(LAYERS.index(LAYER_FOR_BUCKET[bucket]))
+    return np.array(ids, dtype=np.int64), np.array(lats), np.array(lngs), np.array(codes, dtype=np.int64)
+
+
+def _point_feature(project, lat, lng, layer):
+    return {
+        'type': 'Feature',
+        'geometry': {'type': 'Point', 'coordinates': [round(lng, 6), round(lat, 6)]},
+        'properties': {
+            'cluster': False,
+            'id': project['id'],
+            'status': layer,
+            'title': project['project_title'] or '',
+            'description': (project['remarks'] or project['project_description'] or '')[:200],
+            'municipality': project['mun'] or '',
+            'province': project['province'] or PROVINCE,
+            'beneficiary': project['beneficiary'] or '',
+            'proponent': project['proponent_details'] or '',
+            'funds': float(project['funds']) if project['funds'] else 0,
+        },
+    }
+
+
+def feature_collection(params):
+    """GeoJSON clusters/points for one zoom level and bounding box
+
+    Projects are binned on a grid whose cell spans CLUSTER_RADIUS_PX at `zoom`,
+    separately per status layer; cells holding one project come back as a point
+    with its popup details, the rest as a cluster at the members' centroid. The
+    collection's own bbox covers every matching project, for fitting the map.
+    """
+    zoom, bbox, layers = parse_params(params)
+    ids, lats, lngs, codes = _points(layers)
+    collection = {'type': 'FeatureCollection', 'features': [], 'total': int(len(ids))}
+    if not len(ids):
+        return collection
+    collection['bbox'] = [float(lngs.min()), float(lats.min()), float(lngs.max()), float(lats.max())]
+
+    if bbox is not None:
+        west, south, east, north = bbox
+        inside = (lats >= south) & (lats <= north) & (lngs >= west) & (lngs <= east)
+        ids, lats, lngs, codes = ids[inside], lats[inside], lngs[inside], codes[inside]
+    if not len(ids):
+        return collection
+
+    if zoom >= MAX_CLUSTER_ZOOM:
+        groups = np.arange(len(ids))
+    else:
+        size = cell_size_deg(zoom)
+        cells = np.stack([codes, np.floor(lats / size).astype(np.int64), np.floor(lngs / size).astype(np.int64)], axis=1)
+        _, groups = np.unique(cells, axis=0, return_inverse=True)
+        groups = groups.reshape(-1)
+
+    counts = np.bincount(groups)
+    mean_lat = np.bincount(groups, weights=lats) / counts
+    mean_lng = np.bincount(groups, weights=lngs) / counts
+    group_codes = np.zeros(len(counts), dtype=np.int64)
+    group_codes[groups] = codes
+
+    min_lng, min_lat = np.full(len(counts), np.inf), np.full(len(counts), np.inf)
+    max_lng, max_lat = np.full(len(counts), -np.inf), np.full(len(counts), -np.inf)
+    np.minimum.at(min_lng, groups, lngs)
+    np.minimum.at(min_lat, groups, lats)
+    np.maximum.at(max_lng, groups, lngs)
+    np.maximum.at(max_lat, groups, lats)
+
+    singles = counts[groups] == 1
+    details = {
+        row['id']: row
+        for row in Project.objects.filter(id__in=ids[singles].tolist()).values(
+            'id', 'project_title', 'remarks', 'project_description', 'mun', 'province',
+            'beneficiary', 'proponent_details', 'funds',
+        )
+    }
+
+    features = collection['features']
+    for pk, lat, lng, code in zip(ids[singles].tolist(), lats[singles].tolist(), lngs[singles].tolist(), codes[singles].tolist()):
+        features.append(_point_feature(details[pk], lat, lng, LAYERS[code]))
+
+    for group in np.flatnonzero(counts > 1).tolist():
+        features.append({
+            'type': 'Feature',
+            'geometry': {'type': 'Point', 'coordinates': [round(float(mean_lng[group]), 6), round(float(mean_lat[group]), 6)]},
+            'properties': {
+                'cluster': True,
+                'count': int(counts[group]),
+                'status': LAYERS[group_codes[group]],
+                'bbox': [float(min_lng[group]), float(min_lat[group]), float(max_lng[group]), float(max_lat[group])],
+            },
+        })
+    return collection
+
+
+def cached_feature_collection(params, etag):
+    """feature_collection() serialized to JSON, shared between users for the same ETag"""
+    key = f'project_map:{etag}'
+    body = cache.get(key) if PROJECT_MAP_CACHE_TIMEOUT else None
+    if body is None:
+        body = json.dumps(feature_collection(params), separators=(',', ':'))
+        if PROJECT_MAP_CACHE_TIMEOUT:
+            cache.set(key, body, PROJECT_MAP_CACHE_TIMEOUT)
+    return body
+
+
+# -----------------------------
+# Signal receivers
+# -----------------------------
+def projects_changed(sender, raw=False, **kwargs):
+    """post_save/post_delete on Project, and projects_bulk_written"""
+    if raw:
+        return
+    try:
+        cache.incr(_VERSION_KEY)
+    except ValueError:
+        # No version yet, so no ETag handed out to change
+        pass
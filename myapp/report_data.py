@@ -0,0 +1,292 @@
+import time
+from dataclasses import dataclass
+from datetime import date, datetime
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import ExtractMonth
+
+from . import rollups
+from .models import Budget, Project, Proposal, Task, User
+
+
+# Seconds a report's aggregates stay cached; 0 disables the cache
+REPORT_DATASET_CACHE_TIMEOUT = getattr(settings, 'REPORT_DATASET_CACHE_TIMEOUT', 60)
+
+_VERSION_KEY = 'report_dataset:version'
+
+
+# -----------------------------
+# Filters
+# -----------------------------
+@dataclass(frozen=True)
+class ReportFilters:
+    """The reports pages' year, municipality, status, start_date and end_date filters
+
+    Like the pages always have, a malformed year or date is ignored rather
+    than an error.
+    """
+    year: int = None
+    municipality: str = None
+    status: str = None
+    start: date = None
+    end: date = None
+
+    @classmethod
+    def from_params(cls, params):
+        def text(name):
+            return (params.get(name) or '').strip() or None
+
+        def day(name):
+            try:
+                return datetime.strptime(text(name) or '', '%Y-%m-%d').date()
+            except ValueError:
+                return None
+
+        year = text('year')
+        return cls(
+            year=int(year) if year and year.isdigit() else None,
+            municipality=text('municipality'),
+            status=text('status'),
+            start=day('start_date'),
+            end=day('end_date'),
+        )
+
+    @property
+    def key(self):
+        """Cache key part: equal for filters selecting the same rows (municipality and status match case-insensitively)"""
+        return ':'.join(str(value) if value is not None else '' for value in (
+            self.year,
+            self.municipality.lower() if self.municipality else None,
+            self.status.lower() if self.status else None,
+            self.start, self.end,
+        ))
+
+    @property
+    def use_rollups(self):
+        """Without a date range every filter maps onto a rollup dimension"""
+        return self.start is None and self.end is None
+
+    def projects(self, queryset=None):
+        queryset = Project.objects.all() if queryset is None else queryset
+        if self.year is not None:
+            queryset = queryset.filter(year=self.year)
+        if self.municipality:
+            queryset = queryset.filter(mun__iexact=self.municipality)
+        if self.start:
+            queryset = queryset.filter(
+                Q(project_start__gte=self.start) | Q(date_of_completion__gte=self.start) | Q(approval_date__date__gte=self.start)
+            )
+        if self.end:
+            queryset = queryset.filter(
+                Q(project_start__lte=self.end) | Q(date_of_completion__lte=self.end) | Q(approval_date__date__lte=self.end)
+            )
+        if self.status:
+            queryset = queryset.filter(status_bucket=Project.bucket_for_status(self.status))
+        return queryset
+
+    def proposals(self, queryset=None):
+        queryset = Proposal.objects.all() if queryset is None else queryset
+        if self.year is not None:
+            queryset = queryset.filter(submission_date__year=self.year)
+        if self.municipality:
+            queryset = queryset.filter(municipality__iexact=self.municipality)
+        if self.start:
+            queryset = queryset.filter(submission_date__date__gte=self.start)
+        if self.end:
+            queryset = queryset.filter(submission_date__date__lte=self.end)
+        if self.status:
+            queryset = queryset.filter(status__iexact=self.status)
+        return queryset
+
+    def budgets(self, queryset=None):
+        # Budgets only follow the year
+        queryset = Budget.objects.all() if queryset is None else queryset
+        if self.year is not None:
+            queryset = queryset.filter(fiscal_year=self.year)
+        return queryset
+
+
+# -----------------------------
+# Dataset
+# -----------------------------
+@dataclass(frozen=True)
+class ReportDataset:
+    """The filtered aggregates behind the reports pages and the full report PDF"""
+    filters: ReportFilters
+    total_budget: Decimal
+    total_delivered: Decimal
+    # {status: count} as stored, and {status_bucket: count}
+    proposal_status_counts: dict
+    project_bucket_counts: dict
+    # {mun or None: count}, sorted by municipality
+    municipality_counts: dict
+    user_role_counts: dict
+    task_status_counts: dict
+    # [{'fiscal_year', 'total', 'spent', 'remaining'}], oldest first
+    fiscal_years: list
+    # Projects started in each month, January first
+    monthly_projects: list
+    # [{'project_title', 'funds'}] of the ten best-funded projects
+    top_funded: list
+    # [{'fiscal_year', 'total', 'spent', 'remaining', 'projects', 'statuses', 'tasks'}] per budget
+    budget_rows: list
+    # available_years / municipalities / statuses for the filter forms
+    filter_options: tuple
+
+    @property
+    def total_remaining(self):
+        return self.total_budget - self.total_delivered
+
+    @property
+    def utilization_rate(self):
+        return round(float(self.total_delivered) / float(self.total_budget) * 100, 2) if self.total_budget > 0 else 0
+
+    @property
+    def total_projects(self):
+        return sum(self.project_bucket_counts.values())
+
+
+def _fiscal_years(budgets):
+    return [
+        {'fiscal_year': row['fiscal_year'], 'total': row['total'], 'spent': row['spent'], 'remaining': row['total'] - row['spent']}
+        for row in budgets.order_by().values('fiscal_year').annotate(
+            total=Sum('total_equipment_value'), spent=Sum('delivered_equipment_value'),
+        ).order_by('fiscal_year')
+    ]
+
+
+def _monthly_projects(filters, projects):
+    if filters.year is not None:
+        projects = projects.filter(project_start__year=filters.year)
+    monthly = [0] * 12
+    for row in projects.exclude(project_start=None).annotate(
+        month=ExtractMonth('project_start'),
+    ).order_by().values('month').annotate(total=Count('id')):
+        monthly[row['month'] - 1] = row['total']
+    return monthly
+
+
+def _budget_rows(filters, projects):
+    """One row per budget of the year, counting the filtered projects it funds and their tasks"""
+    budgets = list(filters.budgets().order_by('fiscal_year', 'id').values(
+        'id', 'fiscal_year', 'total_equipment_value', 'delivered_equipment_value',
+    ))
+    statuses, tasks = {}, {}
+    for row in projects.filter(budget__isnull=False).order_by().values('budget_id', 'status').annotate(total=Count('id')):
+        statuses.setdefault(row['budget_id'], {})[row['status']] = row['total']
+    for row in Task.objects.filter(project__in=projects, project__budget__isnull=False).order_by().values(
+        'project__budget_id',
+    ).annotate(total=Count('id')):
+        tasks[row['project__budget_id']] = row['total']
+    return [
+        {
+            'id': budget['id'],
+            'fiscal_year': budget['fiscal_year'],
+            'total': budget['total_equipment_value'],
+            'spent': budget['delivered_equipment_value'],
+            'remaining': budget['total_equipment_value'] - budget['delivered_equipment_value'],
+            'projects': sum(statuses.get(budget['id'], {}).values()),
+            'statuses': statuses.get(budget['id'], {}),
+            'tasks': tasks.get(budget['id'], 0),
+        }
+        for budget in budgets
+    ]
+
+
+def build(filters):
+    """Run every aggregate of the report for `filters`"""
+    projects = filters.projects()
+    all_project_rollups = rollups.project_rollups()
+    if filters.use_rollups:
+        project_rows = rollups.project_rollups(filters.year, filters.municipality, filters.status, rows=all_project_rollups)
+        proposal_rows = [
+            {'status': row['status'], 'total': row['count']}
+            for row in rollups.proposal_rollups(filters.year, filters.municipality, filters.status)
+        ]
+        bucket_rows = [{'status_bucket': row['status_bucket'], 'total': row['count']} for row in project_rows]
+        mun_rows = [{'mun': row['municipality'], 'total': row['count']} for row in project_rows]
+    else:
+        proposal_rows = filters.proposals().order_by().values('status').annotate(total=Count('id'))
+        bucket_rows = projects.order_by().values('status_bucket').annotate(total=Count('id'))
+        mun_rows = projects.order_by().values('mun').annotate(total=Count('id'))
+
+    def counts(rows, field):
+        totals = {}
+        for row in rows:
+            totals[row[field]] = totals.get(row[field], 0) + row['total']
+        return totals
+
+    # Budgets only follow the year, which the rollups cover with or without a date range
+    budget_totals = rollups.budget_totals(filters.year)
+    return ReportDataset(
+        filters=filters,
+        total_budget=budget_totals['total_equipment_value'],
+        total_delivered=budget_totals['delivered_equipment_value'],
+        proposal_status_counts=counts(proposal_rows, 'status'),
+        project_bucket_counts=counts(bucket_rows, 'status_bucket'),
+        municipality_counts=dict(sorted(counts(mun_rows, 'mun').items(), key=lambda item: item[0] or '')),
+        user_role_counts=counts(User.objects.order_by().values('role').annotate(total=Count('id')), 'role'),
+        task_status_counts=counts(
+            Task.objects.filter(project__in=projects).order_by().values('status').annotate(total=Count('id')), 'status',
+        ),
+        fiscal_years=_fiscal_years(filters.budgets()),
+        monthly_projects=_monthly_projects(filters, projects),
+        top_funded=list(projects.order_by('-funds').values('project_title', 'funds')[:10]),
+        budget_rows=_budget_rows(filters, projects),
+        filter_options=rollups.project_filter_options(all_project_rollups),
+    )
+
+
+# -----------------------------
+# Cache
+# -----------------------------
+def _version():
+    """The current cache version, started from the clock so a lost counter never reuses old entries"""
+    cache.add(_VERSION_KEY, time.time_ns(), None)
+    return cache.get(_VERSION_KEY)
+
+
+def dataset(filters):
+    """The ReportDataset for `filters`, shared by every view and export asking within the timeout"""
+    if not isinstance(filters, ReportFilters):
+        filters = ReportFilters.from_params(filters)
+    if not REPORT_DATASET_CACHE_TIMEOUT:
+        return build(filters)
+    key = f'report_dataset:{_version()}:{filters.key}'
+    result = cache.get(key)
+    if result is None:
+        result = build(filters)
+        cache.set(key, result, REPORT_DATASET_CACHE_TIMEOUT)
+    return result
+
+
+def invalidate():
+    """Move to a new version; every cached dataset expires unread"""
+    try:
+        cache.incr(_VERSION_KEY)
+    except ValueError:
+        # No version yet, so nothing cached to drop
+        pass
+
+
+# -----------------------------
+# Signal receivers
+# -----------------------------
+def report_data_changed(sender, instance=None, raw=False, **kwargs):
+    """post_save/post_delete on the models the reports aggregate"""
+    if not raw:
+        invalidate()
+
+
+def user_changed(sender, instance=None, raw=False, update_fields=None, **kwargs):
+    """post_save/post_delete on User; the reports only count users by role
+
+    Saves naming their fields without the role, e.g. the last_login stamp of
+    every sign-in, leave the cached reports alone.
+    """
+    if update_fields is not None and 'role' not in update_fields:
+        return
+    report_data_changed(sender, instance, raw=raw, **kwargs)
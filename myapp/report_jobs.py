@@ -0,0 +1,303 @@
+import hashlib
+import json
+import logging
+import re
+import time
+from dataclasses import dataclass
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.db import IntegrityError, connections, transaction
+from django.db.models import Q
+from django.http import FileResponse, HttpRequest, QueryDict
+from django.urls import reverse
+from django.utils import timezone
+
+from .models import ReportJob
+
+logger = logging.getLogger(__name__)
+
+
+class ReportJobError(ValueError):
+    """Raised for an unknown report type or an invalid parameter"""
+
+
+# Seconds a finished report is handed out again for the same parameters
+REPORT_JOB_TTL = getattr(settings, 'REPORT_JOB_TTL', 900)
+
+# Seconds finished and failed jobs (and their files) are kept before the worker prunes them
+REPORT_JOB_RETENTION = getattr(settings, 'REPORT_JOB_RETENTION', 7 * 24 * 3600)
+
+# Seconds a worker's heartbeat stays fresh; without one the pages export directly
+REPORT_WORKER_HEARTBEAT_TIMEOUT = getattr(settings, 'REPORT_WORKER_HEARTBEAT_TIMEOUT', 30)
+
+IN_FLIGHT = ('queued', 'running')
+
+_HEARTBEAT_KEY = 'report_jobs:worker_heartbeat'
+
+
+def _joined_key(job_id):
+    return f'report_jobs:joined:{job_id}'
+
+_FILENAME = re.compile(r'filename="?([^";]+)"?')
+
+
+@dataclass(frozen=True)
+class ReportSpec:
+    """How a report type maps onto its export view"""
+    view_name: str
+    # Query parameters the view reads; anything else is dropped before hashing
+    params: tuple = ()
+    # Parameters passed to the view as URL keyword arguments
+    url_kwargs: tuple = ()
+    # True when the document depends on the requesting user (name, e-signature)
+    per_user: bool = False
+
+
+_FILTERS = ('year', 'start_date', 'end_date', 'status', 'municipality')
+
+REPORTS = {
+    'financial_summary': ReportSpec('financial_summary_pdf', _FILTERS),
+    'proposal_status': ReportSpec('proposal_status_pdf', _FILTERS),
+    'approved_projects': ReportSpec('approved_projects_pdf', url_kwargs=('report_year',)),
+    'full_report': ReportSpec(
+        'export_full_report_pdf',
+        _FILTERS + ('sort_projects', 'sort_proposals', 'include_summary', 'include_equipment', 'include_projects',
+                    'include_proposals', 'include_charts', 'include_signatory', 'include_esignature'),
+        per_user=True,
+    ),
+    'master_excel': ReportSpec('export_master_report_excel'),
+}
+
+
+# -----------------------------
+# Queueing
+# -----------------------------
+def canonical_params(report_type, params):
+    """Known, non-empty parameters of a report as a {name: str} dict"""
+    if report_type not in REPORTS:
+        raise ReportJobError(f'Unknown report type: {report_type}')
+    spec = REPORTS[report_type]
+    canonical = {}
+    for name in spec.params + spec.url_kwargs:
+        value = params.get(name)
+        if value not in (None, ''):
+            canonical[name] = str(value).strip()
+    for name in spec.url_kwargs:
+        if name in canonical and not canonical[name].isdigit():
+            raise ReportJobError(f'{name} must be a number')
+    return canonical
+
+
+def params_hash(report_type, params, user=None):
+    raw = json.dumps([report_type, params, user.pk if user is not None else None], sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def _reusable(job):
+    if job.status in IN_FLIGHT:
+        return True
+    return bool(job.output) and job.output.storage.exists(job.output.name)
+
+
+def enqueue(report_type, params, user):
+    """(job, created) for a report request
+
+    An identical request that is still queued or running, or that finished less
+    than REPORT_JOB_TTL seconds ago, is returned instead of queueing a new job.
+    """
+    params = canonical_params(report_type, params)
+    digest = params_hash(report_type, params, user if REPORTS[report_type].per_user else None)
+
+    for attempt in range(3):
+        job = _existing(digest)
+        if job is not None:
+            if job.status == 'queued' and job.requested_by_id != user.pk:
+                # Someone else now waits on it too, so its requester can no longer cancel it
+                cache.set(_joined_key(job.pk), True, REPORT_JOB_TTL)
+            return job, False
+        try:
+            with transaction.atomic():
+                job = ReportJob.objects.create(report_type=report_type, params=params, params_hash=digest, requested_by=user)
+            return job, True
+        except IntegrityError:
+            # Another request queued the same parameters first; look again, as
+            # that job may also have finished (or failed) in the meantime
+            if attempt == 2:
+                raise
+
+
+def _existing(digest):
+    """The in-flight or recently finished job for `digest`, if it can be handed out"""
+    cutoff = timezone.now() - timedelta(seconds=REPORT_JOB_TTL)
+    candidates = ReportJob.objects.filter(params_hash=digest).filter(
+        Q(status__in=IN_FLIGHT) | Q(status='done', finished_at__gte=cutoff)
+    ).order_by('-date_created')
+    for job in candidates[:2]:
+        if _reusable(job):
+            return job
+    return None
+
+
+def cancel(job):
+    """Give up on a job no worker has claimed, e.g. once the page exported directly; True if it was cancelled
+
+    A job another request was handed while queued is left alone: that request
+    may still be polling for it.
+    """
+    if cache.get(_joined_key(job.pk)):
+        return False
+    return bool(ReportJob.objects.filter(pk=job.pk, status='queued').update(
+        status='failed', error='Cancelled: no worker picked the job up', finished_at=timezone.now(),
+    ))
+
+
+def can_view(job, user):
+    """Shared reports are visible to any signed-in user; per-user ones to their owner and admins"""
+    if not REPORTS[job.report_type].per_user:
+        return True
+    return job.requested_by_id == user.pk or user.role == 'admin'
+
+
+def can_cancel(job, user):
+    """Only the requester and admins may cancel, shared reports included"""
+    return job.requested_by_id == user.pk or user.role == 'admin'
+
+
+def job_payload(job):
+    payload = {
+        'id': job.pk,
+        'report_type': job.report_type,
+        'status': job.status,
+        'status_url': reverse('report_job_status_api', args=[job.pk]),
+        'date_created': job.date_created.isoformat(),
+        'finished_at': job.finished_at.isoformat() if job.finished_at else None,
+    }
+    if job.status == 'queued':
+        payload['cancel_url'] = reverse('report_job_cancel_api', args=[job.pk])
+    if job.status == 'done':
+        payload['download_url'] = reverse('report_job_download', args=[job.pk])
+        payload['filename'] = job.filename
+    if job.status == 'failed':
+        payload['error'] = job.error
+    return payload
+
+
+# -----------------------------
+# Rendering (worker side)
+# -----------------------------
+def _view(spec):
+    from . import views
+    return getattr(views, spec.view_name)
+
+
+def build_request(job):
+    """A GET request carrying the job's parameters and user, as the export view expects"""
+    spec = REPORTS[job.report_type]
+    request = HttpRequest()
+    request.method = 'GET'
+    request.META['SERVER_NAME'] = 'localhost'
+    request.META['SERVER_PORT'] = '80'
+    request.GET = QueryDict(mutable=True)
+    for name, value in job.params.items():
+        if name not in spec.url_kwargs:
+            request.GET[name] = value
+    request.user = job.requested_by or AnonymousUser()
+    return request
+
+
+def render(job):
+    """(content bytes, filename, content type) produced by the report's export view"""
+    spec = REPORTS[job.report_type]
+    kwargs = {name: int(job.params[name]) for name in spec.url_kwargs if name in job.params}
+    response = _view(spec)(build_request(job), **kwargs)
+    if response.status_code != 200:
+        raise ReportJobError(f'Export view returned HTTP {response.status_code}')
+    match = _FILENAME.search(response.get('Content-Disposition', ''))
+    filename = match.group(1) if match else f'{job.report_type}_{job.pk}'
+    if isinstance(response, FileResponse):
+        # excel_export streams a spooled file. response.close() would also send
+        # request_finished and drop the worker's connection, so close the file only
+        with response.file_to_stream as output:
+            content = output.read()
+    else:
+        content = response.content
+    return content, filename, response['Content-Type']
+
+
+def run_job(job_id):
+    """Render one claimed job and store its file; returns the final status"""
+    job = ReportJob.objects.select_related('requested_by').get(pk=job_id)
+    try:
+        content, filename, content_type = render(job)
+    except Exception as e:
+        logger.exception('Report job %s failed', job_id)
+        job.status, job.error = 'failed', f'{type(e).__name__}: {e}'
+    else:
+        job.output.save(filename, ContentFile(content), save=False)
+        job.status, job.filename, job.content_type = 'done', filename, content_type
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'error', 'output', 'filename', 'content_type', 'finished_at'])
+    return job.status
+
+
+def run_job_in_worker(job_id):
+    """run_job() for a pool process; connections are released between jobs"""
+    try:
+        return run_job(job_id)
+    finally:
+        connections.close_all()
+
+
+# -----------------------------
+# Queue maintenance
+# -----------------------------
+def heartbeat():
+    """Mark a worker as alive; run_report_worker calls this at every poll"""
+    cache.set(_HEARTBEAT_KEY, time.time(), REPORT_WORKER_HEARTBEAT_TIMEOUT)
+
+
+def worker_alive():
+    """True if a worker has polled within REPORT_WORKER_HEARTBEAT_TIMEOUT seconds"""
+    return cache.get(_HEARTBEAT_KEY) is not None
+
+
+def claim(limit):
+    """Mark up to `limit` of the oldest queued jobs as running; returns their ids"""
+    claimed = []
+    if limit <= 0:
+        return claimed
+    queued = ReportJob.objects.filter(status='queued').order_by('date_created').values_list('id', flat=True)[:limit]
+    for pk in list(queued):
+        # The status guard keeps two workers from claiming the same job
+        if ReportJob.objects.filter(pk=pk, status='queued').update(status='running', started_at=timezone.now()):
+            claimed.append(pk)
+    return claimed
+
+
+def mark_failed(job_id, error):
+    ReportJob.objects.filter(pk=job_id, status='running').update(
+        status='failed', error=str(error)[:2000], finished_at=timezone.now(),
+    )
+
+
+def requeue_stale(older_than):
+    """Put jobs left running longer than `older_than` seconds (e.g. by a killed worker) back in the queue"""
+    cutoff = timezone.now() - timedelta(seconds=older_than)
+    return ReportJob.objects.filter(status='running', started_at__lt=cutoff).update(status='queued', started_at=None)
+
+
+def prune(older_than=None):
+    """Delete finished/failed jobs, and their files, older than `older_than` seconds"""
+    cutoff = timezone.now() - timedelta(seconds=REPORT_JOB_RETENTION if older_than is None else older_than)
+    expired = ReportJob.objects.filter(status__in=('done', 'failed'), finished_at__lt=cutoff)
+    count = 0
+    for job in expired.iterator():
+        if job.output:
+            job.output.delete(save=False)
+        job.delete()
+        count += 1
+    return count
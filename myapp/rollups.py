@@ -0,0 +1,270 @@
+from abc import ABC, abstractmethod
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from .models import (
+    Project, Proposal, Task, Budget,
+    ProjectStatusRollup, ProposalStatusRollup, TaskStatusRollup, BudgetRollup,
+)
+
+
+# -----------------------------
+# Rollup specifications
+# -----------------------------
+class RollupSpec(ABC):
+    """Describes how rows of a source model are counted into a rollup table"""
+    model = None
+    rollup_model = None
+    # Source fields that decide the rollup bucket
+    dimension_fields = ()
+    # Rollup measure -> source field, summed alongside the row count
+    measures = {}
+
+    @property
+    def fields(self):
+        """Source fields read from the instance (and from the database before an update)"""
+        return tuple(self.dimension_fields) + tuple(self.measures.values())
+
+    @abstractmethod
+    def dimensions(self, values):
+        """The rollup row's key fields for a source row's dimension_fields values"""
+
+    def grouped(self):
+        """Source rows grouped by the dimension fields, used by rebuild()"""
+        return self.model.objects.order_by().values(*self.dimension_fields).annotate(
+            rollup_count=Count('id'),
+            **{measure: Sum(source) for measure, source in self.measures.items()}
+        )
+
+
+class ProjectRollupSpec(RollupSpec):
+    model = Project
+    rollup_model = ProjectStatusRollup
+    dimension_fields = ('status_bucket', 'mun', 'year')
+    measures = {'total_funds': 'funds'}
+
+    def dimensions(self, values):
+        return {
+            'status_bucket': values['status_bucket'],
+            'municipality': values['mun'] or '',
+            'year': values['year'],
+        }
+
+
+class ProposalRollupSpec(RollupSpec):
+    model = Proposal
+    rollup_model = ProposalStatusRollup
+    dimension_fields = ('status', 'municipality', 'submission_date')
+
+    def dimensions(self, values):
+        month = values.get('month')
+        if month is None:
+            submitted = values['submission_date'] or timezone.now()
+            month = timezone.localtime(submitted)
+        return {
+            'status': values['status'],
+            'municipality': values['municipality'] or '',
+            'month': month.date().replace(day=1),
+        }
+
+    def grouped(self):
+        return self.model.objects.order_by().values('status', 'municipality', month=TruncMonth('submission_date')).annotate(
+            rollup_count=Count('id'),
+        )
+
+
+class TaskRollupSpec(RollupSpec):
+    model = Task
+    rollup_model = TaskStatusRollup
+    dimension_fields = ('status', 'assigned_to_id')
+
+    def dimensions(self, values):
+        return {'status': values['status'], 'assignee_id': values['assigned_to_id']}
+
+
+class BudgetRollupSpec(RollupSpec):
+    model = Budget
+    rollup_model = BudgetRollup
+    dimension_fields = ('fund_source', 'fiscal_year')
+    measures = {
+        'total_equipment_value': 'total_equipment_value',
+        'delivered_equipment_value': 'delivered_equipment_value',
+    }
+
+    def dimensions(self, values):
+        return {'fund_source': values['fund_source'], 'fiscal_year': values['fiscal_year']}
+
+
+ROLLUP_SPECS = {
+    spec.model: spec
+    for spec in (ProjectRollupSpec(), ProposalRollupSpec(), TaskRollupSpec(), BudgetRollupSpec())
+}
+
+
+# -----------------------------
+# Incremental maintenance
+# -----------------------------
+def _instance_values(spec, instance):
+    return {name: getattr(instance, name) for name in spec.fields}
+
+
+def _decimal(value):
+    return Decimal(str(value)) if value not in (None, '') else Decimal('0.00')
+
+
+def _measure_values(spec, values):
+    return {measure: _decimal(values[source]) for measure, source in spec.measures.items()}
+
+
+def _apply(spec, values, sign):
+    """Add (sign=1) or remove (sign=-1) one source row from its rollup bucket"""
+    dimensions = spec.dimensions(values)
+    measures = _measure_values(spec, values)
+    rollups = spec.rollup_model.objects.filter(**dimensions)
+
+    updated = rollups.update(
+        count=F('count') + sign,
+        **{measure: F(measure) + sign * amount for measure, amount in measures.items()}
+    )
+    if not updated and sign > 0:
+        spec.rollup_model.objects.create(count=1, **dimensions, **measures)
+    elif sign < 0:
+        rollups.filter(count__lte=0).delete()
+
+
+def remember_previous(sender, instance, raw=False, **kwargs):
+    """pre_save: keep the row's stored dimensions so post_save can move it between buckets"""
+    spec = ROLLUP_SPECS[sender]
+    instance._rollup_previous = None
+    if raw:
+        return
+    if instance.pk and not instance._state.adding:
+        instance._rollup_previous = sender.objects.filter(pk=instance.pk).values(*spec.fields).first()
+
+
+def record_save(sender, instance, created, raw=False, **kwargs):
+    """post_save: move the row into its current rollup bucket"""
+    if raw:
+        # loaddata: fixtures are counted by rebuild_rollups, not row by row
+        return
+    spec = ROLLUP_SPECS[sender]
+    current = _instance_values(spec, instance)
+    previous = getattr(instance, '_rollup_previous', None)
+    instance._rollup_previous = None
+
+    if previous is not None:
+        same_bucket = spec.dimensions(previous) == spec.dimensions(current)
+        if same_bucket and _measure_values(spec, previous) == _measure_values(spec, current):
+            return
+
+    with transaction.atomic():
+        if previous is not None:
+            _apply(spec, previous, -1)
+        _apply(spec, current, 1)
+
+
+def record_delete(sender, instance, **kwargs):
+    """post_delete: remove the row from its rollup bucket"""
+    spec = ROLLUP_SPECS[sender]
+    with transaction.atomic():
+        _apply(spec, _instance_values(spec, instance), -1)
+
+
+def rebuild(specs=None):
+    """Recompute rollup tables from the source rows; returns {rollup model name: bucket count}"""
+    results = {}
+    for spec in specs or ROLLUP_SPECS.values():
+        buckets = {}
+        for row in spec.grouped():
+            key = tuple(sorted(spec.dimensions(row).items()))
+            bucket = buckets.setdefault(key, {'count': 0, **{m: Decimal('0.00') for m in spec.measures}})
+            bucket['count'] += row['rollup_count']
+            for measure in spec.measures:
+                bucket[measure] += _decimal(row[measure])
+
+        with transaction.atomic():
+            spec.rollup_model.objects.all().delete()
+            spec.rollup_model.objects.bulk_create([
+                spec.rollup_model(**dict(key), **bucket) for key, bucket in buckets.items()
+            ])
+        results[spec.rollup_model.__name__] = len(buckets)
+    return results
+
+
+# -----------------------------
+# Readers
+# -----------------------------
+def _iequals(value, wanted):
+    return not wanted or (value or '').lower() == wanted.lower()
+
+
+def project_rollups(year=None, municipality=None, status=None, rows=None):
+    """Project rollup rows matching the report filters (year exact, municipality case-insensitive,
+    status normalized to its bucket)
+
+    Pass `rows` from an earlier unfiltered call to filter in memory instead of re-querying.
+    """
+    if rows is None:
+        rows = ProjectStatusRollup.objects.filter(count__gt=0).values(
+            'status_bucket', 'municipality', 'year', 'count', 'total_funds'
+        )
+    bucket = Project.bucket_for_status(status) if status else None
+    return [
+        row for row in rows
+        if (year is None or row['year'] == year)
+        and _iequals(row['municipality'], municipality)
+        and (bucket is None or row['status_bucket'] == bucket)
+    ]
+
+
+def proposal_rollups(year=None, municipality=None, status=None):
+    """Proposal rollup rows matching the report filters"""
+    rollups = ProposalStatusRollup.objects.filter(count__gt=0)
+    if year is not None:
+        rollups = rollups.filter(month__year=year)
+    if municipality:
+        rollups = rollups.filter(municipality__iexact=municipality)
+    if status:
+        rollups = rollups.filter(status__iexact=status)
+    return list(rollups.values('status', 'municipality', 'month', 'count'))
+
+
+def budget_totals(year=None):
+    """Summed budget rollups: {'count', 'total_equipment_value', 'delivered_equipment_value'}"""
+    rollups = BudgetRollup.objects.all()
+    if year is not None:
+        rollups = rollups.filter(fiscal_year=year)
+    totals = rollups.aggregate(
+        count=Sum('count'),
+        total_equipment_value=Sum('total_equipment_value'),
+        delivered_equipment_value=Sum('delivered_equipment_value'),
+    )
+    return {
+        'count': totals['count'] or 0,
+        'total_equipment_value': totals['total_equipment_value'] or Decimal('0.00'),
+        'delivered_equipment_value': totals['delivered_equipment_value'] or Decimal('0.00'),
+    }
+
+
+def task_status_counts(assignee=None):
+    """{status: count} across all tasks, or only those assigned to `assignee`"""
+    rollups = TaskStatusRollup.objects.filter(count__gt=0)
+    if assignee is not None:
+        rollups = rollups.filter(assignee=assignee)
+    return {
+        row['status']: row['total']
+        for row in rollups.values('status').annotate(total=Sum('count'))
+    }
+
+
+def project_filter_options(rows):
+    """available_years / municipalities / statuses for the report filter forms"""
+    return (
+        sorted({row['year'] for row in rows if row['year'] is not None}),
+        sorted({row['municipality'] for row in rows if row['municipality']}),
+        [bucket for bucket, _ in Project.STATUS_BUCKET_CHOICES if any(row['status_bucket'] == bucket for row in rows)],
+    )
@@ -1,12 +1,14 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, pre_save, post_delete
 from django.dispatch import receiver
-from datetime import date
 from django.urls import reverse
 from django.utils import timezone
+from django.db import transaction
 import logging
 
-from .models import Project, Task, Notification, Proposal, Message
+from .models import Project, Task, Notification, Proposal, Message, BudgetAllocation, EquipmentItem, DeletedConversation, DeletedMessage, GroupChatMessage
+from .models import Budget, ExtensionRequest, TrancheRelease, projects_bulk_written
 from .models import User  # adjust based on your project
+from . import budget_ledger, change_feed, conversations, events, geocoding, group_chats, notification_cache, notification_fanout, overdue, project_map, report_data, rollups, spatial
 
 logger = logging.getLogger(__name__)
 
@@ -15,102 +17,67 @@ logger = logging.getLogger(__name__)
 # Notify proponents + ALL beneficiaries for short projects (≤ 3 months)
 # ------------------------
 @receiver(post_save, sender=Project)
-def notify_short_project(sender, instance, created, **kwargs):
+def notify_short_project(sender, instance, created, raw=False, **kwargs):
+    if raw or not instance.start_date or not instance.end_date:
+        return
 
-    # Ensure proponent exists
-    if not instance.proposal or not instance.proposal.processed_by:
+    duration_days = (instance.end_date - instance.start_date).days
+    if duration_days > 90:
         return
 
-    if instance.start_date and instance.end_date:
-        duration_days = (instance.end_date - instance.start_date).days
-
-        if duration_days <= 90:
-
-            # Avoid duplicate notification to proponent
-            exists = Notification.objects.filter(
-                receiver=instance.proposal.processed_by,
-                message__icontains=f"Project '{instance.project_title}' has a short duration"
-            ).exists()
-
-            if not exists:
-                # -----------------------------
-                # ✔ SEND TO PROPONENT
-                # -----------------------------
-                Notification.objects.create(
-                    sender=None,
-                    receiver=instance.proposal.processed_by,
-                    message=(
-                        f"Project '{instance.project_title}' has a short duration ({duration_days} days). "
-                        f"Please prepare an extension letter and submit the fund utilization report."
-                    ),
-                    category='project',
-                    link=reverse('proponent_projects_url')
-                )
-
-            # -----------------------------
-            # ✔ SEND TO ALL BENEFICIARIES
-            # -----------------------------
-            all_beneficiaries = User.objects.filter(role="beneficiary")
-
-            for b in all_beneficiaries:
-
-                # Avoid duplicates for beneficiaries
-                exists_b = Notification.objects.filter(
-                    receiver=b,
-                    message__icontains=f"Project '{instance.project_title}' is short in duration"
-                ).exists()
-
-                if not exists_b:
-                    Notification.objects.create(
-                        sender=None,
-                        receiver=b,
-                        message=(
-                            f"Project '{instance.project_title}' is short in duration ({duration_days} days). "
-                            f"Please coordinate with the proponent regarding the extension letter and fund utilization."
-                        ),
-                        category='project',
-                        link=reverse('beneficiary_projects_url')
-                    )
+    # Ensure proponent exists
+    if not instance.proposal or not instance.proposal.processed_by_id:
+        return
 
+    # One notice per receiver and project, however often the project is saved
+    dedupe_key = f"project_short:{instance.pk}"
+
+    # -----------------------------
+    # ✔ SEND TO PROPONENT
+    # -----------------------------
+    notification_fanout.fan_out_on_commit(
+        [instance.proposal.processed_by_id],
+        (
+            f"Project '{instance.project_title}' has a short duration ({duration_days} days). "
+            f"Please prepare an extension letter and submit the fund utilization report."
+        ),
+        category='project',
+        link=reverse('proponent_projects_url'),
+        dedupe_key=dedupe_key,
+    )
+
+    # -----------------------------
+    # ✔ SEND TO ALL BENEFICIARIES
+    # -----------------------------
+    notification_fanout.fan_out_on_commit(
+        User.objects.filter(role="beneficiary").values_list('id', flat=True),
+        (
+            f"Project '{instance.project_title}' is short in duration ({duration_days} days). "
+            f"Please coordinate with the proponent regarding the extension letter and fund utilization."
+        ),
+        category='project',
+        link=reverse('beneficiary_projects_url'),
+        dedupe_key=dedupe_key,
+    )
 
 
 # ------------------------
 # Notify proponents for overdue tasks
 # ------------------------
 @receiver(post_save, sender=Task)
-def notify_overdue_task(sender, instance, created, **kwargs):
-
-    if not instance.project or not instance.project.proposal or not instance.project.proposal.processed_by:
+def notify_overdue_task(sender, instance, created, raw=False, **kwargs):
+    """Sweep a task saved already overdue right away; sweep_overdue catches the ones that age into it"""
+    if raw or instance.due_date_notified or instance.status == 'completed':
         return
 
-    proponent = instance.project.proposal.processed_by
-    today = date.today()
-
     # Ensure due_date exists and is date type
-    if isinstance(instance.due_date, str):
+    due_date = instance.due_date
+    if isinstance(due_date, str):
         from datetime import datetime
-        instance.due_date = datetime.strptime(instance.due_date, "%Y-%m-%d").date()
-
-    # Add the field dynamically if missing
-    if not hasattr(instance, 'due_date_notified'):
-        instance.due_date_notified = False
+        due_date = datetime.strptime(due_date, "%Y-%m-%d").date()
 
-    # Notify if overdue and not yet notified
-    if instance.due_date and instance.due_date <= today and not instance.due_date_notified:
-        Notification.objects.create(
-            sender=None,
-            receiver=proponent,
-            message=(
-                f"Task '{instance.title}' is overdue (was due {instance.due_date}). "
-                f"Please take necessary action, prepare an extension letter if needed, "
-                f"and submit required reports."
-            ),
-            category='task',
-            link=reverse('proponent_task_list_url')
-        )
-
-        instance.due_date_notified = True
-        instance.save(update_fields=['due_date_notified'])
+    if due_date and due_date <= timezone.localdate():
+        transaction.on_commit(lambda: overdue.sweep(task_ids=[instance.pk]))
 
 
 # ------------------------
@@ -136,4 +103,112 @@ def notify_new_message(sender, instance, created, **kwargs):
             receiver=instance.recipient,
             message=f"New message from {instance.sender.get_full_name()}{subject_text}",
             link=reverse(conversation_url_name, kwargs={'partner_id': instance.sender.id})
-        )
\ No newline at end of file
+        )
+
+
+# ------------------------
+# Name task locations from the offline gazetteer at write time
+# ------------------------
+def _coordinate(value):
+    # Edit forms assign the posted strings
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+@receiver(pre_save, sender=Task)
+def fill_task_location_name(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    if instance.location_name:
+        if instance._state.adding or not instance.pk:
+            return
+        previous = sender.objects.filter(pk=instance.pk).values_list('latitude', 'longitude', 'location_name').first()
+        point = (_coordinate(instance.latitude), _coordinate(instance.longitude))
+        # Keep the name unless the task moved and the name is still the one derived for the old point
+        if previous is None or previous[:2] == point or previous[2] != instance.location_name:
+            return
+    instance.location_name = geocoding.reverse(instance.latitude, instance.longitude)
+
+
+# ------------------------
+# Keep dashboard rollup tables in step with Project, Proposal, Task and Budget
+# ------------------------
+for _model in rollups.ROLLUP_SPECS:
+    pre_save.connect(rollups.remember_previous, sender=_model, dispatch_uid=f'rollup_pre_save_{_model.__name__}')
+    post_save.connect(rollups.record_save, sender=_model, dispatch_uid=f'rollup_post_save_{_model.__name__}')
+    post_delete.connect(rollups.record_delete, sender=_model, dispatch_uid=f'rollup_post_delete_{_model.__name__}')
+
+
+# ------------------------
+# Drop cached budget allocation ledgers when their allocations, projects, proposals or equipment items change
+# ------------------------
+for _model in (BudgetAllocation, Project, Proposal):
+    pre_save.connect(budget_ledger.remember_budget, sender=_model, dispatch_uid=f'ledger_pre_save_{_model.__name__}')
+    post_save.connect(budget_ledger.budget_changed, sender=_model, dispatch_uid=f'ledger_post_save_{_model.__name__}')
+    post_delete.connect(budget_ledger.budget_changed, sender=_model, dispatch_uid=f'ledger_post_delete_{_model.__name__}')
+# Deleting an item cascades to its allocations, which invalidate their own budgets
+post_save.connect(budget_ledger.equipment_item_changed, sender=EquipmentItem, dispatch_uid='ledger_post_save_EquipmentItem')
+
+
+# ------------------------
+# Keep the in-memory spatial index in step with project and task coordinates
+# ------------------------
+for _model in spatial.MODEL_KINDS:
+    post_save.connect(spatial.coordinates_saved, sender=_model, dispatch_uid=f'spatial_post_save_{_model.__name__}')
+    post_delete.connect(spatial.coordinates_deleted, sender=_model, dispatch_uid=f'spatial_post_delete_{_model.__name__}')
+
+
+# ------------------------
+# Keep inbox conversation summaries in step with messages and one-sided deletes
+# ------------------------
+post_save.connect(conversations.message_saved, sender=Message, dispatch_uid='conversation_post_save_Message')
+post_delete.connect(conversations.message_deleted, sender=Message, dispatch_uid='conversation_post_delete_Message')
+post_save.connect(conversations.conversation_deleted, sender=DeletedConversation, dispatch_uid='conversation_post_save_DeletedConversation')
+post_save.connect(conversations.message_hidden, sender=DeletedMessage, dispatch_uid='conversation_post_save_DeletedMessage')
+
+
+# ------------------------
+# Drop the cached report aggregates when the rows behind them change
+# ------------------------
+for _model in (Project, Proposal, Budget, Task):
+    post_save.connect(report_data.report_data_changed, sender=_model, dispatch_uid=f'report_data_post_save_{_model.__name__}')
+    post_delete.connect(report_data.report_data_changed, sender=_model, dispatch_uid=f'report_data_post_delete_{_model.__name__}')
+post_save.connect(report_data.user_changed, sender=User, dispatch_uid='report_data_post_save_User')
+post_delete.connect(report_data.user_changed, sender=User, dispatch_uid='report_data_post_delete_User')
+projects_bulk_written.connect(report_data.report_data_changed, sender=Project, dispatch_uid='report_data_bulk_Project')
+
+
+# ------------------------
+# Change the map ETag on every project write, bulk ones included
+# ------------------------
+post_save.connect(project_map.projects_changed, sender=Project, dispatch_uid='project_map_post_save_Project')
+post_delete.connect(project_map.projects_changed, sender=Project, dispatch_uid='project_map_post_delete_Project')
+projects_bulk_written.connect(project_map.projects_changed, sender=Project, dispatch_uid='project_map_bulk_Project')
+
+
+# ------------------------
+# Audit deletions no view logs, so the change feed can report them
+# ------------------------
+for _model in (ExtensionRequest, TrancheRelease):
+    post_delete.connect(change_feed.record_delete, sender=_model, dispatch_uid=f'change_feed_post_delete_{_model.__name__}')
+
+
+# ------------------------
+# Count new group chat messages as unread for the other members
+# ------------------------
+post_save.connect(group_chats.message_saved, sender=GroupChatMessage, dispatch_uid='group_chats_post_save_GroupChatMessage')
+
+# ------------------------
+# Drop a user's cached notification bell when their notifications change
+# ------------------------
+post_save.connect(notification_cache.notification_changed, sender=Notification, dispatch_uid='notification_cache_post_save_Notification')
+post_delete.connect(notification_cache.notification_changed, sender=Notification, dispatch_uid='notification_cache_post_delete_Notification')
+
+# ------------------------
+# Push new notifications and messages to open event streams once committed
+# ------------------------
+post_save.connect(events.notification_created, sender=Notification, dispatch_uid='events_post_save_Notification')
+post_save.connect(events.message_created, sender=Message, dispatch_uid='events_post_save_Message')
+post_save.connect(events.group_message_created, sender=GroupChatMessage, dispatch_uid='events_post_save_GroupChatMessage')
@@ -0,0 +1,259 @@
+import math
+import threading
+import time
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+
+from .geocoding import EARTH_RADIUS_KM
+from .models import Project, Task
+from .project_map import project_position
+
+
+# Grid cell size in degrees (~5.5 km of latitude)
+CELL_DEG = 0.05
+
+# km per degree of latitude
+KM_PER_DEG = math.pi * EARTH_RADIUS_KM / 180
+
+# Seconds before the index is reloaded from the database to pick up writes made
+# by other processes; 0 keeps it until the process exits
+SPATIAL_INDEX_MAX_AGE = getattr(settings, 'SPATIAL_INDEX_MAX_AGE', 600)
+
+KINDS = ('project', 'task')
+KIND_CODES = {kind: code for code, kind in enumerate(KINDS)}
+MODEL_KINDS = {Project: 'project', Task: 'task'}
+
+
+def haversine_km(lat, lng, lats, lngs):
+    """Distances in km from one point to arrays of points, all in degrees"""
+    lat, lng = math.radians(lat), math.radians(lng)
+    lats, lngs = np.radians(lats), np.radians(lngs)
+    a = np.sin((lats - lat) / 2) ** 2 + math.cos(lat) * np.cos(lats) * np.sin((lngs - lng) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def _cell(lat, lng):
+    return math.floor(lat / CELL_DEG), math.floor(lng / CELL_DEG)
+
+
+# -----------------------------
+# Index
+# -----------------------------
+class SpatialIndex:
+    """Project and task coordinates in NumPy arrays, bucketed on a lat/lng grid
+
+    Points are addressed by (kind, id) and can be added, moved or removed one at a
+    time; freed slots are reused and the arrays grow by doubling. Queries compute
+    distances for the candidate cells in one vectorized pass.
+    """
+
+    def __init__(self, capacity=1024):
+        self._lock = threading.RLock()
+        self.lats = np.zeros(capacity)
+        self.lngs = np.zeros(capacity)
+        self.kinds = np.zeros(capacity, dtype=np.int8)
+        self.ids = np.zeros(capacity, dtype=np.int64)
+        self.active = np.zeros(capacity, dtype=bool)
+        self._slots = {}
+        self._free = []
+        self._size = 0
+        self._cells = {}
+        self.built_at = time.monotonic()
+
+    def __len__(self):
+        return len(self._slots)
+
+    def __contains__(self, key):
+        return key in self._slots
+
+    def _grow(self):
+        capacity = len(self.lats) * 2
+        for name in ('lats', 'lngs', 'kinds', 'ids', 'active'):
+            array = getattr(self, name)
+            grown = np.zeros(capacity, dtype=array.dtype)
+            grown[:len(array)] = array
+            setattr(self, name, grown)
+
+    def upsert(self, kind, pk, lat, lng):
+        """Add or move a point; None coordinates remove it"""
+        if lat is None or lng is None:
+            return self.remove(kind, pk)
+        lat, lng = float(lat), float(lng)
+        with self._lock:
+            slot = self._slots.get((kind, pk))
+            if slot is not None:
+                old_cell = _cell(self.lats[slot], self.lngs[slot])
+                if old_cell != _cell(lat, lng):
+                    self._cells[old_cell].discard(slot)
+                    self._cells.setdefault(_cell(lat, lng), set()).add(slot)
+            else:
+                if self._free:
+                    slot = self._free.pop()
+                else:
+                    if self._size == len(self.lats):
+                        self._grow()
+                    slot = self._size
+                    self._size += 1
+                self._slots[(kind, pk)] = slot
+                self.kinds[slot] = KIND_CODES[kind]
+                self.ids[slot] = pk
+                self.active[slot] = True
+                self._cells.setdefault(_cell(lat, lng), set()).add(slot)
+            self.lats[slot] = lat
+            self.lngs[slot] = lng
+
+    def remove(self, kind, pk):
+        with self._lock:
+            slot = self._slots.pop((kind, pk), None)
+            if slot is None:
+                return
+            self._cells[_cell(self.lats[slot], self.lngs[slot])].discard(slot)
+            self.active[slot] = False
+            self._free.append(slot)
+
+    def _gather(self, cells):
+        slots = [slot for cell in cells for slot in self._cells.get(cell, ())]
+        return np.fromiter(slots, dtype=np.int64, count=len(slots))
+
+    def _candidates(self, lat, lng, radius_km):
+        """Slots in the grid cells overlapping the radius around (lat, lng)"""
+        dlat = radius_km / KM_PER_DEG
+        dlng = dlat / max(math.cos(math.radians(min(abs(lat) + dlat, 89.9))), 1e-6)
+        lat_cells = range(math.floor((lat - dlat) / CELL_DEG), math.floor((lat + dlat) / CELL_DEG) + 1)
+        lng_cells = range(math.floor((lng - dlng) / CELL_DEG), math.floor((lng + dlng) / CELL_DEG) + 1)
+        if len(lat_cells) * len(lng_cells) > len(self._cells):
+            # Cheaper to walk the occupied cells than every cell in range
+            return self._gather(cell for cell in list(self._cells) if cell[0] in lat_cells and cell[1] in lng_cells)
+        return self._gather((i, j) for i in lat_cells for j in lng_cells)
+
+    def _distances(self, lat, lng, slots, kind):
+        if kind is not None:
+            slots = slots[self.kinds[slots] == KIND_CODES[kind]]
+        return slots, haversine_km(lat, lng, self.lats[slots], self.lngs[slots])
+
+    def _rows(self, slots, distances):
+        """[(kind, id, lat, lng, distance km)] ordered by distance"""
+        order = np.argsort(distances, kind='stable')
+        slots = slots[order]
+        return [
+            (KINDS[code], pk, row_lat, row_lng, distance)
+            for code, pk, row_lat, row_lng, distance in zip(
+                self.kinds[slots].tolist(), self.ids[slots].tolist(),
+                self.lats[slots].tolist(), self.lngs[slots].tolist(), distances[order].tolist(),
+            )
+        ]
+
+    def within(self, lat, lng, radius_km, kind=None):
+        """[(kind, id, lat, lng, distance km)] within radius_km, nearest first"""
+        with self._lock:
+            slots, distances = self._distances(lat, lng, self._candidates(lat, lng, radius_km), kind)
+            hit = distances <= radius_km
+            return self._rows(slots[hit], distances[hit])
+
+    def nearest(self, lat, lng, k=5, kind=None, exclude=()):
+        """The k closest points, nearest first
+
+        Grid rings around the query cell are added until they hold k candidates;
+        the k-th candidate distance then bounds one exact radius search. Falls back
+        to a full scan once the rings cover more cells than are occupied.
+        """
+        wanted = k + len(exclude)
+        with self._lock:
+            ci, cj = _cell(lat, lng)
+            ring = 0
+            while (2 * ring + 1) ** 2 <= len(self._cells):
+                cells = ((i, j) for i in range(ci - ring, ci + ring + 1) for j in range(cj - ring, cj + ring + 1))
+                slots, distances = self._distances(lat, lng, self._gather(cells), kind)
+                if len(slots) >= wanted:
+                    bound = np.partition(distances, wanted - 1)[wanted - 1]
+                    slots, distances = self._distances(lat, lng, self._candidates(lat, lng, bound), kind)
+                    break
+                ring += 1
+            else:
+                slots, distances = self._distances(lat, lng, np.flatnonzero(self.active[:self._size]), kind)
+
+            if len(slots) > wanted:
+                top = np.argpartition(distances, wanted - 1)[:wanted]
+                slots, distances = slots[top], distances[top]
+            return [row for row in self._rows(slots, distances) if (row[0], row[1]) not in exclude][:k]
+
+    def location(self, kind, pk):
+        """(lat, lng) of an indexed point, or None"""
+        with self._lock:
+            slot = self._slots.get((kind, pk))
+            return None if slot is None else (float(self.lats[slot]), float(self.lngs[slot]))
+
+    @classmethod
+    def from_points(cls, points):
+        """Build from (kind, id, lat, lng) tuples"""
+        points = list(points)
+        index = cls(capacity=max(1024, 1 << max(len(points) - 1, 0).bit_length()))
+        for kind, pk, lat, lng in points:
+            index.upsert(kind, pk, lat, lng)
+        return index
+
+    @classmethod
+    def from_database(cls):
+        """Tasks at their stored coordinates; projects at the position the dashboard map shows"""
+        projects = Project.objects.values_list('id', 'latitude', 'longitude', 'mun')
+        tasks = Task.objects.filter(latitude__isnull=False, longitude__isnull=False).values_list('id', 'latitude', 'longitude')
+        points = []
+        for pk, lat, lng, mun in projects.iterator(chunk_size=5000):
+            position = project_position(pk, lat, lng, mun)
+            if position is not None:
+                points.append(('project', pk, *position))
+        points.extend(('task', pk, lat, lng) for pk, lat, lng in tasks.iterator(chunk_size=5000))
+        return cls.from_points(points)
+
+
+# -----------------------------
+# Process-wide instance
+# -----------------------------
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_index():
+    """The shared index, loaded on first use and reloaded after SPATIAL_INDEX_MAX_AGE"""
+    global _index
+    with _index_lock:
+        stale = SPATIAL_INDEX_MAX_AGE and _index is not None and time.monotonic() - _index.built_at > SPATIAL_INDEX_MAX_AGE
+        if _index is None or stale:
+            _index = SpatialIndex.from_database()
+        return _index
+
+
+def reset_index():
+    """Forget the shared index; the next get_index() reloads it"""
+    global _index
+    with _index_lock:
+        _index = None
+
+
+# -----------------------------
+# Signal receivers
+# -----------------------------
+def coordinates_saved(sender, instance, raw=False, **kwargs):
+    """post_save on Project/Task: move the point once the transaction commits"""
+    if raw:
+        return
+    kind, pk, lat, lng = MODEL_KINDS[sender], instance.pk, instance.latitude, instance.longitude
+    if kind == 'project':
+        lat, lng = project_position(pk, lat, lng, instance.mun) or (None, None)
+
+    def apply():
+        if _index is not None:
+            _index.upsert(kind, pk, lat, lng)
+    transaction.on_commit(apply)
+
+
+def coordinates_deleted(sender, instance, **kwargs):
+    """post_delete on Project/Task"""
+    kind, pk = MODEL_KINDS[sender], instance.pk
+
+    def apply():
+        if _index is not None:
+            _index.remove(kind, pk)
+    transaction.on_commit(apply)
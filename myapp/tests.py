@@ -1,3 +1,1679 @@
-from django.test import TestCase
-
-# Create your tests here.
+import asyncio
+from contextlib import contextmanager
+import csv
+from datetime import date, timedelta
+from decimal import Decimal
+import gzip
+from io import BytesIO, StringIO
+import json
+import os
+import random
+import shutil
+import tempfile
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.management import call_command
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.db.models import F, Sum, Value
+from django.db.models.functions import Concat
+from django.http import FileResponse, HttpResponse
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from openpyxl import load_workbook
+from reportlab.lib import colors
+from reportlab.lib.styles import ParagraphStyle
+from reportlab.platypus import Paragraph
+
+from . import budget_ledger, bulk_actions, change_feed, charts, chat_history, conversations, data_exports, events, excel_export, geocoding, group_chats, notification_cache, notification_fanout, notification_retention, overdue, pdf_export, project_grid, project_map, report_data, report_jobs, rollups, spatial
+from .admin_context_processors import notifications_context
+from .dashboard import build_dashboard_snapshot
+from .models import (
+    User, Budget, Proposal, Project, Task, ExtensionRequest, TrancheRelease, AuditLog, Notification,
+    ProjectStatusRollup, ProposalStatusRollup,
+    EquipmentCategory, EquipmentItem, BudgetAllocation, ProjectEquipment, GeocodeCache, ReportJob,
+    Message, ConversationSummary, DeletedMessage, DeletedConversation,
+    GroupChat, GroupChatMember, GroupChatMessage, DeletedGroupChat, DeletedGroupChatMessage,
+)
+
+
+class AppQueriesMixin:
+    @contextmanager
+    def assertAppQueries(self, num):
+        """assertNumQueries() less the database cache backend's own queries"""
+        table = settings.CACHES['default']['LOCATION']
+        with CaptureQueriesContext(connection) as context:
+            yield
+        # Cache writes also run in a savepoint of their own
+        queries = [
+            query['sql'] for query in context.captured_queries
+            if table not in query['sql'] and 'SAVEPOINT' not in query['sql']
+        ]
+        self.assertEqual(len(queries), num, '\n'.join(queries))
+
+
+class DashboardSnapshotTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user('admin', 'password', email='admin@example.com', role='admin')
+        cls.proponent = User.objects.create_user('proponent', 'password', email='proponent@example.com', role='proponent')
+        Budget.objects.create(
+            fiscal_year=2025,
+            total_equipment_value=Decimal('1000.00'),
+            delivered_equipment_value=Decimal('250.00'),
+        )
+        for i, status in enumerate(['pending', 'pending', 'approved', 'rejected']):
+            Proposal.objects.create(title=f'Proposal {i}', status=status)
+        for status in ['Ongoing', 'on-going', 'Completed', 'terminated', None]:
+            project = Project.objects.create(project_title=f'Project {status}', status=status, mun='Naval')
+        Task.objects.create(project=project, title='Task A', due_date=date.today(), status='pending')
+        Task.objects.create(project=project, title='Task B', due_date=date.today(), status='completed')
+        ExtensionRequest.objects.create(proposal=Proposal.objects.first(), proponent=cls.proponent)
+
+    def test_snapshot_counters(self):
+        snapshot = build_dashboard_snapshot()
+
+        self.assertEqual(snapshot.total_users, 2)
+        self.assertEqual(snapshot.total_proposals, 4)
+        self.assertEqual(snapshot.total_projects, 5)
+        self.assertEqual(snapshot.pending_extensions, 1)
+        self.assertEqual(snapshot.total_spent, Decimal('250.00'))
+        self.assertEqual(snapshot.total_remaining, Decimal('750.00'))
+        self.assertEqual(snapshot.utilization_rate, 20.0)
+        self.assertEqual(snapshot.task_pending, 1)
+        self.assertEqual(snapshot.task_completed, 1)
+
+        buckets = dict(zip(snapshot.project_status_labels, snapshot.project_status_values))
+        self.assertEqual(buckets, {'Proposal': 0, 'Ongoing': 2, 'Completed': 1, 'Terminated': 1, 'Unknown': 1})
+
+        proposals = dict(zip(snapshot.proposal_status_labels, snapshot.proposal_status_values))
+        self.assertEqual(proposals, {'Pending': 2, 'Approved': 1, 'Rejected': 1})
+
+        self.assertEqual(len(snapshot.month_labels), 12)
+        self.assertEqual(snapshot.proposals_month_values[-1], 4)
+        self.assertEqual(sum(snapshot.extensions_month_values), 1)
+
+    def test_snapshot_query_count(self):
+        # Budget, project status, users, proposals, extensions, tasks
+        with self.assertNumQueries(6):
+            build_dashboard_snapshot()
+
+    def test_stats_api(self):
+        self.client.force_login(self.admin)
+        response = self.client.get(reverse('administrator_dashboard_stats_api'))
+        self.assertEqual(response.status_code, 200)
+        stats = response.json()['stats']
+        self.assertEqual(stats['total_projects'], 5)
+        self.assertEqual(stats['total_budget'], 1000.0)
+
+    def test_stats_api_requires_admin(self):
+        self.client.force_login(self.proponent)
+        response = self.client.get(reverse('administrator_dashboard_stats_api'))
+        self.assertEqual(response.status_code, 403)
+
+
+class RollupTests(TestCase):
+    def test_project_rollup_follows_save_and_delete(self):
+        project = Project.objects.create(project_title='Solar Dryer', status='Ongoing', mun='Naval', year=2025, funds=Decimal('100.00'))
+        row = ProjectStatusRollup.objects.get(status_bucket='ongoing', municipality='Naval', year=2025)
+        self.assertEqual((row.count, row.total_funds), (1, Decimal('100.00')))
+
+        project.status = 'Completed'
+        project.save(update_fields=['status'])
+        self.assertFalse(ProjectStatusRollup.objects.filter(status_bucket='ongoing').exists())
+        self.assertEqual(ProjectStatusRollup.objects.get(status_bucket='completed').count, 1)
+
+        project.delete()
+        self.assertFalse(ProjectStatusRollup.objects.exists())
+
+    def test_fixtures_leave_rollups_to_the_rebuild(self):
+        project = Project.objects.create(project_title='Solar Dryer', status='Ongoing', mun='Naval', year=2025, funds=Decimal('100.00'))
+        fixture = os.path.join(tempfile.mkdtemp(), 'projects.json')
+        self.addCleanup(shutil.rmtree, os.path.dirname(fixture), ignore_errors=True)
+        call_command('dumpdata', 'myapp.project', output=fixture, verbosity=0)
+
+        call_command('loaddata', fixture, verbosity=0)
+        self.assertEqual(ProjectStatusRollup.objects.get(status_bucket='ongoing').count, 1)
+        project.delete()
+        call_command('loaddata', fixture, verbosity=0)
+        self.assertFalse(ProjectStatusRollup.objects.exists())
+
+        rollups.rebuild()
+        self.assertEqual(ProjectStatusRollup.objects.get(status_bucket='ongoing').count, 1)
+
+    def test_status_bucket_normalizes_spellings(self):
+        for status in ['On-going', 'in progress', 'ONGOING']:
+            Project.objects.create(project_title=f'Project {status}', status=status)
+        Project.objects.create(project_title='Cancelled', status='cancelled')
+        Project.objects.create(project_title='Draft', status='draft')
+
+        self.assertEqual(Project.objects.filter(status_bucket='ongoing').count(), 3)
+        self.assertEqual(Project.objects.get(project_title='Cancelled').status_bucket, 'terminated')
+        self.assertEqual(Project.objects.get(project_title='Draft').status_bucket, 'unknown')
+
+    def test_status_bucket_follows_bulk_writes(self):
+        Project.objects.bulk_create([Project(project_title='Bulk', status='On-going')])
+        project = Project.objects.get(project_title='Bulk')
+        self.assertEqual(project.status_bucket, 'ongoing')
+
+        Project.objects.filter(pk=project.pk).update(status='Completed')
+        self.assertEqual(Project.objects.get(pk=project.pk).status_bucket, 'completed')
+        Project.objects.filter(status='Completed').update(status=Concat(Value('cancel'), Value('led')))
+        self.assertEqual(Project.objects.get(pk=project.pk).status_bucket, 'terminated')
+        project.status = ' NEW '
+        Project.objects.bulk_update([project], ['status'])
+        self.assertEqual(Project.objects.get(pk=project.pk).status_bucket, 'proposal')
+
+        # Written around the ORM: rebuild_rollups backfills the bucket
+        with connection.cursor() as cursor:
+            cursor.execute("UPDATE myapp_project SET status = ' in progress' WHERE id = %s", [project.pk])
+        call_command('rebuild_rollups', stdout=StringIO())
+        self.assertEqual(Project.objects.get(pk=project.pk).status_bucket, 'ongoing')
+        self.assertEqual(Project.objects.sync_status_buckets(), 0)
+
+    def test_budget_and_task_rollups(self):
+        budget = Budget.objects.create(fiscal_year=2024, fund_source='SETUP', total_equipment_value=Decimal('500.00'))
+        budget.delivered_equipment_value = Decimal('200.00')
+        budget.save(update_fields=['delivered_equipment_value'])
+        self.assertEqual(rollups.budget_totals(2024)['delivered_equipment_value'], Decimal('200.00'))
+        self.assertEqual(rollups.budget_totals(2023)['count'], 0)
+
+        project = Project.objects.create(project_title='Rice Mill')
+        task = Task.objects.create(project=project, title='Install', due_date=date.today())
+        task.status = 'completed'
+        task.save()
+        self.assertEqual(rollups.task_status_counts(), {'completed': 1})
+
+    def test_rebuild_repairs_drift(self):
+        Proposal.objects.create(title='Fish Dryer', status='pending', municipality='Naval')
+        Proposal.objects.filter(status='pending').update(status='approved')
+        self.assertEqual(ProposalStatusRollup.objects.get().status, 'pending')
+
+        call_command('rebuild_rollups', stdout=StringIO())
+        self.assertEqual(ProposalStatusRollup.objects.get().status, 'approved')
+
+
+class StatusBucketMigrationTests(TransactionTestCase):
+    migrate_from = [('myapp', '0037_dashboard_rollups')]
+    migrate_to = [('myapp', '0038_project_status_bucket')]
+
+    def setUp(self):
+        executor = MigrationExecutor(connection)
+        self.latest = executor.loader.graph.leaf_nodes()
+        executor.migrate(self.migrate_from)
+
+    def tearDown(self):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(self.latest)
+
+    def test_backfill_regroups_populated_rollups(self):
+        apps = MigrationExecutor(connection).loader.project_state(self.migrate_from).apps
+        OldProject = apps.get_model('myapp', 'Project')
+        OldRollup = apps.get_model('myapp', 'ProjectStatusRollup')
+        for title, status in [('Dryer', 'Ongoing'), ('Mill', 'on-going'), ('Kiln', 'Completed')]:
+            OldProject.objects.create(project_title=title, status=status, mun='Naval', year=2025, funds=Decimal('10.00'))
+        for status, count in [('Ongoing', 1), ('on-going', 1), ('Completed', 1)]:
+            OldRollup.objects.create(status=status, municipality='Naval', year=2025, count=count, total_funds=Decimal('10.00'))
+
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(self.migrate_to)
+
+        apps = executor.loader.project_state(self.migrate_to).apps
+        Rollup = apps.get_model('myapp', 'ProjectStatusRollup')
+        self.assertEqual(
+            sorted(Rollup.objects.values_list('status_bucket', 'count', 'total_funds')),
+            [('completed', 1, Decimal('10.00')), ('ongoing', 2, Decimal('20.00'))],
+        )
+
+
+class ProjectGridApiTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user('admin', 'password', email='admin@example.com', role='admin')
+        funds = [Decimal('500.00'), None, Decimal('300.00'), Decimal('500.00'), None, Decimal('100.00'), Decimal('300.00')]
+        cls.projects = [
+            Project.objects.create(project_title=f'Project {i}', funds=amount, mun='Naval' if i % 2 else 'Biliran', status='Ongoing')
+            for i, amount in enumerate(funds)
+        ]
+        budget = Budget.objects.create(fiscal_year=2025, total_equipment_value=Decimal('1000.00'))
+        category = EquipmentCategory.objects.create(name='Food Processing')
+        for i, project in enumerate(cls.projects[:3]):
+            item = EquipmentItem.objects.create(name=f'Dryer {i}', category=category, estimated_unit_cost=Decimal('50.00'))
+            allocation = BudgetAllocation.objects.create(budget=budget, equipment_item=item, allocated_quantity=2)
+            ProjectEquipment.objects.create(budget_allocation=allocation, project=project, delivered_quantity=1)
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def get(self, **params):
+        return self.client.get(reverse('administrator_projects_api'), params)
+
+    def test_keyset_pages_cover_every_row_once(self):
+        seen, cursor, pages = [], None, 0
+        while True:
+            params = {'sort': '-funds', 'limit': 2, 'fields': 'funds'}
+            if cursor:
+                params['cursor'] = cursor
+            data = self.get(**params).json()
+            seen.extend(row['id'] for row in data['results'])
+            pages += 1
+            cursor = data['next_cursor']
+            if not cursor:
+                break
+
+        expected = list(Project.objects.order_by(F('funds').desc(nulls_last=True), '-id').values_list('id', flat=True))
+        self.assertEqual(seen, expected)
+        self.assertEqual(pages, 4)
+
+    def test_field_projection_and_filters(self):
+        data = self.get(fields='project_title,mun', mun='naval', status='on-going').json()
+        self.assertEqual(data['total'], 3)
+        self.assertEqual(set(data['results'][0]), {'id', 'project_title', 'mun'})
+
+    def test_equipment_summary_is_prefetched(self):
+        # count, projects, deliveries (+ allocation and item joined)
+        with self.assertNumQueries(3):
+            page = project_grid.project_page({'fields': 'equipment_summary'})
+        summaries = [row['equipment_summary'] for row in page['results']]
+        self.assertEqual(sum(len(summary) for summary in summaries), 3)
+
+    def test_invalid_requests(self):
+        self.assertEqual(self.get(fields='password').status_code, 400)
+        self.assertEqual(self.get(sort='latitude').status_code, 400)
+        self.assertEqual(self.get(cursor='not-a-cursor').status_code, 400)
+
+
+class BudgetBreakdownTests(AppQueriesMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        category = EquipmentCategory.objects.create(name='Food Processing')
+        item = EquipmentItem.objects.create(name='Dryer', category=category, estimated_unit_cost=Decimal('50.00'))
+        for year in (2024, 2025, 2025):
+            budget = Budget.objects.create(fiscal_year=year, fund_source='DOST_GIA', total_equipment_value=Decimal('1000.00'))
+            BudgetAllocation.objects.create(budget=budget, equipment_item=item, allocated_quantity=2)
+            Project.objects.create(project_title=f'Project {budget.id}', budget=budget, funds=Decimal('100.00'))
+            # Approved but not yet converted (saving an approved proposal creates its project)
+            proposal = Proposal.objects.create(title=f'Proposal {budget.id}', status='pending', budget=budget)
+            Proposal.objects.filter(pk=proposal.pk).update(status='approved')
+
+    def test_breakdown_query_count_is_fixed(self):
+        budgets = Budget.objects.order_by('-date_created')
+        # budgets, totals, status, allocations, projects, proposals, fund source, fiscal year
+        with self.assertAppQueries(8):
+            breakdown = budget_ledger.budget_breakdown(budgets)
+
+        expected = Budget.objects.filter(fiscal_year=2025).aggregate(total=Sum('total_equipment_value'))['total']
+        self.assertEqual(breakdown['fiscal_year_data']['2025']['total'], float(expected))
+        self.assertEqual(breakdown['status_counts']['pending_procurement'], 3)
+        types = sorted(entry['type'] for entry in breakdown['budget_allocations'][0]['allocations'])
+        self.assertEqual(types, ['equipment', 'project', 'proposal'])
+
+        # Ledgers now come from the cache
+        with self.assertAppQueries(5):
+            budget_ledger.budget_breakdown(Budget.objects.order_by('-date_created'))
+
+    def test_ledger_invalidated_when_project_changes(self):
+        budget = Budget.objects.order_by('id').first()
+        self.assertEqual(len(budget_ledger.allocation_ledgers([budget])[budget.id]), 3)
+
+        Project.objects.filter(budget=budget).get().delete()
+        self.assertEqual(len(budget_ledger.allocation_ledgers([budget])[budget.id]), 2)
+
+    def test_ledger_invalidated_when_unit_cost_changes(self):
+        budget = Budget.objects.order_by('id').first()
+
+        def equipment_amount():
+            ledger = budget_ledger.allocation_ledgers([budget])[budget.id]
+            return next(entry['amount'] for entry in ledger if entry['type'] == 'equipment')
+
+        self.assertEqual(equipment_amount(), 100.0)
+        item = EquipmentItem.objects.get(name='Dryer')
+        item.estimated_unit_cost = Decimal('75.00')
+        item.save()
+        self.assertEqual(equipment_amount(), 150.0)
+
+
+class GeocodingTests(TestCase):
+    def test_reverse_uses_gazetteer_and_cache(self):
+        self.assertEqual(geocoding.reverse(11.5701, 124.3982), 'Naval, Biliran')
+        self.assertEqual(GeocodeCache.objects.count(), 1)
+
+        # Same rounded key: served from the cache table
+        with self.assertNumQueries(1):
+            self.assertEqual(geocoding.reverse(11.57012, 124.39815), 'Naval, Biliran')
+
+        # Far outside Biliran
+        self.assertIsNone(geocoding.reverse(14.5995, 120.9842))
+
+    def test_task_location_named_at_write_time(self):
+        project = Project.objects.create(project_title='Solar Dryer')
+        task = Task.objects.create(project=project, title='Survey', due_date=date.today(), latitude=11.6170, longitude=124.4330)
+        self.assertEqual(task.location_name, 'Almeria, Biliran')
+
+        named = Task.objects.create(project=project, title='Install', due_date=date.today(), latitude=11.6170, longitude=124.4330, location_name='Barangay Hall')
+        self.assertEqual(named.location_name, 'Barangay Hall')
+
+        # Moved: the derived name follows the point; a name given with the move is kept
+        task.latitude, task.longitude = '11.4667', '124.5500'
+        task.save()
+        self.assertEqual(task.location_name, 'Cabucgayan, Biliran')
+        named.title = 'Install dryer'
+        named.save()
+        self.assertEqual(named.location_name, 'Barangay Hall')
+        named.latitude, named.location_name = 11.4667, 'Town Hall'
+        named.save()
+        self.assertEqual(named.location_name, 'Town Hall')
+
+    def test_bulk_resolve_backfills_legacy_tasks(self):
+        project = Project.objects.create(project_title='Rice Mill')
+        for i in range(5):
+            Task.objects.create(project=project, title=f'Task {i}', due_date=date.today())
+        Task.objects.update(latitude=11.4667, longitude=124.5500)
+
+        call_command('geocode_tasks', stdout=StringIO())
+        self.assertEqual(set(Task.objects.values_list('location_name', flat=True)), {'Cabucgayan, Biliran'})
+
+
+class SpatialIndexTests(TestCase):
+    def setUp(self):
+        spatial.reset_index()
+        self.addCleanup(spatial.reset_index)
+
+    def test_batched_haversine_matches_scalar(self):
+        lats, lngs = [11.6167, 11.4667, 11.7833], [124.4333, 124.5500, 124.3333]
+        batched = spatial.haversine_km(11.5667, 124.4000, lats, lngs)
+        for value, lat, lng in zip(batched, lats, lngs):
+            self.assertAlmostEqual(value, geocoding.haversine_km(11.5667, 124.4000, lat, lng), places=9)
+
+    def test_radius_and_nearest_match_brute_force(self):
+        rng = random.Random(7)
+        points = [('task', i, rng.uniform(11.4, 11.8), rng.uniform(124.3, 124.7)) for i in range(2000)]
+        index = spatial.SpatialIndex.from_points(points)
+        for lat, lng in [(11.5667, 124.4000), (11.45, 124.69), (12.5, 125.5)]:
+            by_distance = sorted(points, key=lambda p: geocoding.haversine_km(lat, lng, p[2], p[3]))
+            self.assertEqual([row[1] for row in index.nearest(lat, lng, k=7)], [p[1] for p in by_distance[:7]])
+            expected = {p[1] for p in points if geocoding.haversine_km(lat, lng, p[2], p[3]) <= 3}
+            self.assertEqual({row[1] for row in index.within(lat, lng, 3)}, expected)
+
+    def test_index_follows_saves_and_deletes(self):
+        project = Project.objects.create(project_title='Solar Dryer', latitude=11.5667, longitude=124.4000)
+        index = spatial.get_index()
+        self.assertIn(('project', project.id), index)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            project.latitude, project.longitude = 11.6167, 124.4333
+            project.save()
+            task = Task.objects.create(project=project, title='Survey', due_date=date.today(), latitude=11.6170, longitude=124.4330)
+        self.assertEqual(index.location('project', project.id), (11.6167, 124.4333))
+        self.assertEqual(index.nearest(11.6167, 124.4333, k=1, kind='task')[0][1], task.id)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            project.latitude = None
+            project.save()
+        self.assertNotIn(('project', project.id), index)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            task.delete()
+        self.assertEqual(len(index), 0)
+
+    def test_nearby_api(self):
+        admin = User.objects.create_user('admin', 'password', email='admin@example.com', role='admin')
+        naval = Project.objects.create(project_title='Naval Mill', mun='Naval', latitude=11.5667, longitude=124.4000)
+        almeria = Project.objects.create(project_title='Almeria Dryer', mun='Almeria', latitude=11.6167, longitude=124.4333)
+        Project.objects.create(project_title='Maripipi Kiln', mun='Maripipi', latitude=11.7833, longitude=124.3333)
+        self.client.force_login(admin)
+        url = reverse('map_nearby_api')
+
+        data = self.client.get(url, {'lat': 11.57, 'lng': 124.40, 'k': 2}).json()
+        self.assertEqual([row['id'] for row in data['results']], [naval.id, almeria.id])
+        self.assertEqual(data['results'][0]['title'], 'Naval Mill')
+
+        data = self.client.get(url, {'project': naval.id, 'radius_km': 10}).json()
+        self.assertEqual([row['id'] for row in data['results']], [almeria.id])
+
+        self.assertEqual(self.client.get(url, {'lat': 'north'}).status_code, 400)
+        for params in ({'lat': 'nan', 'lng': 124.4}, {'lat': 11.57, 'lng': '-inf'}, {'lat': 91, 'lng': 124.4},
+                       {'lat': 11.57, 'lng': 124.4, 'radius_km': 'inf'}, {'project': naval.id, 'radius_km': 'nan'}):
+            self.assertEqual(self.client.get(url, params).status_code, 400, params)
+
+    def test_benchmark_command(self):
+        out = StringIO()
+        call_command('benchmark_spatial', points=2000, stdout=out)
+        self.assertIn('faster than the scalar loop', out.getvalue())
+
+
+class ProjectMapApiTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user('admin', 'password', email='admin@example.com', role='admin')
+        # 30 projects around Naval without coordinates, 2 placed in Maripipi
+        for i in range(30):
+            Project.objects.create(project_title=f'Naval {i}', mun='Naval', status='Ongoing')
+        cls.maripipi = [
+            Project.objects.create(project_title=f'Maripipi {i}', mun='Maripipi', status='Completed', latitude=11.78 + i / 100, longitude=124.33)
+            for i in range(2)
+        ]
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.admin)
+
+    def get(self, **params):
+        return self.client.get(reverse('map_projects_api'), params)
+
+    def test_fallback_positions_are_deterministic(self):
+        project = Project.objects.filter(mun='Naval').first()
+        first = project_map.project_position(project.id, None, None, 'Naval')
+        self.assertEqual(first, project_map.project_position(project.id, None, None, 'Naval'))
+        self.assertLessEqual(abs(first[0] - geocoding.BILIRAN_MUNICIPALITIES['Naval']['lat']), project_map.FALLBACK_JITTER_DEG)
+        self.assertNotEqual(first, project_map.project_position(project.id + 1, None, None, 'Naval'))
+
+    def test_clusters_by_zoom_and_bbox(self):
+        collection = self.get(zoom=10).json()
+        self.assertEqual(collection['total'], 32)
+        self.assertEqual(sum(f['properties'].get('count', 1) for f in collection['features']), 32)
+        self.assertLess(len(collection['features']), 32)
+
+        # Fully zoomed in: one point per project, with popup details
+        points = self.get(zoom=project_map.MAX_CLUSTER_ZOOM).json()['features']
+        self.assertEqual(len(points), 32)
+        self.assertFalse(any(f['properties']['cluster'] for f in points))
+
+        # Bounding box around Maripipi only
+        features = self.get(zoom=18, bbox='124.3,11.75,124.36,11.82').json()['features']
+        self.assertEqual({f['properties']['id'] for f in features}, {p.id for p in self.maripipi})
+
+        features = self.get(zoom=18, status='completed').json()['features']
+        self.assertEqual({f['properties']['status'] for f in features}, {'completed'})
+
+    def test_etag_revalidation(self):
+        response = self.get(zoom=12)
+        self.assertEqual(response['Content-Type'], 'application/geo+json')
+        self.assertNotIn('no-store', response['Cache-Control'])
+        etag = response['ETag']
+
+        self.assertEqual(self.client.get(reverse('map_projects_api'), {'zoom': 12}, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        self.maripipi[0].project_title = 'Renamed'
+        self.maripipi[0].save()
+        self.assertEqual(self.client.get(reverse('map_projects_api'), {'zoom': 12}, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+        # A queryset update leaves date_updated and the count alone
+        etag = self.get(zoom=12)['ETag']
+        Project.objects.filter(pk=self.maripipi[1].pk).update(latitude=11.9)
+        self.assertEqual(self.client.get(reverse('map_projects_api'), {'zoom': 12}, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_invalid_parameters(self):
+        self.assertEqual(self.get(bbox='1,2,3').status_code, 400)
+        self.assertEqual(self.get(status='archived').status_code, 400)
+
+
+class ReportJobTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user('admin', 'password', email='admin@example.com', role='admin')
+        cls.staff = User.objects.create_user('staff', 'password', email='staff@example.com', role='dost_staff')
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        cache.clear()
+
+    def test_identical_requests_share_a_job(self):
+        first, created = report_jobs.enqueue('proposal_status', {'year': '2025', 'ignored': 'x'}, self.admin)
+        self.assertTrue(created)
+        self.assertEqual(first.params, {'year': '2025'})
+
+        again, created = report_jobs.enqueue('proposal_status', {'year': '2025'}, self.staff)
+        self.assertFalse(created)
+        self.assertEqual(again.pk, first.pk)
+
+        other, created = report_jobs.enqueue('proposal_status', {'year': '2024'}, self.admin)
+        self.assertTrue(created)
+
+        # The full report carries the requester's name and signature, so it is per user
+        mine, _ = report_jobs.enqueue('full_report', {'year': '2025'}, self.admin)
+        theirs, _ = report_jobs.enqueue('full_report', {'year': '2025'}, self.staff)
+        self.assertNotEqual(mine.pk, theirs.pk)
+
+        with self.assertRaises(report_jobs.ReportJobError):
+            report_jobs.enqueue('unknown', {}, self.admin)
+
+    def test_enqueue_retries_after_losing_a_race(self):
+        digest = report_jobs.params_hash('master_excel', {})
+        rival = ReportJob.objects.create(report_type='master_excel', params={}, params_hash=digest)
+        lookups = []
+        real_existing = report_jobs._existing
+
+        def existing(digest):
+            lookups.append(digest)
+            if len(lookups) == 1:
+                # Not committed yet when first looked up, so creating ours collides with it
+                return None
+            # ...and failed by the time of the second look
+            ReportJob.objects.filter(pk=rival.pk).update(status='failed')
+            return real_existing(digest)
+
+        with mock.patch.object(report_jobs, '_existing', side_effect=existing):
+            job, created = report_jobs.enqueue('master_excel', {}, self.admin)
+        self.assertTrue(created)
+        self.assertNotEqual(job.pk, rival.pk)
+        self.assertEqual(len(lookups), 2)
+
+    def test_claim_marks_each_job_once(self):
+        job, _ = report_jobs.enqueue('master_excel', {}, self.admin)
+        self.assertEqual(report_jobs.claim(5), [job.pk])
+        self.assertEqual(report_jobs.claim(5), [])
+
+    def test_no_worker_means_no_job(self):
+        self.client.force_login(self.admin)
+        response = self.client.post(reverse('report_job_create_api'), {'report_type': 'master_excel'})
+        self.assertEqual(response.status_code, 503)
+        self.assertFalse(ReportJob.objects.exists())
+
+    def test_cancel_a_job_left_waiting(self):
+        job, _ = report_jobs.enqueue('master_excel', {}, self.staff)
+        self.client.force_login(self.staff)
+        data = self.client.post(report_jobs.job_payload(job)['cancel_url']).json()
+        self.assertEqual((data['cancelled'], data['job']['status']), (True, 'failed'))
+        # The next request queues a fresh job instead of waiting on the abandoned one
+        again, created = report_jobs.enqueue('master_excel', {}, self.staff)
+        self.assertTrue(created)
+
+        report_jobs.claim(1)
+        self.assertFalse(self.client.post(reverse('report_job_cancel_api', args=[again.pk])).json()['cancelled'])
+
+    def test_only_the_requester_cancels_a_shared_job(self):
+        job, _ = report_jobs.enqueue('master_excel', {}, self.admin)
+        self.client.force_login(self.staff)
+        self.assertEqual(self.client.post(reverse('report_job_cancel_api', args=[job.pk])).status_code, 403)
+
+        # Once another user waits on it, not even its requester drops it
+        mine, _ = report_jobs.enqueue('proposal_status', {}, self.staff)
+        self.assertEqual(report_jobs.enqueue('proposal_status', {}, self.admin)[0].pk, mine.pk)
+        self.assertFalse(self.client.post(reverse('report_job_cancel_api', args=[mine.pk])).json()['cancelled'])
+        mine.refresh_from_db()
+        self.assertEqual(mine.status, 'queued')
+
+    def test_worker_renders_and_reuses_output(self):
+        self.client.force_login(self.admin)
+        # What run_report_worker does at every poll
+        report_jobs.heartbeat()
+        response = self.client.post(reverse('report_job_create_api'), {'report_type': 'master_excel'})
+        self.assertEqual(response.status_code, 202)
+        job = response.json()['job']
+        self.assertEqual(job['status'], 'queued')
+
+        out = StringIO()
+        call_command('run_report_worker', workers=0, once=True, stdout=out)
+        self.assertIn(f"Report job #{job['id']}: done", out.getvalue())
+
+        status = self.client.get(job['status_url']).json()['job']
+        self.assertEqual(status['status'], 'done')
+        download = self.client.get(status['download_url'])
+        self.assertEqual(download.status_code, 200)
+        self.assertTrue(b''.join(download.streaming_content).startswith(b'PK'))
+        self.assertIn('attachment', download['Content-Disposition'])
+
+        # A second identical request within the TTL reuses the stored file
+        response = self.client.post(reverse('report_job_create_api'), {'report_type': 'master_excel'})
+        self.assertEqual(response.json()['job']['id'], job['id'])
+        self.assertFalse(response.json()['created'])
+
+    def test_failures_and_pruning(self):
+        job, _ = report_jobs.enqueue('full_report', {'year': '2025'}, None)
+        report_jobs.claim(1)
+        # Without a user the login_required export view redirects to the login page
+        self.assertEqual(report_jobs.run_job(job.pk), 'failed')
+        job.refresh_from_db()
+        self.assertIn('HTTP 302', job.error)
+
+        self.assertEqual(report_jobs.prune(older_than=0), 1)
+        self.assertFalse(ReportJob.objects.exists())
+
+    def test_per_user_jobs_are_private(self):
+        job, _ = report_jobs.enqueue('full_report', {}, self.admin)
+        self.client.force_login(self.staff)
+        self.assertEqual(self.client.get(reverse('report_job_status_api', args=[job.pk])).status_code, 403)
+
+
+class ChartCacheTests(TestCase):
+    def setUp(self):
+        cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache_dir, ignore_errors=True)
+        patcher = mock.patch.object(charts, 'CHART_CACHE_DIR', cache_dir)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        charts.reset_stats()
+
+    def spec(self, values, **kwargs):
+        return charts.ChartSpec('bar', ['Pending', 'Approved'], [charts.series('Count', values, ['gold', 'red'])],
+                                title='Proposal Status', size=(3, 2), **kwargs)
+
+    def test_identical_specs_hit_the_cache(self):
+        png = charts.render_png(self.spec([1, 2]))
+        self.assertTrue(png.startswith(b'\x89PNG'))
+        # Decimal and int values describe the same chart
+        self.assertEqual(charts.render_png(self.spec([Decimal('1'), 2.0])), png)
+        charts.render_png(self.spec([1, 3]))
+        charts.render_png(self.spec([1, 2], title_weight='bold'))
+
+        stats = charts.stats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['entries']), (1, 3, 3))
+
+    def test_least_recently_used_chart_is_evicted(self):
+        specs = [self.spec([1, n]) for n in range(3)]
+        size = len(charts.render_png(specs[0]))
+        with mock.patch.object(charts, 'CHART_CACHE_MAX_BYTES', size * 2 + size // 2):
+            charts.render_png(specs[1])
+            # Backdate the second chart; reading the first again marks it as recently used
+            past = os.path.getmtime(charts._path(specs[1].key())) - 10
+            os.utime(charts._path(specs[1].key()), (past, past))
+            charts.render_png(specs[0])
+            charts.render_png(specs[2])
+
+        self.assertTrue(os.path.exists(charts._path(specs[0].key())))
+        self.assertFalse(os.path.exists(charts._path(specs[1].key())))
+        self.assertEqual(charts.stats()['evictions'], 1)
+
+    def test_unknown_kind_is_rejected(self):
+        with self.assertRaises(ValueError):
+            charts.ChartSpec('radar', [], [])
+
+
+class ConversationSummaryTests(AppQueriesMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user('admin', 'password', email='admin@example.com', role='admin')
+        cls.staff = User.objects.create_user('staff', 'password', email='staff@example.com', role='dost_staff')
+        cls.proponent = User.objects.create_user('proponent', 'password', email='proponent@example.com', role='proponent')
+
+    def send(self, sender, recipient, content='Hello'):
+        return Message.objects.create(sender=sender, recipient=recipient, content=content)
+
+    def summary(self, user, partner):
+        return ConversationSummary.objects.get(user=user, partner=partner)
+
+    def test_messages_update_both_sides(self):
+        self.send(self.staff, self.admin)
+        latest = self.send(self.staff, self.admin, 'Second')
+        self.assertEqual(self.summary(self.admin, self.staff).unread_count, 2)
+        self.assertEqual(self.summary(self.admin, self.staff).last_message, latest)
+        self.assertEqual(self.summary(self.staff, self.admin).unread_count, 0)
+
+        latest.mark_as_read()
+        self.assertEqual(self.summary(self.admin, self.staff).unread_count, 1)
+        conversations.mark_read(self.admin, self.staff)
+        self.assertEqual(self.summary(self.admin, self.staff).unread_count, 0)
+        self.assertFalse(Message.objects.filter(is_read=False).exists())
+
+    def test_one_sided_deletes(self):
+        first = self.send(self.staff, self.admin, 'First')
+        second = self.send(self.staff, self.admin, 'Second')
+        DeletedMessage.objects.create(user=self.admin, message=second)
+        summary = self.summary(self.admin, self.staff)
+        self.assertEqual((summary.last_message, summary.unread_count), (first, 1))
+        self.assertEqual(self.summary(self.staff, self.admin).last_message, second)
+
+        DeletedConversation.objects.create(user=self.admin, partner=self.staff, delete_before=timezone.now())
+        summary = self.summary(self.admin, self.staff)
+        self.assertEqual((summary.last_message, summary.unread_count), (None, 0))
+        self.assertEqual(conversations.inbox_page(self.admin).paginator.count, 0)
+
+        # A new message brings the conversation back
+        reply = self.send(self.staff, self.admin, 'Third')
+        summary = self.summary(self.admin, self.staff)
+        self.assertEqual((summary.last_message, summary.unread_count), (reply, 1))
+
+    def test_rebuild_matches_incremental_updates(self):
+        self.send(self.staff, self.admin)
+        message = self.send(self.admin, self.proponent)
+        self.send(self.proponent, self.admin).mark_as_read()
+        DeletedMessage.objects.create(user=self.proponent, message=message)
+        fields = ('user_id', 'partner_id', 'last_message_id', 'last_activity', 'unread_count', 'delete_before')
+        before = sorted(ConversationSummary.objects.values_list(*fields))
+        self.assertEqual(conversations.rebuild(), 4)
+        self.assertEqual(sorted(ConversationSummary.objects.values_list(*fields)), before)
+
+    def test_inbox_query_count_does_not_grow_with_partners(self):
+        for i in range(5):
+            partner = User.objects.create_user(f'user{i}', 'password', email=f'user{i}@example.com', role='proponent',
+                                               first_name='Juan', last_name=f'Cruz {i}')
+            self.send(partner, self.staff)
+        self.client.force_login(self.staff)
+        self.client.get(reverse('staff_messages_url'))
+        # session, user, inbox count and page, session save; the notification bell is cached
+        with self.assertAppQueries(5):
+            response = self.client.get(reverse('staff_messages_url'))
+        self.assertEqual(len(response.context['conversations']), 5)
+        self.assertContains(response, 'Hello')
+
+
+class ChatHistoryTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user('admin', 'password', email='admin@example.com', role='admin')
+        cls.staff = User.objects.create_user('staff', 'password', email='staff@example.com', role='dost_staff')
+        cls.messages = [Message.objects.create(sender=cls.staff, recipient=cls.admin, content=f'#{i}') for i in range(7)]
+        # Two messages sharing a timestamp are told apart by id
+        Message.objects.filter(pk__in=[m.pk for m in cls.messages[2:4]]).update(created_at=cls.messages[2].created_at)
+
+    def ids(self, history):
+        return [m.pk for m in history['messages']]
+
+    def test_cursors_walk_the_whole_conversation(self):
+        messages = chat_history.direct_messages(self.admin, self.staff)
+        latest = chat_history.page(messages, limit=3)
+        self.assertEqual(self.ids(latest), [m.pk for m in self.messages[4:]])
+        self.assertTrue(latest['has_more'])
+
+        older = chat_history.page(messages, before=latest['before'], limit=3)
+        oldest = chat_history.page(messages, before=older['before'], limit=3)
+        self.assertEqual(self.ids(older) + self.ids(latest), [m.pk for m in self.messages[1:]])
+        self.assertEqual((self.ids(oldest), oldest['has_more']), ([self.messages[0].pk], False))
+
+        newer = chat_history.page(messages, after=older['after'], limit=10)
+        self.assertEqual((self.ids(newer), newer['has_more']), (self.ids(latest), False))
+        self.assertEqual(chat_history.page(messages, after=latest['after'])['messages'], [])
+
+    def test_deleted_messages_are_excluded(self):
+        DeletedMessage.objects.create(user=self.admin, message=self.messages[-1])
+        self.assertNotIn(self.messages[-1].pk, self.ids(chat_history.page(chat_history.direct_messages(self.admin, self.staff))))
+        self.assertIn(self.messages[-1].pk, self.ids(chat_history.page(chat_history.direct_messages(self.staff, self.admin))))
+
+    def test_history_api(self):
+        self.client.force_login(self.admin)
+        url = reverse('message_history_api', args=[self.staff.pk])
+        first = self.client.get(url, {'limit': 5}).json()
+        self.assertEqual([m['content'] for m in first['messages']], ['#2', '#3', '#4', '#5', '#6'])
+
+        reply = Message.objects.create(sender=self.staff, recipient=self.admin, content='New')
+        data = self.client.get(url, {'after': first['after']}).json()
+        self.assertEqual([m['id'] for m in data['messages']], [reply.pk])
+        reply.refresh_from_db()
+        self.assertTrue(reply.is_read)
+
+        self.assertEqual(self.client.get(url, {'before': 'nope'}).status_code, 400)
+        self.assertEqual(self.client.get(reverse('message_history_api', args=[999])).status_code, 404)
+
+    def test_group_history_requires_membership(self):
+        chat = GroupChat.objects.create(name='Team', created_by=self.admin)
+        GroupChatMember.objects.create(group_chat=chat, user=self.admin)
+        hidden = GroupChatMessage.objects.create(group_chat=chat, sender=self.admin, content='Hidden')
+        GroupChatMessage.objects.create(group_chat=chat, sender=self.admin, content='Shown')
+        DeletedGroupChatMessage.objects.create(user=self.admin, message=hidden)
+        url = reverse('group_chat_history_api', args=[chat.pk])
+
+        self.client.force_login(self.admin)
+        self.assertEqual([m['content'] for m in self.client.get(url).json()['messages']], ['Shown'])
+        self.client.force_login(self.staff)
+        self.assertEqual(self.client.get(url).status_code, 403)
+
+
+class EventStreamTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user('admin', 'password', email='admin@example.com', role='admin')
+        cls.staff = User.objects.create_user('staff', 'password', email='staff@example.com', role='dost_staff')
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.log = events.EventLog(os.path.join(self.tmp, 'events.sqlite3'))
+        self.hub = events.EventHub(self.log)
+        for name, value in (('log', self.log), ('hub', self.hub), ('EVENT_BUS_POLL_INTERVAL', 0.05)):
+            patcher = mock.patch.object(events, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.addCleanup(shutil.rmtree, self.tmp, ignore_errors=True)
+
+    def test_creations_are_published_on_commit(self):
+        chat = GroupChat.objects.create(name='Team', created_by=self.admin)
+        with self.captureOnCommitCallbacks() as callbacks:
+            Message.objects.create(sender=self.admin, recipient=self.staff, content='Hi')
+        # Nothing is pushed for a transaction that might still roll back
+        self.assertEqual(self.log.since(0), [])
+        for callback in callbacks:
+            callback()
+        with self.captureOnCommitCallbacks(execute=True):
+            Notification.objects.create(receiver=self.staff, message='Assigned', category='task')
+            GroupChatMessage.objects.create(group_chat=chat, sender=self.admin, content='Hello team')
+
+        rows = sorted((channel, event) for _, channel, event, _ in self.log.since(0))
+        self.assertEqual(rows, [
+            (f'group:{chat.pk}', 'group_message'),
+            (f'user:{self.admin.pk}', 'message'),
+            (f'user:{self.staff.pk}', 'message'),
+            # The message's own notification, then the task one
+            (f'user:{self.staff.pk}', 'notification'),
+            (f'user:{self.staff.pk}', 'notification'),
+        ])
+
+    def test_hub_delivers_to_matching_subscriptions_and_replays(self):
+        early = self.log.append('user:1', 'notification', {'id': 1})
+
+        async def scenario():
+            mine = await self.hub.subscribe(['user:1', 'group:5'])
+            other = await self.hub.subscribe(['user:2'])
+            events.publish('group:5', 'group_message', {'id': 7})
+            delivered = await asyncio.wait_for(mine.queue.get(), 2)
+            # Published by another worker: only the shared log sees it
+            self.log.append('user:2', 'message', {'id': 8})
+            other_delivered = await asyncio.wait_for(other.queue.get(), 2)
+
+            replayed = await self.hub.subscribe(['user:1'], last_event_id=early - 1)
+            replay = replayed.queue.get_nowait()
+            for subscription in (mine, other, replayed):
+                self.hub.unsubscribe(subscription)
+            self.hub._task.cancel()
+            return delivered, other_delivered, replay, mine.queue.empty()
+
+        delivered, other_delivered, replay, rest = asyncio.run(scenario())
+        self.assertEqual((delivered[1:3], other_delivered[1:3]), (('group:5', 'group_message'), ('user:2', 'message')))
+        self.assertEqual(replay[0], early)
+        self.assertTrue(rest)
+
+    def test_subscription_after_idle_starts_at_the_end_of_the_log(self):
+        async def scenario():
+            first = await self.hub.subscribe(['user:1'])
+            self.hub.unsubscribe(first)
+            # Published while nobody in this process listens
+            self.log.append('user:1', 'notification', {'id': 1})
+            await asyncio.sleep(0.2)
+            late = await self.hub.subscribe(['user:1'])
+            events.publish('user:1', 'notification', {'id': 2})
+            delivered = await asyncio.wait_for(late.queue.get(), 2)
+            self.hub.unsubscribe(late)
+            self.hub._task.cancel()
+            return delivered, late.queue.empty()
+
+        delivered, rest = asyncio.run(scenario())
+        self.assertEqual(json.loads(delivered[3]), {'id': 2})
+        self.assertTrue(rest)
+
+    def test_stream_formats_events_and_ends(self):
+        async def scenario():
+            subscription = await self.hub.subscribe(['user:1'])
+            events.publish('user:1', 'notification', {'id': 3})
+            with mock.patch.object(events, 'SSE_MAX_AGE', 0.3), mock.patch.object(events, 'SSE_KEEPALIVE', 0.1):
+                chunks = [chunk async for chunk in events.stream(subscription)]
+            self.hub._task.cancel()
+            return chunks
+
+        chunks = asyncio.run(scenario())
+        self.assertEqual(chunks[0], f'retry: {events.SSE_RETRY_MS}\n\n')
+        self.assertRegex(chunks[1], r'^id: \d+\nevent: notification\ndata: \{"id":3\}\n\n$')
+        self.assertIn(': keepalive\n\n', chunks[2:])
+        self.assertFalse(self.hub._subscriptions)
+
+    def test_view_requires_login_and_declines_under_wsgi(self):
+        url = reverse('event_stream')
+        self.assertEqual(self.client.get(url).status_code, 403)
+        self.client.force_login(self.admin)
+        # The test client is WSGI: the browser is told to keep polling instead
+        self.assertEqual(self.client.get(url).status_code, 204)
+
+
+class NotificationCacheTests(AppQueriesMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create_user('staff', 'password', email='staff@example.com', role='dost_staff')
+
+    def setUp(self):
+        cache.clear()
+        self.first = Notification.objects.create(receiver=self.staff, message='First', category='task')
+
+    def test_summary_is_cached_until_notifications_change(self):
+        self.assertEqual(notification_cache.summary(self.staff.pk)['unread_count'], 1)
+        with self.assertAppQueries(0):
+            feed = notification_cache.summary(self.staff.pk)
+        self.assertEqual([n['message'] for n in feed['notifications']], ['First'])
+
+        second = Notification.objects.create(receiver=self.staff, message='Second', category='task')
+        self.assertEqual(notification_cache.summary(self.staff.pk)['unread_count'], 2)
+        self.first.status = 'read'
+        self.first.save(update_fields=['status'])
+        self.assertEqual(notification_cache.summary(self.staff.pk)['unread_count'], 1)
+        second.delete()
+        self.assertEqual(notification_cache.summary(self.staff.pk)['unread_count'], 0)
+
+    def test_invalidation_reaches_other_processes(self):
+        notification_cache.summary(self.staff.pk)
+        # Stored in the database rather than this process's memory
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT COUNT(*) FROM {settings.CACHES['default']['LOCATION']}")
+            self.assertEqual(cursor.fetchone()[0], 2)
+        # The cache of another web worker, sweep_overdue or run_report_worker
+        other = caches.create_connection('default')
+        key = notification_cache._version_key(self.staff.pk)
+        version = other.get(key)
+        self.assertEqual(version, cache.get(key))
+
+        Notification.objects.create(receiver=self.staff, message='Second', category='task')
+        self.assertNotEqual(other.get(key), version)
+
+    def test_clear_all_and_polling_endpoint(self):
+        self.client.force_login(self.staff)
+        data = self.client.get(reverse('get_notification_count')).json()
+        self.assertEqual((data['unread_count'], [n['message'] for n in data['notifications']]), (1, ['First']))
+
+        self.client.post(reverse('clear_all_notifications'))
+        data = self.client.get(reverse('get_notification_count')).json()
+        self.assertEqual((data['unread_count'], data['notifications']), (0, []))
+
+    def test_context_processor_is_lazy(self):
+        request = RequestFactory().get('/')
+        request.user = self.staff
+        with self.assertAppQueries(0):
+            context = notifications_context(request)
+        with self.assertAppQueries(2):
+            self.assertTrue(context['unread_notifications_count'] > 0)
+            self.assertEqual(len(context['notifications_list']), 1)
+
+
+class NotificationFanoutTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.proponent = User.objects.create_user('proponent', 'password', email='proponent@example.com', role='proponent')
+        cls.proposal = Proposal.objects.create(title='Fish Dryer', status='approved', processed_by=cls.proponent)
+
+    def setUp(self):
+        # Keep pushes out of the shared event log
+        patcher = mock.patch.object(events, 'publish_many')
+        self.publish_many = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def beneficiaries(self, count, start=0):
+        return User.objects.bulk_create([User(username=f'beneficiary{i}', email=f'b{i}@example.com', role='beneficiary')
+                                         for i in range(start, start + count)])
+
+    def save_project(self, **fields):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Project.objects.create(project_title='Solar Dryer', proposal=self.proposal,
+                                          start_date=date(2025, 1, 1), end_date=date(2025, 2, 1), **fields)
+
+    def test_short_project_notifies_once_per_receiver(self):
+        beneficiaries = self.beneficiaries(3)
+        project = self.save_project()
+        self.assertEqual(Notification.objects.filter(receiver__in=beneficiaries, dedupe_key=f'project_short:{project.pk}').count(), 3)
+        self.assertEqual(Notification.objects.filter(receiver=self.proponent).count(), 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            project.save()
+        self.assertEqual(Notification.objects.filter(dedupe_key=f'project_short:{project.pk}').count(), 4)
+
+    def test_fan_out_query_count_does_not_grow_with_receivers(self):
+        def queries(receivers):
+            with self.assertNumQueries(3) as context:
+                # existing keys, beneficiary ids, insert (SQLite fits 500 rows in one statement)
+                notification_fanout.fan_out(
+                    User.objects.filter(pk__in=[u.pk for u in receivers]).values_list('id', flat=True),
+                    'Heads up', dedupe_key=f'notice:{len(receivers)}',
+                )
+            return context
+
+        queries(self.beneficiaries(2))
+        queries(self.beneficiaries(40, start=2))
+        self.assertEqual(Notification.objects.filter(dedupe_key='notice:40').count(), 40)
+
+    def test_nothing_is_sent_before_commit(self):
+        self.beneficiaries(2)
+        with self.captureOnCommitCallbacks() as callbacks:
+            Project.objects.create(project_title='Solar Dryer', proposal=self.proposal,
+                                   start_date=date(2025, 1, 1), end_date=date(2025, 2, 1))
+        self.assertFalse(Notification.objects.filter(dedupe_key__startswith='project_short:').exists())
+        self.assertFalse(self.publish_many.called)
+        for callback in callbacks:
+            callback()
+        self.assertEqual(Notification.objects.filter(dedupe_key__startswith='project_short:').count(), 3)
+
+
+class OverdueSweepTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.proponent = User.objects.create_user('proponent', 'password', email='proponent@example.com', role='proponent')
+        proposal = Proposal.objects.create(title='Fish Dryer', status='approved', processed_by=cls.proponent)
+        cls.project = Project.objects.create(project_title='Solar Dryer', proposal=proposal)
+        cls.orphan = Project.objects.create(project_title='No Proposal')
+
+    def setUp(self):
+        patcher = mock.patch.object(events, 'publish_many')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tasks(self, count, **fields):
+        fields.setdefault('due_date', date(2025, 1, 1))
+        fields.setdefault('project', self.project)
+        # bulk_create: no post_save, like tasks that simply age past their due date
+        return Task.objects.bulk_create([Task(title=f'Task {i}', **fields) for i in range(count)])
+
+    def test_sweep_flags_and_notifies_once(self):
+        overdue_tasks = self.tasks(2)
+        self.tasks(1, status='completed')
+        self.tasks(1, due_date=date(2099, 1, 1))
+        self.tasks(1, project=self.orphan)
+
+        self.assertEqual(overdue.sweep(), 2)
+        self.assertEqual(set(Task.objects.filter(due_date_notified=True)), set(overdue_tasks))
+        self.assertEqual(Notification.objects.filter(receiver=self.proponent, category='task').count(), 2)
+        self.assertEqual(overdue.sweep(), 0)
+
+    def test_sweep_query_count_does_not_grow_with_tasks(self):
+        self.tasks(2)
+        # find, savepoint, flag, insert, release
+        with self.assertNumQueries(5):
+            overdue.sweep()
+        self.tasks(50)
+        with self.assertNumQueries(5):
+            self.assertEqual(overdue.sweep(), 50)
+
+    def test_saving_an_overdue_task_sweeps_it(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            task = Task.objects.create(project=self.project, title='Late', due_date=date(2025, 1, 1))
+        task.refresh_from_db()
+        self.assertTrue(task.due_date_notified)
+        self.assertEqual(Notification.objects.filter(dedupe_key=f'task_overdue:{task.pk}').count(), 1)
+
+    def test_command(self):
+        self.tasks(3)
+        out = StringIO()
+        call_command('sweep_overdue', stdout=out)
+        self.assertIn('3 overdue task(s) flagged', out.getvalue())
+
+
+class NotificationRetentionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create_user('staff', 'password', email='staff@example.com', role='dost_staff')
+        cls.admin = User.objects.create_user('admin', 'password', email='admin@example.com', role='admin')
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        patcher = mock.patch.object(notification_retention, 'NOTIFICATION_ARCHIVE_DIR', self.tmp)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(shutil.rmtree, self.tmp, ignore_errors=True)
+
+    def notify(self, receiver, count, days_ago, status='unread'):
+        stamp = timezone.now() - timedelta(days=days_ago)
+        Notification.objects.bulk_create([
+            Notification(receiver=receiver, message=f'Notice {i}', status=status, timestamp=stamp - timedelta(minutes=i))
+            for i in range(count)
+        ])
+
+    def test_old_read_notifications_are_archived_in_batches(self):
+        self.notify(self.staff, 5, days_ago=200, status='read')
+        self.notify(self.staff, 2, days_ago=200)
+        self.notify(self.staff, 3, days_ago=1, status='read')
+
+        self.assertEqual(notification_retention.archive_read(days=90, batch_size=2), 5)
+        self.assertEqual(Notification.objects.count(), 5)
+        self.assertFalse(Notification.objects.filter(status='read', timestamp__lt=timezone.now() - timedelta(days=90)).exists())
+
+        month = timezone.localtime(timezone.now() - timedelta(days=200)).strftime('%Y-%m')
+        archived = list(notification_retention.read_archive(month))
+        self.assertEqual(sorted(row['message'] for row in archived), [f'Notice {i}' for i in range(5)])
+        self.assertEqual({row['receiver_id'] for row in archived}, {self.staff.pk})
+
+    def test_per_user_cap_keeps_the_newest(self):
+        self.notify(self.staff, 6, days_ago=1)
+        self.notify(self.admin, 2, days_ago=1)
+        newest = list(Notification.objects.filter(receiver=self.staff).order_by('-timestamp').values_list('id', flat=True)[:4])
+
+        self.assertEqual(notification_retention.enforce_caps(max_per_user=4, batch_size=1), 2)
+        self.assertEqual(sorted(Notification.objects.filter(receiver=self.staff).values_list('id', flat=True)), sorted(newest))
+        self.assertEqual(Notification.objects.filter(receiver=self.admin).count(), 2)
+
+    def test_per_user_cap_spares_unread(self):
+        self.notify(self.staff, 3, days_ago=10)
+        self.notify(self.staff, 3, days_ago=1, status='read')
+        self.assertEqual(notification_retention.enforce_caps(max_per_user=4), 2)
+        self.assertEqual(Notification.objects.filter(receiver=self.staff, status='unread').count(), 3)
+
+        # More unread than the cap: the last read one, then the oldest unread
+        self.notify(self.staff, 3, days_ago=20)
+        self.assertEqual(notification_retention.enforce_caps(max_per_user=4), 3)
+        self.assertFalse(Notification.objects.filter(receiver=self.staff, status='read').exists())
+        self.assertEqual(Notification.objects.filter(receiver=self.staff, timestamp__lt=timezone.now() - timedelta(days=15)).count(), 1)
+
+    def test_command(self):
+        self.notify(self.staff, 3, days_ago=100, status='read')
+        out = StringIO()
+        call_command('prune_notifications', '--days', '90', '--max-per-user', '0', stdout=out)
+        self.assertIn('3 old read notification(s) and 0 over the per-user cap archived', out.getvalue())
+
+
+class BulkActionTests(AppQueriesMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create_user('staff', 'password', email='staff@example.com', role='dost_staff',
+                                             first_name='Ana', last_name='Reyes')
+        cls.admin = User.objects.create_user('admin', 'password', email='admin@example.com', role='admin',
+                                             first_name='Ben', last_name='Santos')
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.staff)
+
+    def post(self, name, data):
+        return self.client.post(reverse(name), data, content_type='application/json')
+
+    def test_notifications_by_ids_and_watermark(self):
+        now = timezone.now()
+        old, older, new = Notification.objects.bulk_create([
+            Notification(receiver=self.staff, message=message, timestamp=now - timedelta(hours=hours))
+            for message, hours in (('Old', 2), ('Older', 3), ('New', 0))
+        ])
+        other = Notification.objects.create(receiver=self.admin, message='Not mine')
+
+        data = self.post('notifications_bulk_read', {'ids': [old.pk, other.pk]}).json()
+        self.assertEqual((data['updated'], data['unread_count']), (1, 2))
+        data = self.post('notifications_bulk_read', {'before': (now - timedelta(hours=1)).isoformat()}).json()
+        self.assertEqual((data['updated'], data['unread_count']), (1, 1))
+
+        data = self.post('notifications_bulk_delete', {'ids': [old.pk, older.pk, new.pk, other.pk]}).json()
+        self.assertEqual((data['deleted'], data['unread_count']), (3, 0))
+        self.assertTrue(Notification.objects.filter(pk=other.pk).exists())
+
+    def test_notification_delete_is_one_query(self):
+        Notification.objects.bulk_create([Notification(receiver=self.staff, message=f'#{i}') for i in range(500)])
+        Notification.objects.create(receiver=self.admin, message='Not mine')
+        self.assertEqual(notification_cache.summary(self.staff.pk)['unread_count'], 500)
+
+        # No row fetch or per-row post_delete, whatever the selection size
+        with self.assertAppQueries(1):
+            deleted = bulk_actions.delete_notifications(self.staff, {'ids': None, 'before': timezone.now(), 'partner_id': None})
+        self.assertEqual(deleted, 500)
+        self.assertEqual(notification_cache.summary(self.staff.pk)['unread_count'], 0)
+        self.assertEqual(Notification.objects.count(), 1)
+
+    def test_messages_read_and_hidden_in_bulk(self):
+        received = [Message.objects.create(sender=self.admin, recipient=self.staff, content=f'#{i}') for i in range(3)]
+        sent = Message.objects.create(sender=self.staff, recipient=self.admin, content='Reply')
+        summary = ConversationSummary.objects.get(user=self.staff, partner=self.admin)
+        self.assertEqual(summary.unread_count, 3)
+
+        data = self.post('messages_bulk_read', {'ids': [m.pk for m in received[:2]], 'partner_id': self.admin.pk}).json()
+        self.assertEqual((data['updated'], data['unread_messages']), (2, 1))
+        summary.refresh_from_db()
+        self.assertEqual(summary.unread_count, 1)
+
+        data = self.post('messages_bulk_delete', {'before': timezone.now().isoformat()}).json()
+        self.assertEqual((data['deleted'], data['unread_messages']), (4, 0))
+        self.assertEqual(set(DeletedMessage.objects.filter(user=self.staff).values_list('message_id', flat=True)),
+                         {m.pk for m in received} | {sent.pk})
+        summary.refresh_from_db()
+        self.assertIsNone(summary.last_message_id)
+        self.assertEqual(ConversationSummary.objects.get(user=self.admin, partner=self.staff).last_message_id, sent.pk)
+
+    def test_invalid_selection(self):
+        self.assertEqual(self.post('notifications_bulk_read', {}).status_code, 400)
+        self.assertEqual(self.post('notifications_bulk_read', {'ids': 'all'}).status_code, 400)
+        self.assertEqual(self.post('messages_bulk_read', {'before': 'yesterday'}).status_code, 400)
+        self.assertEqual(self.client.get(reverse('notifications_bulk_read')).status_code, 405)
+
+
+@mock.patch.object(events, 'publish_many')
+class GroupChatUnreadTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin, cls.staff, cls.left = (
+            User.objects.create_user(username, 'password', email=f'{username}@example.com', role=role,
+                                     first_name=username.title(), last_name='Cruz')
+            for username, role in (('admin', 'admin'), ('staff', 'dost_staff'), ('left', 'dost_staff'))
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.chat = GroupChat.objects.create(name='Team', created_by=self.admin)
+        self.members = {
+            user.username: GroupChatMember.objects.create(group_chat=self.chat, user=user, is_active=user != self.left)
+            for user in (self.admin, self.staff, self.left)
+        }
+
+    def unread(self, username):
+        self.members[username].refresh_from_db()
+        return self.members[username].unread_count
+
+    def test_new_messages_count_for_other_active_members(self, publish_many):
+        for i in range(3):
+            GroupChatMessage.objects.create(group_chat=self.chat, sender=self.admin, content=f'#{i}')
+        GroupChatMessage.objects.create(group_chat=self.chat, sender=self.staff, content='Reply')
+        self.assertEqual((self.unread('admin'), self.unread('staff'), self.unread('left')), (1, 3, 0))
+        self.assertEqual(group_chats.total_unread(self.staff), 3)
+
+    def test_opening_the_chat_clears_the_count(self, publish_many):
+        GroupChatMessage.objects.create(group_chat=self.chat, sender=self.admin, content='Hello')
+        self.client.force_login(self.staff)
+        response = self.client.get(reverse('staff_group_chat_detail_url', args=[self.chat.pk]))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.unread('staff'), 0)
+        self.assertIsNotNone(self.members['staff'].last_seen_at)
+
+    def test_list_shows_badges_in_constant_queries(self, publish_many):
+        GroupChatMessage.objects.create(group_chat=self.chat, sender=self.admin, content='Hello')
+        self.client.force_login(self.staff)
+        url = reverse('staff_group_chats_url')
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as one_chat:
+            response = self.client.get(url)
+        self.assertContains(response, 'title="Unread messages">1</span>')
+
+        for i in range(5):
+            chat = GroupChat.objects.create(name=f'Chat {i}', created_by=self.admin)
+            GroupChatMember.objects.bulk_create([GroupChatMember(group_chat=chat, user=user) for user in (self.admin, self.staff)])
+            GroupChatMessage.objects.create(group_chat=chat, sender=self.admin, content='Hi')
+        with CaptureQueriesContext(connection) as six_chats:
+            response = self.client.get(url)
+        self.assertEqual(len(six_chats), len(one_chat))
+        self.assertEqual([m.member_count for m in response.context['user_group_chats']], [2] * 5 + [2])
+
+    def test_rebuild_matches_counters(self, publish_many):
+        for i in range(3):
+            GroupChatMessage.objects.create(group_chat=self.chat, sender=self.admin, content=f'#{i}')
+        group_chats.mark_seen(self.members['admin'])
+        GroupChatMessage.objects.create(group_chat=self.chat, sender=self.staff, content='Reply')
+        counters = dict(GroupChatMember.objects.filter(is_active=True).values_list('user__username', 'unread_count'))
+        GroupChatMember.objects.update(unread_count=0)
+        group_chats.rebuild_unread()
+        self.assertEqual(
+            dict(GroupChatMember.objects.filter(is_active=True).values_list('user__username', 'unread_count')), counters,
+        )
+
+    def test_benchmark_command(self, publish_many):
+        out = StringIO()
+        call_command('benchmark_group_chats', '--chats', '3', '--members', '4', '--messages', '2', stdout=out)
+        self.assertIn('stored counters', out.getvalue())
+        self.assertEqual(GroupChat.objects.count(), 1)
+
+
+@mock.patch.object(events, 'publish_many')
+class VisibleMessageTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create_user('staff', 'password', email='staff@example.com', role='dost_staff')
+        cls.admin = User.objects.create_user('admin', 'password', email='admin@example.com', role='admin')
+        cls.other = User.objects.create_user('other', 'password', email='other@example.com', role='proponent')
+
+    def test_direct_messages_with_50k_tombstones(self, publish_many):
+        # bulk_create() skips the summary signals, which this test does not need
+        messages = Message.objects.bulk_create([
+            Message(sender=self.admin, recipient=self.staff, content=f'#{i}') for i in range(50010)
+        ], batch_size=5000)
+        DeletedMessage.objects.bulk_create(
+            [DeletedMessage(user=self.staff, message=message) for message in messages[:50000]], batch_size=5000,
+        )
+        Message.objects.bulk_create([Message(sender=self.admin, recipient=self.other, content='Not mine')])
+
+        visible = Message.objects.visible_to(self.staff)
+        _, params = visible.query.sql_with_params()
+        self.assertLess(len(params), 10)
+        with self.assertNumQueries(1):
+            self.assertEqual(set(visible.values_list('pk', flat=True)), {m.pk for m in messages[50000:]})
+        self.assertEqual(Message.objects.visible_to(self.admin).count(), 50011)
+
+    def test_conversation_watermark(self, publish_many):
+        old = Message.objects.create(sender=self.staff, recipient=self.admin, content='Old')
+        DeletedConversation.objects.create(user=self.staff, partner=self.admin, delete_before=old.created_at)
+        new = Message.objects.create(sender=self.admin, recipient=self.staff, content='New')
+        elsewhere = Message.objects.create(sender=self.other, recipient=self.staff, content='Elsewhere')
+        Message.objects.filter(pk=elsewhere.pk).update(created_at=old.created_at)
+
+        self.assertEqual(set(Message.objects.visible_to(self.staff)), {new, elsewhere})
+        self.assertEqual(set(Message.objects.visible_to(self.admin)), {old, new})
+
+    def test_group_chat_messages(self, publish_many):
+        chat = GroupChat.objects.create(name='Team', created_by=self.admin)
+        other_chat = GroupChat.objects.create(name='Other', created_by=self.admin)
+        old, hidden, shown = [
+            GroupChatMessage.objects.create(group_chat=chat, sender=self.admin, content=content)
+            for content in ('Old', 'Hidden', 'Shown')
+        ]
+        kept = GroupChatMessage.objects.create(group_chat=other_chat, sender=self.admin, content='Kept')
+        GroupChatMessage.objects.filter(pk=kept.pk).update(created_at=old.created_at)
+        DeletedGroupChat.objects.create(user=self.staff, group_chat=chat, delete_before=old.created_at)
+        DeletedGroupChatMessage.objects.create(user=self.staff, message=hidden)
+
+        self.assertEqual(set(GroupChatMessage.objects.visible_to(self.staff)), {shown, kept})
+        self.assertEqual(GroupChatMessage.objects.visible_to(self.admin).count(), 4)
+
+
+class ExcelExportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user('admin', 'password', email='admin@example.com', role='admin',
+                                             first_name='ana', last_name='reyes')
+        Budget.objects.create(fiscal_year=2025, total_equipment_value=Decimal('1000.00'),
+                              delivered_equipment_value=Decimal('250.00'), created_by=cls.admin)
+        Proposal.objects.create(title='Solar Dryer', status='approved', proposed_amount=Decimal('500.00'),
+                                submitted_by=cls.admin)
+        project = Project.objects.create(project_title='Rice Mill', status='Ongoing', funds=Decimal('1500.50'),
+                                         project_start=date(2025, 1, 15))
+        Task.objects.create(project=project, title='Install', due_date=date(2025, 3, 1), assigned_to=cls.admin)
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def workbook(self, name):
+        response = self.client.get(reverse(name))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], excel_export.XLSX_CONTENT_TYPE)
+        self.assertRegex(response['Content-Disposition'], r'^attachment; filename="\w+_\d{8}\.xlsx"$')
+        return load_workbook(BytesIO(b''.join(response.streaming_content)))
+
+    def test_projects_sheet(self):
+        ws = self.workbook('export_projects_excel').active
+        self.assertEqual((ws.max_row, ws.max_column), (2, 55))
+        self.assertEqual([c.value for c in ws[1][:4]], ['No.', 'Code', 'Year', 'Project Title'])
+        row = ws[2]
+        self.assertEqual((row[0].value, row[3].value, row[23].value, row[31].value), ('-', 'Rice Mill', 1500.5, '2025-01-15'))
+        self.assertEqual((ws['A1'].style, row[3].style, row[23].style), ('export_header', 'export_cell', 'export_currency'))
+        self.assertEqual(ws.freeze_panes, 'A2')
+
+    def test_rows_come_from_one_projection(self):
+        Project.objects.bulk_create([Project(project_title=f'Project {i}') for i in range(20)])
+        names = excel_export.user_names()
+        with self.assertNumQueries(1):
+            rows = list(excel_export.rows(excel_export.tasks(), excel_export.task_columns(names)))
+        self.assertEqual(rows, [['Install', 'Rice Mill', '-', 'Ana Reyes', 'Pending', '2025-03-01', '-', '-']])
+
+    def test_master_report(self):
+        wb = self.workbook('export_master_report_excel')
+        self.assertEqual(wb.sheetnames, ['Summary', 'Budgets', 'Proposals', 'Projects', 'Tasks'])
+        summary = {row[0]: row[1] for row in wb['Summary'].iter_rows(values_only=True) if row}
+        self.assertEqual((summary['Total Remaining:'], summary['Approved:'], summary['Total Tasks:']), (750.0, 1, 1))
+        self.assertEqual([c.value for c in wb['Budgets'][2]], [2025, 'DOST_GIA', 1000.0, 750.0, 250.0,
+                                                             'pending_procurement', date.today().isoformat()])
+        self.assertEqual([c.value for c in wb['Proposals'][2]][:5], ['Solar Dryer', 'Approved', 500.0, '-', 'Ana Reyes'])
+
+
+class DataExportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user('admin', 'password', email='admin@example.com', role='admin')
+        cls.staff = User.objects.create_user('staff', 'password', email='staff@example.com', role='dost_staff')
+        naval = Project.objects.create(project_title='Rice Mill, Phase 2', status='Ongoing', mun='Naval', year=2025,
+                                       funds=Decimal('1500.50'))
+        Project.objects.create(project_title='Solar Dryer', status='Completed', mun='Kawayan', year=2024)
+        Task.objects.create(project=naval, title='Install', due_date=date(2025, 3, 1), status='pending')
+        Task.objects.create(project=naval, title='Train', due_date=date(2025, 4, 1), status='completed')
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def get(self, dataset, fmt='csv', **kwargs):
+        headers = {key: kwargs.pop(key) for key in list(kwargs) if key.startswith('HTTP_')}
+        return self.client.get(reverse(f'export_data_{fmt}', args=[dataset]), kwargs, **headers)
+
+    def body(self, response):
+        return b''.join(response.streaming_content).decode()
+
+    def test_csv_with_report_filters(self):
+        response = self.get('projects', municipality='naval', year='2025')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        self.assertRegex(response['Content-Disposition'], r'attachment; filename="projects_\d{8}\.csv"')
+        rows = list(csv.reader(StringIO(self.body(response))))
+        self.assertEqual(len(rows), 2)
+        project = dict(zip(rows[0], rows[1]))
+        self.assertEqual((project['project_title'], project['funds'], project['status_bucket']),
+                         ('Rice Mill, Phase 2', '1500.50', 'ongoing'))
+
+    def test_ndjson_in_chunks(self):
+        response = self.get('tasks', 'ndjson', status='completed')
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        rows = [json.loads(line) for line in self.body(response).splitlines()]
+        self.assertEqual([(row['title'], row['due_date']) for row in rows], [('Train', '2025-04-01')])
+
+        queryset = data_exports.DATASETS['tasks'].queryset(data_exports.parse_filters({}))
+        with self.assertNumQueries(1):
+            chunks = list(data_exports.lines('ndjson', queryset, ('id', 'title'), chunk_size=1))
+        self.assertEqual(len(chunks), 2)
+
+    def test_gzip_and_conditional_requests(self):
+        response = self.get('projects', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        text = gzip.decompress(b''.join(response.streaming_content)).decode()
+        self.assertEqual(len(text.splitlines()), 3)
+
+        etag, last_modified = response['ETag'], response['Last-Modified']
+        self.assertEqual(self.get('projects', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.assertEqual(self.get('projects', HTTP_IF_MODIFIED_SINCE=last_modified).status_code, 304)
+        # The filters are part of the validator
+        self.assertEqual(self.get('projects', year='2025', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+        Project.objects.filter(mun='Kawayan').delete()
+        self.assertEqual(self.get('projects', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_invalid_requests(self):
+        self.assertEqual(self.get('projects', year='last').status_code, 400)
+        self.assertEqual(self.get('projects', start_date='2025-13-01').status_code, 400)
+        self.assertEqual(self.get('users').status_code, 400)
+        self.assertEqual(self.get('audit_logs').status_code, 200)
+        self.client.force_login(self.staff)
+        self.assertEqual(self.get('audit_logs').status_code, 403)
+        self.assertEqual(self.get('equipment_deliveries').status_code, 200)
+
+
+class ChangeFeedTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user('admin', 'password', email='admin@example.com', role='admin')
+        cls.staff = User.objects.create_user('staff', 'password', email='staff@example.com', role='dost_staff')
+        cls.projects = [Project.objects.create(project_title=f'Project {i}', mun='Naval') for i in range(3)]
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+        # Serve rows written a moment ago
+        lag = mock.patch.object(change_feed, 'CHANGE_FEED_SAFETY_LAG', 0)
+        lag.start()
+        self.addCleanup(lag.stop)
+
+    def get(self, feed, **params):
+        return self.client.get(reverse('change_feed_api', args=[feed]), params)
+
+    def sync(self, feed, cursor=None, limit=2):
+        """Every page from `cursor`: (changed ids, deleted ids, last cursor)"""
+        changed, deleted = [], []
+        while True:
+            data = self.get(feed, **({'cursor': cursor} if cursor else {}), limit=limit).json()
+            changed += [row['id'] for row in data['changes']]
+            deleted += [row['id'] for row in data['deleted']]
+            cursor = data['cursor']
+            if not data['has_more']:
+                return changed, deleted, cursor
+
+    def test_full_load_then_only_changes(self):
+        # Rows sharing a date_updated are told apart by id
+        Project.objects.update(date_updated=timezone.now())
+        changed, deleted, cursor = self.sync('projects', limit=1)
+        self.assertEqual(changed, [project.pk for project in self.projects])
+        self.assertEqual(deleted, [])
+        self.assertEqual(self.sync('projects', cursor)[:2], ([], []))
+
+        first, second, _ = self.projects
+        first.save()
+        second_pk = second.pk
+        second.delete()
+        AuditLog.objects.create(user=self.admin, action='delete', model_name='Project', object_id=str(second_pk))
+        changed, deleted, cursor = self.sync('projects', cursor)
+        self.assertEqual((changed, deleted), ([first.pk], [second_pk]))
+        self.assertEqual(self.sync('projects', cursor)[:2], ([], []))
+
+    def test_no_changes_costs_one_query_per_side(self):
+        cursor = self.sync('projects')[2]
+        with self.assertNumQueries(2):
+            changes = change_feed.page(change_feed.get_feed('projects'), cursor)
+        self.assertEqual((changes['changes'], changes['deleted'], changes['cursor']), ([], [], cursor))
+
+    def test_cursor_stays_behind_writes_in_flight(self):
+        feed = change_feed.get_feed('projects')
+        now = timezone.now()
+        quick = self.projects[2]
+        Project.objects.update(date_updated=now - timedelta(minutes=5))
+        Project.objects.filter(pk=quick.pk).update(date_updated=now - timedelta(seconds=10))
+        with mock.patch.object(change_feed, 'CHANGE_FEED_SAFETY_LAG', 60):
+            first = change_feed.page(feed)
+            self.assertEqual(len(first['changes']), 2)
+            # Stamped before `quick` but committed after the sync; a cursor past `quick` would skip it
+            late = Project.objects.create(project_title='Late', mun='Naval')
+            Project.objects.filter(pk=late.pk).update(date_updated=now - timedelta(seconds=30))
+            self.assertEqual(change_feed.page(feed, first['cursor'])['changes'], [])
+            with mock.patch.object(change_feed.timezone, 'now', return_value=now + timedelta(minutes=1)):
+                later = change_feed.page(feed, first['cursor'])
+        self.assertEqual([row['id'] for row in later['changes']], [late.pk, quick.pk])
+
+    def test_unaudited_deletes_are_logged(self):
+        proposal = Proposal.objects.create(title='Fish Dryer', status='approved')
+        extension = ExtensionRequest.objects.create(proposal=proposal, proponent=self.staff)
+        tranche = TrancheRelease.objects.create(project=self.projects[0], tranche_number=1, amount=Decimal('1000.00'))
+        tranche_pk, extension_pk = tranche.pk, extension.pk
+        cursor = self.sync('tranche_releases')[2]
+        self.assertEqual(self.sync('extension_requests')[0], [extension_pk])
+
+        # Cascades from the project delete the tranche with no view involved
+        self.projects[0].delete()
+        proposal.extension_requests.all().delete()
+        self.assertEqual(self.sync('tranche_releases', cursor)[:2], ([], [tranche_pk]))
+        self.assertEqual(self.sync('extension_requests')[1], [extension_pk])
+
+    def test_invalid_requests(self):
+        self.assertEqual(self.get('projects', cursor='yesterday').status_code, 400)
+        self.assertEqual(self.get('projects', limit='all').status_code, 400)
+        self.assertEqual(self.get('tasks').status_code, 400)
+        self.client.force_login(self.staff)
+        self.assertEqual(self.get('projects').status_code, 403)
+
+
+class ReportDatasetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user('admin', 'password', email='admin@example.com', role='admin')
+        budget = Budget.objects.create(fiscal_year=2025, total_equipment_value=Decimal('1000.00'),
+                                       delivered_equipment_value=Decimal('250.00'))
+        naval = Project.objects.create(project_title='Rice Mill', status='ongoing', mun='Naval', year=2025,
+                                       budget=budget, funds=Decimal('500.00'), project_start=date(2025, 3, 1))
+        Project.objects.create(project_title='Solar Dryer', status='completed', mun='Kawayan', year=2025, budget=budget)
+        Task.objects.create(project=naval, title='Install', due_date=date(2025, 3, 1), status='pending')
+        Proposal.objects.create(title='Fish Dryer', status='pending', municipality='Naval')
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.admin)
+
+    def test_equivalent_filters_share_a_key(self):
+        filters = report_data.ReportFilters.from_params({'year': '2025', 'municipality': ' NAVAL ', 'start_date': 'soon'})
+        self.assertEqual(filters, report_data.ReportFilters(year=2025, municipality='NAVAL'))
+        self.assertEqual(filters.key, report_data.ReportFilters.from_params({'municipality': 'naval', 'year': '2025'}).key)
+        self.assertNotEqual(filters.key, report_data.ReportFilters(year=2025).key)
+
+    def test_aggregates(self):
+        report = report_data.dataset({'year': '2025', 'municipality': 'naval'})
+        self.assertEqual((report.total_budget, report.total_remaining, report.utilization_rate),
+                         (Decimal('1000.00'), Decimal('750.00'), 25.0))
+        self.assertEqual(report.project_bucket_counts, {'ongoing': 1})
+        self.assertEqual(report.proposal_status_counts, {})
+        self.assertEqual(report.task_status_counts, {'pending': 1})
+        self.assertEqual(report.monthly_projects[2], 1)
+        self.assertEqual(report.top_funded, [{'project_title': 'Rice Mill', 'funds': Decimal('500.00')}])
+        [row] = report.budget_rows
+        self.assertEqual((row['projects'], row['statuses'], row['tasks']), (1, {'ongoing': 1}, 1))
+
+        # The date range leaves the rollups for the same lookups on the tables
+        ranged = report_data.dataset({'municipality': 'naval', 'start_date': '2025-01-01'})
+        self.assertEqual((ranged.project_bucket_counts, ranged.proposal_status_counts), ({'ongoing': 1}, {'pending': 1}))
+
+    def test_page_and_pdf_share_one_computation(self):
+        params = {'year': '2025', 'municipality': 'Naval'}
+        with mock.patch.object(report_data, 'build', wraps=report_data.build) as build:
+            self.assertEqual(self.client.get(reverse('administrator_reports_url'), params).status_code, 200)
+            response = self.client.get(reverse('export_full_report_pdf'), params)
+            self.assertEqual(response['Content-Type'], 'application/pdf')
+            self.assertEqual(build.call_count, 1)
+
+            Project.objects.create(project_title='Fish Cage', status='ongoing', mun='Naval', year=2025)
+            self.assertEqual(report_data.dataset(params).total_projects, 2)
+            self.assertEqual(build.call_count, 2)
+
+    def test_sign_in_keeps_the_cached_dataset(self):
+        report_data.dataset({'year': '2025'})
+        with mock.patch.object(report_data, 'build', wraps=report_data.build) as build:
+            self.assertTrue(self.client.login(username='admin', password='password'))
+            report_data.dataset({'year': '2025'})
+            self.assertEqual(build.call_count, 0)
+
+            self.admin.role = 'dost_staff'
+            self.admin.save()
+            self.assertEqual(report_data.dataset({'year': '2025'}).user_role_counts, {'dost_staff': 1})
+
+    def test_worker_reads_the_page_dataset(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        params = {'year': '2025', 'include_charts': '0'}
+        with mock.patch.object(report_data, 'build', wraps=report_data.build) as build, \
+                override_settings(MEDIA_ROOT=media_root):
+            self.client.get(reverse('administrator_reports_url'), params)
+            job, _ = report_jobs.enqueue('full_report', params, self.admin)
+            report_jobs.claim(1)
+            # run_report_worker has a cache client of its own
+            with mock.patch.object(report_data, 'cache', caches.create_connection('default')):
+                self.assertEqual(report_jobs.run_job(job.pk), 'done')
+            self.assertEqual(build.call_count, 1)
+
+    def test_role_report_pages(self):
+        # The contexts, not the templates: these pages link export URLs that no longer exist
+        for url in ('staff_reports_url', 'proponent_reports_url', 'beneficiary_reports_url'):
+            with mock.patch('myapp.views.render', return_value=HttpResponse()) as render:
+                self.assertEqual(self.client.get(reverse(url), {'year': '2025', 'status': 'ongoing'}).status_code, 200)
+            context = render.call_args.args[2]
+        self.assertEqual([(row['total_projects'], row['ongoing'], row['total_tasks']) for row in context['report_data']],
+                         [(1, 1, 1)])
+        self.assertEqual([group['project_title'] for group in context['project_task_grouped']], ['Rice Mill'])
+
+
+class ReportPdfTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user('admin', 'password', email='admin@example.com', role='admin')
+        Project.objects.bulk_create([
+            Project(project_title=f'Project {i}' + (' with a title far too long to fit its column' if i % 2 else ''),
+                    mun='Naval', year=2025, funds=Decimal('1000.00'))
+            for i in range(5)
+        ])
+
+    def setUp(self):
+        cache.clear()
+
+    def test_plain_strings_where_they_fit(self):
+        style = ParagraphStyle('Cell', fontSize=8)
+        self.assertEqual(pdf_export.fit('Rice Mill', 150, style), 'Rice Mill')
+        self.assertIsInstance(pdf_export.fit('Rice Mill ' * 10, 150, style), Paragraph)
+
+    def test_chunks_repeat_the_header_and_keep_the_stripes(self):
+        rows = [[str(i)] for i in range(5)]
+        tables = list(pdf_export.chunked_tables(['#'], rows, [20], [], stripe=colors.red, chunk_size=2))
+        self.assertEqual([table._cellvalues for table in tables],
+                         [[['#'], ['0'], ['1']], [['#'], ['2'], ['3']], [['#'], ['4']]])
+        # The list's 2nd and 4th rows, wherever the chunks break
+        striped = [[cmd[1][1] for cmd in table._bkgrndcmds] for table in tables]
+        self.assertEqual(striped, [[2], [2], []])
+
+    def test_full_report_streams_a_spooled_pdf(self):
+        self.client.force_login(self.admin)
+        with mock.patch.object(pdf_export, 'PDF_TABLE_CHUNK_ROWS', 2), \
+                mock.patch.object(pdf_export, '_table', wraps=pdf_export._table) as table:
+            response = self.client.get(reverse('export_full_report_pdf'), {'year': '2025', 'include_charts': '0'})
+        # Five projects two at a time, and no proposals
+        self.assertEqual(table.call_count, 3)
+        self.assertIsInstance(response, FileResponse)
+        self.assertEqual(response['Content-Disposition'], 'inline; filename="dost_report_2025.pdf"')
+        self.assertTrue(b''.join(response.streaming_content).startswith(b'%PDF'))
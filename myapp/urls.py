@@ -16,6 +16,9 @@ urlpatterns = [
 # Administrator
 
 path('administrator/dashboard/', views.administrator_dashboard_view, name='administrator_dashboard_url'),
+path('api/dashboard/stats/', views.administrator_dashboard_stats_api, name='administrator_dashboard_stats_api'),
+path('api/map/nearby/', views.map_nearby_api, name='map_nearby_api'),
+path('api/map/projects/', views.map_projects_api, name='map_projects_api'),
 
 # Users
 path('administrator/users/', views.administrator_users_view, name='administrator_users_url'),
@@ -59,6 +62,7 @@ path(
 
 
 path('projects/', views.administrator_projects_view, name='administrator_projects_url'),
+path('api/projects/', views.administrator_projects_api, name='administrator_projects_api'),
 path('projects/<int:pk>/', views.administrator_projects_detail_view, name='administrator_projects_detail_url'),
 path('projects/add/', views.administrator_projects_add_view, name='administrator_projects_add_url'),
 path('projects/update/<int:pk>/', views.administrator_projects_update_view, name='administrator_projects_update_url'),
@@ -70,6 +74,9 @@ path('notifications/read/<int:pk>/', views.mark_notification_read_view, name='ma
 path('notifications/delete/<int:pk>/', views.delete_notification_view, name='delete_notification'),
 path('notifications/clear-all/', views.clear_all_notifications_view, name='clear_all_notifications'),
 path('notifications/count/', views.get_notification_count_view, name='get_notification_count'),
+path('notifications/bulk-read/', views.notifications_bulk_read_api, name='notifications_bulk_read'),
+path('notifications/bulk-delete/', views.notifications_bulk_delete_api, name='notifications_bulk_delete'),
+path('events/stream/', views.event_stream_view, name='event_stream'),
 
 
 # Administrator Task Management
@@ -125,6 +132,25 @@ path('export/proposals/excel/', views.export_proposals_excel, name='export_propo
 path('export/tasks/excel/', views.export_tasks_excel, name='export_tasks_excel'),
 path('export/master-report/excel/', views.export_master_report_excel, name='export_master_report_excel'),
 
+# CSV / NDJSON data exports (projects, proposals, budgets, tasks, audit_logs, equipment_deliveries)
+path('export/<slug:dataset>/csv/', views.export_data_view, {'fmt': 'csv'}, name='export_data_csv'),
+path('export/<slug:dataset>/ndjson/', views.export_data_view, {'fmt': 'ndjson'}, name='export_data_ndjson'),
+
+# Change feeds for incremental syncs (projects, proposals, budgets, extension_requests, tranche_releases)
+path('api/changes/<slug:feed>/', views.change_feed_api, name='change_feed_api'),
+
+# Background report jobs
+path('reports/jobs/', views.report_job_create_api, name='report_job_create_api'),
+path('reports/jobs/<int:pk>/', views.report_job_status_api, name='report_job_status_api'),
+path('reports/jobs/<int:pk>/cancel/', views.report_job_cancel_api, name='report_job_cancel_api'),
+path('reports/jobs/<int:pk>/download/', views.report_job_download, name='report_job_download'),
+
+# Message history (cursor-paginated)
+path('api/messages/<int:partner_id>/history/', views.message_history_api, name='message_history_api'),
+path('api/messages/bulk-read/', views.messages_bulk_read_api, name='messages_bulk_read'),
+path('api/messages/bulk-delete/', views.messages_bulk_delete_api, name='messages_bulk_delete'),
+path('api/group-chats/<int:chat_id>/history/', views.group_chat_history_api, name='group_chat_history_api'),
+
 # Report Export URLs
 path('administrator/reports/user-productivity/export/pdf/', views.export_user_productivity_pdf, name='export_user_productivity_pdf'),
 path('administrator/reports/project-progress/export/excel/', views.export_project_progress_excel, name='export_project_progress_excel'),
@@ -3,12 +3,15 @@ from django.contrib import messages
 from django.contrib.auth.hashers import make_password
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.decorators import login_required
-from django.utils.cache import add_never_cache_headers
+from django.utils.cache import add_never_cache_headers, get_conditional_response
+from django.utils.http import http_date
 from django.views.decorators.csrf import csrf_protect
 from django.urls import reverse
-from django.db.models import Sum, Q, Avg, Subquery
+from django.db.models import Sum, Q, Avg, Subquery, Prefetch
 from django.template.loader import get_template
-from django.http import Http404, HttpResponse, HttpResponseBadRequest, HttpResponseForbidden
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseBadRequest, HttpResponseForbidden, StreamingHttpResponse
+from django.core.handlers.asgi import ASGIRequest
+from asgiref.sync import sync_to_async
 from datetime import datetime, timedelta, time
 from django.db.models import Case, When, Value, CharField
 from django.db.models.functions import Concat
@@ -24,9 +27,11 @@ from .models import (
     GroupChatMessage, Announcement, SystemHealth, BackupStatus, MaintenanceSchedule,
     BudgetAllocation, EquipmentCategory, EquipmentItem, ProjectEquipment, TrancheRelease,
     CalendarEvent, DigitalSignature, Mention, ProjectMilestone, Translation, UserPreference,
-    DeletedMessage, DeletedConversation, DeletedGroupChat, DeletedGroupChatMessage
+    DeletedMessage, DeletedConversation, DeletedGroupChat, DeletedGroupChatMessage, ReportJob
 )
 from .forms import MessageForm
+from .dashboard import build_dashboard_snapshot
+from . import budget_ledger, bulk_actions, change_feed, charts, chat_history, conversations, data_exports, events, excel_export, geocoding, group_chats, notification_cache, pdf_export, project_grid, project_map, report_data, report_jobs, rollups, spatial
 from .validators import (
     validate_profile_picture, validate_document_upload, validate_image_upload,
     validate_file_extension, validate_file_size, validate_password_strength,
@@ -39,6 +44,7 @@ from django.core.exceptions import ValidationError
 from django.core.files.storage import FileSystemStorage
 import csv
 from collections import defaultdict
+from django.views.decorators.gzip import gzip_page
 from django.views.decorators.http import require_POST, require_GET
 from django.http import JsonResponse
 import json
@@ -55,24 +61,12 @@ from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph,
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib import colors
 from reportlab.lib.units import inch
-from geopy.geocoders import Nominatim # type: ignore
-import matplotlib.pyplot as plt
-from matplotlib.ticker import FuncFormatter
-import matplotlib
-matplotlib.use('Agg')  # Non-GUI backend for server-side plotting
-import matplotlib.pyplot as plt
-from matplotlib.ticker import MaxNLocator
 
 import os
 from reportlab.lib.utils import ImageReader
 from reportlab.platypus import Frame, PageTemplate
 from django.conf import settings
 
-# Excel export
-from openpyxl import Workbook
-from openpyxl.styles import Font, Alignment, Border, Side, PatternFill
-from openpyxl.utils import get_column_letter
-
 #Remove cache
 def add_no_cache_headers(response):
     add_never_cache_headers(response)
@@ -154,15 +148,8 @@ def logout_view(request):
 
 
 
-# Haversine formula
-def haversine_distance(lat1, lon1, lat2, lon2):
-    R = 6371  # Earth radius in km
-    lat1, lon1, lat2, lon2 = map(math.radians, [lat1, lon1, lat2, lon2])
-    dlat = lat2 - lat1
-    dlon = lon2 - lon1
-    a = math.sin(dlat / 2)**2 + math.cos(lat1) * math.cos(lat2) * math.sin(dlon / 2)**2
-    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
-    return R * c
+# Haversine formula (km between two points), the geocoder's scalar version
+haversine_distance = geocoding.haversine_km
 
 
 
@@ -195,7 +182,10 @@ def clear_all_notifications_view(request):
     """Clear all notifications for the current user"""
     if request.method == 'POST':
         try:
-            Notification.objects.filter(receiver=request.user).delete()
+            # One DELETE without per-row post_delete; the cache is dropped once below
+            notifications = Notification.objects.filter(receiver=request.user)
+            notifications._raw_delete(notifications.db)
+            notification_cache.invalidate(request.user.pk)
             return JsonResponse({"success": True})
         except Exception as e:
             return JsonResponse({"success": False, "error": str(e)})
@@ -206,227 +196,108 @@ def clear_all_notifications_view(request):
 def get_notification_count_view(request):
     """API endpoint to get current notification count for polling"""
     try:
-        unread_count = Notification.objects.filter(
-            receiver=request.user,
-            status='unread'
-        ).count()
-        
-        # Get latest 10 notifications for dropdown refresh
-        notifications = Notification.objects.filter(
-            receiver=request.user
-        ).order_by('-timestamp')[:10]
-        
+        feed = notification_cache.summary(request.user.pk)
+
+        # Latest 10 notifications for dropdown refresh
         notifications_data = []
-        for notif in notifications:
+        for notif in feed['notifications']:
             notifications_data.append({
-                'id': notif.id,
-                'message': notif.message,
-                'category': notif.category,
-                'status': notif.status,
-                'timestamp': notif.timestamp.strftime('%b %d, %Y %H:%M'),
-                'link': notif.link or '',
+                'id': notif['id'],
+                'message': notif['message'],
+                'category': notif['category'],
+                'status': notif['status'],
+                'timestamp': notif['timestamp'].strftime('%b %d, %Y %H:%M'),
+                'link': notif['link'] or '',
             })
         
         return JsonResponse({
             "success": True,
-            "unread_count": unread_count,
+            "unread_count": feed['unread_count'],
             "notifications": notifications_data
         })
     except Exception as e:
         return JsonResponse({"success": False, "error": str(e)})
 
 
-# Administrator
-@login_required
-def administrator_dashboard_view(request):
-    # -----------------------------
-    # Municipality Coordinates for Biliran
-    # -----------------------------
-    MUNICIPALITY_COORDS = {
-        'Almeria': {'lat': 11.6167, 'lng': 124.4333},
-        'Biliran': {'lat': 11.5833, 'lng': 124.4667},
-        'Cabucgayan': {'lat': 11.4667, 'lng': 124.5500},
-        'Caibiran': {'lat': 11.5500, 'lng': 124.5833},
-        'Culaba': {'lat': 11.6500, 'lng': 124.5500},
-        'Kawayan': {'lat': 11.6667, 'lng': 124.5000},
-        'Maripipi': {'lat': 11.7833, 'lng': 124.3333},
-        'Naval': {'lat': 11.5667, 'lng': 124.4000},
-    }
-
-    # -----------------------------
-    # Projects Data for Map
-    # -----------------------------
-    projects_qs = Project.objects.all()
-
-    projects = []
-    for p in projects_qs:
-        municipality = p.mun or ''
-        coords = MUNICIPALITY_COORDS.get(municipality, {})
-        
-        # Use project's actual coordinates if available, otherwise use municipality center with offset
-        if p.latitude is not None and p.longitude is not None:
-            lat = p.latitude
-            lng = p.longitude
-        elif coords:
-            # Add small random offset to prevent markers from stacking on same point
-            import random
-            lat = coords.get('lat') + random.uniform(-0.01, 0.01)
-            lng = coords.get('lng') + random.uniform(-0.01, 0.01)
-        else:
-            lat = None
-            lng = None
-        
-        projects.append({
-            'id': p.id,
-            'title': p.project_title or '',
-            'description': p.remarks or p.project_description or '',
-            'municipality': municipality,
-            'province': p.province or 'Biliran',
-            'beneficiary': p.beneficiary or '',
-            'proponent': p.proponent_details or '',
-            'status': (p.status or 'new').lower().replace(' ', '_').replace('-', '_'),
-            'funds': float(p.funds) if p.funds else 0,
-            'latitude': lat,
-            'longitude': lng,
-        })
+def _bulk_response(request, action, key):
+    """Run a bulk_actions function on the POSTed selection; answers with the new unread counts"""
+    try:
+        selection = bulk_actions.parse_selection(request)
+    except bulk_actions.SelectionError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+    count = action(request.user, selection)
+    return JsonResponse({'success': True, key: count, **bulk_actions.unread_counts(request.user)})
 
-    # -----------------------------
-    # Total Budget
-    # -----------------------------
-    total_budget = Budget.objects.aggregate(total=Sum('total_equipment_value'))['total'] or Decimal('0.00')
 
-    # -----------------------------
-    # Total Spent (calculated from budget allocations, not transactions)
-    # This correctly reflects all funds that have been allocated to projects
-    # -----------------------------
-    total_delivered = Budget.objects.aggregate(total=Sum('delivered_equipment_value'))['total'] or Decimal('0.00')
-    total_spent = total_delivered
-    total_remaining = total_budget - total_spent
-    total_spent = total_spent.quantize(Decimal('0.01'))
-    total_remaining = total_remaining.quantize(Decimal('0.01'))
+@login_required
+@require_POST
+def notifications_bulk_read_api(request):
+    """Mark many notifications read: {"ids": [...]} and/or {"before": "<ISO time>"}"""
+    return _bulk_response(request, bulk_actions.mark_notifications_read, 'updated')
 
-    # -----------------------------
-    # Utilization Rate
-    # -----------------------------
-    all_projects_count = Project.objects.count()
-    completed_projects_count = Project.objects.filter(status__iexact='completed').count()
 
-    utilization_rate = (completed_projects_count / all_projects_count * 100) if all_projects_count > 0 else 0
-    utilization_rate = round(utilization_rate, 2)
+@login_required
+@require_POST
+def notifications_bulk_delete_api(request):
+    """Delete many notifications: {"ids": [...]} and/or {"before": "<ISO time>"}"""
+    return _bulk_response(request, bulk_actions.delete_notifications, 'deleted')
 
-    # -----------------------------
-    # Chart 1: Project Status (normalized into fixed buckets)
-    # -----------------------------
-    project_status_counts = Project.objects.values('status').annotate(total=Count('id'))
-    status_data = {'Proposal': 0, 'Ongoing': 0, 'Completed': 0, 'Terminated': 0, 'Unknown': 0}
-
-    def normalize_status(raw_status):
-        if not raw_status:
-            return 'Unknown'
-        s = str(raw_status).strip().lower()
-        # map common variants into the dashboard buckets
-        if s in ('proposal', 'proposed'):
-            return 'Proposal'
-        if s in ('ongoing', 'on-going', 'in_progress', 'in progress', 'inprogress'):
-            return 'Ongoing'
-        if s in ('completed', 'complete'):
-            return 'Completed'
-        if s in ('terminated', 'cancelled', 'canceled'):
-            return 'Terminated'
-        return 'Unknown'
 
-    for entry in project_status_counts:
-        raw = entry.get('status')
-        label = normalize_status(raw)
-        # accumulate counts into the normalized bucket
-        status_data[label] = status_data.get(label, 0) + entry.get('total', 0)
+@login_required
+@require_POST
+def messages_bulk_read_api(request):
+    """Mark many received messages read: ids and/or before, optionally within one partner_id"""
+    return _bulk_response(request, bulk_actions.mark_messages_read, 'updated')
 
-    project_status_labels = list(status_data.keys())
-    project_status_values = list(status_data.values())
 
-    # -----------------------------
-    # Chart 2: User Roles (Users Module)
-    # -----------------------------
-    user_role_counts = User.objects.values('role').annotate(total=Count('id'))
-    user_role_labels = []
-    user_role_values = []
-    for entry in user_role_counts:
-        # Format 'dost_staff' -> 'Dost Staff'
-        label = entry['role'].replace('_', ' ').title()
-        user_role_labels.append(label)
-        user_role_values.append(entry['total'])
+@login_required
+@require_POST
+def messages_bulk_delete_api(request):
+    """Delete many messages on the user's side only: ids and/or before, optionally within one partner_id"""
+    return _bulk_response(request, bulk_actions.hide_messages, 'deleted')
 
-    # -----------------------------
-    # Chart 3: Proposal Status (Proposals Module)
-    # -----------------------------
-    proposal_status_counts = Proposal.objects.values('status').annotate(total=Count('id'))
-    proposal_status_labels = []
-    proposal_status_values = []
-    for entry in proposal_status_counts:
-        label = entry['status'].replace('_', ' ').title()
-        proposal_status_labels.append(label)
-        proposal_status_values.append(entry['total'])
+def _event_channels(request):
+    """(authenticated, channels) for the requesting user: their own plus their active group chats"""
+    user = request.user
+    if not user.is_authenticated:
+        return False, []
+    chat_ids = GroupChatMember.objects.filter(user=user, is_active=True).values_list('group_chat_id', flat=True)
+    return True, [events.user_channel(user.pk)] + [events.group_channel(chat_id) for chat_id in chat_ids]
 
-    # -----------------------------
-    # Chart 4: Extension Request Status
-    # -----------------------------
-    extension_status_counts = ExtensionRequest.objects.values('status').annotate(total=Count('id'))
-    extension_status_labels = []
-    extension_status_values = []
-    for entry in extension_status_counts:
-        label = entry['status'].replace('_', ' ').title()
-        extension_status_labels.append(label)
-        extension_status_values.append(entry['total'])
 
-    # -----------------------------
-    # Chart 5: Proposals Over Time (Last 12 Months)
-    # -----------------------------
-    from django.db.models.functions import TruncMonth
-    twelve_months_ago = timezone.now() - timedelta(days=365)
-    proposals_by_month = Proposal.objects.filter(
-        submission_date__gte=twelve_months_ago
-    ).annotate(
-        month=TruncMonth('submission_date')
-    ).values('month').annotate(count=Count('id')).order_by('month')
-    
-    proposals_month_labels = []
-    proposals_month_values = []
-    for entry in proposals_by_month:
-        if entry['month']:
-            proposals_month_labels.append(entry['month'].strftime('%b %Y'))
-            proposals_month_values.append(entry['count'])
+async def event_stream_view(request):
+    """Server-Sent Events stream of the user's notifications, messages and group chat messages
 
-    # -----------------------------
-    # Chart 6: Extension Requests Over Time (Last 12 Months)
-    # -----------------------------
-    extensions_by_month = ExtensionRequest.objects.filter(
-        date_submitted__gte=twelve_months_ago
-    ).annotate(
-        month=TruncMonth('date_submitted')
-    ).values('month').annotate(count=Count('id')).order_by('month')
-    
-    extensions_month_labels = []
-    extensions_month_values = []
-    for entry in extensions_by_month:
-        if entry['month']:
-            extensions_month_labels.append(entry['month'].strftime('%b %Y'))
-            extensions_month_values.append(entry['count'])
+    Only served under ASGI; a WSGI worker would be tied up for the life of the
+    stream, so there the browser gets 204 (which stops EventSource) and keeps
+    polling /notifications/count/ instead.
+    """
+    if request.method != 'GET':
+        return HttpResponse(status=405)
+    authenticated, channels = await sync_to_async(_event_channels)(request)
+    if not authenticated:
+        return HttpResponseForbidden()
+    if not isinstance(request, ASGIRequest):
+        return HttpResponse(status=204)
+
+    last_event_id = request.headers.get('Last-Event-ID', '')
+    subscription = await events.hub.subscribe(
+        channels, int(last_event_id) if last_event_id.isdigit() else None,
+    )
+    response = StreamingHttpResponse(events.stream(subscription), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Keep nginx from holding events back in its buffer
+    response['X-Accel-Buffering'] = 'no'
+    return response
 
-    # -----------------------------
-    # Summary Stats
-    # -----------------------------
-    total_users = User.objects.count()
-    total_proposals = Proposal.objects.count()
-    total_projects = Project.objects.count()
-    pending_extensions = ExtensionRequest.objects.filter(status='pending').count()
 
+# Administrator
+@login_required
+def administrator_dashboard_view(request):
     # -----------------------------
-    # Task Completion Stats
+    # Counters, status buckets and 12-month trends (grouped queries)
     # -----------------------------
-    task_pending = Task.objects.filter(status='pending').count()
-    task_in_progress = Task.objects.filter(status='in_progress').count()
-    task_completed = Task.objects.filter(status='completed').count()
-    task_overdue = Task.objects.filter(status='overdue').count()
+    snapshot = build_dashboard_snapshot()
 
     # -----------------------------
     # Recent Activity Feed
@@ -434,51 +305,148 @@ def administrator_dashboard_view(request):
     recent_activities = AuditLog.objects.select_related('user').order_by('-timestamp')[:10]
 
     context = {
-        'projects_json': json.dumps(projects),
-        'total_budget': int(total_budget),
-        'total_spent': int(total_spent),
-        'total_remaining': int(total_remaining),
-        'utilization_rate': utilization_rate,
+        'total_budget': int(snapshot.total_budget),
+        'total_spent': int(snapshot.total_spent),
+        'total_remaining': int(snapshot.total_remaining),
+        'utilization_rate': snapshot.utilization_rate,
         
         # Project Chart
-        'project_status_labels': json.dumps(project_status_labels),
-        'project_status_values': json.dumps(project_status_values),
+        'project_status_labels': json.dumps(snapshot.project_status_labels),
+        'project_status_values': json.dumps(snapshot.project_status_values),
         
         # User Chart
-        'user_role_labels': json.dumps(user_role_labels),
-        'user_role_values': json.dumps(user_role_values),
+        'user_role_labels': json.dumps(snapshot.user_role_labels),
+        'user_role_values': json.dumps(snapshot.user_role_values),
         
         # Proposal Chart
-        'proposal_status_labels': json.dumps(proposal_status_labels),
-        'proposal_status_values': json.dumps(proposal_status_values),
+        'proposal_status_labels': json.dumps(snapshot.proposal_status_labels),
+        'proposal_status_values': json.dumps(snapshot.proposal_status_values),
         
         # Extension Request Chart
-        'extension_status_labels': json.dumps(extension_status_labels),
-        'extension_status_values': json.dumps(extension_status_values),
+        'extension_status_labels': json.dumps(snapshot.extension_status_labels),
+        'extension_status_values': json.dumps(snapshot.extension_status_values),
         
         # Trends Charts
-        'proposals_month_labels': json.dumps(proposals_month_labels),
-        'proposals_month_values': json.dumps(proposals_month_values),
-        'extensions_month_labels': json.dumps(extensions_month_labels),
-        'extensions_month_values': json.dumps(extensions_month_values),
+        'proposals_month_labels': json.dumps(snapshot.month_labels),
+        'proposals_month_values': json.dumps(snapshot.proposals_month_values),
+        'extensions_month_labels': json.dumps(snapshot.month_labels),
+        'extensions_month_values': json.dumps(snapshot.extensions_month_values),
         
         # Summary Stats
-        'total_users': total_users,
-        'total_proposals': total_proposals,
-        'total_projects': total_projects,
-        'pending_extensions': pending_extensions,
+        'total_users': snapshot.total_users,
+        'total_proposals': snapshot.total_proposals,
+        'total_projects': snapshot.total_projects,
+        'pending_extensions': snapshot.pending_extensions,
         
         # Task Completion Stats
-        'task_pending': task_pending,
-        'task_in_progress': task_in_progress,
-        'task_completed': task_completed,
-        'task_overdue': task_overdue,
+        'task_pending': snapshot.task_pending,
+        'task_in_progress': snapshot.task_in_progress,
+        'task_completed': snapshot.task_completed,
+        'task_overdue': snapshot.task_overdue,
         
         # Activity Feed
         'recent_activities': recent_activities,
     }
 
     return render(request, 'administrator/dashboard.html', context)
+
+
+@login_required
+def administrator_dashboard_stats_api(request):
+    """API endpoint returning the administrator dashboard snapshot as JSON"""
+    if request.user.role != 'admin':
+        return JsonResponse({'success': False, 'error': 'Permission denied.'}, status=403)
+
+    snapshot = build_dashboard_snapshot()
+    return JsonResponse({'success': True, 'stats': snapshot.as_dict()})
+
+
+@login_required
+@require_GET
+def map_nearby_api(request):
+    """Nearest projects/tasks to a point, or to a project/task, from the in-memory spatial index
+
+    Query: lat & lng, or project=<id> / task=<id>; k (default 5, max 50);
+    radius_km to return everything within a radius instead; kind=project|task|all.
+    """
+    if request.user.role != 'admin':
+        return JsonResponse({'success': False, 'error': 'Permission denied.'}, status=403)
+
+    kind = request.GET.get('kind') or 'project'
+    if kind not in spatial.KINDS + ('all',):
+        return JsonResponse({'success': False, 'error': 'Invalid kind.'}, status=400)
+    kind = None if kind == 'all' else kind
+    origin = next((name for name in spatial.KINDS if request.GET.get(name)), None)
+    try:
+        k = min(max(int(request.GET.get('k') or 5), 1), 50)
+        radius_km = float(request.GET['radius_km']) if request.GET.get('radius_km') else None
+        if origin:
+            pk = int(request.GET[origin])
+        else:
+            lat, lng = float(request.GET['lat']), float(request.GET['lng'])
+            # float() also parses 'nan' and 'inf', which the grid cannot place
+            if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+                raise ValueError
+    except (KeyError, ValueError):
+        return JsonResponse({'success': False, 'error': 'Invalid or missing coordinates.'}, status=400)
+    if radius_km is not None and not (math.isfinite(radius_km) and radius_km >= 0):
+        return JsonResponse({'success': False, 'error': 'Invalid radius.'}, status=400)
+
+    index = spatial.get_index()
+    exclude = ()
+    if origin:
+        point = index.location(origin, pk)
+        if point is None:
+            return JsonResponse({'success': False, 'error': f'{origin.title()} has no coordinates.'}, status=404)
+        lat, lng = point
+        exclude = ((origin, pk),)
+
+    if radius_km is not None:
+        found = [row for row in index.within(lat, lng, radius_km, kind) if (row[0], row[1]) not in exclude]
+    else:
+        found = index.nearest(lat, lng, k, kind, exclude=exclude)
+
+    ids = {name: [pk for row_kind, pk, *_ in found if row_kind == name] for name in spatial.KINDS}
+    labels = {}
+    for pk, title, mun, bucket in Project.objects.filter(id__in=ids['project']).values_list('id', 'project_title', 'mun', 'status_bucket'):
+        labels[('project', pk)] = {'title': title or '', 'municipality': mun or '', 'status': bucket}
+    for pk, title, place, status in Task.objects.filter(id__in=ids['task']).values_list('id', 'title', 'location_name', 'status'):
+        labels[('task', pk)] = {'title': title or '', 'municipality': place or '', 'status': status}
+
+    results = [
+        {'kind': row_kind, 'id': pk, 'latitude': row_lat, 'longitude': row_lng,
+         'distance_km': round(distance, 3), **labels.get((row_kind, pk), {})}
+        for row_kind, pk, row_lat, row_lng, distance in found
+    ]
+    return JsonResponse({'success': True, 'origin': {'latitude': lat, 'longitude': lng}, 'results': results})
+
+
+@login_required
+@require_GET
+def map_projects_api(request):
+    """Dashboard map as GeoJSON, clustered server-side for ?zoom= and ?bbox=west,south,east,north
+
+    Responses carry an ETag derived from the project table, so unchanged views of
+    the map are answered with 304 Not Modified.
+    """
+    if request.user.role != 'admin':
+        return JsonResponse({'success': False, 'error': 'Permission denied.'}, status=403)
+
+    try:
+        etag = f'"{project_map.map_etag(request.GET)}"'
+    except project_map.MapQueryError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = HttpResponse(
+            project_map.cached_feature_collection(request.GET, etag.strip('"')),
+            content_type='application/geo+json',
+        )
+    response['ETag'] = etag
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
 # ----------------------------
 # Administrator User Management Views
 # ----------------------------
@@ -678,144 +646,33 @@ def administrator_users_update_view(request, user_id):
 # Administrator: Budget List
 # --------------------------
 def administrator_budgets_view(request):
-    from django.db.models import Sum, Q
-    from decimal import Decimal
     import json
     
     # Get fund filter from request
     selected_fund = request.GET.get('fund', 'all')
     
-    # Get all budgets or filter by fund
+    # Get all budgets or filter by fund (documents are listed in the budgets table)
     if selected_fund == 'all':
-        budgets = Budget.objects.all().order_by('-date_created')
+        budgets = Budget.objects.prefetch_related('documents').order_by('-date_created')
     else:
-        budgets = Budget.objects.filter(fund_source=selected_fund).order_by('-date_created')
-    
-    # Get all budgets for summary statistics (always show totals for all funds)
-    all_budgets = Budget.objects.all()
-    
-    # Summary statistics (filtered or all funds based on selection)
-    if selected_fund == 'all':
-        # Show totals for all funds
-        total_budget = Budget.objects.aggregate(total=Sum('total_equipment_value'))['total'] or Decimal('0.00')
-        total_delivered = Budget.objects.aggregate(total=Sum('delivered_equipment_value'))['total'] or Decimal('0.00')
-        total_spent = total_delivered
-        total_remaining = total_budget - total_spent
-        utilization_rate = round((float(total_spent) / float(total_budget) * 100), 2) if total_budget > 0 else 0
-    else:
-        # Show totals for selected fund only
-        filtered_budgets = Budget.objects.filter(fund_source=selected_fund)
-        total_budget = filtered_budgets.aggregate(total=Sum('total_equipment_value'))['total'] or Decimal('0.00')
-        total_delivered = filtered_budgets.aggregate(total=Sum('delivered_equipment_value'))['total'] or Decimal('0.00')
-        total_spent = total_delivered
-        total_remaining = total_budget - total_spent
-        utilization_rate = round((float(total_spent) / float(total_budget) * 100), 2) if total_budget > 0 else 0
-    
-    # Budget breakdown by fund source (filtered or all)
-    fund_source_data = {}
-    for budget in budgets:
-        source = budget.fund_source
-        if source not in fund_source_data:
-            fund_source_data[source] = {'total': 0, 'remaining': 0, 'spent': 0}
-        fund_source_data[source]['total'] += float(budget.total_amount)
-        fund_source_data[source]['remaining'] += float(budget.remaining_amount)
-        fund_source_data[source]['spent'] += float(budget.total_amount - budget.remaining_amount)
-    
-    # Budget breakdown by fiscal year (filtered or all)
-    fiscal_year_data = {}
-    for budget in budgets:
-        year = str(budget.fiscal_year)
-        if year not in fiscal_year_data:
-            fiscal_year_data[year] = {'total': 0, 'remaining': 0, 'spent': 0}
-        fiscal_year_data[year]['total'] += float(budget.total_amount)
-        fiscal_year_data[year]['remaining'] += float(budget.remaining_amount)
-        fiscal_year_data[year]['spent'] += float(budget.total_amount - budget.remaining_amount)
-    
-    # Status breakdown (filtered or all) - equipment-focused statuses
-    status_counts = {
-        'pending_procurement': 0, 
-        'available': 0, 
-        'partially_allocated': 0, 
-        'fully_allocated': 0, 
-        'completed': 0,
-        'archived': 0,
-        # Legacy status mappings for existing data
-        'active': 0,
-        'exhausted': 0
-    }
-    for budget in budgets:
-        if budget.status in status_counts:
-            status_counts[budget.status] += 1
+        budgets = Budget.objects.filter(fund_source=selected_fund).prefetch_related('documents').order_by('-date_created')
     
+    # Summary statistics, fund source / fiscal year / status breakdowns and the
+    # per-budget allocation ledgers (filtered or all funds based on selection)
+    breakdown = budget_ledger.budget_breakdown(budgets)
+    fund_source_data = breakdown['fund_source_data']
+    fiscal_year_data = breakdown['fiscal_year_data']
+
     # Get all unique fund sources for the filter dropdown
     all_fund_sources = Budget.objects.values_list('fund_source', flat=True).distinct().order_by('fund_source')
-    
-    # Detailed budget allocation data - showing where each budget is used (filtered or all)
-    budget_allocations = []
-    for budget in budgets:
-        # Get projects using this budget
-        projects = Project.objects.filter(budget=budget).select_related('proposal')
-        proposals = Proposal.objects.filter(budget=budget, status='approved')
-        
-        allocation_details = []
-        
-        # Add equipment allocations
-        equipment_allocations = BudgetAllocation.objects.filter(budget=budget).select_related('equipment_item', 'allocated_by')
-        for eq_alloc in equipment_allocations:
-            allocation_details.append({
-                'type': 'equipment',
-                'id': eq_alloc.id,
-                'title': f"{eq_alloc.equipment_item.name} ({eq_alloc.allocated_quantity} {eq_alloc.equipment_item.unit})",
-                'amount': float(eq_alloc.allocated_value),
-                'location': 'Equipment Allocation',
-                'status': eq_alloc.status,
-                'beneficiary': eq_alloc.allocated_by.full_name if eq_alloc.allocated_by else 'System'
-            })
-        
-        # Add project allocations
-        for project in projects:
-            allocation_details.append({
-                'type': 'project',
-                'id': project.id,
-                'title': project.project_title,
-                'amount': float(project.funds or 0),
-                'location': f"{project.mun or ''} {project.province or ''}".strip() or project.beneficiary_address or 'N/A',
-                'status': project.status,
-                'beneficiary': project.beneficiary or 'N/A'
-            })
-        
-        # Add approved proposal allocations (not yet converted to projects)
-        for proposal in proposals:
-            # Only include proposals that haven't been converted to projects yet
-            if not hasattr(proposal, 'project') or proposal.project is None:
-                allocation_details.append({
-                    'type': 'proposal',
-                    'id': proposal.id,
-                    'title': proposal.title,
-                    'amount': float(proposal.approved_amount or 0),
-                    'location': f"{proposal.municipality or ''} {proposal.province or ''}".strip() or proposal.location or 'N/A',
-                    'status': 'approved',
-                    'beneficiary': proposal.beneficiary.full_name if proposal.beneficiary else 'N/A'
-                })
-        
-        budget_allocations.append({
-            'budget_id': budget.id,
-            'fund_source': budget.fund_source,
-            'fiscal_year': budget.fiscal_year,
-            'total_amount': float(budget.total_amount),
-            'remaining_amount': float(budget.remaining_amount),
-            'allocated_amount': float(budget.total_amount - budget.remaining_amount),
-            'allocations': allocation_details,
-            'allocation_count': len(allocation_details)
-        })
-    
+
     context = {
-        'budgets': budgets,
-        'total_budget': int(total_budget),
-        'total_spent': int(total_spent),
-        'total_remaining': int(total_remaining),
-        'utilization_rate': utilization_rate,
-        'budget_count': budgets.count(),
+        'budgets': breakdown['budgets'],
+        'total_budget': int(breakdown['total_budget']),
+        'total_spent': int(breakdown['total_spent']),
+        'total_remaining': int(breakdown['total_remaining']),
+        'utilization_rate': breakdown['utilization_rate'],
+        'budget_count': breakdown['budget_count'],
         'fund_source_labels': json.dumps(list(fund_source_data.keys())),
         'fund_source_totals': json.dumps([d['total'] for d in fund_source_data.values()]),
         'fund_source_spent': json.dumps([d['spent'] for d in fund_source_data.values()]),
@@ -823,8 +680,8 @@ def administrator_budgets_view(request):
         'fiscal_year_labels': json.dumps(list(fiscal_year_data.keys())),
         'fiscal_year_spent': json.dumps([d['spent'] for d in fiscal_year_data.values()]),
         'fiscal_year_remaining': json.dumps([d['remaining'] for d in fiscal_year_data.values()]),
-        'status_counts': json.dumps(status_counts),
-        'budget_allocations': budget_allocations,
+        'status_counts': json.dumps(breakdown['status_counts']),
+        'budget_allocations': breakdown['budget_allocations'],
         'selected_fund': selected_fund,
         'all_fund_sources': all_fund_sources,
     }
@@ -1449,23 +1306,22 @@ def administrator_proposals_decline_view(request):
 # ---------------------------
 @login_required
 def administrator_projects_view(request):
-    projects = Project.objects.select_related('proposal', 'budget', 'project_leader').all()
     # Get budgets that are available for allocation (includes legacy 'active' status)
     budgets = Budget.objects.filter(status__in=['available', 'partially_allocated', 'active'])
     proposals = Proposal.objects.filter(status='approved')
     equipment_categories = EquipmentCategory.objects.all()  # For equipment delivery form
     
     # Chart 1: Project Status
-    project_status_counts = Project.objects.values('status').annotate(total=Count('id'))
+    bucket_labels = dict(Project.STATUS_BUCKET_CHOICES)
+    project_status_counts = Project.objects.values('status_bucket').annotate(total=Count('id')).order_by('status_bucket')
     status_data = {}
     for entry in project_status_counts:
-        label = entry['status'] or "Unknown"
-        status_data[label] = entry['total']
+        status_data[bucket_labels[entry['status_bucket']]] = entry['total']
     project_status_labels = list(status_data.keys())
     project_status_values = list(status_data.values())
 
     # Chart 2: Top 10 Projects by Funds
-    top_projects = Project.objects.order_by('-funds')[:10]
+    top_projects = Project.objects.filter(funds__gt=0).order_by('-funds').only('project_title', 'funds')[:10]
     top_project_labels = []
     top_project_budgets = []
     for p in top_projects:
@@ -1494,88 +1350,27 @@ def administrator_projects_view(request):
     year_labels = [str(entry['year'] or 'Unknown') for entry in projects_by_year]
     year_values = [entry['count'] for entry in projects_by_year]
 
-    # ────────────────────────────────────────────
-    # SERIALIZE PROJECTS TO JSON FOR ALPINE.JS
-    # ────────────────────────────────────────────
-    projects_data = []
-    for p in projects:
-        projects_data.append({
-            'id': p.id,
-            'no': p.no,
-            'project_code': p.project_code or '',
-            'year': p.year,
-            'project_title': p.project_title or '',
-            'agency_grantee': p.agency_grantee or '',
-            'program': p.program or '',
-            'type_of_project': p.type_of_project or '',
-            'status': p.status or '',
-            'remarks': p.remarks or '',
-            'mun': p.mun or '',
-            'province': p.province or 'Biliran',
-            'district': p.district or 'Lone District',
-            'beneficiary': p.beneficiary or '',
-            'beneficiary_address': p.beneficiary_address or '',
-            'contact_details': p.contact_details or '',
-            'proponent_details': p.proponent_details or '',
-            'no_of_beneficiaries': p.no_of_beneficiaries or 0,
-            'male': p.male or 0,
-            'female': p.female or 0,
-            'total_beneficiaries': p.total_beneficiaries or 0,
-            'senior_citizen': p.senior_citizen or 0,
-            'pwd': p.pwd or 0,
-            'fund_source': p.fund_source or '',
-            'funds': float(p.funds) if p.funds else 0.0,
-            'total_project_cost': float(p.total_project_cost) if p.total_project_cost else 0.0,
-            'counterpart_funds': float(p.counterpart_funds) if p.counterpart_funds else 0.0,
-            'internally_managed_fund': float(p.internally_managed_fund) if p.internally_managed_fund else 0.0,
-            'total_funds_released': float(p.total_funds_released) if p.total_funds_released else 0.0,
-            'first_tranche': float(p.first_tranche) if p.first_tranche else 0.0,
-            'second_tranche': float(p.second_tranche) if p.second_tranche else 0.0,
-            'third_tranche': float(p.third_tranche) if p.third_tranche else 0.0,
-            'dost_viii': float(p.dost_viii) if p.dost_viii else 0.0,
-            'project_start': p.project_start.isoformat() if p.project_start else '',
-            'project_end': p.project_end.isoformat() if p.project_end else '',
-            'date_of_release': p.date_of_release.isoformat() if p.date_of_release else '',
-            'date_of_completion': p.date_of_completion.isoformat() if p.date_of_completion else '',
-            'date_of_donation': p.date_of_donation.isoformat() if p.date_of_donation else '',
-            'date_of_inspection_tagging': p.date_of_inspection_tagging.isoformat() if p.date_of_inspection_tagging else '',
-            'date_of_liquidation': p.date_of_liquidation.isoformat() if p.date_of_liquidation else '',
-            'check_ada_no': p.check_ada_no or '',
-            'status_of_liquidation': p.status_of_liquidation or '',
-            'amount_liquidated': float(p.amount_liquidated) if p.amount_liquidated else 0.0,
-            'original_project_duration': p.original_project_duration or '',
-            'extension_date': p.extension_date or '',
-            'availed_technologies': p.availed_technologies or '',
-            'interventions': p.interventions or '',
-            'donation_status': p.donation_status or '',
-            'tafr': p.tafr or '',
-            'par': p.par or '',
-            'list_of_eqpt': p.list_of_eqpt or '',
-            'terminal_report': p.terminal_report or '',
-            'invoice_receipt': p.invoice_receipt or '',
-            'donated': p.donated or '',
-            'acknowledgment_receipt_by_grantee': p.acknowledgment_receipt_by_grantee or '',
-            'pme_visit': p.pme_visit or '',
-            'womens_group': p.womens_group or '',
-            'product_photo': p.product_photo.url if p.product_photo else '',
-            'supporting_documents': p.supporting_documents.url if p.supporting_documents else '',
-            # DOST Equipment Tracking Summary
-            'equipment_summary': [
-                {
-                    'name': eq.budget_allocation.equipment_item.name if eq.budget_allocation and eq.budget_allocation.equipment_item else 'Unknown Equipment',
-                    'quantity': eq.delivered_quantity,
-                    'unit_cost': float(eq.budget_allocation.equipment_item.estimated_unit_cost or 0) if eq.budget_allocation and eq.budget_allocation.equipment_item else 0.0,
-                    'property_tag': eq.property_tag_number or '',
-                    'ownership_status': eq.ownership_status or 'dost_owned',
-                    'ownership_status_display': eq.get_ownership_status_display() if hasattr(eq, 'get_ownership_status_display') else eq.ownership_status,
-                    'delivery_date': eq.delivery_date.isoformat() if eq.delivery_date else '',
-                } for eq in p.equipment_deliveries.select_related('budget_allocation__equipment_item').all()
-            ] if hasattr(p, 'equipment_deliveries') else [],
-        })
+    # Projects by Start Year
+    projects_by_start_year = Project.objects.filter(project_start__isnull=False).values(
+        start_year=ExtractYear('project_start')
+    ).annotate(count=Count('id')).order_by('start_year')
+    start_year_labels = [str(entry['start_year']) for entry in projects_by_start_year]
+    start_year_values = [entry['count'] for entry in projects_by_start_year]
+
+    # Projects per Fund Source and beneficiary demographics
+    projects_by_fund_source = Project.objects.values('fund_source').annotate(count=Count('id')).order_by('-count')
+    fund_source_count_labels = [entry['fund_source'] or 'Unassigned' for entry in projects_by_fund_source]
+    fund_source_count_values = [entry['count'] for entry in projects_by_fund_source]
+    demographics = Project.objects.aggregate(
+        male=Sum('male'), female=Sum('female'), senior=Sum('senior_citizen'), pwd=Sum('pwd'),
+    )
+    demographic_values = [demographics[key] or 0 for key in ('male', 'female', 'senior', 'pwd')]
 
+    # The project grid itself is loaded page by page from administrator_projects_api
     context = {
-        'projects': projects,
-        'projects_json': json.dumps(projects_data),
+        'project_count': Project.objects.count(),
+        'project_grid_statuses': Project.STATUS_BUCKET_CHOICES,
+        'project_grid_municipalities': sorted(filter(None, Project.objects.order_by().values_list('mun', flat=True).distinct())),
         'mun_labels': json.dumps(mun_labels),
         'mun_values': json.dumps(mun_values),
         'fund_source_labels': json.dumps(fund_source_labels),
@@ -1599,11 +1394,30 @@ def administrator_projects_view(request):
         'project_status_values': json.dumps(project_status_values),
         'top_project_labels': json.dumps(top_project_labels),
         'top_project_budgets': json.dumps(top_project_budgets),
+        'start_year_labels': json.dumps(start_year_labels),
+        'start_year_values': json.dumps(start_year_values),
+        'fund_source_count_labels': json.dumps(fund_source_count_labels),
+        'fund_source_count_values': json.dumps(fund_source_count_values),
+        'demographic_values': json.dumps(demographic_values),
     }
 
     return render(request, 'administrator/projects.html', context)
 
 
+@login_required
+@require_GET
+def administrator_projects_api(request):
+    """Paginated project grid: filtering, sorting, keyset cursor and ?fields= projection"""
+    if request.user.role != 'admin':
+        return JsonResponse({'success': False, 'error': 'Permission denied.'}, status=403)
+
+    try:
+        page = project_grid.project_page(request.GET)
+    except project_grid.GridQueryError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+    return JsonResponse({'success': True, **page})
+
+
 # ---------------------------
 # Project Detail View
 # ---------------------------
@@ -2895,30 +2709,17 @@ def financial_summary_pdf(request):
     # ---------------------------
     # Generate Graph with Matplotlib
     # ---------------------------
-    fig, ax = plt.subplots(figsize=(8, 4))
-    bar_width = 0.25
-    index = range(len(labels))
-
-    ax.bar(index, total_amounts, bar_width, label='Total Budget', color='skyblue')
-    ax.bar([i + bar_width for i in index], spent_amounts, bar_width, label='Spent', color='salmon')
-    ax.bar([i + bar_width*2 for i in index], remaining_amounts, bar_width, label='Remaining', color='lightgreen')
-
-    ax.set_xlabel('Fund Source')
-    ax.set_ylabel('Amount (PHP)')
-    ax.set_title('Financial Overview per Budget')
-    ax.set_xticks([i + bar_width for i in index])
-    ax.set_xticklabels(labels, rotation=45, ha='right')
-    ax.legend()
-
-    # Format y-axis as currency without decimals
-    ax.yaxis.set_major_formatter(FuncFormatter(lambda x, _: f'PHP {int(x):,}'))
-
-    # Save plot to BytesIO buffer
-    buf = io.BytesIO()
-    plt.tight_layout()
-    plt.savefig(buf, format='PNG')
-    plt.close(fig)
-    buf.seek(0)
+    buf = charts.png_buffer(charts.ChartSpec(
+        'grouped_bar', labels,
+        [
+            charts.series('Total Budget', total_amounts, 'skyblue'),
+            charts.series('Spent', spent_amounts, 'salmon'),
+            charts.series('Remaining', remaining_amounts, 'lightgreen'),
+        ],
+        title='Financial Overview per Budget', xlabel='Fund Source', ylabel='Amount (PHP)',
+        size=(8, 4), bar_width=0.25, label_rotation=45, legend=True,
+        y_format='PHP {:,}',  # currency without decimals
+    ))
 
     # Add graph to PDF
     img = Image(buf, width=450, height=250)
@@ -3051,31 +2852,11 @@ def proposal_status_pdf(request):
     counts = list(status_counts.values())
     colors_list = ['gold', 'lightgreen', 'red']  # Pending, Approved, Declined
 
-    fig, ax = plt.subplots(figsize=(6,6))
-    bars = ax.bar(labels, counts, color=colors_list)
-    ax.set_ylabel('Number of Proposals')
-    ax.set_title('Proposal Status Overview', fontsize=12, weight='bold')
-
-    # Make y-axis integer only
-    ax.yaxis.set_major_locator(plt.MaxNLocator(integer=True))
-
-    # Add value labels on top of bars
-    for bar in bars:
-        height = bar.get_height()
-        ax.text(
-            bar.get_x() + bar.get_width()/2,
-            height + 0.1,
-            f'{int(height)}',
-            ha='center',
-            va='bottom',
-            fontsize=9
-        )
-
-    plt.tight_layout()
-    buf = io.BytesIO()
-    plt.savefig(buf, format='PNG', dpi=150)
-    plt.close(fig)
-    buf.seek(0)
+    buf = charts.png_buffer(charts.ChartSpec(
+        'bar', labels, [charts.series('Proposals', counts, colors_list)],
+        title='Proposal Status Overview', title_size=12, title_weight='bold', ylabel='Number of Proposals',
+        size=(6, 6), dpi=150, integer_y=True, value_labels='{}',
+    ))
 
     # ---------------------------
     # Create PDF in Landscape with DOST Header
@@ -3201,8 +2982,6 @@ def approved_projects_pdf(request, report_year=None):
     from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
     from reportlab.lib.pagesizes import landscape, letter
     from reportlab.lib import colors
-    import matplotlib.pyplot as plt
-    from matplotlib.ticker import MaxNLocator
 
     # ---------------------------
     # Filter projects and order by project_code
@@ -3217,23 +2996,13 @@ def approved_projects_pdf(request, report_year=None):
     labels = [p.project_title for p in projects]
     approved_amounts = [float(p.approved_budget) for p in projects]
 
-    num_projects = max(len(labels), 1)
-    fig_width = 16  # full page width
-    fig_height = 6
-    fig, ax = plt.subplots(figsize=(fig_width, fig_height))
-    ax.bar(range(num_projects), approved_amounts, color='skyblue')
-    ax.set_title(f'Approved Project Budgets – Fiscal Year {report_year or "All"}', fontsize=12, weight='bold')
-    ax.set_xlabel('Project')
-    ax.set_ylabel('Approved Budget (PHP)')
-    ax.set_xticks(range(num_projects))
-    ax.set_xticklabels(labels, rotation=45, ha='right', fontsize=8)
-    ax.yaxis.set_major_locator(MaxNLocator(integer=True))
-    plt.tight_layout()
-
-    buf = io.BytesIO()
-    plt.savefig(buf, format='PNG', dpi=150)
-    plt.close(fig)
-    buf.seek(0)
+    buf = charts.png_buffer(charts.ChartSpec(
+        'bar', labels, [charts.series('Approved Budget', approved_amounts, 'skyblue')],
+        title=f'Approved Project Budgets – Fiscal Year {report_year or "All"}', title_size=12, title_weight='bold',
+        xlabel='Project', ylabel='Approved Budget (PHP)',
+        size=(16, 6),  # full page width
+        dpi=150, label_rotation=45, label_size=8, integer_y=True,
+    ))
 
     # ---------------------------
     # Table Data
@@ -3323,8 +3092,6 @@ def export_full_report_pdf(request):
     from reportlab.lib.units import inch
     from reportlab.lib.utils import ImageReader
     import os
-    import matplotlib.pyplot as plt
-    from matplotlib.ticker import MaxNLocator
     from decimal import Decimal
     from django.db.models import Sum, Count, Q
     from datetime import datetime
@@ -3350,56 +3117,10 @@ def export_full_report_pdf(request):
     include_signatory = request.GET.get('include_signatory', '1') == '1'
     include_esignature = request.GET.get('include_esignature', '0') == '1'  # Default to False
     
-    # Only set current year as default if explicitly requested, otherwise don't filter by year
-    current_year = datetime.now().year
-    # Don't set default year - only filter if user explicitly selects a year
-
-    # Base querysets for filtering
-    project_queryset = Project.objects.all()
-    proposal_queryset = Proposal.objects.all()
-    budget_queryset = Budget.objects.all()
-    task_queryset = Task.objects.all()
-
-    # Apply filters
-    if selected_year:
-        try:
-            year_int = int(selected_year)
-            project_queryset = project_queryset.filter(year=year_int)
-            proposal_queryset = proposal_queryset.filter(submission_date__year=year_int)
-            budget_queryset = budget_queryset.filter(fiscal_year=year_int)
-        except ValueError:
-            pass
-
-    if selected_municipality and selected_municipality != '':
-        project_queryset = project_queryset.filter(mun__iexact=selected_municipality)
-        proposal_queryset = proposal_queryset.filter(municipality__iexact=selected_municipality)
-
-    if start_date:
-        try:
-            start = datetime.strptime(start_date, '%Y-%m-%d').date()
-            project_queryset = project_queryset.filter(
-                Q(project_start__gte=start) | 
-                Q(date_of_completion__gte=start) |
-                Q(approval_date__date__gte=start)
-            )
-            proposal_queryset = proposal_queryset.filter(submission_date__date__gte=start)
-        except ValueError:
-            pass
-
-    if end_date:
-        try:
-            end = datetime.strptime(end_date, '%Y-%m-%d').date()
-            project_queryset = project_queryset.filter(
-                Q(project_start__lte=end) | 
-                Q(date_of_completion__lte=end) |
-                Q(approval_date__date__lte=end)
-            )
-            proposal_queryset = proposal_queryset.filter(submission_date__date__lte=end)
-        except ValueError:
-            pass
-
-    if selected_status and selected_status != '':
-        project_queryset = project_queryset.filter(status__iexact=selected_status)
+    # Filtered aggregates, shared with administrator_reports_view for the same filters
+    report = report_data.dataset(request.GET)
+    project_queryset = report.filters.projects()
+    proposal_queryset = report.filters.proposals()
 
     styles = getSampleStyleSheet()
     
@@ -3430,57 +3151,42 @@ def export_full_report_pdf(request):
     # -----------------------------
     
     # Financial Summary (calculated from budget allocations)
-    total_budget = budget_queryset.aggregate(total=Sum('total_equipment_value'))['total'] or Decimal('0.00')
-    total_spent = budget_queryset.aggregate(total=Sum('delivered_equipment_value'))['total'] or Decimal('0.00')
-    total_remaining = total_budget - total_spent
-    utilization_rate = round((float(total_spent) / float(total_budget) * 100), 2) if total_budget > 0 else 0
+    total_budget = report.total_budget
+    total_spent = report.total_delivered
+    total_remaining = report.total_remaining
+    utilization_rate = report.utilization_rate
 
     # Proposal Status
-    proposal_counts_qs = proposal_queryset.values('status').annotate(total=Count('id'))
     proposal_status_counts = {'pending': 0, 'approved': 0, 'rejected': 0, 'for_review': 0, 'needs_revision': 0}
-    for p in proposal_counts_qs:
-        if p['status'] in proposal_status_counts:
-            proposal_status_counts[p['status']] = p['total']
+    for status, total in report.proposal_status_counts.items():
+        if status in proposal_status_counts:
+            proposal_status_counts[status] = total
     total_proposals = sum(proposal_status_counts.values())
 
     # Project Status
-    project_counts_qs = project_queryset.values('status').annotate(total=Count('id'))
     project_status_counts = {'new': 0, 'ongoing': 0, 'completed': 0, 'terminated': 0}
-    for p in project_counts_qs:
-        status = p['status'] or 'new'
-        # Normalize status to match the buckets
-        if status.lower() in ['new', 'proposal', 'proposed']:
-            project_status_counts['new'] += p['total']
-        elif status.lower() in ['ongoing', 'on-going', 'in_progress', 'in progress', 'inprogress']:
-            project_status_counts['ongoing'] += p['total']
-        elif status.lower() in ['completed', 'complete']:
-            project_status_counts['completed'] += p['total']
-        elif status.lower() in ['terminated', 'cancelled', 'canceled']:
-            project_status_counts['terminated'] += p['total']
-        else:
-            project_status_counts['new'] += p['total']  # Default to new
+    for bucket, total in report.project_bucket_counts.items():
+        # Proposal-stage and unrecognized statuses are reported as new
+        project_status_counts[bucket if bucket in project_status_counts else 'new'] += total
     total_projects = sum(project_status_counts.values())
     completion_rate = round((project_status_counts['completed'] / total_projects * 100), 1) if total_projects > 0 else 0
 
     # User Role Distribution (users are not filtered)
-    user_counts_qs = User.objects.values('role').annotate(total=Count('id'))
     user_role_counts = {'admin': 0, 'dost_staff': 0, 'proponent': 0, 'beneficiary': 0}
-    for u in user_counts_qs:
-        if u['role'] in user_role_counts:
-            user_role_counts[u['role']] = u['total']
+    for role, total in report.user_role_counts.items():
+        if role in user_role_counts:
+            user_role_counts[role] = total
     total_users = sum(user_role_counts.values())
 
     # Projects by Municipality (field is 'mun' in model)
-    municipality_qs = project_queryset.values('mun').annotate(count=Count('id')).order_by('mun')
-    municipality_counts = {m['mun']: m['count'] for m in municipality_qs if m['mun']}
+    municipality_counts = {mun: total for mun, total in report.municipality_counts.items() if mun}
 
-    # Task Summary (filter tasks by projects)
-    project_ids = list(project_queryset.values_list('id', flat=True))
-    total_tasks = task_queryset.filter(project__in=project_ids).count() if project_ids else 0
-    tasks_pending = task_queryset.filter(project__in=project_ids, status='pending').count() if project_ids else 0
-    tasks_in_progress = task_queryset.filter(project__in=project_ids, status='in_progress').count() if project_ids else 0
-    tasks_completed = task_queryset.filter(project__in=project_ids, status='completed').count() if project_ids else 0
-    tasks_delayed = task_queryset.filter(project__in=project_ids, status='delayed').count() if project_ids else 0
+    # Task Summary (tasks of the filtered projects)
+    total_tasks = sum(report.task_status_counts.values())
+    tasks_pending = report.task_status_counts.get('pending', 0)
+    tasks_in_progress = report.task_status_counts.get('in_progress', 0)
+    tasks_completed = report.task_status_counts.get('completed', 0)
+    tasks_delayed = report.task_status_counts.get('delayed', 0)
 
     # ALL Projects for complete list (filtered and sorted)
     # Define sorting mappings for projects
@@ -3536,140 +3242,74 @@ def export_full_report_pdf(request):
     chart_images = []
     
     # 1. Financial Summary Bar Chart (Budget by Fiscal Year)
-    fiscal_year_data = budget_queryset.values('fiscal_year').annotate(
-        total=Sum('total_equipment_value'),
-        spent=Sum('delivered_equipment_value'),
-        remaining=Sum('total_equipment_value') - Sum('delivered_equipment_value')
-    ).order_by('fiscal_year')
+    fiscal_year_data = report.fiscal_years
     
+    # Shared look of the report's charts
+    style = dict(dpi=200, tight_bbox=True, title_size=12, title_weight='bold', axis_label_size=10, tick_size=9)
+
     if fiscal_year_data:
-        fig1, ax1 = plt.subplots(figsize=(6, 4))
         years = [str(item['fiscal_year']) for item in fiscal_year_data]
-        totals = [float(item['total'] or 0) for item in fiscal_year_data]
-        spents = [float(item['spent'] or 0) for item in fiscal_year_data]
-        remainings = [float(item['remaining'] or 0) for item in fiscal_year_data]
-        
-        x = range(len(years))
-        # Create stacked bars: Allocated at bottom, Remaining on top
-        ax1.bar(x, spents, width=0.8, label='Allocated', color='#FF6384', alpha=0.8)
-        ax1.bar(x, remainings, width=0.8, bottom=spents, label='Remaining', color='#36A2EB', alpha=0.8)
-        
-        # Add total budget line for reference
-        ax1.plot(x, totals, 'o-', color='#4BC0C0', linewidth=2, markersize=6, label='Total Budget')
-        
-        ax1.set_ylabel('Amount (PHP)', fontsize=10)
-        ax1.set_title('Budget Allocation by Fiscal Year', fontsize=12, fontweight='bold')
-        ax1.set_xticks(x)
-        ax1.set_xticklabels(years, rotation=45, ha='right')
-        ax1.legend(fontsize=9)
-        ax1.yaxis.set_major_formatter(plt.FuncFormatter(lambda x, p: f'{int(x):,}'))
-        ax1.tick_params(axis='both', labelsize=9)
-        
-        plt.tight_layout()
-        buf1 = io.BytesIO()
-        plt.savefig(buf1, format='PNG', dpi=200, bbox_inches='tight')
-        plt.close(fig1)
-        buf1.seek(0)
+        # Stacked bars (Allocated at bottom, Remaining on top) with the total budget as a reference line
+        buf1 = charts.png_buffer(charts.ChartSpec(
+            'stacked_bar', years,
+            [
+                charts.series('Allocated', [item['spent'] for item in fiscal_year_data], '#FF6384'),
+                charts.series('Remaining', [item['remaining'] for item in fiscal_year_data], '#36A2EB'),
+            ],
+            line=charts.series('Total Budget', [item['total'] for item in fiscal_year_data], '#4BC0C0'),
+            title='Budget Allocation by Fiscal Year', ylabel='Amount (PHP)', size=(6, 4),
+            alpha=0.8, label_rotation=45, legend=True, legend_size=9, y_format='{:,}', **style,
+        ))
         chart_images.append(('Budget by Fiscal Year', buf1))
     else:
         # Fallback to simple financial summary if no fiscal year data
-        fig1, ax1 = plt.subplots(figsize=(5, 4))
-        labels1 = ['Total Budget', 'Allocated', 'Remaining']
-        values1 = [float(total_budget), float(total_spent), float(total_remaining)]
-        colors1 = ['#4BC0C0', '#FF6384', '#36A2EB']
-        bars1 = ax1.bar(labels1, values1, color=colors1)
-        ax1.set_ylabel('Amount (PHP)', fontsize=10)
-        ax1.set_title('Financial Summary', fontsize=12, fontweight='bold')
-        ax1.yaxis.set_major_formatter(plt.FuncFormatter(lambda x, p: f'{int(x):,}'))
-        ax1.tick_params(axis='both', labelsize=9)
-        for bar in bars1:
-            height = bar.get_height()
-            ax1.text(bar.get_x() + bar.get_width()/2., height, f'{int(height):,}', ha='center', va='bottom', fontsize=9)
-        plt.tight_layout()
-        buf1 = io.BytesIO()
-        plt.savefig(buf1, format='PNG', dpi=200, bbox_inches='tight')
-        plt.close(fig1)
-        buf1.seek(0)
+        buf1 = charts.png_buffer(charts.ChartSpec(
+            'bar', ['Total Budget', 'Allocated', 'Remaining'],
+            [charts.series('Amount', [total_budget, total_spent, total_remaining], ['#4BC0C0', '#FF6384', '#36A2EB'])],
+            title='Financial Summary', ylabel='Amount (PHP)', size=(5, 4),
+            y_format='{:,}', value_labels='{:,}', **style,
+        ))
         chart_images.append(('Financial Summary', buf1))
 
     # 2. Proposal Status Chart
-    fig2, ax2 = plt.subplots(figsize=(5, 4))
-    labels2 = ['Pending', 'Approved', 'Declined']
-    values2 = [proposal_status_counts['pending'], proposal_status_counts['approved'], proposal_status_counts['rejected']]
-    colors2 = ['#FFCE56', '#4BC0C0', '#FF6384']
-    bars2 = ax2.bar(labels2, values2, color=colors2)
-    ax2.set_ylabel('Count', fontsize=10)
-    ax2.set_title('Proposal Status', fontsize=12, fontweight='bold')
-    ax2.yaxis.set_major_locator(MaxNLocator(integer=True))
-    ax2.tick_params(axis='both', labelsize=9)
-    for bar in bars2:
-        height = bar.get_height()
-        ax2.text(bar.get_x() + bar.get_width()/2., height, f'{int(height)}', ha='center', va='bottom', fontsize=9)
-    plt.tight_layout()
-    buf2 = io.BytesIO()
-    plt.savefig(buf2, format='PNG', dpi=200, bbox_inches='tight')
-    plt.close(fig2)
-    buf2.seek(0)
+    buf2 = charts.png_buffer(charts.ChartSpec(
+        'bar', ['Pending', 'Approved', 'Declined'],
+        [charts.series('Count', [proposal_status_counts['pending'], proposal_status_counts['approved'],
+                                 proposal_status_counts['rejected']], ['#FFCE56', '#4BC0C0', '#FF6384'])],
+        title='Proposal Status', ylabel='Count', size=(5, 4), integer_y=True, value_labels='{}', **style,
+    ))
     chart_images.append(('Proposal Status', buf2))
 
     # 3. Project Status Chart (Bar chart for clarity)
-    fig3, ax3 = plt.subplots(figsize=(6, 4))
-    labels3 = ['New', 'Ongoing', 'Completed', 'Terminated']
-    values3 = [project_status_counts['new'], project_status_counts['ongoing'], 
-               project_status_counts['completed'], project_status_counts['terminated']]
-    colors3 = ['#9CA3AF', '#3B82F6', '#22C55E', '#EF4444']
-    bars3 = ax3.bar(labels3, values3, color=colors3)
-    ax3.set_ylabel('Count', fontsize=10)
-    ax3.set_title('Project Status Distribution', fontsize=12, fontweight='bold')
-    ax3.yaxis.set_major_locator(MaxNLocator(integer=True))
-    ax3.tick_params(axis='both', labelsize=10)
-    for bar in bars3:
-        height = bar.get_height()
-        ax3.text(bar.get_x() + bar.get_width()/2., height, f'{int(height)}', ha='center', va='bottom', fontsize=10)
-    plt.tight_layout()
-    buf3 = io.BytesIO()
-    plt.savefig(buf3, format='PNG', dpi=200, bbox_inches='tight')
-    plt.close(fig3)
-    buf3.seek(0)
+    buf3 = charts.png_buffer(charts.ChartSpec(
+        'bar', ['New', 'Ongoing', 'Completed', 'Terminated'],
+        [charts.series('Count', [project_status_counts['new'], project_status_counts['ongoing'],
+                                 project_status_counts['completed'], project_status_counts['terminated']],
+                       ['#9CA3AF', '#3B82F6', '#22C55E', '#EF4444'])],
+        title='Project Status Distribution', ylabel='Count', size=(6, 4), integer_y=True,
+        value_labels='{}', value_label_size=10, **{**style, 'tick_size': 10},
+    ))
     chart_images.append(('Project Status', buf3))
 
     # 4. User Role Distribution Chart (use legend instead of labels on pie)
-    fig4, ax4 = plt.subplots(figsize=(6, 4))
-    labels4 = ['Admin', 'Staff', 'Proponent', 'Beneficiary']
-    values4 = [user_role_counts['admin'], user_role_counts['dost_staff'], 
-               user_role_counts['proponent'], user_role_counts['beneficiary']]
-    colors4 = ['#8B5CF6', '#EC4899', '#0EA5E9', '#F59E0B']
-    wedges4, texts4, autotexts4 = ax4.pie(values4, colors=colors4, autopct='%1.1f%%', startangle=90, textprops={'fontsize': 10}, pctdistance=0.75)
-    ax4.legend(wedges4, labels4, loc='center left', bbox_to_anchor=(1, 0.5), fontsize=9)
-    ax4.set_title('User Roles', fontsize=12, fontweight='bold')
-    plt.tight_layout()
-    buf4 = io.BytesIO()
-    plt.savefig(buf4, format='PNG', dpi=200, bbox_inches='tight')
-    plt.close(fig4)
-    buf4.seek(0)
+    buf4 = charts.png_buffer(charts.ChartSpec(
+        'pie', ['Admin', 'Staff', 'Proponent', 'Beneficiary'],
+        [charts.series('Users', [user_role_counts['admin'], user_role_counts['dost_staff'],
+                                 user_role_counts['proponent'], user_role_counts['beneficiary']],
+                       ['#8B5CF6', '#EC4899', '#0EA5E9', '#F59E0B'])],
+        title='User Roles', size=(6, 4), legend=True, legend_size=9, **{**style, 'tick_size': 10},
+    ))
     chart_images.append(('User Roles', buf4))
 
     # 5. Projects by Municipality Chart
     if municipality_counts:
-        fig5, ax5 = plt.subplots(figsize=(10, 4))
-        muni_labels = list(municipality_counts.keys())
-        muni_values = list(municipality_counts.values())
-        colors5 = ['#3B82F6', '#22C55E', '#F59E0B', '#EF4444', '#8B5CF6', '#EC4899', '#0EA5E9', '#9CA3AF']
-        bars5 = ax5.bar(muni_labels, muni_values, color=colors5[:len(muni_labels)])
-        ax5.set_ylabel('Projects', fontsize=10)
-        ax5.set_xlabel('Municipality', fontsize=10)
-        ax5.set_title('Projects by Municipality', fontsize=12, fontweight='bold')
-        ax5.yaxis.set_major_locator(MaxNLocator(integer=True))
-        ax5.tick_params(axis='both', labelsize=9)
-        plt.xticks(rotation=45, ha='right')
-        for bar in bars5:
-            height = bar.get_height()
-            ax5.text(bar.get_x() + bar.get_width()/2., height, f'{int(height)}', ha='center', va='bottom', fontsize=9)
-        plt.tight_layout()
-        buf5 = io.BytesIO()
-        plt.savefig(buf5, format='PNG', dpi=200, bbox_inches='tight')
-        plt.close(fig5)
-        buf5.seek(0)
+        buf5 = charts.png_buffer(charts.ChartSpec(
+            'bar', list(municipality_counts.keys()),
+            [charts.series('Projects', municipality_counts.values(),
+                           ['#3B82F6', '#22C55E', '#F59E0B', '#EF4444', '#8B5CF6', '#EC4899', '#0EA5E9', '#9CA3AF'])],
+            title='Projects by Municipality', xlabel='Municipality', ylabel='Projects', size=(10, 4),
+            label_rotation=45, integer_y=True, value_labels='{}', **style,
+        ))
         chart_images.append(('Municipality', buf5))
 
     # -----------------------------
@@ -3695,9 +3335,16 @@ def export_full_report_pdf(request):
         
         try:
             logo_path = os.path.join(settings.BASE_DIR, 'static', 'img', 'dost.png')
-            if os.path.exists(logo_path):
+            if not canvas.hasForm('dost_logo') and os.path.exists(logo_path):
+                # Embedded once as a form that every page reuses, rather than decoded and hashed page after page.
+                # Decoding first means a bad file fails before the form is opened
                 logo = ImageReader(logo_path)
+                logo.getRGBData()
+                canvas.beginForm('dost_logo')
                 canvas.drawImage(logo, logo_x, logo_y, width=logo_width, height=logo_height, mask='auto')
+                canvas.endForm()
+            if canvas.hasForm('dost_logo'):
+                canvas.doForm('dost_logo')
         except Exception as e:
             # Draw a placeholder if logo fails to load
             canvas.setFillColor(colors.HexColor('#2563EB'))
@@ -3762,8 +3409,8 @@ def export_full_report_pdf(request):
     
     report_title = " | ".join(title_parts)
     
-    response = HttpResponse(content_type='application/pdf')
-    response['Content-Disposition'] = f'inline; filename="dost_report_{selected_year or "all_years"}.pdf"'
+    # Built into a spooled temporary file and streamed back, not held in the response
+    output = pdf_export.spooled_file()
 
     # Create custom page template with header
     page_width, page_height = landscape(letter)
@@ -3771,7 +3418,7 @@ def export_full_report_pdf(request):
     template = PageTemplate(id='dost_template', frames=frame, onPage=add_dost_header)
     
     doc = BaseDocTemplate(
-        response,
+        output,
         pagesize=landscape(letter)
     )
     doc.addPageTemplates([template])
@@ -3872,34 +3519,39 @@ def export_full_report_pdf(request):
         
         # Projects table header
         projects_header = ['#', 'Project Code', 'Project Title', 'Agency/Grantee', 'Municipality', 'Status', 'Program', 'Funds (PHP)', 'Start Date', 'End Date']
-        projects_data = [projects_header]
-        
-        for idx, proj in enumerate(all_projects, 1):
-            # Truncate long titles for table display
-            title = proj.project_title or 'Untitled'
-            if len(title) > 50:
-                title = title[:47] + '...'
-            
-            agency = proj.agency_grantee or 'N/A'
-            if len(agency) > 30:
-                agency = agency[:27] + '...'
-            
-            projects_data.append([
-                str(idx),
-                proj.project_code or 'N/A',
-                Paragraph(title, cell_style),
-                Paragraph(agency, cell_style),
-                proj.mun or 'N/A',
-                (proj.status or 'N/A').title(),
-                proj.program or 'N/A',
-                f'PHP {int(proj.funds):,}' if proj.funds else 'PHP 0',
-                proj.project_start.strftime('%m/%d/%Y') if proj.project_start else 'N/A',
-                proj.project_end.strftime('%m/%d/%Y') if proj.project_end else 'N/A',
-            ])
-        
         # Column widths for landscape: total ~750 (letter landscape width minus margins)
-        projects_table = Table(projects_data, colWidths=[25, 60, 150, 100, 70, 60, 50, 80, 65, 65], repeatRows=1)
-        projects_table.setStyle(TableStyle([
+        projects_widths = [25, 60, 150, 100, 70, 60, 50, 80, 65, 65]
+
+        def project_rows():
+            rows = all_projects.values_list(
+                'project_code', 'project_title', 'agency_grantee', 'mun', 'status', 'program', 'funds', 'project_start', 'project_end',
+            ).iterator(chunk_size=2000)
+            for idx, (code, title, agency, mun, status, program, funds, start, end) in enumerate(rows, 1):
+                # Truncate long titles for table display
+                title = title or 'Untitled'
+                if len(title) > 50:
+                    title = title[:47] + '...'
+
+                agency = agency or 'N/A'
+                if len(agency) > 30:
+                    agency = agency[:27] + '...'
+
+                yield [
+                    str(idx),
+                    code or 'N/A',
+                    # Only text too wide for its column pays for a wrapping Paragraph
+                    pdf_export.fit(title, projects_widths[2], cell_style),
+                    pdf_export.fit(agency, projects_widths[3], cell_style),
+                    mun or 'N/A',
+                    (status or 'N/A').title(),
+                    program or 'N/A',
+                    f'PHP {int(funds):,}' if funds else 'PHP 0',
+                    start.strftime('%m/%d/%Y') if start else 'N/A',
+                    end.strftime('%m/%d/%Y') if end else 'N/A',
+                ]
+
+        # Fixed-size tables, each repeating the header
+        elements.extend(pdf_export.chunked_tables(projects_header, project_rows(), projects_widths, [
             ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#1E40AF')),
             ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
             ('ALIGN', (0, 0), (0, -1), 'CENTER'),
@@ -3915,10 +3567,7 @@ def export_full_report_pdf(request):
             ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
             ('TOPPADDING', (0, 1), (-1, -1), 4),
             ('BOTTOMPADDING', (0, 1), (-1, -1), 4),
-            # Alternate row colors
-            *[('BACKGROUND', (0, i), (-1, i), colors.HexColor('#DBEAFE')) for i in range(2, len(projects_data), 2)],
-        ]))
-        elements.append(projects_table)
+        ], stripe=colors.HexColor('#DBEAFE')))
         elements.append(Spacer(1, 20))
 
     # ========================================
@@ -3931,39 +3580,41 @@ def export_full_report_pdf(request):
         
         # Proposals table header
         proposals_header = ['#', 'Title', 'Submitted By', 'Status', 'Proposed (PHP)', 'Approved (PHP)', 'Location', 'Submission Date']
-        proposals_data = [proposals_header]
-        
-        for idx, prop in enumerate(all_proposals, 1):
-            # Truncate long titles
-            title = prop.title or 'Untitled'
-            if len(title) > 60:
-                title = title[:57] + '...'
-            
-            submitted_by = prop.submitted_by.full_name() if prop.submitted_by else 'N/A'
-            if len(submitted_by) > 25:
-                submitted_by = submitted_by[:22] + '...'
-            
-            location = prop.location or prop.municipality or 'N/A'
-            if len(location) > 20:
-                location = location[:17] + '...'
-            
-            # Format status nicely
-            status_display = prop.get_status_display() if hasattr(prop, 'get_status_display') else (prop.status or 'N/A').replace('_', ' ').title()
-            
-            proposals_data.append([
-                str(idx),
-                Paragraph(title, cell_style),
-                Paragraph(submitted_by, cell_style),
-                status_display,
-                f'PHP {int(prop.proposed_amount):,}' if prop.proposed_amount else 'PHP 0',
-                f'PHP {int(prop.approved_amount):,}' if prop.approved_amount else '-',
-                location,
-                prop.submission_date.strftime('%m/%d/%Y') if prop.submission_date else 'N/A',
-            ])
-        
         # Column widths for landscape
-        proposals_table = Table(proposals_data, colWidths=[25, 180, 100, 70, 90, 90, 80, 75], repeatRows=1)
-        proposals_table.setStyle(TableStyle([
+        proposals_widths = [25, 180, 100, 70, 90, 90, 80, 75]
+
+        def proposal_rows():
+            names = excel_export.user_names()
+            statuses = dict(Proposal.STATUS_CHOICES)
+            rows = all_proposals.values_list(
+                'title', 'submitted_by', 'status', 'proposed_amount', 'approved_amount', 'location', 'municipality', 'submission_date',
+            ).iterator(chunk_size=2000)
+            for idx, (title, submitted_by, status, proposed, approved, location, municipality, submitted) in enumerate(rows, 1):
+                # Truncate long titles
+                title = title or 'Untitled'
+                if len(title) > 60:
+                    title = title[:57] + '...'
+
+                submitted_by = names(submitted_by) if submitted_by else 'N/A'
+                if len(submitted_by) > 25:
+                    submitted_by = submitted_by[:22] + '...'
+
+                location = location or municipality or 'N/A'
+                if len(location) > 20:
+                    location = location[:17] + '...'
+
+                yield [
+                    str(idx),
+                    pdf_export.fit(title, proposals_widths[1], cell_style),
+                    pdf_export.fit(submitted_by, proposals_widths[2], cell_style),
+                    statuses.get(status, status),
+                    f'PHP {int(proposed):,}' if proposed else 'PHP 0',
+                    f'PHP {int(approved):,}' if approved else '-',
+                    location,
+                    submitted.strftime('%m/%d/%Y') if submitted else 'N/A',
+                ]
+
+        elements.extend(pdf_export.chunked_tables(proposals_header, proposal_rows(), proposals_widths, [
             ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#065F46')),
             ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
             ('ALIGN', (0, 0), (0, -1), 'CENTER'),
@@ -3979,10 +3630,7 @@ def export_full_report_pdf(request):
             ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
             ('TOPPADDING', (0, 1), (-1, -1), 4),
             ('BOTTOMPADDING', (0, 1), (-1, -1), 4),
-            # Alternate row colors
-            *[('BACKGROUND', (0, i), (-1, i), colors.HexColor('#D1FAE5')) for i in range(2, len(proposals_data), 2)],
-        ]))
-        elements.append(proposals_table)
+        ], stripe=colors.HexColor('#D1FAE5')))
         elements.append(Spacer(1, 20))
 
     # ========================================
@@ -4168,7 +3816,7 @@ def export_full_report_pdf(request):
 
     # Build and return PDF
     doc.build(elements)
-    return response
+    return pdf_export.response(output, f'dost_report_{selected_year or "all_years"}.pdf')
 
 
 @login_required
@@ -4184,81 +3832,32 @@ def administrator_reports_view(request):
     start_date = request.GET.get('start_date')
     end_date = request.GET.get('end_date')
     selected_status = request.GET.get('status')
-    
-    # Don't set default year - only filter if user explicitly selects a year
-    current_year = datetime.now().year
-
-    # Base querysets for filtering
-    project_queryset = Project.objects.all()
-    proposal_queryset = Proposal.objects.all()
-    budget_queryset = Budget.objects.all()
-    task_queryset = Task.objects.all()
-
-    # Apply filters
-    if selected_year:
-        try:
-            year_int = int(selected_year)
-            project_queryset = project_queryset.filter(year=year_int)
-            proposal_queryset = proposal_queryset.filter(submission_date__year=year_int)
-            budget_queryset = budget_queryset.filter(fiscal_year=year_int)
-        except ValueError:
-            pass
-
-    if selected_municipality and selected_municipality != '':
-        project_queryset = project_queryset.filter(mun__iexact=selected_municipality)
-        proposal_queryset = proposal_queryset.filter(municipality__iexact=selected_municipality)
-
-    if start_date:
-        try:
-            start = datetime.strptime(start_date, '%Y-%m-%d').date()
-            project_queryset = project_queryset.filter(
-                Q(project_start__gte=start) | 
-                Q(date_of_completion__gte=start) |
-                Q(approval_date__date__gte=start)
-            )
-            proposal_queryset = proposal_queryset.filter(submission_date__date__gte=start)
-        except ValueError:
-            pass
 
-    if end_date:
-        try:
-            end = datetime.strptime(end_date, '%Y-%m-%d').date()
-            project_queryset = project_queryset.filter(
-                Q(project_start__lte=end) | 
-                Q(date_of_completion__lte=end) |
-                Q(approval_date__date__lte=end)
-            )
-            proposal_queryset = proposal_queryset.filter(submission_date__date__lte=end)
-        except ValueError:
-            pass
-
-    if selected_status and selected_status != '':
-        project_queryset = project_queryset.filter(status__iexact=selected_status)
-        proposal_queryset = proposal_queryset.filter(status__iexact=selected_status)
+    # Filtered aggregates, shared with export_full_report_pdf for the same filters
+    report = report_data.dataset(request.GET)
+    filters = report.filters
 
     # -----------------------------
     # Total Budget (calculated from budget allocations)
     # -----------------------------
-    total_budget = budget_queryset.aggregate(total=Sum('total_equipment_value'))['total'] or Decimal('0.00')
-    total_delivered = budget_queryset.aggregate(total=Sum('delivered_equipment_value'))['total'] or Decimal('0.00')
-    total_spent = total_delivered
-    total_remaining = total_budget - total_spent
+    total_budget = report.total_budget
+    total_spent = report.total_delivered
+    total_remaining = report.total_remaining
 
     total_budget_int = int(total_budget)
     total_spent_int = int(total_spent)
     total_remaining_int = int(total_remaining)
     
     # Utilization rate
-    utilization_rate = round((float(total_spent) / float(total_budget) * 100), 2) if total_budget > 0 else 0
+    utilization_rate = report.utilization_rate
 
     # -----------------------------
     # Proposal Status Counts
     # -----------------------------
-    proposal_counts_qs = proposal_queryset.values('status').annotate(total=Count('id'))
     proposal_status_counts = {'pending': 0, 'approved': 0, 'rejected': 0, 'for_review': 0, 'needs_revision': 0}
-    for p in proposal_counts_qs:
-        if p['status'] in proposal_status_counts:
-            proposal_status_counts[p['status']] = p['total']
+    for status, total in report.proposal_status_counts.items():
+        if status in proposal_status_counts:
+            proposal_status_counts[status] += total
     
     total_proposals = sum(proposal_status_counts.values())
 
@@ -4266,20 +3865,9 @@ def administrator_reports_view(request):
     # Project Status Counts
     # -----------------------------
     project_status_counts = {'New': 0, 'Ongoing': 0, 'Completed': 0, 'Terminated': 0}
-    project_counts_qs = project_queryset.values('status').annotate(total=Count('id'))
-    for p in project_counts_qs:
-        status = p['status'] or 'New'
-        # Normalize status
-        if status.lower() in ['new', 'proposal']:
-            project_status_counts['New'] += p['total']
-        elif status.lower() in ['ongoing', 'on-going', 'in_progress']:
-            project_status_counts['Ongoing'] += p['total']
-        elif status.lower() in ['completed', 'complete']:
-            project_status_counts['Completed'] += p['total']
-        elif status.lower() in ['terminated', 'cancelled']:
-            project_status_counts['Terminated'] += p['total']
-        else:
-            project_status_counts['New'] += p['total']
+    bucket_labels = {'proposal': 'New', 'unknown': 'New', 'ongoing': 'Ongoing', 'completed': 'Completed', 'terminated': 'Terminated'}
+    for bucket, total in report.project_bucket_counts.items():
+        project_status_counts[bucket_labels[bucket]] += total
     
     total_projects = sum(project_status_counts.values())
 
@@ -4292,11 +3880,7 @@ def administrator_reports_view(request):
     # -----------------------------
     # User Role Counts
     # -----------------------------
-    user_role_counts = {}
-    user_counts_qs = User.objects.values('role').annotate(total=Count('id'))
-    for u in user_counts_qs:
-        role_label = u['role'].replace('_', ' ').title()
-        user_role_counts[role_label] = u['total']
+    user_role_counts = {role.replace('_', ' ').title(): total for role, total in report.user_role_counts.items()}
     
     total_users = sum(user_role_counts.values())
 
@@ -4304,17 +3888,18 @@ def administrator_reports_view(request):
     # Projects by Municipality
     # -----------------------------
     municipality_counts = {}
-    mun_qs = project_queryset.values('mun').annotate(total=Count('id'))
-    for m in mun_qs:
-        mun_name = m['mun'] or 'Unspecified'
-        municipality_counts[mun_name] = m['total']
+    for mun, total in report.municipality_counts.items():
+        mun_name = mun or 'Unspecified'
+        municipality_counts[mun_name] = municipality_counts.get(mun_name, 0) + total
 
     # -----------------------------
     # Project Approved Amounts (Top 10)
     # -----------------------------
-    projects = project_queryset.all().order_by('-funds')[:10]
-    scatter_labels = [p.project_title[:30] + '...' if len(p.project_title or '') > 30 else (p.project_title or 'Untitled') for p in projects]
-    scatter_data = [int(p.funds or 0) for p in projects]
+    scatter_labels = [
+        p['project_title'][:30] + '...' if len(p['project_title'] or '') > 30 else (p['project_title'] or 'Untitled')
+        for p in report.top_funded
+    ]
+    scatter_data = [int(p['funds'] or 0) for p in report.top_funded]
 
     # -----------------------------
     # Equipment Allocation Summary
@@ -4336,34 +3921,17 @@ def administrator_reports_view(request):
     # -----------------------------
     # Monthly Project Trend (All Years or Selected Year)
     # -----------------------------
-    monthly_projects = [0] * 12
-    if selected_year:
-        # Filter by selected year
-        filter_year = int(selected_year)
-        for p in project_queryset.filter(project_start__year=filter_year):
-            if p.project_start:
-                monthly_projects[p.project_start.month - 1] += 1
-    else:
-        # Show all years combined
-        for p in project_queryset.all():
-            if p.project_start:
-                monthly_projects[p.project_start.month - 1] += 1
+    monthly_projects = report.monthly_projects
 
     # Get filter options for the form
-    available_years = sorted(list(Project.objects.values_list('year', flat=True).distinct().exclude(year__isnull=True)))
-    available_municipalities = sorted(list(Project.objects.values_list('mun', flat=True).distinct().exclude(mun__isnull=True).exclude(mun='')))
-    available_statuses = sorted(list(Project.objects.values_list('status', flat=True).distinct().exclude(status__isnull=True).exclude(status='')))
+    available_years, available_municipalities, available_statuses = report.filter_options
 
     # -----------------------------
     # DOST Tranche Summary
     # -----------------------------
     tranche_queryset = TrancheRelease.objects.all()
-    if selected_year:
-        try:
-            year_int = int(selected_year)
-            tranche_queryset = tranche_queryset.filter(release_date__year=year_int)
-        except ValueError:
-            pass
+    if filters.year is not None:
+        tranche_queryset = tranche_queryset.filter(release_date__year=filters.year)
     
     # Tranche statistics - using correct field names
     tranche_status_counts = {
@@ -4398,12 +3966,8 @@ def administrator_reports_view(request):
     # DOST Equipment Tracking
     # -----------------------------
     equipment_queryset = ProjectEquipment.objects.all()
-    if selected_year:
-        try:
-            year_int = int(selected_year)
-            equipment_queryset = equipment_queryset.filter(project__year=year_int)
-        except ValueError:
-            pass
+    if filters.year is not None:
+        equipment_queryset = equipment_queryset.filter(project__year=filters.year)
     
     # Equipment ownership statistics
     equipment_ownership_counts = {
@@ -4682,372 +4246,39 @@ def administrator_audit_logs_view(request):
 @login_required
 def export_projects_excel(request):
     """Export all projects to Excel file - matches the Projects table structure"""
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Projects"
-    
-    # Header styling
-    header_font = Font(bold=True, color="FFFFFF")
-    header_fill = PatternFill(start_color="0072CE", end_color="0072CE", fill_type="solid")
-    header_alignment = Alignment(horizontal="center", vertical="center", wrap_text=True)
-    thin_border = Border(
-        left=Side(style='thin'),
-        right=Side(style='thin'),
-        top=Side(style='thin'),
-        bottom=Side(style='thin')
+    wb = excel_export.workbook()
+    excel_export.write_sheet(
+        wb, "Projects", excel_export.project_columns(),
+        excel_export.rows(excel_export.projects(), excel_export.project_columns()),
     )
-    
-    # Headers - matching the projects table exactly
-    headers = [
-        # Identification
-        "No.", "Code", "Year",
-        # Basic Info
-        "Project Title", "Agency/Grantee", "Program", "Type", "Status", "Remarks",
-        # Location
-        "Municipality", "Province", "District",
-        # Beneficiaries
-        "Beneficiary", "Beneficiary Address", "Contact", "Proponent", 
-        "No. Beneficiaries", "Male", "Female", "Total", "Senior Citizen", "PWD",
-        # Financials
-        "Fund Source", "Approved Budget", "Total Project Cost", "Counterpart Fund", 
-        "Internal Managed Fund", "Total Released",
-        # Tranches
-        "1st Tranche", "2nd Tranche", "3rd Tranche",
-        # Dates & Timeline
-        "Start Date", "End Date", "Release Date", "Completion Date", "Duration", "Extension Date",
-        # Liquidation
-        "Check/ADA No.", "Liquidation Status", "Liquidation Date", "Amount Liquidated",
-        # Tech & Interventions
-        "Technologies Availed", "Interventions",
-        # Documents & Status
-        "TAFR", "PAR", "Terminal Report", "Invoice/Receipt", "Equipment List",
-        # Donation
-        "Donated", "Donation Date", "Donation Status",
-        # Other
-        "PME Visit", "Women's Group", "Inspection/Tagging Date", "Receipt by Grantee"
-    ]
-    
-    for col, header in enumerate(headers, 1):
-        cell = ws.cell(row=1, column=col, value=header)
-        cell.font = header_font
-        cell.fill = header_fill
-        cell.alignment = header_alignment
-        cell.border = thin_border
-    
-    # Data rows
-    projects = Project.objects.all().order_by('no', '-date_created')
-    
-    for row_num, project in enumerate(projects, 2):
-        data = [
-            # Identification
-            project.no or '-',
-            project.project_code or '-',
-            project.year or '-',
-            # Basic Info
-            project.project_title or '-',
-            project.agency_grantee or '-',
-            project.program or '-',
-            project.type_of_project or '-',
-            project.status or '-',
-            project.remarks or '-',
-            # Location
-            project.mun or '-',
-            project.province or '-',
-            project.district or '-',
-            # Beneficiaries
-            project.beneficiary or '-',
-            project.beneficiary_address or '-',
-            project.contact_details or '-',
-            project.proponent_details or '-',
-            project.no_of_beneficiaries or '-',
-            project.male or '-',
-            project.female or '-',
-            project.total_beneficiaries or '-',
-            project.senior_citizen or '-',
-            project.pwd or '-',
-            # Financials
-            project.fund_source or '-',
-            float(project.funds or 0) if project.funds else '-',
-            float(project.total_project_cost or 0) if project.total_project_cost else '-',
-            float(project.counterpart_funds or 0) if project.counterpart_funds else '-',
-            float(project.internally_managed_fund or 0) if project.internally_managed_fund else '-',
-            float(project.total_funds_released or 0) if project.total_funds_released else '-',
-            # Tranches
-            float(project.first_tranche or 0) if project.first_tranche else '-',
-            float(project.second_tranche or 0) if project.second_tranche else '-',
-            float(project.third_tranche or 0) if project.third_tranche else '-',
-            # Dates & Timeline
-            project.project_start.strftime('%Y-%m-%d') if project.project_start else '-',
-            project.project_end.strftime('%Y-%m-%d') if project.project_end else '-',
-            project.date_of_release.strftime('%Y-%m-%d') if project.date_of_release else '-',
-            project.date_of_completion.strftime('%Y-%m-%d') if project.date_of_completion else '-',
-            project.original_project_duration or '-',
-            project.extension_date or '-',
-            # Liquidation
-            project.check_ada_no or '-',
-            project.status_of_liquidation or '-',
-            project.date_of_liquidation.strftime('%Y-%m-%d') if project.date_of_liquidation else '-',
-            float(project.amount_liquidated or 0) if project.amount_liquidated else '-',
-            # Tech & Interventions
-            project.availed_technologies or '-',
-            project.interventions or '-',
-            # Documents & Status
-            project.tafr or '-',
-            project.par or '-',
-            project.terminal_report or '-',
-            project.invoice_receipt or '-',
-            project.list_of_eqpt or '-',
-            # Donation
-            project.donated or '-',
-            project.date_of_donation.strftime('%Y-%m-%d') if project.date_of_donation else '-',
-            project.donation_status or '-',
-            # Other
-            project.pme_visit or '-',
-            project.womens_group or '-',
-            project.date_of_inspection_tagging.strftime('%Y-%m-%d') if project.date_of_inspection_tagging else '-',
-            project.acknowledgment_receipt_by_grantee or '-',
-        ]
-        
-        for col, value in enumerate(data, 1):
-            cell = ws.cell(row=row_num, column=col, value=value)
-            cell.border = thin_border
-            cell.alignment = Alignment(wrap_text=True)
-    
-    # Adjust column widths
-    column_widths = [
-        6, 15, 6,  # Identification
-        40, 25, 12, 15, 12, 20,  # Basic Info
-        12, 12, 8,  # Location
-        25, 30, 20, 25, 8, 6, 6, 6, 6, 6,  # Beneficiaries
-        15, 15, 15, 15, 15, 15,  # Financials
-        12, 12, 12,  # Tranches
-        12, 12, 12, 12, 15, 15,  # Dates
-        15, 15, 12, 15,  # Liquidation
-        30, 30,  # Tech
-        10, 10, 12, 12, 20,  # Documents
-        10, 12, 15,  # Donation
-        10, 12, 12, 15  # Other
-    ]
-    for i, width in enumerate(column_widths, 1):
-        if i <= len(column_widths):
-            ws.column_dimensions[get_column_letter(i)].width = width
-    
-    # Freeze the header row
-    ws.freeze_panes = 'A2'
-    
-    # Create response
-    response = HttpResponse(
-        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-    )
-    response['Content-Disposition'] = f'attachment; filename="projects_export_{timezone.now().strftime("%Y%m%d")}.xlsx"'
-    wb.save(response)
-    return response
+    return excel_export.response(wb, excel_export.stamped('projects_export'))
 
 
 @login_required
 def export_budgets_excel(request):
     """Export all budgets to Excel file"""
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Budgets"
-    
-    # Header styling
-    header_font = Font(bold=True, color="FFFFFF")
-    header_fill = PatternFill(start_color="0072CE", end_color="0072CE", fill_type="solid")
-    header_alignment = Alignment(horizontal="center", vertical="center", wrap_text=True)
-    thin_border = Border(
-        left=Side(style='thin'),
-        right=Side(style='thin'),
-        top=Side(style='thin'),
-        bottom=Side(style='thin')
-    )
-    
-    # Headers
-    headers = [
-        "Fiscal Year", "Fund Source", "Total Amount", "Remaining Amount",
-        "Status", "Date Allocated", "Created By"
-    ]
-    
-    for col, header in enumerate(headers, 1):
-        cell = ws.cell(row=1, column=col, value=header)
-        cell.font = header_font
-        cell.fill = header_fill
-        cell.alignment = header_alignment
-        cell.border = thin_border
-    
-    # Data rows
-    budgets = Budget.objects.all().order_by('-fiscal_year')
-    
-    for row_num, budget in enumerate(budgets, 2):
-        created_by = budget.created_by.full_name() if budget.created_by else '-'
-        data = [
-            budget.fiscal_year,
-            budget.fund_source or '-',
-            float(budget.total_amount or 0),
-            float(budget.remaining_amount or 0),
-            budget.status or '-',
-            budget.date_allocated.strftime('%Y-%m-%d') if budget.date_allocated else '-',
-            created_by
-        ]
-        
-        for col, value in enumerate(data, 1):
-            cell = ws.cell(row=row_num, column=col, value=value)
-            cell.border = thin_border
-            cell.alignment = Alignment(wrap_text=True)
-    
-    # Adjust column widths
-    column_widths = [12, 30, 18, 18, 12, 15, 25]
-    for i, width in enumerate(column_widths, 1):
-        ws.column_dimensions[get_column_letter(i)].width = width
-    
-    # Create response
-    response = HttpResponse(
-        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-    )
-    response['Content-Disposition'] = f'attachment; filename="budgets_export_{timezone.now().strftime("%Y%m%d")}.xlsx"'
-    wb.save(response)
-    return response
+    columns = excel_export.budget_columns(excel_export.user_names())
+    wb = excel_export.workbook()
+    excel_export.write_sheet(wb, "Budgets", columns, excel_export.rows(excel_export.budgets(), columns))
+    return excel_export.response(wb, excel_export.stamped('budgets_export'))
 
 
 @login_required
 def export_proposals_excel(request):
     """Export all proposals to Excel file"""
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Proposals"
-    
-    # Header styling
-    header_font = Font(bold=True, color="FFFFFF")
-    header_fill = PatternFill(start_color="0072CE", end_color="0072CE", fill_type="solid")
-    header_alignment = Alignment(horizontal="center", vertical="center", wrap_text=True)
-    thin_border = Border(
-        left=Side(style='thin'),
-        right=Side(style='thin'),
-        top=Side(style='thin'),
-        bottom=Side(style='thin')
-    )
-    
-    # Headers
-    headers = [
-        "Title", "Status", "Proposed Amount", "Approved Amount",
-        "Submitted By", "Submission Date", "Processed By", "Beneficiary",
-        "Location", "Municipality", "Province"
-    ]
-    
-    for col, header in enumerate(headers, 1):
-        cell = ws.cell(row=1, column=col, value=header)
-        cell.font = header_font
-        cell.fill = header_fill
-        cell.alignment = header_alignment
-        cell.border = thin_border
-    
-    # Data rows
-    proposals = Proposal.objects.all().order_by('-submission_date')
-    
-    for row_num, proposal in enumerate(proposals, 2):
-        submitted_by = proposal.submitted_by.full_name() if proposal.submitted_by else '-'
-        processed_by = proposal.processed_by.full_name() if proposal.processed_by else '-'
-        beneficiary = proposal.beneficiary.full_name() if proposal.beneficiary else '-'
-        
-        data = [
-            proposal.title or '-',
-            proposal.get_status_display() or '-',
-            float(proposal.proposed_amount or 0),
-            float(proposal.approved_amount or 0) if proposal.approved_amount else '-',
-            submitted_by,
-            proposal.submission_date.strftime('%Y-%m-%d') if proposal.submission_date else '-',
-            processed_by,
-            beneficiary,
-            proposal.location or '-',
-            proposal.municipality or '-',
-            proposal.province or '-'
-        ]
-        
-        for col, value in enumerate(data, 1):
-            cell = ws.cell(row=row_num, column=col, value=value)
-            cell.border = thin_border
-            cell.alignment = Alignment(wrap_text=True)
-    
-    # Adjust column widths
-    column_widths = [40, 15, 18, 18, 25, 15, 25, 25, 25, 15, 15]
-    for i, width in enumerate(column_widths, 1):
-        ws.column_dimensions[get_column_letter(i)].width = width
-    
-    # Create response
-    response = HttpResponse(
-        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-    )
-    response['Content-Disposition'] = f'attachment; filename="proposals_export_{timezone.now().strftime("%Y%m%d")}.xlsx"'
-    wb.save(response)
-    return response
+    columns = excel_export.proposal_columns(excel_export.user_names())
+    wb = excel_export.workbook()
+    excel_export.write_sheet(wb, "Proposals", columns, excel_export.rows(excel_export.proposals(), columns))
+    return excel_export.response(wb, excel_export.stamped('proposals_export'))
 
 
 @login_required
 def export_tasks_excel(request):
     """Export all tasks to Excel file"""
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Tasks"
-    
-    # Header styling
-    header_font = Font(bold=True, color="FFFFFF")
-    header_fill = PatternFill(start_color="0072CE", end_color="0072CE", fill_type="solid")
-    header_alignment = Alignment(horizontal="center", vertical="center", wrap_text=True)
-    thin_border = Border(
-        left=Side(style='thin'),
-        right=Side(style='thin'),
-        top=Side(style='thin'),
-        bottom=Side(style='thin')
-    )
-    
-    # Headers
-    headers = [
-        "Task Title", "Project", "Description", "Assigned To",
-        "Status", "Due Date", "Completion Date", "Location"
-    ]
-    
-    for col, header in enumerate(headers, 1):
-        cell = ws.cell(row=1, column=col, value=header)
-        cell.font = header_font
-        cell.fill = header_fill
-        cell.alignment = header_alignment
-        cell.border = thin_border
-    
-    # Data rows
-    tasks = Task.objects.all().select_related('project', 'assigned_to').order_by('-due_date')
-    
-    for row_num, task in enumerate(tasks, 2):
-        assigned_to = task.assigned_to.full_name() if task.assigned_to else '-'
-        project_title = task.project.project_title if task.project else '-'
-        
-        data = [
-            task.title or '-',
-            project_title,
-            task.description or '-',
-            assigned_to,
-            task.get_status_display() or '-',
-            task.due_date.strftime('%Y-%m-%d') if task.due_date else '-',
-            task.completion_date.strftime('%Y-%m-%d') if task.completion_date else '-',
-            task.location_name or '-'
-        ]
-        
-        for col, value in enumerate(data, 1):
-            cell = ws.cell(row=row_num, column=col, value=value)
-            cell.border = thin_border
-            cell.alignment = Alignment(wrap_text=True)
-    
-    # Adjust column widths
-    column_widths = [30, 40, 50, 25, 15, 12, 15, 30]
-    for i, width in enumerate(column_widths, 1):
-        ws.column_dimensions[get_column_letter(i)].width = width
-    
-    # Create response
-    response = HttpResponse(
-        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-    )
-    response['Content-Disposition'] = f'attachment; filename="tasks_export_{timezone.now().strftime("%Y%m%d")}.xlsx"'
-    wb.save(response)
-    return response
+    columns = excel_export.task_columns(excel_export.user_names())
+    wb = excel_export.workbook()
+    excel_export.write_sheet(wb, "Tasks", columns, excel_export.rows(excel_export.tasks(), columns))
+    return excel_export.response(wb, excel_export.stamped('tasks_export'))
 
 
 @login_required
@@ -5060,349 +4291,250 @@ def export_master_report_excel(request):
     - Projects
     - Tasks
     """
-    wb = Workbook()
-    
-    # Styling
-    header_font = Font(bold=True, color="FFFFFF")
-    header_fill = PatternFill(start_color="0072CE", end_color="0072CE", fill_type="solid")
-    title_font = Font(bold=True, size=14, color="0072CE")
-    subtitle_font = Font(bold=True, size=11)
-    header_alignment = Alignment(horizontal="center", vertical="center", wrap_text=True)
-    thin_border = Border(
-        left=Side(style='thin'), right=Side(style='thin'),
-        top=Side(style='thin'), bottom=Side(style='thin')
-    )
-    currency_format = '₱#,##0.00'
-    
-    def style_header_row(ws, row, num_cols):
-        for col in range(1, num_cols + 1):
-            cell = ws.cell(row=row, column=col)
-            cell.font = header_font
-            cell.fill = header_fill
-            cell.alignment = header_alignment
-            cell.border = thin_border
-    
+    wb = excel_export.workbook()
+
     # =====================
     # SHEET 1: SUMMARY
     # =====================
-    ws_summary = wb.active
-    ws_summary.title = "Summary"
-    
     # Get summary data
     total_budgets = Budget.objects.count()
-    total_budget_amount = Budget.objects.aggregate(total=Sum('total_amount'))['total'] or 0
-    total_remaining = Budget.objects.aggregate(total=Sum('remaining_amount'))['total'] or 0
-    total_spent = float(total_budget_amount) - float(total_remaining)
-    
-    total_proposals = Proposal.objects.count()
-    pending_proposals = Proposal.objects.filter(status='pending').count()
-    approved_proposals = Proposal.objects.filter(status='approved').count()
-    rejected_proposals = Proposal.objects.filter(status='rejected').count()
-    
-    total_projects = Project.objects.count()
-    ongoing_projects = Project.objects.filter(status__iexact='ongoing').count()
-    completed_projects = Project.objects.filter(status__iexact='completed').count()
-    
-    total_tasks = Task.objects.count()
-    pending_tasks = Task.objects.filter(status='pending').count()
-    completed_tasks = Task.objects.filter(status='completed').count()
-    
+    # total_amount / remaining_amount are model properties, so aggregate the stored values
+    budget_sums = Budget.objects.aggregate(total=Sum('total_equipment_value'), delivered=Sum('delivered_equipment_value'))
+    total_budget_amount = budget_sums['total'] or 0
+    total_spent = float(budget_sums['delivered'] or 0)
+    total_remaining = float(total_budget_amount) - total_spent
+
+    proposal_counts = Proposal.objects.aggregate(
+        total=Count('id'),
+        pending=Count('id', filter=Q(status='pending')),
+        approved=Count('id', filter=Q(status='approved')),
+        rejected=Count('id', filter=Q(status='rejected')),
+    )
+    project_buckets = Project.objects.aggregate(
+        total=Count('id'),
+        ongoing=Count('id', filter=Q(status_bucket='ongoing')),
+        completed=Count('id', filter=Q(status_bucket='completed')),
+    )
+    task_counts = Task.objects.aggregate(
+        total=Count('id'),
+        pending=Count('id', filter=Q(status='pending')),
+        completed=Count('id', filter=Q(status='completed')),
+    )
+
+    ws_summary = wb.create_sheet("Summary")
+    ws_summary.column_dimensions['A'].width = 20
+    ws_summary.column_dimensions['B'].width = 20
+
+    def summary_row(label=None, value=None, style=None, value_style=None):
+        ws_summary.append([
+            excel_export.styled_cell(ws_summary, label, style),
+            excel_export.styled_cell(ws_summary, value, value_style),
+        ] if label is not None else [])
+
     # Title
-    ws_summary['A1'] = "DOST Biliran - Master Report Summary"
-    ws_summary['A1'].font = title_font
-    ws_summary.merge_cells('A1:D1')
-    
-    ws_summary['A2'] = f"Generated on: {timezone.now().strftime('%B %d, %Y at %I:%M %p')}"
-    ws_summary['A2'].font = Font(italic=True, color="666666")
-    
+    summary_row("DOST Biliran - Master Report Summary", style='export_title')
+    summary_row(f"Generated on: {timezone.now().strftime('%B %d, %Y at %I:%M %p')}", style='export_note')
+    summary_row()
+
     # Budget Summary
-    ws_summary['A4'] = "BUDGET SUMMARY"
-    ws_summary['A4'].font = subtitle_font
-    ws_summary['A5'] = "Total Budgets:"
-    ws_summary['B5'] = total_budgets
-    ws_summary['A6'] = "Total Allocated:"
-    ws_summary['B6'] = float(total_budget_amount)
-    ws_summary['B6'].number_format = currency_format
-    ws_summary['A7'] = "Total Spent:"
-    ws_summary['B7'] = total_spent
-    ws_summary['B7'].number_format = currency_format
-    ws_summary['A8'] = "Total Remaining:"
-    ws_summary['B8'] = float(total_remaining)
-    ws_summary['B8'].number_format = currency_format
-    
+    summary_row("BUDGET SUMMARY", style='export_subtitle')
+    summary_row("Total Budgets:", total_budgets)
+    summary_row("Total Allocated:", float(total_budget_amount), value_style='export_amount')
+    summary_row("Total Spent:", total_spent, value_style='export_amount')
+    summary_row("Total Remaining:", float(total_remaining), value_style='export_amount')
+    summary_row()
+
     # Proposal Summary
-    ws_summary['A10'] = "PROPOSAL SUMMARY"
-    ws_summary['A10'].font = subtitle_font
-    ws_summary['A11'] = "Total Proposals:"
-    ws_summary['B11'] = total_proposals
-    ws_summary['A12'] = "Pending:"
-    ws_summary['B12'] = pending_proposals
-    ws_summary['A13'] = "Approved:"
-    ws_summary['B13'] = approved_proposals
-    ws_summary['A14'] = "Rejected:"
-    ws_summary['B14'] = rejected_proposals
-    
+    summary_row("PROPOSAL SUMMARY", style='export_subtitle')
+    summary_row("Total Proposals:", proposal_counts['total'])
+    summary_row("Pending:", proposal_counts['pending'])
+    summary_row("Approved:", proposal_counts['approved'])
+    summary_row("Rejected:", proposal_counts['rejected'])
+    summary_row()
+
     # Project Summary
-    ws_summary['A16'] = "PROJECT SUMMARY"
-    ws_summary['A16'].font = subtitle_font
-    ws_summary['A17'] = "Total Projects:"
-    ws_summary['B17'] = total_projects
-    ws_summary['A18'] = "Ongoing:"
-    ws_summary['B18'] = ongoing_projects
-    ws_summary['A19'] = "Completed:"
-    ws_summary['B19'] = completed_projects
-    
+    summary_row("PROJECT SUMMARY", style='export_subtitle')
+    summary_row("Total Projects:", project_buckets['total'])
+    summary_row("Ongoing:", project_buckets['ongoing'])
+    summary_row("Completed:", project_buckets['completed'])
+    summary_row()
+
     # Task Summary
-    ws_summary['A21'] = "TASK SUMMARY"
-    ws_summary['A21'].font = subtitle_font
-    ws_summary['A22'] = "Total Tasks:"
-    ws_summary['B22'] = total_tasks
-    ws_summary['A23'] = "Pending:"
-    ws_summary['B23'] = pending_tasks
-    ws_summary['A24'] = "Completed:"
-    ws_summary['B24'] = completed_tasks
-    
-    ws_summary.column_dimensions['A'].width = 20
-    ws_summary.column_dimensions['B'].width = 20
-    
-    # =====================
-    # SHEET 2: BUDGETS
-    # =====================
-    ws_budgets = wb.create_sheet("Budgets")
-    budget_headers = ["Fiscal Year", "Fund Source", "Total Amount", "Remaining Amount", "Spent", "Status", "Date Allocated"]
-    
-    for col, header in enumerate(budget_headers, 1):
-        ws_budgets.cell(row=1, column=col, value=header)
-    style_header_row(ws_budgets, 1, len(budget_headers))
-    
-    budgets = Budget.objects.all().order_by('-fiscal_year')
-    for row_num, budget in enumerate(budgets, 2):
-        spent = float(budget.total_amount or 0) - float(budget.remaining_amount or 0)
-        data = [
-            budget.fiscal_year,
-            budget.fund_source or '-',
-            float(budget.total_amount or 0),
-            float(budget.remaining_amount or 0),
-            spent,
-            budget.status or '-',
-            budget.date_allocated.strftime('%Y-%m-%d') if budget.date_allocated else '-'
-        ]
-        for col, value in enumerate(data, 1):
-            cell = ws_budgets.cell(row=row_num, column=col, value=value)
-            cell.border = thin_border
-            if col in [3, 4, 5]:
-                cell.number_format = currency_format
-    
-    for i, width in enumerate([12, 30, 18, 18, 18, 12, 15], 1):
-        ws_budgets.column_dimensions[get_column_letter(i)].width = width
-    ws_budgets.freeze_panes = 'A2'
-    
-    # =====================
-    # SHEET 3: PROPOSALS
-    # =====================
-    ws_proposals = wb.create_sheet("Proposals")
-    proposal_headers = ["Title", "Status", "Proposed Amount", "Approved Amount", "Submitted By", 
-                        "Submission Date", "Processed By", "Beneficiary", "Municipality", "Province"]
-    
-    for col, header in enumerate(proposal_headers, 1):
-        ws_proposals.cell(row=1, column=col, value=header)
-    style_header_row(ws_proposals, 1, len(proposal_headers))
-    
-    proposals = Proposal.objects.all().select_related('submitted_by', 'processed_by', 'beneficiary').order_by('-submission_date')
-    for row_num, proposal in enumerate(proposals, 2):
-        data = [
-            proposal.title or '-',
-            proposal.get_status_display() or '-',
-            float(proposal.proposed_amount or 0),
-            float(proposal.approved_amount or 0) if proposal.approved_amount else '-',
-            proposal.submitted_by.full_name() if proposal.submitted_by else '-',
-            proposal.submission_date.strftime('%Y-%m-%d') if proposal.submission_date else '-',
-            proposal.processed_by.full_name() if proposal.processed_by else '-',
-            proposal.beneficiary.full_name() if proposal.beneficiary else '-',
-            proposal.municipality or '-',
-            proposal.province or '-'
-        ]
-        for col, value in enumerate(data, 1):
-            cell = ws_proposals.cell(row=row_num, column=col, value=value)
-            cell.border = thin_border
-            if col in [3, 4] and isinstance(value, float):
-                cell.number_format = currency_format
-    
-    for i, width in enumerate([40, 15, 18, 18, 25, 15, 25, 25, 15, 15], 1):
-        ws_proposals.column_dimensions[get_column_letter(i)].width = width
-    ws_proposals.freeze_panes = 'A2'
-    
-    # =====================
-    # SHEET 4: PROJECTS (Full 54-column structure matching projects table)
-    # =====================
-    ws_projects = wb.create_sheet("Projects")
-    project_headers = [
-        # Identification
-        "No.", "Code", "Year",
-        # Basic Info
-        "Project Title", "Agency/Grantee", "Program", "Type", "Status", "Remarks",
-        # Location
-        "Municipality", "Province", "District",
-        # Beneficiaries
-        "Beneficiary", "Beneficiary Address", "Contact", "Proponent", 
-        "No. Beneficiaries", "Male", "Female", "Total", "Senior Citizen", "PWD",
-        # Financials
-        "Fund Source", "Approved Budget", "Total Project Cost", "Counterpart Fund", 
-        "Internal Managed Fund", "Total Released",
-        # Tranches
-        "1st Tranche", "2nd Tranche", "3rd Tranche",
-        # Dates & Timeline
-        "Start Date", "End Date", "Release Date", "Completion Date", "Duration", "Extension Date",
-        # Liquidation
-        "Check/ADA No.", "Liquidation Status", "Liquidation Date", "Amount Liquidated",
-        # Tech & Interventions
-        "Technologies Availed", "Interventions",
-        # Documents & Status
-        "TAFR", "PAR", "Terminal Report", "Invoice/Receipt", "Equipment List",
-        # Donation
-        "Donated", "Donation Date", "Donation Status",
-        # Other
-        "PME Visit", "Women's Group", "Inspection/Tagging Date", "Receipt by Grantee"
-    ]
-    
-    for col, header in enumerate(project_headers, 1):
-        ws_projects.cell(row=1, column=col, value=header)
-    style_header_row(ws_projects, 1, len(project_headers))
-    
-    projects = Project.objects.all().order_by('no', '-date_created')
-    for row_num, project in enumerate(projects, 2):
-        data = [
-            # Identification
-            project.no or '-',
-            project.project_code or '-',
-            project.year or '-',
-            # Basic Info
-            project.project_title or '-',
-            project.agency_grantee or '-',
-            project.program or '-',
-            project.type_of_project or '-',
-            project.status or '-',
-            project.remarks or '-',
-            # Location
-            project.mun or '-',
-            project.province or '-',
-            project.district or '-',
-            # Beneficiaries
-            project.beneficiary or '-',
-            project.beneficiary_address or '-',
-            project.contact_details or '-',
-            project.proponent_details or '-',
-            project.no_of_beneficiaries or '-',
-            project.male or '-',
-            project.female or '-',
-            project.total_beneficiaries or '-',
-            project.senior_citizen or '-',
-            project.pwd or '-',
-            # Financials
-            project.fund_source or '-',
-            float(project.funds or 0) if project.funds else '-',
-            float(project.total_project_cost or 0) if project.total_project_cost else '-',
-            float(project.counterpart_funds or 0) if project.counterpart_funds else '-',
-            float(project.internally_managed_fund or 0) if project.internally_managed_fund else '-',
-            float(project.total_funds_released or 0) if project.total_funds_released else '-',
-            # Tranches
-            float(project.first_tranche or 0) if project.first_tranche else '-',
-            float(project.second_tranche or 0) if project.second_tranche else '-',
-            float(project.third_tranche or 0) if project.third_tranche else '-',
-            # Dates & Timeline
-            project.project_start.strftime('%Y-%m-%d') if project.project_start else '-',
-            project.project_end.strftime('%Y-%m-%d') if project.project_end else '-',
-            project.date_of_release.strftime('%Y-%m-%d') if project.date_of_release else '-',
-            project.date_of_completion.strftime('%Y-%m-%d') if project.date_of_completion else '-',
-            project.original_project_duration or '-',
-            project.extension_date or '-',
-            # Liquidation
-            project.check_ada_no or '-',
-            project.status_of_liquidation or '-',
-            project.date_of_liquidation.strftime('%Y-%m-%d') if project.date_of_liquidation else '-',
-            float(project.amount_liquidated or 0) if project.amount_liquidated else '-',
-            # Tech & Interventions
-            project.availed_technologies or '-',
-            project.interventions or '-',
-            # Documents & Status
-            project.tafr or '-',
-            project.par or '-',
-            project.terminal_report or '-',
-            project.invoice_receipt or '-',
-            project.list_of_eqpt or '-',
-            # Donation
-            project.donated or '-',
-            project.date_of_donation.strftime('%Y-%m-%d') if project.date_of_donation else '-',
-            project.donation_status or '-',
-            # Other
-            project.pme_visit or '-',
-            project.womens_group or '-',
-            project.date_of_inspection_tagging.strftime('%Y-%m-%d') if project.date_of_inspection_tagging else '-',
-            project.acknowledgment_receipt_by_grantee or '-',
-        ]
-        for col, value in enumerate(data, 1):
-            cell = ws_projects.cell(row=row_num, column=col, value=value)
-            cell.border = thin_border
-            cell.alignment = Alignment(wrap_text=True)
-            # Apply currency format to financial columns (24-31 and 41)
-            if col in [24, 25, 26, 27, 28, 29, 30, 31, 41] and isinstance(value, float):
-                cell.number_format = currency_format
-    
-    # Column widths for all 54 columns
-    project_widths = [
-        6, 15, 6,  # Identification
-        40, 25, 12, 15, 12, 20,  # Basic Info
-        12, 12, 8,  # Location
-        25, 30, 20, 25, 8, 6, 6, 6, 6, 6,  # Beneficiaries
-        15, 15, 15, 15, 15, 15,  # Financials
-        12, 12, 12,  # Tranches
-        12, 12, 12, 12, 15, 15,  # Dates
-        15, 15, 12, 15,  # Liquidation
-        30, 30,  # Tech
-        10, 10, 12, 12, 20,  # Documents
-        10, 12, 15,  # Donation
-        10, 12, 12, 15  # Other
-    ]
-    for i, width in enumerate(project_widths, 1):
-        if i <= len(project_widths):
-            ws_projects.column_dimensions[get_column_letter(i)].width = width
-    ws_projects.freeze_panes = 'A2'
-    
+    summary_row("TASK SUMMARY", style='export_subtitle')
+    summary_row("Total Tasks:", task_counts['total'])
+    summary_row("Pending:", task_counts['pending'])
+    summary_row("Completed:", task_counts['completed'])
+
     # =====================
-    # SHEET 5: TASKS
+    # SHEETS 2-5: BUDGETS, PROPOSALS, PROJECTS (full projects table structure), TASKS
     # =====================
-    ws_tasks = wb.create_sheet("Tasks")
-    task_headers = ["Task Title", "Project", "Assigned To", "Status", "Due Date", "Completion Date", "Location"]
-    
-    for col, header in enumerate(task_headers, 1):
-        ws_tasks.cell(row=1, column=col, value=header)
-    style_header_row(ws_tasks, 1, len(task_headers))
-    
-    tasks = Task.objects.all().select_related('project', 'assigned_to').order_by('-due_date')
-    for row_num, task in enumerate(tasks, 2):
-        data = [
-            task.title or '-',
-            task.project.project_title if task.project else '-',
-            task.assigned_to.full_name() if task.assigned_to else '-',
-            task.get_status_display() or '-',
-            task.due_date.strftime('%Y-%m-%d') if task.due_date else '-',
-            task.completion_date.strftime('%Y-%m-%d') if task.completion_date else '-',
-            task.location_name or '-'
-        ]
-        for col, value in enumerate(data, 1):
-            cell = ws_tasks.cell(row=row_num, column=col, value=value)
-            cell.border = thin_border
-    
-    for i, width in enumerate([30, 40, 25, 15, 12, 15, 30], 1):
-        ws_tasks.column_dimensions[get_column_letter(i)].width = width
-    ws_tasks.freeze_panes = 'A2'
-    
-    # Create response
-    response = HttpResponse(
-        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+    names = excel_export.user_names()
+    for title, columns, queryset in (
+        ("Budgets", excel_export.budget_columns(names, master=True), excel_export.budgets()),
+        ("Proposals", excel_export.proposal_columns(names, master=True), excel_export.proposals()),
+        ("Projects", excel_export.project_columns(), excel_export.projects()),
+        ("Tasks", excel_export.task_columns(names, master=True), excel_export.tasks()),
+    ):
+        excel_export.write_sheet(wb, title, columns, excel_export.rows(queryset, columns))
+
+    return excel_export.response(wb, excel_export.stamped('DOST_Master_Report'))
+
+
+@login_required
+@require_GET
+@gzip_page
+def export_data_view(request, dataset, fmt):
+    """Stream a dataset as CSV or NDJSON for bulk consumers, filtered like the reports page
+
+    Rows are read and written in chunks, so memory does not grow with the
+    export. Clients sending Accept-Encoding: gzip get a gzipped body, and
+    unchanged data is answered with 304 Not Modified for If-None-Match or
+    If-Modified-Since.
+    """
+    try:
+        spec = data_exports.get_dataset(dataset, fmt)
+        filters = data_exports.parse_filters(request.GET)
+    except data_exports.ExportQueryError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+    if spec.admin_only and request.user.role != 'admin':
+        return JsonResponse({'success': False, 'error': 'Permission denied.'}, status=403)
+
+    etag, updated = data_exports.validators(dataset, fmt, filters)
+    last_modified = int(updated.timestamp()) if updated else None
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        response = StreamingHttpResponse(
+            data_exports.lines(fmt, spec.queryset(filters), spec.fields),
+            content_type=data_exports.CONTENT_TYPES[fmt],
+        )
+        response['Content-Disposition'] = f'attachment; filename="{data_exports.filename(dataset, fmt)}"'
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified)
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+@login_required
+@require_GET
+def change_feed_api(request, feed):
+    """Rows of a feed created, modified or deleted since ?cursor=, for incremental syncs
+
+    Call without a cursor for a full load, then with each response's cursor
+    until has_more is false; keep the last cursor for the next sync.
+    """
+    if request.user.role != 'admin':
+        return JsonResponse({'success': False, 'error': 'Permission denied.'}, status=403)
+    try:
+        changes = change_feed.page(
+            change_feed.get_feed(feed), cursor=request.GET.get('cursor'), limit=request.GET.get('limit'),
+        )
+    except change_feed.FeedQueryError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+    return JsonResponse({'success': True, **changes})
+
+
+# ---------------------------
+# Background Report Jobs
+# ---------------------------
+@login_required
+@require_POST
+def report_job_create_api(request):
+    """Queue a PDF/Excel export for run_report_worker (or reuse an identical one)
+
+    POST report_type plus the report's usual query parameters. Answers 202 with
+    the job's status_url; the download_url appears once the job is done.
+    Answers 503 without queueing anything when no worker is running, so the
+    page can export directly right away.
+    """
+    if not report_jobs.worker_alive():
+        return JsonResponse({'success': False, 'error': 'No report worker is running.'}, status=503)
+    try:
+        job, created = report_jobs.enqueue(request.POST.get('report_type', ''), request.POST, request.user)
+    except report_jobs.ReportJobError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+    return JsonResponse({'success': True, 'created': created, 'job': report_jobs.job_payload(job)}, status=202)
+
+
+@login_required
+@require_GET
+def report_job_status_api(request, pk):
+    job = get_object_or_404(ReportJob, pk=pk)
+    if not report_jobs.can_view(job, request.user):
+        return JsonResponse({'success': False, 'error': 'Permission denied.'}, status=403)
+    return JsonResponse({'success': True, 'job': report_jobs.job_payload(job)})
+
+
+@login_required
+@require_POST
+def report_job_cancel_api(request, pk):
+    """Drop a job still waiting for a worker, when the page falls back to the direct export"""
+    job = get_object_or_404(ReportJob, pk=pk)
+    if not report_jobs.can_cancel(job, request.user):
+        return JsonResponse({'success': False, 'error': 'Permission denied.'}, status=403)
+    cancelled = report_jobs.cancel(job)
+    job.refresh_from_db()
+    return JsonResponse({'success': True, 'cancelled': cancelled, 'job': report_jobs.job_payload(job)})
+
+
+@login_required
+@require_GET
+def report_job_download(request, pk):
+    job = get_object_or_404(ReportJob, pk=pk)
+    if not report_jobs.can_view(job, request.user):
+        return HttpResponseForbidden('Permission denied.')
+    if job.status != 'done' or not job.output:
+        return JsonResponse({'success': False, 'error': 'Report is not ready.', 'job': report_jobs.job_payload(job)}, status=409)
+    return FileResponse(
+        job.output.open('rb'), filename=job.filename, content_type=job.content_type,
+        # PDFs open in the browser like the direct exports; spreadsheets download
+        as_attachment=job.content_type != 'application/pdf',
     )
-    response['Content-Disposition'] = f'attachment; filename="DOST_Master_Report_{timezone.now().strftime("%Y%m%d")}.xlsx"'
-    wb.save(response)
+
+
+def _history_response(request, messages_qs):
+    try:
+        history = chat_history.page(
+            messages_qs, before=request.GET.get('before'), after=request.GET.get('after'), limit=request.GET.get('limit'),
+        )
+    except chat_history.HistoryQueryError as e:
+        return None, JsonResponse({'success': False, 'error': str(e)}, status=400)
+    return history, JsonResponse({
+        'success': True,
+        'messages': [chat_history.message_payload(message, request.user) for message in history['messages']],
+        'has_more': history['has_more'],
+        'before': history['before'],
+        'after': history['after'],
+    })
+
+
+@login_required
+@require_GET
+def message_history_api(request, partner_id):
+    """A page of a direct conversation: ?before=<cursor> pages back, ?after=<cursor> fetches new messages"""
+    partner = User.objects.filter(pk=partner_id).first()
+    if partner is None:
+        return JsonResponse({'success': False, 'error': 'User not found.'}, status=404)
+    history, response = _history_response(request, chat_history.direct_messages(request.user, partner))
+    if history and request.GET.get('after') and any(m.sender_id == partner.pk and not m.is_read for m in history['messages']):
+        # The open conversation has shown them
+        conversations.mark_read(request.user, partner)
+    return response
+
+
+@login_required
+@require_GET
+def group_chat_history_api(request, chat_id):
+    """A page of a group chat the user is an active member of"""
+    member = GroupChatMember.objects.select_related('group_chat').filter(
+        group_chat_id=chat_id, user=request.user, is_active=True,
+    ).first()
+    if member is None:
+        return JsonResponse({'success': False, 'error': 'Permission denied.'}, status=403)
+    history, response = _history_response(request, chat_history.group_messages(request.user, member.group_chat))
+    if history and request.GET.get('after') and history['messages']:
+        # The open chat has shown them
+        group_chats.mark_seen(member)
     return response
 
 
@@ -6459,58 +5591,13 @@ def staff_reports_view(request):
     end_date = request.GET.get('end_date')
     selected_status = request.GET.get('status')
     
-    # Don't set default year - only filter if user explicitly selects a year
-    current_year = datetime.now().year
-
-    # Base querysets for filtering
-    project_queryset = Project.objects.all()
-    proposal_queryset = Proposal.objects.all()
-    budget_queryset = Budget.objects.all()
-
-    # Apply filters
-    if selected_year:
-        try:
-            year_int = int(selected_year)
-            project_queryset = project_queryset.filter(year=year_int)
-            proposal_queryset = proposal_queryset.filter(submission_date__year=year_int)
-            budget_queryset = budget_queryset.filter(fiscal_year=year_int)
-        except ValueError:
-            pass
-
-    if selected_municipality and selected_municipality != '':
-        project_queryset = project_queryset.filter(mun__iexact=selected_municipality)
-
-    if start_date:
-        try:
-            start = datetime.strptime(start_date, '%Y-%m-%d').date()
-            project_queryset = project_queryset.filter(
-                Q(project_start__gte=start) | 
-                Q(date_of_completion__gte=start) |
-                Q(approval_date__date__gte=start)
-            )
-            proposal_queryset = proposal_queryset.filter(submission_date__date__gte=start)
-        except ValueError:
-            pass
-
-    if end_date:
-        try:
-            end = datetime.strptime(end_date, '%Y-%m-%d').date()
-            project_queryset = project_queryset.filter(
-                Q(project_start__lte=end) | 
-                Q(date_of_completion__lte=end) |
-                Q(approval_date__date__lte=end)
-            )
-            proposal_queryset = proposal_queryset.filter(submission_date__date__lte=end)
-        except ValueError:
-            pass
-
-    if selected_status and selected_status != '':
-        project_queryset = project_queryset.filter(status__iexact=selected_status)
+    # Filtered aggregates, shared with the other reports pages for the same filters
+    report = report_data.dataset(request.GET)
 
     # -----------------------------
     # Total Budget
     # -----------------------------
-    total_budget = budget_queryset.aggregate(total=Sum('total_amount'))['total'] or Decimal('0.00')
+    total_budget = report.total_budget
     total_spent = BudgetTransaction.objects.filter(transaction_type='deduction').aggregate(
         total=Sum('amount')
     )['total'] or Decimal('0.00')
@@ -6523,16 +5610,18 @@ def staff_reports_view(request):
     # -----------------------------
     # Proposal Status Counts
     # -----------------------------
-    proposal_counts_qs = proposal_queryset.values('status').annotate(total=Count('id'))
     proposal_status_counts = {'pending': 0, 'approved': 0, 'rejected': 0}
-    for p in proposal_counts_qs:
-        if p['status'] in proposal_status_counts:
-            proposal_status_counts[p['status']] = p['total']
+    for status, total in report.proposal_status_counts.items():
+        if status in proposal_status_counts:
+            proposal_status_counts[status] += total
 
     # -----------------------------
     # Project Approved Amounts
     # -----------------------------
-    projects = project_queryset.all()
+    projects = report.filters.projects().annotate(
+        pending_task_count=Count('tasks', filter=Q(tasks__status='pending')),
+        completed_task_count=Count('tasks', filter=Q(tasks__status='completed')),
+    )
     scatter_labels = [p.project_title for p in projects]
     scatter_data = [int(p.funds or 0) for p in projects]
 
@@ -6545,13 +5634,11 @@ def staff_reports_view(request):
 
     for p in projects:
         step_labels.append(f"{p.project_title} ({p.project_start.year if p.project_start else 'N/A'})")
-        pending_counts.append(p.tasks.filter(status='pending').count())
-        completed_counts.append(p.tasks.filter(status='completed').count())
+        pending_counts.append(p.pending_task_count)
+        completed_counts.append(p.completed_task_count)
 
     # Get filter options for the form
-    available_years = sorted(list(Project.objects.values_list('year', flat=True).distinct().exclude(year__isnull=True)))
-    available_municipalities = sorted(list(Project.objects.values_list('mun', flat=True).distinct().exclude(mun__isnull=True).exclude(mun='')))
-    available_statuses = sorted(list(Project.objects.values_list('status', flat=True).distinct().exclude(status__isnull=True).exclude(status='')))
+    available_years, available_municipalities, available_statuses = report.filter_options
 
     context = {
         'total_budget': total_budget_int,
@@ -6574,7 +5661,7 @@ def staff_reports_view(request):
         'end_date': end_date,
         'selected_status': selected_status,
         
-        'report_year': int(selected_year) if selected_year else 2025,
+        'report_year': report.filters.year or 2025,
     }
 
     return render(request, 'staff/reports.html', context)
@@ -6760,16 +5847,16 @@ def proponent_dashboard_view(request):
     needs_revision_proposals = proposals_qs.filter(status='needs_revision').count()
     
     # Project status counts
-    ongoing_projects = 0
-    completed_projects = 0
-    terminated_projects = 0
-    for project in projects_qs:
-        if project.status == 'terminated':
-            terminated_projects += 1
-        elif project.end_date and timezone.now().date() >= project.end_date:
-            completed_projects += 1
-        else:
-            ongoing_projects += 1
+    today = timezone.now().date()
+    not_terminated = ~Q(status_bucket='terminated')
+    project_counts = projects_qs.aggregate(
+        terminated=Count('id', filter=Q(status_bucket='terminated')),
+        completed=Count('id', filter=not_terminated & Q(project_end__lte=today)),
+        ongoing=Count('id', filter=not_terminated & (Q(project_end__isnull=True) | Q(project_end__gt=today))),
+    )
+    ongoing_projects = project_counts['ongoing']
+    completed_projects = project_counts['completed']
+    terminated_projects = project_counts['terminated']
     
     # DOST Compliance: Liquidation Progress
     from decimal import Decimal
@@ -7155,127 +6242,66 @@ def proponent_reports_view(request):
     end_date = request.GET.get('end_date')
     selected_status = request.GET.get('status')
     
-    # Don't set default year - only filter if user explicitly selects a year
-    current_year = datetime.now().year
-
-    # Initialize geocoder
-    geolocator = Nominatim(user_agent="admin_reports")
-
-    # Base querysets for filtering
-    budget_queryset = Budget.objects.all()
-    project_queryset = Project.objects.all()
-
-    # Apply filters
-    if selected_year:
-        try:
-            year_int = int(selected_year)
-            budget_queryset = budget_queryset.filter(fiscal_year=year_int)
-            project_queryset = project_queryset.filter(year=year_int)
-        except ValueError:
-            pass
-
-    if selected_municipality and selected_municipality != '':
-        project_queryset = project_queryset.filter(mun__iexact=selected_municipality)
-
-    if start_date:
-        try:
-            start = datetime.strptime(start_date, '%Y-%m-%d').date()
-            project_queryset = project_queryset.filter(
-                Q(project_start__gte=start) | 
-                Q(date_of_completion__gte=start) |
-                Q(approval_date__date__gte=start)
-            )
-        except ValueError:
-            pass
-
-    if end_date:
-        try:
-            end = datetime.strptime(end_date, '%Y-%m-%d').date()
-            project_queryset = project_queryset.filter(
-                Q(project_start__lte=end) | 
-                Q(date_of_completion__lte=end) |
-                Q(approval_date__date__lte=end)
-            )
-        except ValueError:
-            pass
+    # Filtered aggregates, shared with the other reports pages for the same filters
+    report = report_data.dataset(request.GET)
 
-    if selected_status and selected_status != '':
-        project_queryset = project_queryset.filter(status__iexact=selected_status)
-
-    # Fetch budgets ordered by fiscal year, filtered
-    budgets = budget_queryset.order_by('fiscal_year')
-
-    report_data = []
+    report_data_rows = []
     fiscal_years = []
     total_amounts = []
     remaining_amounts = []
     spent_amounts = []
     project_task_grouped = []
 
-    for budget in budgets:
-        # Filter projects for this budget based on our filters
-        projects = budget.projects.filter(id__in=project_queryset.values_list('id', flat=True))
-        total_projects = projects.count()
-        tasks_count = Task.objects.filter(project__in=projects).count()
-
+    for budget in report.budget_rows:
         # Count projects by status
-        status_counts = {
-            'proposal': projects.filter(status='proposal').count(),
-            'ongoing': projects.filter(status='ongoing').count(),
-            'completed': projects.filter(status='completed').count(),
-            'terminated': projects.filter(status='terminated').count(),
-        }
+        status_counts = {status: budget['statuses'].get(status, 0) for status in ('proposal', 'ongoing', 'completed', 'terminated')}
 
         # Prepare report row
-        report_data.append({
-            'fiscal_year': budget.fiscal_year,
-            'total_budget': float(budget.total_amount),
-            'spent_budget': float(budget.total_amount - budget.remaining_amount),
-            'remaining_budget': float(budget.remaining_amount),
-            'total_projects': total_projects,
+        report_data_rows.append({
+            'fiscal_year': budget['fiscal_year'],
+            'total_budget': float(budget['total']),
+            'spent_budget': float(budget['spent']),
+            'remaining_budget': float(budget['remaining']),
+            'total_projects': budget['projects'],
             **status_counts,
-            'total_tasks': tasks_count,
+            'total_tasks': budget['tasks'],
         })
 
         # For Chart.js
-        fiscal_years.append(budget.fiscal_year)
-        total_amounts.append(float(budget.total_amount))
-        remaining_amounts.append(float(budget.remaining_amount))
-        spent_amounts.append(float(budget.total_amount - budget.remaining_amount))
-
-        # Grouped Project-Task data
-        for project in projects:
-            task_list = []
-            for task in project.tasks.all():
-                location_name = "N/A"
-                if task.latitude and task.longitude:
-                    try:
-                        location = geolocator.reverse((task.latitude, task.longitude), exactly_one=True)
-                        if location:
-                            location_name = location.address
-                    except Exception as e:
-                        location_name = "N/A"
-
-                task_list.append({
-                    'task_title': task.title,
-                    'location_name': location_name,
-                    'task_status': task.status,
-                    'assigned_to': task.assigned_to.get_full_name() if task.assigned_to else 'Unassigned',
-                })
-
-            project_task_grouped.append({
-                'project_title': project.project_title,
-                'approved_budget': float(project.funds or 0),
-                'tasks': task_list
+        fiscal_years.append(budget['fiscal_year'])
+        total_amounts.append(float(budget['total']))
+        remaining_amounts.append(float(budget['remaining']))
+        spent_amounts.append(float(budget['spent']))
+
+    # Grouped Project-Task data, budget by budget (location names come from the offline
+    # gazetteer; tasks saved before it existed are resolved here in one batch)
+    projects = report.filters.projects().filter(
+        budget_id__in=[budget['id'] for budget in report.budget_rows],
+    ).order_by('budget__fiscal_year', 'budget_id', 'id').prefetch_related(
+        Prefetch('tasks', queryset=Task.objects.select_related('assigned_to')),
+    )
+    geocoding.resolve_task_locations([task for project in projects for task in project.tasks.all()])
+    for project in projects:
+        task_list = []
+        for task in project.tasks.all():
+            task_list.append({
+                'task_title': task.title,
+                'location_name': task.location_name or "N/A",
+                'task_status': task.status,
+                'assigned_to': task.assigned_to.get_full_name() if task.assigned_to else 'Unassigned',
             })
 
+        project_task_grouped.append({
+            'project_title': project.project_title,
+            'approved_budget': float(project.funds or 0),
+            'tasks': task_list
+        })
+
     # Get filter options for the form
-    available_years = sorted(list(Project.objects.values_list('year', flat=True).distinct().exclude(year__isnull=True)))
-    available_municipalities = sorted(list(Project.objects.values_list('mun', flat=True).distinct().exclude(mun__isnull=True).exclude(mun='')))
-    available_statuses = sorted(list(Project.objects.values_list('status', flat=True).distinct().exclude(status__isnull=True).exclude(status='')))
+    available_years, available_municipalities, available_statuses = report.filter_options
 
     context = {
-        'report_data': report_data,
+        'report_data': report_data_rows,
         'fiscal_years': fiscal_years,
         'total_amounts': total_amounts,
         'remaining_amounts': remaining_amounts,
@@ -7729,127 +6755,66 @@ def beneficiary_reports_view(request):
     end_date = request.GET.get('end_date')
     selected_status = request.GET.get('status')
     
-    # Don't set default year - only filter if user explicitly selects a year
-    current_year = datetime.now().year
-
-    # Initialize geocoder
-    geolocator = Nominatim(user_agent="admin_reports")
-
-    # Base querysets for filtering
-    budget_queryset = Budget.objects.all()
-    project_queryset = Project.objects.all()
-
-    # Apply filters
-    if selected_year:
-        try:
-            year_int = int(selected_year)
-            budget_queryset = budget_queryset.filter(fiscal_year=year_int)
-            project_queryset = project_queryset.filter(year=year_int)
-        except ValueError:
-            pass
-
-    if selected_municipality and selected_municipality != '':
-        project_queryset = project_queryset.filter(mun__iexact=selected_municipality)
-
-    if start_date:
-        try:
-            start = datetime.strptime(start_date, '%Y-%m-%d').date()
-            project_queryset = project_queryset.filter(
-                Q(project_start__gte=start) | 
-                Q(date_of_completion__gte=start) |
-                Q(approval_date__date__gte=start)
-            )
-        except ValueError:
-            pass
-
-    if end_date:
-        try:
-            end = datetime.strptime(end_date, '%Y-%m-%d').date()
-            project_queryset = project_queryset.filter(
-                Q(project_start__lte=end) | 
-                Q(date_of_completion__lte=end) |
-                Q(approval_date__date__lte=end)
-            )
-        except ValueError:
-            pass
-
-    if selected_status and selected_status != '':
-        project_queryset = project_queryset.filter(status__iexact=selected_status)
+    # Filtered aggregates, shared with the other reports pages for the same filters
+    report = report_data.dataset(request.GET)
 
-    # Fetch budgets ordered by fiscal year, filtered
-    budgets = budget_queryset.order_by('fiscal_year')
-
-    report_data = []
+    report_data_rows = []
     fiscal_years = []
     total_amounts = []
     remaining_amounts = []
     spent_amounts = []
     project_task_grouped = []
 
-    for budget in budgets:
-        # Filter projects for this budget based on our filters
-        projects = budget.projects.filter(id__in=project_queryset.values_list('id', flat=True))
-        total_projects = projects.count()
-        tasks_count = Task.objects.filter(project__in=projects).count()
-
+    for budget in report.budget_rows:
         # Count projects by status
-        status_counts = {
-            'proposal': projects.filter(status='proposal').count(),
-            'ongoing': projects.filter(status='ongoing').count(),
-            'completed': projects.filter(status='completed').count(),
-            'terminated': projects.filter(status='terminated').count(),
-        }
+        status_counts = {status: budget['statuses'].get(status, 0) for status in ('proposal', 'ongoing', 'completed', 'terminated')}
 
         # Prepare report row
-        report_data.append({
-            'fiscal_year': budget.fiscal_year,
-            'total_budget': float(budget.total_amount),
-            'spent_budget': float(budget.total_amount - budget.remaining_amount),
-            'remaining_budget': float(budget.remaining_amount),
-            'total_projects': total_projects,
+        report_data_rows.append({
+            'fiscal_year': budget['fiscal_year'],
+            'total_budget': float(budget['total']),
+            'spent_budget': float(budget['spent']),
+            'remaining_budget': float(budget['remaining']),
+            'total_projects': budget['projects'],
             **status_counts,
-            'total_tasks': tasks_count,
+            'total_tasks': budget['tasks'],
         })
 
         # For Chart.js
-        fiscal_years.append(budget.fiscal_year)
-        total_amounts.append(float(budget.total_amount))
-        remaining_amounts.append(float(budget.remaining_amount))
-        spent_amounts.append(float(budget.total_amount - budget.remaining_amount))
-
-        # Grouped Project-Task data
-        for project in projects:
-            task_list = []
-            for task in project.tasks.all():
-                location_name = "N/A"
-                if task.latitude and task.longitude:
-                    try:
-                        location = geolocator.reverse((task.latitude, task.longitude), exactly_one=True)
-                        if location:
-                            location_name = location.address
-                    except Exception as e:
-                        location_name = "N/A"
-
-                task_list.append({
-                    'task_title': task.title,
-                    'location_name': location_name,
-                    'task_status': task.status,
-                    'assigned_to': task.assigned_to.get_full_name() if task.assigned_to else 'Unassigned',
-                })
-
-            project_task_grouped.append({
-                'project_title': project.project_title,
-                'approved_budget': float(project.funds or 0),
-                'tasks': task_list
+        fiscal_years.append(budget['fiscal_year'])
+        total_amounts.append(float(budget['total']))
+        remaining_amounts.append(float(budget['remaining']))
+        spent_amounts.append(float(budget['spent']))
+
+    # Grouped Project-Task data, budget by budget (location names come from the offline
+    # gazetteer; tasks saved before it existed are resolved here in one batch)
+    projects = report.filters.projects().filter(
+        budget_id__in=[budget['id'] for budget in report.budget_rows],
+    ).order_by('budget__fiscal_year', 'budget_id', 'id').prefetch_related(
+        Prefetch('tasks', queryset=Task.objects.select_related('assigned_to')),
+    )
+    geocoding.resolve_task_locations([task for project in projects for task in project.tasks.all()])
+    for project in projects:
+        task_list = []
+        for task in project.tasks.all():
+            task_list.append({
+                'task_title': task.title,
+                'location_name': task.location_name or "N/A",
+                'task_status': task.status,
+                'assigned_to': task.assigned_to.get_full_name() if task.assigned_to else 'Unassigned',
             })
 
+        project_task_grouped.append({
+            'project_title': project.project_title,
+            'approved_budget': float(project.funds or 0),
+            'tasks': task_list
+        })
+
     # Get filter options for the form
-    available_years = sorted(list(Project.objects.values_list('year', flat=True).distinct().exclude(year__isnull=True)))
-    available_municipalities = sorted(list(Project.objects.values_list('mun', flat=True).distinct().exclude(mun__isnull=True).exclude(mun='')))
-    available_statuses = sorted(list(Project.objects.values_list('status', flat=True).distinct().exclude(status__isnull=True).exclude(status='')))
+    available_years, available_municipalities, available_statuses = report.filter_options
 
     context = {
-        'report_data': report_data,
+        'report_data': report_data_rows,
         'fiscal_years': fiscal_years,
         'total_amounts': total_amounts,
         'remaining_amounts': remaining_amounts,
@@ -8627,11 +7592,8 @@ def administrator_communication_hub_view(request):
     # Get unread message count
     unread_messages = Message.objects.filter(recipient=user, is_read=False).count()
 
-    # Get user's group chats
-    user_group_chats = GroupChatMember.objects.filter(
-        user=user,
-        is_active=True
-    ).select_related('group_chat').order_by('-group_chat__updated_at')
+    # Get user's group chats, with unread counters
+    user_group_chats = group_chats.memberships(user)
 
     # Get recent announcements
     # First get all active announcements, then filter by target roles/users in Python
@@ -8660,9 +7622,9 @@ def administrator_communication_hub_view(request):
     recent_announcements = recent_announcements[:5]
 
     # Get recent messages
-    recent_messages = Message.objects.filter(
-        Q(sender=user) | Q(recipient=user)
-    ).select_related('sender', 'recipient').order_by('-created_at')[:10]
+    recent_messages = Message.objects.visible_to(user).select_related(
+        'sender', 'recipient',
+    ).order_by('-created_at')[:10]
 
     context = {
         'unread_messages': unread_messages,
@@ -8677,69 +7639,12 @@ def administrator_communication_hub_view(request):
 def administrator_messages_view(request):
     """Messages inbox view - shows conversations with people"""
     user = request.user
-    
-    # Import delete tracking models
-    from .models import DeletedConversation, DeletedMessage
-
-    # Get all unique conversation partners
-    sent_messages = Message.objects.filter(sender=user).values_list('recipient', flat=True).distinct()
-    received_messages = Message.objects.filter(recipient=user).values_list('sender', flat=True).distinct()
-
-    # Combine and get unique user IDs
-    conversation_user_ids = set(sent_messages) | set(received_messages)
-    conversation_user_ids.discard(user.id)  # Remove self
-    
-    # Get deleted conversations for this user
-    deleted_convos = DeletedConversation.objects.filter(user=user).values_list('partner_id', 'delete_before')
-    deleted_convos_dict = {partner_id: delete_before for partner_id, delete_before in deleted_convos}
-
-    conversations = []
-    for partner_id in conversation_user_ids:
-        try:
-            partner = User.objects.get(id=partner_id)
-            
-            # Build the base query for messages in this conversation
-            messages_query = Message.objects.filter(
-                (Q(sender=user) & Q(recipient=partner)) |
-                (Q(sender=partner) & Q(recipient=user))
-            )
-            
-            # Filter out messages from before the delete timestamp (if conversation was deleted)
-            if partner_id in deleted_convos_dict:
-                messages_query = messages_query.filter(created_at__gt=deleted_convos_dict[partner_id])
-            
-            # Filter out individually deleted messages
-            deleted_msg_ids = DeletedMessage.objects.filter(
-                user=user,
-                message__in=messages_query
-            ).values_list('message_id', flat=True)
-            messages_query = messages_query.exclude(id__in=deleted_msg_ids)
-
-            # Get the latest message in this conversation
-            latest_message = messages_query.select_related('sender', 'recipient').order_by('-created_at').first()
-
-            if latest_message:
-                # Count unread messages from this partner (excluding deleted ones)
-                unread_count = messages_query.filter(
-                    sender=partner,
-                    recipient=user,
-                    is_read=False
-                ).count()
-
-                conversations.append({
-                    'partner': partner,
-                    'latest_message': latest_message,
-                    'unread_count': unread_count,
-                    'last_activity': latest_message.created_at,
-                })
-        except User.DoesNotExist:
-            continue
 
-    # Sort conversations by last activity (most recent first)
-    conversations.sort(key=lambda x: x['last_activity'], reverse=True)
+    page = conversations.inbox_page(user, request.GET.get('page'))
 
     context = {
-        'conversations': conversations,
+        'conversations': page,
+        'page_obj': page,
     }
 
     return render(request, 'administrator/messages.html', context)
@@ -8755,34 +7660,15 @@ def administrator_conversation_view(request, partner_id):
     except User.DoesNotExist:
         raise Http404("User not found")
 
-    # Get IDs of messages deleted by this user
-    from .models import DeletedMessage
-    deleted_message_ids = DeletedMessage.objects.filter(
-        user=user
-    ).values_list('message_id', flat=True)
+    # Latest page of the conversation; older pages and new messages come from message_history_api
+    history = chat_history.page(chat_history.direct_messages(user, partner))
 
-    # Check if there's any conversation history between these users
-    conversation_exists = Message.objects.filter(
-        (Q(sender=user) & Q(recipient=partner)) |
-        (Q(sender=partner) & Q(recipient=user))
-    ).exclude(id__in=deleted_message_ids).exists()
-
-    if not conversation_exists:
+    if not history['messages']:
         # No conversation exists, redirect to compose new message
         return redirect('administrator_compose_message_url')
 
-    # Get all messages in this conversation (both directions), excluding deleted ones
-    conversation_messages = Message.objects.filter(
-        (Q(sender=user) & Q(recipient=partner)) |
-        (Q(sender=partner) & Q(recipient=user))
-    ).exclude(id__in=deleted_message_ids).select_related('sender', 'recipient').order_by('created_at')
-
     # Mark all messages from partner as read
-    Message.objects.filter(
-        sender=partner,
-        recipient=user,
-        is_read=False
-    ).update(is_read=True)
+    conversations.mark_read(user, partner)
 
     if request.method == 'POST':
         reply_content = request.POST.get('reply_content')
@@ -8816,7 +7702,8 @@ def administrator_conversation_view(request, partner_id):
 
     context = {
         'partner': partner,
-        'conversation_messages': conversation_messages,
+        'conversation_messages': history['messages'],
+        'history': history,
     }
 
     return render(request, 'administrator/conversation.html', context)
@@ -8888,12 +7775,12 @@ def administrator_message_detail_view(request, message_id):
         root_message = message.parent_message
         while root_message.parent_message:
             root_message = root_message.parent_message
-        thread_messages = Message.objects.filter(
+        thread_messages = Message.objects.visible_to(request.user).filter(
             Q(id=root_message.id) | Q(parent_message=root_message) | Q(parent_message__parent_message=root_message)
         ).select_related('sender', 'recipient').order_by('created_at')
     else:
         # This is the root message
-        thread_messages = Message.objects.filter(
+        thread_messages = Message.objects.visible_to(request.user).filter(
             Q(id=message.id) | Q(parent_message=message) | Q(parent_message__parent_message=message)
         ).select_related('sender', 'recipient').order_by('created_at')
 
@@ -8938,11 +7825,8 @@ def administrator_group_chats_view(request):
     """Group chats list view"""
     user = request.user
 
-    # Get user's group chats
-    user_chats = GroupChatMember.objects.filter(
-        user=user,
-        is_active=True
-    ).select_related('group_chat').order_by('-group_chat__updated_at')
+    # Get user's group chats, with unread counters
+    user_chats = group_chats.memberships(user)
 
     # Get available projects for creating new group chats
     projects = Project.objects.filter(status__in=['ongoing', 'planning']).order_by('project_title')
@@ -8967,15 +7851,11 @@ def administrator_group_chat_detail_view(request, chat_id):
     except GroupChatMember.DoesNotExist:
         raise Http404("Group chat not found or access denied")
 
-    # Update last seen
-    chat_member.last_seen_at = timezone.now()
-    chat_member.save(update_fields=['last_seen_at'])
+    # Update last seen and clear the unread badge
+    group_chats.mark_seen(chat_member)
 
-    # Get recent messages
-    messages_qs = GroupChatMessage.objects.filter(
-        group_chat=chat
-    ).select_related('sender').order_by('-created_at')[:50]
-    chat_messages = list(reversed(messages_qs))
+    # Latest page of messages; older pages and new messages come from group_chat_history_api
+    history = chat_history.page(chat_history.group_messages(request.user, chat))
 
     # Get active members
     active_members = GroupChatMember.objects.filter(
@@ -9011,7 +7891,8 @@ def administrator_group_chat_detail_view(request, chat_id):
 
     context = {
         'chat': chat,
-        'chat_messages': chat_messages,
+        'chat_messages': history['messages'],
+        'history': history,
         'active_members': active_members,
         'is_admin': chat_member.role == 'admin',
     }
@@ -9369,12 +8250,7 @@ def staff_group_chats_view(request):
         messages.error(request, 'Access denied.')
         return redirect('staff_dashboard_url')
 
-    user_group_chats = GroupChatMember.objects.filter(
-        user=request.user,
-        is_active=True
-    ).select_related('group_chat').annotate(
-        member_count=Count('group_chat__members', filter=Q(group_chat__members__is_active=True))
-    ).order_by('-group_chat__updated_at')
+    user_group_chats = group_chats.memberships(request.user)
 
     context = {
         'user_group_chats': user_group_chats,
@@ -9401,10 +8277,11 @@ def staff_group_chat_detail_view(request, chat_id):
         messages.error(request, 'Access denied. You are not a member of this chat.')
         return redirect('staff_group_chats_url')
 
-    # Get chat messages
-    chat_messages = GroupChatMessage.objects.filter(
-        group_chat=chat
-    ).select_related('sender').order_by('created_at')
+    # Update last seen and clear the unread badge
+    group_chats.mark_seen(chat_member)
+
+    # Latest page of messages; older pages and new messages come from group_chat_history_api
+    history = chat_history.page(chat_history.group_messages(request.user, chat))
 
     # Get active members
     active_members = GroupChatMember.objects.filter(
@@ -9429,7 +8306,8 @@ def staff_group_chat_detail_view(request, chat_id):
 
     context = {
         'chat': chat,
-        'chat_messages': chat_messages,
+        'chat_messages': history['messages'],
+        'history': history,
         'active_members': active_members,
         'is_admin': is_admin,
     }
@@ -9509,12 +8387,7 @@ def proponent_group_chats_view(request):
         messages.error(request, 'Access denied.')
         return redirect('proponent_dashboard_url')
 
-    user_group_chats = GroupChatMember.objects.filter(
-        user=request.user,
-        is_active=True
-    ).select_related('group_chat').annotate(
-        member_count=Count('group_chat__members', filter=Q(group_chat__members__is_active=True))
-    ).order_by('-group_chat__updated_at')
+    user_group_chats = group_chats.memberships(request.user)
 
     context = {
         'user_group_chats': user_group_chats,
@@ -9540,10 +8413,11 @@ def proponent_group_chat_detail_view(request, chat_id):
         messages.error(request, 'Access denied. You are not a member of this chat.')
         return redirect('proponent_group_chats_url')
 
-    # Get chat messages
-    chat_messages = GroupChatMessage.objects.filter(
-        group_chat=chat
-    ).select_related('sender').order_by('created_at')
+    # Update last seen and clear the unread badge
+    group_chats.mark_seen(chat_member)
+
+    # Latest page of messages; older pages and new messages come from group_chat_history_api
+    history = chat_history.page(chat_history.group_messages(request.user, chat))
 
     # Get active members
     active_members = GroupChatMember.objects.filter(
@@ -9568,7 +8442,8 @@ def proponent_group_chat_detail_view(request, chat_id):
 
     context = {
         'chat': chat,
-        'chat_messages': chat_messages,
+        'chat_messages': history['messages'],
+        'history': history,
         'active_members': active_members,
         'is_admin': is_admin,
     }
@@ -9645,12 +8520,7 @@ def beneficiary_group_chats_view(request):
         messages.error(request, 'Access denied.')
         return redirect('beneficiary_dashboard_url')
 
-    user_group_chats = GroupChatMember.objects.filter(
-        user=request.user,
-        is_active=True
-    ).select_related('group_chat').annotate(
-        member_count=Count('group_chat__members', filter=Q(group_chat__members__is_active=True))
-    ).order_by('-group_chat__updated_at')
+    user_group_chats = group_chats.memberships(request.user)
 
     context = {
         'user_group_chats': user_group_chats,
@@ -9676,10 +8546,11 @@ def beneficiary_group_chat_detail_view(request, chat_id):
         messages.error(request, 'Access denied. You are not a member of this chat.')
         return redirect('beneficiary_group_chats_url')
 
-    # Get chat messages
-    chat_messages = GroupChatMessage.objects.filter(
-        group_chat=chat
-    ).select_related('sender').order_by('created_at')
+    # Update last seen and clear the unread badge
+    group_chats.mark_seen(chat_member)
+
+    # Latest page of messages; older pages and new messages come from group_chat_history_api
+    history = chat_history.page(chat_history.group_messages(request.user, chat))
 
     # Get active members
     active_members = GroupChatMember.objects.filter(
@@ -9704,7 +8575,8 @@ def beneficiary_group_chat_detail_view(request, chat_id):
 
     context = {
         'chat': chat,
-        'chat_messages': chat_messages,
+        'chat_messages': history['messages'],
+        'history': history,
         'active_members': active_members,
         'is_admin': is_admin,
     }
@@ -10290,47 +9162,11 @@ def staff_messages_view(request):
         messages.error(request, 'Access denied.')
         return redirect('staff_dashboard_url')
 
-    # Get all unique conversation partners
-    sent_messages = Message.objects.filter(sender=user).values_list('recipient', flat=True).distinct()
-    received_messages = Message.objects.filter(recipient=user).values_list('sender', flat=True).distinct()
-
-    # Combine and get unique user IDs
-    conversation_user_ids = set(sent_messages) | set(received_messages)
-    conversation_user_ids.discard(user.id)  # Remove self
-
-    conversations = []
-    for partner_id in conversation_user_ids:
-        try:
-            partner = User.objects.get(id=partner_id)
-
-            # Get the latest message in this conversation
-            latest_message = Message.objects.filter(
-                (Q(sender=user) & Q(recipient=partner)) |
-                (Q(sender=partner) & Q(recipient=user))
-            ).select_related('sender', 'recipient').order_by('-created_at').first()
-
-            if latest_message:
-                # Count unread messages from this partner
-                unread_count = Message.objects.filter(
-                    sender=partner,
-                    recipient=user,
-                    is_read=False
-                ).count()
-
-                conversations.append({
-                    'partner': partner,
-                    'latest_message': latest_message,
-                    'unread_count': unread_count,
-                    'last_activity': latest_message.created_at,
-                })
-        except User.DoesNotExist:
-            continue
-
-    # Sort conversations by last activity (most recent first)
-    conversations.sort(key=lambda x: x['last_activity'], reverse=True)
+    page = conversations.inbox_page(user, request.GET.get('page'))
 
     context = {
-        'conversations': conversations,
+        'conversations': page,
+        'page_obj': page,
     }
 
     return render(request, 'staff/messages.html', context)
@@ -10348,21 +9184,11 @@ def staff_conversation_view(request, partner_id):
         messages.error(request, 'User not found.')
         return redirect('staff_messages_url')
 
-    # Get IDs of messages deleted by this user
-    deleted_msg_ids = DeletedMessage.objects.filter(user=user).values('message_id')
-
-    # Get all messages between user and partner (excluding deleted ones)
-    conversation_messages = Message.objects.filter(
-        (Q(sender=user) & Q(recipient=partner)) |
-        (Q(sender=partner) & Q(recipient=user))
-    ).exclude(id__in=Subquery(deleted_msg_ids)).select_related('sender', 'recipient').order_by('created_at')
+    # Latest page of the conversation; older pages and new messages come from message_history_api
+    history = chat_history.page(chat_history.direct_messages(user, partner))
 
     # Mark messages from partner as read
-    Message.objects.filter(
-        sender=partner,
-        recipient=user,
-        is_read=False
-    ).update(is_read=True)
+    conversations.mark_read(user, partner)
 
     # Handle new message submission
     if request.method == 'POST':
@@ -10379,7 +9205,8 @@ def staff_conversation_view(request, partner_id):
 
     context = {
         'partner': partner,
-        'conversation_messages': conversation_messages,
+        'conversation_messages': history['messages'],
+        'history': history,
         'form': form,
     }
 
@@ -10461,12 +9288,12 @@ def staff_message_detail_view(request, message_id):
         root_message = message.parent_message
         while root_message.parent_message:
             root_message = root_message.parent_message
-        thread_messages = Message.objects.filter(
+        thread_messages = Message.objects.visible_to(request.user).filter(
             Q(id=root_message.id) | Q(parent_message=root_message) | Q(parent_message__parent_message=root_message)
         ).select_related('sender', 'recipient').order_by('created_at')
     else:
         # This is the root message
-        thread_messages = Message.objects.filter(
+        thread_messages = Message.objects.visible_to(request.user).filter(
             Q(id=message.id) | Q(parent_message=message) | Q(parent_message__parent_message=message)
         ).select_related('sender', 'recipient').order_by('created_at')
 
@@ -10539,47 +9366,11 @@ def proponent_messages_view(request):
         messages.error(request, 'Access denied.')
         return redirect('proponent_dashboard_url')
 
-    # Get all unique conversation partners
-    sent_messages = Message.objects.filter(sender=user).values_list('recipient', flat=True).distinct()
-    received_messages = Message.objects.filter(recipient=user).values_list('sender', flat=True).distinct()
-
-    # Combine and get unique user IDs
-    conversation_user_ids = set(sent_messages) | set(received_messages)
-    conversation_user_ids.discard(user.id)  # Remove self
-
-    conversations = []
-    for partner_id in conversation_user_ids:
-        try:
-            partner = User.objects.get(id=partner_id)
-
-            # Get the latest message in this conversation
-            latest_message = Message.objects.filter(
-                (Q(sender=user) & Q(recipient=partner)) |
-                (Q(sender=partner) & Q(recipient=user))
-            ).select_related('sender', 'recipient').order_by('-created_at').first()
-
-            if latest_message:
-                # Count unread messages from this partner
-                unread_count = Message.objects.filter(
-                    sender=partner,
-                    recipient=user,
-                    is_read=False
-                ).count()
-
-                conversations.append({
-                    'partner': partner,
-                    'latest_message': latest_message,
-                    'unread_count': unread_count,
-                    'last_activity': latest_message.created_at,
-                })
-        except User.DoesNotExist:
-            continue
-
-    # Sort conversations by last activity (most recent first)
-    conversations.sort(key=lambda x: x['last_activity'], reverse=True)
+    page = conversations.inbox_page(user, request.GET.get('page'))
 
     context = {
-        'conversations': conversations,
+        'conversations': page,
+        'page_obj': page,
     }
 
     return render(request, 'proponent/messages.html', context)
@@ -10597,21 +9388,11 @@ def proponent_conversation_view(request, partner_id):
         messages.error(request, 'User not found.')
         return redirect('proponent_messages_url')
 
-    # Get IDs of messages deleted by this user
-    deleted_msg_ids = DeletedMessage.objects.filter(user=user).values('message_id')
-
-    # Get all messages between user and partner (excluding deleted ones)
-    conversation_messages = Message.objects.filter(
-        (Q(sender=user) & Q(recipient=partner)) |
-        (Q(sender=partner) & Q(recipient=user))
-    ).exclude(id__in=Subquery(deleted_msg_ids)).select_related('sender', 'recipient').order_by('created_at')
+    # Latest page of the conversation; older pages and new messages come from message_history_api
+    history = chat_history.page(chat_history.direct_messages(user, partner))
 
     # Mark messages from partner as read
-    Message.objects.filter(
-        sender=partner,
-        recipient=user,
-        is_read=False
-    ).update(is_read=True)
+    conversations.mark_read(user, partner)
 
     # Handle new message submission
     if request.method == 'POST':
@@ -10628,7 +9409,8 @@ def proponent_conversation_view(request, partner_id):
 
     context = {
         'partner': partner,
-        'conversation_messages': conversation_messages,
+        'conversation_messages': history['messages'],
+        'history': history,
         'form': form,
     }
 
@@ -10721,12 +9503,12 @@ def proponent_message_detail_view(request, message_id):
         root_message = message.parent_message
         while root_message.parent_message:
             root_message = root_message.parent_message
-        thread_messages = Message.objects.filter(
+        thread_messages = Message.objects.visible_to(request.user).filter(
             Q(id=root_message.id) | Q(parent_message=root_message) | Q(parent_message__parent_message=root_message)
         ).select_related('sender', 'recipient').order_by('created_at')
     else:
         # This is the root message
-        thread_messages = Message.objects.filter(
+        thread_messages = Message.objects.visible_to(request.user).filter(
             Q(id=message.id) | Q(parent_message=message) | Q(parent_message__parent_message=message)
         ).select_related('sender', 'recipient').order_by('created_at')
 
@@ -10799,47 +9581,11 @@ def beneficiary_messages_view(request):
         messages.error(request, 'Access denied.')
         return redirect('index_url')
 
-    # Get all unique conversation partners
-    sent_messages = Message.objects.filter(sender=user).values_list('recipient', flat=True).distinct()
-    received_messages = Message.objects.filter(recipient=user).values_list('sender', flat=True).distinct()
-
-    # Combine and get unique user IDs
-    conversation_user_ids = set(sent_messages) | set(received_messages)
-    conversation_user_ids.discard(user.id)  # Remove self
-
-    conversations = []
-    for partner_id in conversation_user_ids:
-        try:
-            partner = User.objects.get(id=partner_id)
-
-            # Get the latest message in this conversation
-            latest_message = Message.objects.filter(
-                (Q(sender=user) & Q(recipient=partner)) |
-                (Q(sender=partner) & Q(recipient=user))
-            ).select_related('sender', 'recipient').order_by('-created_at').first()
-
-            if latest_message:
-                # Count unread messages from this partner
-                unread_count = Message.objects.filter(
-                    sender=partner,
-                    recipient=user,
-                    is_read=False
-                ).count()
-
-                conversations.append({
-                    'partner': partner,
-                    'latest_message': latest_message,
-                    'unread_count': unread_count,
-                    'last_activity': latest_message.created_at,
-                })
-        except User.DoesNotExist:
-            continue
-
-    # Sort conversations by last activity (most recent first)
-    conversations.sort(key=lambda x: x['last_activity'], reverse=True)
+    page = conversations.inbox_page(user, request.GET.get('page'))
 
     context = {
-        'conversations': conversations,
+        'conversations': page,
+        'page_obj': page,
     }
 
     return render(request, 'beneficiary/messages.html', context)
@@ -10857,21 +9603,11 @@ def beneficiary_conversation_view(request, partner_id):
         messages.error(request, 'User not found.')
         return redirect('beneficiary_messages_url')
 
-    # Get IDs of messages deleted by this user
-    deleted_msg_ids = DeletedMessage.objects.filter(user=user).values('message_id')
-
-    # Get all messages between user and partner (excluding deleted ones)
-    conversation_messages = Message.objects.filter(
-        (Q(sender=user) & Q(recipient=partner)) |
-        (Q(sender=partner) & Q(recipient=user))
-    ).exclude(id__in=Subquery(deleted_msg_ids)).select_related('sender', 'recipient').order_by('created_at')
+    # Latest page of the conversation; older pages and new messages come from message_history_api
+    history = chat_history.page(chat_history.direct_messages(user, partner))
 
     # Mark messages from partner as read
-    Message.objects.filter(
-        sender=partner,
-        recipient=user,
-        is_read=False
-    ).update(is_read=True)
+    conversations.mark_read(user, partner)
 
     # Handle new message submission
     if request.method == 'POST':
@@ -10888,7 +9624,8 @@ def beneficiary_conversation_view(request, partner_id):
 
     context = {
         'partner': partner,
-        'conversation_messages': conversation_messages,
+        'conversation_messages': history['messages'],
+        'history': history,
         'form': form,
     }
 
@@ -10981,12 +9718,12 @@ def beneficiary_message_detail_view(request, message_id):
         root_message = message.parent_message
         while root_message.parent_message:
             root_message = root_message.parent_message
-        thread_messages = Message.objects.filter(
+        thread_messages = Message.objects.visible_to(request.user).filter(
             Q(id=root_message.id) | Q(parent_message=root_message) | Q(parent_message__parent_message=root_message)
         ).select_related('sender', 'recipient').order_by('created_at')
     else:
         # This is the root message
-        thread_messages = Message.objects.filter(
+        thread_messages = Message.objects.visible_to(request.user).filter(
             Q(id=message.id) | Q(parent_message=message) | Q(parent_message__parent_message=message)
         ).select_related('sender', 'recipient').order_by('created_at')
 
@@ -229,3 +229,78 @@ SESSION_COOKIE_HTTPONLY = True
 # SECURE_BROWSER_XSS_FILTER = True
 # SECURE_CONTENT_TYPE_NOSNIFF = True
 # X_FRAME_OPTIONS = 'DENY'
+
+# =============================================================================
+# CACHED REPORT DATA
+# =============================================================================
+
+# Cached data is shared by every web worker and by run_report_worker, so it lives
+# in the database rather than in each process's memory; invalidations made by one
+# process (a save, sweep_overdue, prune_notifications) are seen by all of them.
+# The table is created by migrate (or python manage.py createcachetable).
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'myapp_cache',
+    }
+}
+
+# Seconds a budget's allocation ledger (administrator budgets page) stays cached.
+# Ledgers are also dropped whenever their allocations, projects or proposals change.
+# Set to 0 to always rebuild.
+BUDGET_LEDGER_CACHE_TIMEOUT = 300
+
+# Seconds before a process reloads its in-memory map spatial index from the database.
+# Saves in the same process update the index immediately; the reload picks up
+# writes made by other worker processes and bulk updates. Set to 0 to never reload.
+SPATIAL_INDEX_MAX_AGE = 600
+
+# Seconds a clustered dashboard map response stays cached. Entries are keyed by
+# the response ETag, which changes whenever a project is added, edited or deleted.
+PROJECT_MAP_CACHE_TIMEOUT = 300
+
+# Seconds the filtered aggregates of the reports pages and the full report PDF stay
+# cached, shared between them for the same filters. Entries are dropped whenever a
+# project, proposal, budget, task or user is saved or deleted. Set to 0 to always query.
+REPORT_DATASET_CACHE_TIMEOUT = 60
+
+# Seconds a user's unread notification count and latest notifications (the bell)
+# stay cached. Entries are dropped whenever one of the user's notifications is
+# created, changed or deleted. Set to 0 to always query.
+NOTIFICATION_CACHE_TIMEOUT = 300
+
+# python manage.py prune_notifications archives read notifications older than
+# NOTIFICATION_RETENTION_DAYS, and each user's oldest past NOTIFICATION_MAX_PER_USER
+# (0 for no cap; read ones first, unread only past the cap on their own), to monthly
+# gzipped JSON-lines files in NOTIFICATION_ARCHIVE_DIR.
+NOTIFICATION_RETENTION_DAYS = 90
+NOTIFICATION_MAX_PER_USER = 500
+NOTIFICATION_ARCHIVE_DIR = os.path.join(BASE_DIR, 'archive', 'notifications')
+
+# =============================================================================
+# BACKGROUND REPORT JOBS
+# =============================================================================
+
+# PDF/Excel exports queued from the reports pages are rendered by
+#   python manage.py run_report_worker
+# A finished report is handed out again for identical parameters for
+# REPORT_JOB_TTL seconds; jobs and their files are pruned after REPORT_JOB_RETENTION.
+REPORT_JOB_TTL = 900
+REPORT_JOB_RETENTION = 7 * 24 * 3600
+
+# The worker beats at every poll. The pages only queue jobs while a beat is less
+# than REPORT_WORKER_HEARTBEAT_TIMEOUT seconds old, and export directly otherwise.
+REPORT_WORKER_HEARTBEAT_TIMEOUT = 30
+
+# Charts embedded in PDF reports are cached as PNG files keyed by a hash of
+# their data and styling; the least recently used are evicted past CHART_CACHE_MAX_BYTES
+# (0 disables the cache). CHART_CACHE_DIR defaults to a directory in the system temp dir.
+CHART_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+# Excel exports are written row by row to a temporary file and streamed back.
+# Workbooks up to EXCEL_SPOOL_MAX_SIZE bytes stay in memory; larger ones spill to disk.
+EXCEL_SPOOL_MAX_SIZE = 8 * 1024 * 1024
+
+# The full report PDF is built into a temporary file the same way; PDFs up to
+# PDF_SPOOL_MAX_SIZE bytes stay in memory.
+PDF_SPOOL_MAX_SIZE = 8 * 1024 * 1024